@@ -0,0 +1,4 @@
+"""Variante asynchrone (ASGI) de l'API : asgi_app.py, servie par uvicorn"""
+from .app import create_app
+
+__all__ = ['create_app']
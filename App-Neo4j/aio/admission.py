@@ -0,0 +1,40 @@
+from services.admission import track_request
+from aio.responses import jsonify
+
+
+def overloaded_response(retry_after):
+    """503 + Retry-After, même corps que la variante Flask (app.py)"""
+    return jsonify({"success": False, "error": "Base de données surchargée, réessayez plus tard"}, 503,
+                   headers={'Retry-After': str(retry_after)})
+
+
+async def overloaded(request, exc):
+    """Gestionnaire d'OverloadedError non interceptée par la route"""
+    return overloaded_response(exc.retry_after)
+
+
+class AdmissionMiddleware:
+    """Middleware ASGI : remplace la réponse par un 503 + Retry-After quand une requête
+    Neo4j de la route a été refusée par le contrôle d'admission (services/admission.py),
+    même si la route a intercepté l'exception et répondu 500.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        admission = track_request()
+        replaced = False
+
+        async def shedding_send(message):
+            nonlocal replaced
+            if replaced:
+                return
+            if message['type'] == 'http.response.start' and admission.retry_after is not None:
+                replaced = True
+                return await overloaded_response(admission.retry_after)(scope, receive, send)
+            await send(message)
+
+        await self.app(scope, receive, shedding_send)
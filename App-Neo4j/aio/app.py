@@ -0,0 +1,82 @@
+from contextlib import asynccontextmanager
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.routing import Route
+from config import DEBUG
+from aio.db import get_async_db
+from aio.responses import jsonify
+from aio.metrics import MetricsMiddleware, get_metrics
+from aio.compression import CompressionMiddleware
+from aio.admission import AdmissionMiddleware, overloaded
+from services.admission import OverloadedError
+from aio.routes import user_routes, post_routes, comment_routes, bulk_routes
+
+
+async def index(request):
+    """Page d'accueil de l'API"""
+    return jsonify({
+        "message": "Bienvenue sur l'API Neo4j (ASGI)",
+        "version": "1.0.0",
+        "endpoints": {
+            "users": "/users",
+            "posts": "/posts",
+            "comments": "/comments"
+        }
+    })
+
+async def test_db(request):
+    """Test de la connexion à Neo4j"""
+    try:
+        result = (await get_async_db().run("MATCH (n) RETURN count(n) AS count")).data()
+        return jsonify({
+            "status": "success",
+            "message": "Connexion à Neo4j établie avec succès",
+            "node_count": result[0]["count"] if result else 0
+        })
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": f"Erreur de connexion à Neo4j: {str(e)}"
+        }, 500)
+
+async def not_found(request, exc):
+    """Gestionnaire pour les routes non trouvées"""
+    return jsonify({"error": "Route non trouvée"}, 404)
+
+async def server_error(request, exc):
+    """Gestionnaire pour les erreurs serveur"""
+    return jsonify({"error": "Erreur interne du serveur"}, 500)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Le driver est créé au premier usage dans la boucle du serveur, fermé à l'arrêt
+    yield
+    await get_async_db().close()
+
+
+def create_app():
+    """Fabrique de l'application ASGI : mêmes routes et enveloppes JSON que app.py"""
+    routes = [
+        Route('/', index),
+        Route('/test-db', test_db),
+        Route('/metrics', get_metrics),
+        # Les écritures en masse avant /users/{user_id} et /posts/{post_id}
+        *bulk_routes,
+        *user_routes,
+        *post_routes,
+        *comment_routes,
+    ]
+    return Starlette(
+        debug=DEBUG,
+        routes=routes,
+        middleware=[Middleware(MetricsMiddleware, routes=routes),
+                    Middleware(CompressionMiddleware),
+                    Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'],
+                               allow_headers=['*']),
+                    # Au plus près des routes : le 503 reçoit encore les en-têtes CORS
+                    Middleware(AdmissionMiddleware)],
+        exception_handlers={404: not_found, 500: server_error, OverloadedError: overloaded},
+        lifespan=lifespan,
+    )
@@ -0,0 +1,67 @@
+from services.compression import choose_encoding, is_compressible, compressor
+from config import COMPRESSION_MIN_SIZE, COMPRESSION_STREAM_FLUSH_BYTES
+
+
+class CompressionMiddleware:
+    """Middleware ASGI : compression gzip/brotli des réponses (voir services/compression.py).
+
+    Une réponse en un seul message est compressée si elle dépasse
+    COMPRESSION_MIN_SIZE ; un flux (more_body) est compressé message par
+    message, avec un vidage du compresseur tous les
+    COMPRESSION_STREAM_FLUSH_BYTES octets.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        accept_encoding = next((value.decode('latin-1') for name, value in scope['headers']
+                                if name == b'accept-encoding'), '')
+        encoding = choose_encoding(accept_encoding)
+        state = {"start": None, "stream": None, "pending": 0}
+
+        async def compressing_send(message):
+            if message['type'] == 'http.response.start':
+                headers = {name.lower(): value for name, value in message.get('headers', [])}
+                content_type = headers.get(b'content-type', b'').decode('latin-1')
+                status = message['status']
+                if (status < 200 or status in (204, 304) or b'content-encoding' in headers
+                        or not is_compressible(content_type)):
+                    return await send(message)
+                message.setdefault('headers', []).append((b'vary', b'Accept-Encoding'))
+                if encoding is None:
+                    return await send(message)
+                # En-têtes retenus jusqu'au premier morceau : corps complet ou flux ?
+                state["start"] = message
+                return
+
+            if message['type'] != 'http.response.body' or state["start"] is None and state["stream"] is None:
+                return await send(message)
+
+            body, more_body = message.get('body', b''), message.get('more_body', False)
+            if state["start"] is not None:
+                start, state["start"] = state["start"], None
+                if not more_body and len(body) < COMPRESSION_MIN_SIZE:
+                    await send(start)
+                    return await send(message)
+                headers = [(name, value) for name, value in start['headers']
+                           if name.lower() != b'content-length']
+                headers.append((b'content-encoding', encoding.encode('latin-1')))
+                await send(dict(start, headers=headers))
+                state["stream"] = compressor(encoding)
+
+            stream = state["stream"]
+            out = stream.compress(body) if body else b''
+            state["pending"] += len(body)
+            if not more_body:
+                out += stream.finish()
+                state["stream"] = None
+            elif state["pending"] >= COMPRESSION_STREAM_FLUSH_BYTES:
+                out += stream.flush()
+                state["pending"] = 0
+            if out or not more_body:
+                await send({'type': 'http.response.body', 'body': out, 'more_body': more_body})
+
+        await self.app(scope, receive, compressing_send)
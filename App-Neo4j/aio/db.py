@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import time
+from neo4j import AsyncGraphDatabase, READ_ACCESS, WRITE_ACCESS
+from config import (NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, NEO4J_DATABASE,
+                    NEO4J_MAX_POOL_SIZE, NEO4J_MAX_CONNECTION_LIFETIME,
+                    NEO4J_CONNECTION_ACQUISITION_TIMEOUT, NEO4J_FETCH_SIZE)
+from services.db_service import Result, is_write_query, get_db
+from services.metrics import observe_query
+from services.slow_queries import slow_query_log
+from services.admission import admission_for, query_priority, SCAN
+
+logger = logging.getLogger(__name__)
+
+
+def _query_plan(query, params):
+    # Capture dans un thread d'arrière-plan : passe par le driver synchrone
+    return get_db().query_plan(query, params)
+
+
+class AsyncDatabaseService:
+    """Accès asynchrone à Neo4j, même interface que DatabaseService avec des coroutines.
+
+    Le driver asynchrone est lié à une boucle d'événements : il est créé au
+    premier usage dans la boucle courante, et celui d'une boucle précédente
+    est fermé.
+    """
+
+    def __init__(self):
+        self._driver = None
+        self._loop = None
+
+    @property
+    def driver(self):
+        loop = asyncio.get_running_loop()
+        if self._driver is None or self._loop is not loop:
+            if self._driver is not None:
+                self._drop_driver(self._driver, self._loop)
+            self._driver = AsyncGraphDatabase.driver(
+                NEO4J_URI,
+                auth=(NEO4J_USER, NEO4J_PASSWORD),
+                max_connection_pool_size=NEO4J_MAX_POOL_SIZE,
+                max_connection_lifetime=NEO4J_MAX_CONNECTION_LIFETIME,
+                connection_acquisition_timeout=NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+            )
+            self._loop = loop
+        return self._driver
+
+    @staticmethod
+    def _drop_driver(driver, loop):
+        """Ferme le driver d'une autre boucle : dans cette boucle si elle tourne encore"""
+        if loop.is_running():
+            asyncio.run_coroutine_threadsafe(driver.close(), loop)
+        else:
+            # Boucle arrêtée ou fermée : le driver ne peut plus y être fermé proprement
+            logger.warning("Driver Neo4j asynchrone abandonné : sa boucle d'événements est arrêtée")
+
+    def _session(self, access_mode):
+        return self.driver.session(database=NEO4J_DATABASE, fetch_size=NEO4J_FETCH_SIZE,
+                                   default_access_mode=access_mode)
+
+    async def _execute(self, access_mode, work, *args, **kwargs):
+        async with self._session(access_mode) as session:
+            if access_mode == READ_ACCESS:
+                return await session.execute_read(work, *args, **kwargs)
+            return await session.execute_write(work, *args, **kwargs)
+
+    async def read_transaction(self, work, *args, **kwargs):
+        """Exécute une fonction de transaction asynchrone en lecture"""
+        async with admission_for(False).slot_async(SCAN):
+            return await self._execute(READ_ACCESS, work, *args, **kwargs)
+
+    async def write_transaction(self, work, *args, **kwargs):
+        """Exécute une fonction de transaction asynchrone en écriture"""
+        async with admission_for(True).slot_async(SCAN):
+            return await self._execute(WRITE_ACCESS, work, *args, **kwargs)
+
+    async def run(self, query, parameters=None, **kwargs):
+        """Exécute une requête dans une transaction gérée ; le résultat s'utilise comme en synchrone.
+
+        Même contrôle d'admission que DatabaseService.run (OverloadedError si refusée).
+        """
+        params = dict(parameters or {}, **kwargs)
+        write = is_write_query(query)
+        async with admission_for(write).slot_async(query_priority(query)):
+            return await self._run(WRITE_ACCESS if write else READ_ACCESS, query, params)
+
+    async def _run(self, access_mode, query, params):
+        async def work(tx):
+            result = await tx.run(query, params)
+            return [record async for record in result]
+
+        started = time.perf_counter()
+        try:
+            records = await self._execute(access_mode, work)
+        except Exception as e:
+            elapsed = time.perf_counter() - started
+            observe_query(query, elapsed, error=True)
+            if elapsed >= slow_query_log.threshold:
+                slow_query_log.record(query, params, elapsed, error=str(e), profiler=_query_plan)
+            raise
+        elapsed = time.perf_counter() - started
+        observe_query(query, elapsed, rows=len(records))
+        if elapsed >= slow_query_log.threshold:
+            slow_query_log.record(query, params, elapsed, rows=len(records), profiler=_query_plan)
+        return Result(records)
+
+    async def stream(self, query, parameters=None, **kwargs):
+        """Générateur asynchrone qui lit les enregistrements au fil de l'eau (une place de lecture SCAN)"""
+        params = dict(parameters or {}, **kwargs)
+        async with admission_for(False).slot_async(SCAN):
+            started = time.perf_counter()
+            rows, failed = 0, False
+            try:
+                async with self._session(READ_ACCESS) as session:
+                    async with await session.begin_transaction() as tx:
+                        result = await tx.run(query, params)
+                        async for record in result:
+                            rows += 1
+                            yield record
+            except Exception:
+                failed = True
+                raise
+            finally:
+                observe_query(query, time.perf_counter() - started, rows=rows, error=failed)
+
+    async def close(self):
+        """Ferme le driver et toutes les connexions du pool"""
+        if self._driver is not None:
+            await self._driver.close()
+        self._driver = None
+        self._loop = None
+
+
+# Instance unique (aucune connexion n'est ouverte ici)
+async_db_service = AsyncDatabaseService()
+
+def get_async_db():
+    """Fonction utilitaire pour obtenir l'accès asynchrone à la base de données"""
+    return async_db_service
@@ -0,0 +1,33 @@
+import time
+from starlette.responses import Response
+from services.metrics import render, observe_request
+
+
+async def get_metrics(request):
+    """Métriques au format texte Prometheus"""
+    return Response(render(), media_type='text/plain; version=0.0.4')
+
+
+class MetricsMiddleware:
+    """Middleware ASGI : mesure chaque requête jusqu'au début de la réponse.
+
+    La route est le gabarit de la Route trouvée par le routeur (scope["endpoint"]) :
+    le nombre de séries reste borné.
+    """
+
+    def __init__(self, app, routes):
+        self.app = app
+        self.paths = {route.endpoint: route.path for route in routes}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+
+        async def timed_send(message):
+            if message['type'] == 'http.response.start':
+                route = self.paths.get(scope.get('endpoint'), 'unmatched')
+                observe_request(scope['method'], route, message['status'], time.perf_counter() - started)
+            await send(message)
+
+        await self.app(scope, receive, timed_send)
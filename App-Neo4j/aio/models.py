@@ -0,0 +1,470 @@
+"""Couche d'accès asynchrone : même API que models/, mêmes requêtes Cypher.
+
+Les objets retournés sont ceux des modèles synchrones (User, Post, Comment),
+seules les méthodes qui touchent la base deviennent des coroutines.
+"""
+from config import BULK_BATCH_SIZE, FEED_FANOUT_LIMIT, FEED_TIMELINE_LENGTH, COMMENT_THREAD_LIMIT
+from models import queries
+from models.user import User
+from models.post import Post
+from models.comment import Comment
+from services.batching import chunked, item_error
+from services import feed
+from services.cache import user_cache, user_email_cache, post_cache, timeline_cache, author_posts_cache
+from services.db_service import get_db
+from services.friend_graph import friend_graph
+from services.pagination import page_query, page_params, build_page
+from services.projection import page_queries, find_query, all_query, user_posts_query, many_query
+from services.conditional import version_from, node_version
+from services.search import with_highlights
+from aio.db import get_async_db
+
+
+async def run_batches(statement, rows, batch_size, on_result, reports):
+    """Équivalent asynchrone de services.batching.run_batches"""
+    db = get_async_db()
+    for chunk in chunked(rows, batch_size):
+        try:
+            for result in (await db.run(statement, rows=chunk)).data():
+                reports[result['idx']] = on_result(result)
+        except Exception as e:
+            for row in chunk:
+                reports[row['idx']] = item_error(row['idx'], str(e))
+    return reports
+
+
+class AsyncUser:
+    @classmethod
+    async def find_by_id(cls, user_id):
+        """Trouve un utilisateur par son ID (lecture traversante via le cache)"""
+        async def load():
+            result = (await get_async_db().run(queries.USER_FIND_BY_ID, id=user_id)).data()
+            return dict(result[0]['u']) if result else None
+
+        user_data = await user_cache.get_or_load_async(user_id, load)
+        return User.from_node(user_data) if user_data else None
+
+    @classmethod
+    async def version(cls, user_id, variant=''):
+        """Version de la fiche (voir User.version)"""
+        found, user_data = user_cache.peek(user_id)
+        if found:
+            return node_version('user', user_data, variant) if user_data else None
+        result = (await get_async_db().run(queries.USER_VERSION, id=user_id)).data()
+        return version_from('user', user_id, result[0], variant) if result else None
+
+    @classmethod
+    async def friends_version(cls, user_id):
+        """Version de la liste d'amis (voir User.friends_version)"""
+        result = (await get_async_db().run(queries.USER_FRIENDS_VERSION, id=user_id)).data()
+        return version_from('friends', user_id, result[0]) if result else None
+
+    @classmethod
+    async def find_by_email(cls, email):
+        """Trouve un utilisateur par son email (lecture traversante via le cache)"""
+        async def load():
+            result = (await get_async_db().run(queries.USER_FIND_BY_EMAIL, email=email)).data()
+            return dict(result[0]['u']) if result else None
+
+        user_data = await user_email_cache.get_or_load_async(email, load)
+        return User.from_node(user_data) if user_data else None
+
+    @classmethod
+    async def save(cls, user):
+        """Enregistre un utilisateur"""
+        await get_async_db().run(queries.USER_CREATE, id=user.id, name=user.name,
+                                 email=user.email, created_at=user.created_at)
+        user_cache.invalidate(user.id)
+        user_email_cache.invalidate(user.email)
+        return user
+
+    @classmethod
+    async def update(cls, user, name=None, email=None):
+        """Met à jour les informations d'un utilisateur"""
+        old_email = user.email
+        if name:
+            user.name = name
+        if email:
+            user.email = email
+        await get_async_db().run(queries.USER_UPDATE, id=user.id, name=user.name, email=user.email)
+        user_cache.invalidate(user.id)
+        user_email_cache.invalidate(old_email, user.email)
+        return user
+
+    @classmethod
+    async def delete_by_id(cls, user_id):
+        """Supprime un utilisateur ; retourne False s'il n'existe pas"""
+        result = (await get_async_db().run(queries.USER_DELETE_BY_ID, id=user_id)).data()
+        return User.after_delete(user_id, result)
+
+    @classmethod
+    async def befriend(cls, user_id, friend_id):
+        """Crée une amitié en une seule requête (voir User.befriend)"""
+        result = (await get_async_db().run(queries.USER_BEFRIEND, user_id=user_id,
+                                           friend_id=friend_id)).data()[0]
+        return User.after_befriend(user_id, friend_id, User.befriend_status(result))
+
+    @classmethod
+    async def unfriend(cls, user_id, friend_id):
+        """Supprime une amitié en une seule requête (voir User.unfriend)"""
+        result = (await get_async_db().run(queries.USER_UNFRIEND, user_id=user_id,
+                                           friend_id=friend_id)).data()[0]
+        return User.after_unfriend(user_id, friend_id, User.unfriend_status(result))
+
+    @classmethod
+    async def is_friend_with(cls, user_id, friend_id):
+        """Vérifie si deux utilisateurs sont amis"""
+        if friend_graph.ensure_loaded(get_db()):
+            return friend_graph.are_friends(user_id, friend_id)
+        result = (await get_async_db().run(queries.USER_IS_FRIEND_WITH, user_id=user_id,
+                                           friend_id=friend_id)).data()
+        return bool(result)
+
+    @classmethod
+    async def get_friends(cls, user_id):
+        """Récupère la liste des amis d'un utilisateur"""
+        if friend_graph.ensure_loaded(get_db()):
+            return [user.to_dict() for user in await cls.find_many(friend_graph.friends(user_id))]
+        return [record['user'] for record in await get_async_db().run(queries.USER_FRIENDS, id=user_id)]
+
+    @classmethod
+    async def get_mutual_friends(cls, user_id, other_id):
+        """Récupère les amis en commun de deux utilisateurs"""
+        if friend_graph.ensure_loaded(get_db()):
+            mutual_ids = friend_graph.mutual_friends(user_id, other_id)
+            return [user.to_dict() for user in await cls.find_many(mutual_ids)]
+        results = await get_async_db().run(queries.USER_MUTUAL_FRIENDS, user_id=user_id, other_id=other_id)
+        return [record['user'] for record in results]
+
+    @classmethod
+    async def get_recommendations(cls, user_id, limit=10):
+        """Suggestions d'amis (voir User.get_recommendations)"""
+        if friend_graph.ensure_loaded(get_db()):
+            ranked = friend_graph.recommendations(user_id, limit)
+        else:
+            results = (await get_async_db().run(queries.USER_RECOMMENDATIONS, id=user_id,
+                                                limit=limit)).data()
+            ranked = [(result['id'], result['common_friends']) for result in results]
+        users = await cls.find_many([ranked_id for ranked_id, _ in ranked])
+        return User.recommendations_from(ranked, users)
+
+    @classmethod
+    async def find_many(cls, user_ids):
+        """Trouve plusieurs utilisateurs par ID via le cache (voir User.find_many)"""
+        if not user_ids:
+            return []
+        async def load(missing_ids):
+            results = (await get_async_db().run(queries.USER_FIND_MANY, ids=list(missing_ids))).data()
+            return {result['u']['id']: dict(result['u']) for result in results}
+
+        by_id = await user_cache.get_many_or_load_async(user_ids, load)
+        return [User.from_node(by_id[user_id]) for user_id in user_ids if user_id in by_id]
+
+    @classmethod
+    async def get_many(cls, user_ids, projection=None):
+        """Utilisateurs par id, en dictionnaire {id: utilisateur} (voir User.get_many)"""
+        if projection:
+            results = await get_async_db().run(many_query(projection), ids=list(user_ids))
+            return {record['user']['id']: record['user'] for record in results}
+        return {user.id: user.to_dict() for user in await cls.find_many(user_ids)}
+
+    @classmethod
+    async def find_projected(cls, user_id, projection):
+        """Utilisateur réduit aux champs et inclusions demandés (voir User.find_projected)"""
+        result = (await get_async_db().run(find_query(projection), id=user_id)).data()
+        return result[0]['user'] if result else None
+
+    @classmethod
+    async def get_page(cls, limit, after=None, projection=None):
+        """Récupère une page d'utilisateurs et le curseur suivant"""
+        variants = page_queries(projection) if projection else queries.USER_PAGE
+        results = await get_async_db().run(page_query(variants, after), **page_params(limit, after))
+        return build_page([record['user'] for record in results], limit)
+
+    @classmethod
+    async def iter_all(cls, projection=None):
+        """Itère paresseusement sur tous les utilisateurs"""
+        query = all_query(projection) if projection else queries.USER_ALL
+        async for record in get_async_db().stream(query):
+            yield record['user']
+
+    @classmethod
+    async def bulk_create(cls, items, batch_size=BULK_BATCH_SIZE):
+        """Crée des utilisateurs par lots (voir User.bulk_create)"""
+        reports, rows = User.bulk_create_rows(items)
+        reports = await run_batches(queries.USER_BULK_CREATE, rows, batch_size,
+                                    User.bulk_create_report, reports)
+        return User.after_bulk_create(rows, reports)
+
+    @classmethod
+    async def bulk_befriend(cls, items, batch_size=BULK_BATCH_SIZE):
+        """Crée des amitiés par lots (voir User.bulk_befriend)"""
+        reports, rows = User.bulk_befriend_rows(items)
+        reports = await run_batches(queries.USER_BULK_BEFRIEND, rows, batch_size,
+                                    User.bulk_befriend_report, reports)
+        return User.after_bulk_befriend(rows, reports)
+
+
+class AsyncPost:
+    @classmethod
+    async def find_by_id(cls, post_id):
+        """Trouve un post par son ID (lecture traversante via le cache)"""
+        async def load():
+            result = (await get_async_db().run(queries.POST_FIND_BY_ID, id=post_id)).data()
+            return dict(result[0]['p'], author_id=result[0]['author_id']) if result else None
+
+        post_data = await post_cache.get_or_load_async(post_id, load)
+        return Post.from_node(post_data, post_data['author_id']) if post_data else None
+
+    @classmethod
+    async def version(cls, post_id, variant=''):
+        """Version du post (voir Post.version)"""
+        found, post_data = post_cache.peek(post_id)
+        if found:
+            return node_version('post', post_data, variant) if post_data else None
+        result = (await get_async_db().run(queries.POST_VERSION, id=post_id)).data()
+        return version_from('post', post_id, result[0], variant) if result else None
+
+    @classmethod
+    async def comments_version(cls, post_id, variant=''):
+        """Version de la liste des commentaires (voir Post.comments_version)"""
+        result = (await get_async_db().run(queries.POST_COMMENTS_VERSION, id=post_id)).data()
+        return version_from('comments', post_id, result[0], variant) if result else None
+
+    @classmethod
+    async def save(cls, post):
+        """Enregistre un post et sa relation avec l'auteur"""
+        result = (await get_async_db().run(queries.POST_CREATE, id=post.id, title=post.title,
+                                           content=post.content, created_at=post.created_at,
+                                           author_id=post.author_id,
+                                           fanout_limit=FEED_FANOUT_LIMIT)).data()
+        return post.after_create(result)
+
+    @classmethod
+    async def update(cls, post, title=None, content=None):
+        """Met à jour les informations d'un post"""
+        if title:
+            post.title = title
+        if content:
+            post.content = content
+        await get_async_db().run(queries.POST_UPDATE, id=post.id, title=post.title, content=post.content)
+        post_cache.invalidate(post.id)
+        return post
+
+    @classmethod
+    async def delete_by_id(cls, post_id):
+        """Supprime un post ; retourne False s'il n'existe pas"""
+        result = (await get_async_db().run(queries.POST_DELETE_BY_ID, id=post_id)).data()
+        post_cache.invalidate(post_id)
+        return bool(result and result[0]['deleted'])
+
+    @classmethod
+    async def like(cls, post_id, user_id):
+        """Ajoute un like en une seule requête (voir Post.like)"""
+        result = (await get_async_db().run(queries.POST_LIKE, post_id=post_id,
+                                           user_id=user_id)).data()[0]
+        return Post.after_count_change(post_id, Post.like_status(result))
+
+    @classmethod
+    async def unlike(cls, post_id, user_id):
+        """Retire un like en une seule requête (voir Post.unlike)"""
+        result = (await get_async_db().run(queries.POST_UNLIKE, post_id=post_id,
+                                           user_id=user_id)).data()[0]
+        return Post.after_count_change(post_id, Post.unlike_status(result))
+
+    @classmethod
+    async def find_many(cls, post_ids):
+        """Trouve plusieurs posts par ID via le cache (voir Post.find_many)"""
+        if not post_ids:
+            return []
+        async def load(missing_ids):
+            results = (await get_async_db().run(queries.POST_FIND_MANY, ids=list(missing_ids))).data()
+            return {result['p']['id']: dict(result['p'], author_id=result['author_id'])
+                    for result in results}
+
+        by_id = await post_cache.get_many_or_load_async(post_ids, load)
+        return [Post.from_node(by_id[post_id], by_id[post_id]['author_id'])
+                for post_id in post_ids if post_id in by_id]
+
+    @classmethod
+    async def get_many(cls, post_ids, projection=None):
+        """Posts par id, en dictionnaire {id: post} (voir Post.get_many)"""
+        if projection:
+            results = await get_async_db().run(many_query(projection), ids=list(post_ids))
+            return {record['post']['id']: record['post'] for record in results}
+        return {post.id: post.to_dict() for post in await cls.find_many(post_ids)}
+
+    @classmethod
+    async def viewer_state(cls, user_id, post_ids):
+        """État des posts pour un lecteur, en une requête (voir Post.viewer_state)"""
+        results = (await get_async_db().run(queries.POST_VIEWER_STATE, user_id=user_id,
+                                            post_ids=list(post_ids))).data()
+        return Post.viewer_state_from(user_id, results)
+
+    @classmethod
+    async def get_feed(cls, user_id, limit, after=None):
+        """Fil d'actualité d'un utilisateur (voir Post.get_feed)"""
+        db = get_async_db()
+
+        async def load_timeline():
+            rows = (await db.run(queries.FEED_TIMELINE, id=user_id, fanout_limit=FEED_FANOUT_LIMIT,
+                                 length=FEED_TIMELINE_LENGTH)).data()
+            return feed.timeline_from_rows(rows)
+
+        async def load_author_posts(author_id):
+            rows = (await db.run(queries.FEED_AUTHOR_RECENT, id=author_id,
+                                 length=FEED_TIMELINE_LENGTH)).data()
+            return feed.author_posts_from_rows(rows)
+
+        timeline = await timeline_cache.get_or_load_async(user_id, load_timeline)
+        sources = [timeline['items']]
+        for author_id in timeline['celebrities']:
+            sources.append(await author_posts_cache.get_or_load_async(
+                author_id, lambda: load_author_posts(author_id)))
+
+        entries, next_cursor = build_page(feed.merge_page(sources, limit, after), limit)
+        posts = await cls.find_many([entry['id'] for entry in entries])
+        return [post.to_dict() for post in posts], next_cursor
+
+    @classmethod
+    async def get_user_posts(cls, user_id, projection=None):
+        """Récupère tous les posts d'un utilisateur"""
+        query = user_posts_query(projection) if projection else queries.POST_BY_AUTHOR
+        return [record['post'] for record in await get_async_db().run(query, user_id=user_id)]
+
+    @classmethod
+    async def find_projected(cls, post_id, projection):
+        """Post réduit aux champs et inclusions demandés (voir Post.find_projected)"""
+        result = (await get_async_db().run(find_query(projection), id=post_id)).data()
+        return result[0]['post'] if result else None
+
+    @classmethod
+    async def get_page(cls, limit, after=None, projection=None):
+        """Récupère une page de posts et le curseur suivant"""
+        variants = page_queries(projection) if projection else queries.POST_PAGE
+        results = await get_async_db().run(page_query(variants, after), **page_params(limit, after))
+        return build_page([record['post'] for record in results], limit)
+
+    @classmethod
+    async def search(cls, search, limit, after=None):
+        """Posts trouvés par une recherche plein texte et le curseur suivant (voir Post.search)"""
+        results = await get_async_db().run(page_query(queries.POST_SEARCH, after), text=search.query,
+                                           **page_params(limit, after))
+        posts, next_cursor = build_page([dict(record['post'], score=record['score']) for record in results],
+                                        limit, 'score')
+        return [with_highlights(post, search) for post in posts], next_cursor
+
+    @classmethod
+    async def iter_all(cls, projection=None):
+        """Itère paresseusement sur tous les posts"""
+        query = all_query(projection) if projection else queries.POST_ALL
+        async for record in get_async_db().stream(query):
+            yield record['post']
+
+    @classmethod
+    async def bulk_create(cls, items, batch_size=BULK_BATCH_SIZE):
+        """Crée des posts par lots (voir Post.bulk_create)"""
+        reports, rows = Post.bulk_create_rows(items)
+        reports = await run_batches(queries.POST_BULK_CREATE, rows, batch_size,
+                                    Post.bulk_create_report, reports)
+        return Post.after_bulk_create(rows, reports)
+
+    @classmethod
+    async def bulk_like(cls, items, batch_size=BULK_BATCH_SIZE):
+        """Ajoute des likes par lots (voir Post.bulk_like)"""
+        reports, rows = Post.bulk_like_rows(items)
+        reports = await run_batches(queries.POST_BULK_LIKE, rows, batch_size,
+                                    Post.bulk_like_report, reports)
+        return Post.after_bulk_like(rows, reports)
+
+
+class AsyncComment:
+    @classmethod
+    async def find_by_id(cls, comment_id):
+        """Trouve un commentaire par son ID"""
+        result = (await get_async_db().run(queries.COMMENT_FIND_BY_ID, id=comment_id)).data()
+        return Comment.from_node(result[0]['c']) if result else None
+
+    @classmethod
+    async def version(cls, comment_id, variant=''):
+        """Version du commentaire (voir Comment.version)"""
+        result = (await get_async_db().run(queries.COMMENT_VERSION, id=comment_id)).data()
+        return version_from('comment', comment_id, result[0], variant) if result else None
+
+    @classmethod
+    async def save(cls, comment):
+        """Crée un commentaire et ses relations en une seule requête (voir Comment.save)"""
+        result = (await get_async_db().run(queries.COMMENT_CREATE, id=comment.id,
+                                           content=comment.content, author_id=comment.author_id,
+                                           post_id=comment.post_id, parent_id=comment.parent_id,
+                                           created_at=comment.created_at)).data()[0]
+        return Post.after_count_change(comment.post_id, Comment.save_status(result))
+
+    @classmethod
+    async def update(cls, comment, content):
+        """Met à jour le contenu d'un commentaire"""
+        comment.content = content
+        await get_async_db().run(queries.COMMENT_UPDATE, id=comment.id, content=content)
+        return comment
+
+    @classmethod
+    async def delete(cls, comment):
+        """Supprime un commentaire et ses réponses (voir Comment.delete)"""
+        result = (await get_async_db().run(queries.COMMENT_DELETE_BY_ID, id=comment.id)).data()
+        if result and result[0]['post_id'] is not None:
+            Post.after_count_change(result[0]['post_id'], 'ok')
+        return bool(result)
+
+    @classmethod
+    async def get_post_comments(cls, post_id, limit, after=None):
+        """Récupère une page des commentaires d'un post et le curseur suivant"""
+        results = await get_async_db().run(page_query(queries.POST_COMMENTS_PAGE, after), post_id=post_id,
+                                           **page_params(limit, after))
+        return build_page([record['comment'] for record in results], limit)
+
+    @classmethod
+    async def get_thread(cls, comment_id, limit=COMMENT_THREAD_LIMIT):
+        """Commentaire et toutes ses réponses (voir Comment.get_thread)"""
+        result = (await get_async_db().run(queries.COMMENT_THREAD, id=comment_id, limit=limit + 1)).data()
+        return Comment.thread_from(result, limit)
+
+    @classmethod
+    async def like(cls, comment_id, user_id):
+        """Ajoute un like en une seule requête (voir Comment.like)"""
+        result = (await get_async_db().run(queries.COMMENT_LIKE, comment_id=comment_id,
+                                           user_id=user_id)).data()[0]
+        return Comment.like_status(result)
+
+    @classmethod
+    async def unlike(cls, comment_id, user_id):
+        """Retire un like en une seule requête (voir Comment.unlike)"""
+        result = (await get_async_db().run(queries.COMMENT_UNLIKE, comment_id=comment_id,
+                                           user_id=user_id)).data()[0]
+        return Comment.unlike_status(result)
+
+    @classmethod
+    async def delete_from_post(cls, post_id, comment_id):
+        """Supprime un commentaire d'un post en une seule requête (voir Comment.delete_from_post)"""
+        result = (await get_async_db().run(queries.COMMENT_DELETE_FROM_POST, post_id=post_id,
+                                           comment_id=comment_id)).data()[0]
+        return Post.after_count_change(post_id, Comment.delete_from_post_status(result))
+
+    @classmethod
+    async def find_projected(cls, comment_id, projection):
+        """Commentaire réduit aux champs et inclusions demandés (voir Comment.find_projected)"""
+        result = (await get_async_db().run(find_query(projection), id=comment_id)).data()
+        return result[0]['comment'] if result else None
+
+    @classmethod
+    async def get_page(cls, limit, after=None, projection=None):
+        """Récupère une page de commentaires et le curseur suivant"""
+        variants = page_queries(projection) if projection else queries.COMMENT_PAGE
+        results = await get_async_db().run(page_query(variants, after), **page_params(limit, after))
+        return build_page([record['comment'] for record in results], limit)
+
+    @classmethod
+    async def iter_all(cls, projection=None):
+        """Itère paresseusement sur tous les commentaires"""
+        query = all_query(projection) if projection else queries.COMMENT_ALL
+        async for record in get_async_db().stream(query):
+            yield record['comment']
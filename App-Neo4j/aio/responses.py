@@ -0,0 +1,61 @@
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from services.streaming import NDJSON_MIMETYPE
+from services.json_codec import dumps_bytes, ndjson_line
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encodée par services/json_codec.py (orjson si installé)"""
+
+    def render(self, content):
+        return dumps_bytes(content)
+
+
+def jsonify(payload, status=200, headers=None):
+    """Réponse JSON, même enveloppe que les routes Flask"""
+    return FastJSONResponse(payload, status_code=status, headers=headers)
+
+
+def not_modified(headers):
+    """Réponse 304 sans corps, avec ETag et Last-Modified"""
+    return Response(status_code=304, headers=headers)
+
+
+async def read_json(request):
+    """Corps JSON de la requête, None s'il est absent ou illisible (comme request.json)"""
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+def wants_ndjson(request):
+    """Indique si le client demande un flux NDJSON (Accept ou ?stream=1)"""
+    if request.query_params.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return True
+    accept = request.headers.get('accept', '')
+    return NDJSON_MIMETYPE in accept and 'application/json' not in accept
+
+
+async def ndjson_response(rows):
+    """Réponse chunkée qui écrit une ligne JSON par élément d'un itérable asynchrone.
+
+    Le premier élément est lu avant de répondre, comme services.streaming.ndjson_response.
+    """
+    rows = rows.__aiter__()
+    try:
+        first = [await rows.__anext__()]
+    except StopAsyncIteration:
+        first = []
+
+    async def generate():
+        try:
+            for row in first:
+                yield ndjson_line(row)
+            async for row in rows:
+                yield ndjson_line(row)
+        finally:
+            await rows.aclose()
+
+    # Empêche un reverse proxy (nginx) de bufferiser tout le flux
+    return StreamingResponse(generate(), media_type=NDJSON_MIMETYPE,
+                             headers={'X-Accel-Buffering': 'no'})
@@ -0,0 +1,6 @@
+from .user_routes import user_routes
+from .post_routes import post_routes
+from .comment_routes import comment_routes
+from .bulk_routes import bulk_routes
+
+__all__ = ['user_routes', 'post_routes', 'comment_routes', 'bulk_routes']
@@ -0,0 +1,77 @@
+from starlette.routing import Route
+from config import BULK_BATCH_SIZE, BULK_MAX_ITEMS
+from aio.models import AsyncUser, AsyncPost
+from aio.responses import jsonify, read_json
+
+
+async def _bulk_response(request, bulk_method):
+    """Valide le corps (liste JSON), lance l'écriture par lots et construit le rapport"""
+    items = await read_json(request)
+    if not isinstance(items, list) or not items:
+        return jsonify({
+            "success": False,
+            "error": "Le corps doit être une liste JSON non vide"
+        }, 400)
+    if len(items) > BULK_MAX_ITEMS:
+        return jsonify({
+            "success": False,
+            "error": f"Au plus {BULK_MAX_ITEMS} éléments par requête"
+        }, 413)
+
+    try:
+        batch_size = max(1, int(request.query_params.get('batch_size', BULK_BATCH_SIZE)))
+    except ValueError:
+        return jsonify({
+            "success": False,
+            "error": "Le paramètre batch_size doit être un entier"
+        }, 400)
+
+    results = await bulk_method(items, batch_size=batch_size)
+    failed = sum(1 for result in results if not result['success'])
+
+    # 207 quand une partie des éléments a été rejetée
+    return jsonify({
+        "success": failed == 0,
+        "data": {
+            "succeeded": len(results) - failed,
+            "failed": failed,
+            "results": results
+        }
+    }, 201 if failed == 0 else 207)
+
+async def bulk_create_users(request):
+    """Crée des utilisateurs en masse"""
+    try:
+        return await _bulk_response(request, AsyncUser.bulk_create)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def bulk_create_posts(request):
+    """Crée des posts en masse"""
+    try:
+        return await _bulk_response(request, AsyncPost.bulk_create)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def bulk_create_friendships(request):
+    """Crée des relations d'amitié en masse"""
+    try:
+        return await _bulk_response(request, AsyncUser.bulk_befriend)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def bulk_create_likes(request):
+    """Ajoute des likes en masse"""
+    try:
+        return await _bulk_response(request, AsyncPost.bulk_like)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+
+# Table de routage (équivalent du blueprint bulk_bp, sans préfixe)
+bulk_routes = [
+    Route('/users/bulk', bulk_create_users, methods=['POST']),
+    Route('/posts/bulk', bulk_create_posts, methods=['POST']),
+    Route('/friendships/bulk', bulk_create_friendships, methods=['POST']),
+    Route('/likes/bulk', bulk_create_likes, methods=['POST']),
+]
@@ -0,0 +1,186 @@
+from starlette.routing import Route
+from services.pagination import parse_page_args, InvalidCursorError
+from services.projection import parse_projection_args, InvalidProjectionError
+from services.conditional import projection_variant, is_not_modified, version_headers
+from aio.models import AsyncComment
+from aio.responses import jsonify, read_json, wants_ndjson, ndjson_response, not_modified
+
+
+async def get_comments(request):
+    """Récupère tous les commentaires, page par page (?limit=&after=<curseur>) ou en flux NDJSON"""
+    try:
+        projection = parse_projection_args(request.query_params, 'comment')
+        if wants_ndjson(request):
+            return await ndjson_response(AsyncComment.iter_all(projection))
+        limit, after = parse_page_args(request.query_params)
+        comments, next_cursor = await AsyncComment.get_page(limit, after, projection)
+        return jsonify({"success": True, "data": comments, "next_cursor": next_cursor})
+    except (InvalidCursorError, InvalidProjectionError) as e:
+        return jsonify({"success": False, "error": str(e)}, 400)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def get_comment(request):
+    """Récupère un commentaire par son ID (?fields=, ?include=), réponse conditionnelle sauf avec ?include="""
+    try:
+        comment_id = request.path_params['comment_id']
+        projection = parse_projection_args(request.query_params, 'comment')
+        variant = projection_variant(projection)
+        headers = None
+        if variant is not None:
+            version = await AsyncComment.version(comment_id, variant)
+            if version is None:
+                return jsonify({
+                    "success": False,
+                    "error": "Commentaire non trouvé"
+                }, 404)
+            headers = version_headers(version)
+            if is_not_modified(request.headers, version):
+                return not_modified(headers)
+
+        if projection:
+            comment_data = await AsyncComment.find_projected(comment_id, projection)
+        else:
+            comment = await AsyncComment.find_by_id(comment_id)
+            comment_data = comment.to_dict() if comment else None
+        if not comment_data:
+            return jsonify({
+                "success": False,
+                "error": "Commentaire non trouvé"
+            }, 404)
+
+        return jsonify({"success": True, "data": comment_data}, headers=headers)
+    except InvalidProjectionError as e:
+        return jsonify({"success": False, "error": str(e)}, 400)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def get_comment_thread(request):
+    """Récupère un commentaire et toutes ses réponses, dans l'ordre du fil"""
+    try:
+        thread = await AsyncComment.get_thread(request.path_params['comment_id'])
+        if thread is None:
+            return jsonify({
+                "success": False,
+                "error": "Commentaire non trouvé"
+            }, 404)
+
+        return jsonify({"success": True, "data": thread})
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def update_comment(request):
+    """Met à jour un commentaire"""
+    try:
+        data = await read_json(request)
+        if not data or 'content' not in data:
+            return jsonify({
+                "success": False,
+                "error": "Le champ content est requis"
+            }, 400)
+
+        comment = await AsyncComment.find_by_id(request.path_params['comment_id'])
+        if not comment:
+            return jsonify({
+                "success": False,
+                "error": "Commentaire non trouvé"
+            }, 404)
+
+        await AsyncComment.update(comment, data['content'])
+
+        return jsonify({
+            "success": True,
+            "message": "Commentaire mis à jour avec succès",
+            "data": comment.to_dict()
+        })
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def delete_comment(request):
+    """Supprime un commentaire et ses réponses"""
+    try:
+        comment = await AsyncComment.find_by_id(request.path_params['comment_id'])
+        if not comment:
+            return jsonify({
+                "success": False,
+                "error": "Commentaire non trouvé"
+            }, 404)
+
+        await AsyncComment.delete(comment)
+
+        return jsonify({
+            "success": True,
+            "message": "Commentaire supprimé avec succès"
+        })
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def like_comment(request):
+    """Ajoute un like à un commentaire"""
+    try:
+        data = await read_json(request)
+        if not data or 'user_id' not in data:
+            return jsonify({
+                "success": False,
+                "error": "L'ID de l'utilisateur est requis"
+            }, 400)
+
+        status = await AsyncComment.like(request.path_params['comment_id'], data['user_id'])
+        if status == 'comment_not_found':
+            return jsonify({
+                "success": False,
+                "error": "Commentaire non trouvé"
+            }, 404)
+        if status == 'user_not_found':
+            return jsonify({
+                "success": False,
+                "error": "Utilisateur non trouvé"
+            }, 404)
+
+        return jsonify({
+            "success": True,
+            "message": "Like ajouté avec succès"
+        }, 201)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def unlike_comment(request):
+    """Retire un like d'un commentaire"""
+    try:
+        data = await read_json(request)
+        if not data or 'user_id' not in data:
+            return jsonify({
+                "success": False,
+                "error": "L'ID de l'utilisateur est requis"
+            }, 400)
+
+        status = await AsyncComment.unlike(request.path_params['comment_id'], data['user_id'])
+        if status == 'comment_not_found':
+            return jsonify({
+                "success": False,
+                "error": "Commentaire non trouvé"
+            }, 404)
+        if status == 'user_not_found':
+            return jsonify({
+                "success": False,
+                "error": "Utilisateur non trouvé"
+            }, 404)
+
+        return jsonify({
+            "success": True,
+            "message": "Like retiré avec succès"
+        })
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+
+# Table de routage (équivalent du blueprint comment_bp monté sur /comments)
+comment_routes = [
+    Route('/comments', get_comments, methods=['GET']),
+    Route('/comments/{comment_id}', get_comment, methods=['GET']),
+    Route('/comments/{comment_id}', update_comment, methods=['PUT']),
+    Route('/comments/{comment_id}', delete_comment, methods=['DELETE']),
+    Route('/comments/{comment_id}/thread', get_comment_thread, methods=['GET']),
+    Route('/comments/{comment_id}/like', like_comment, methods=['POST']),
+    Route('/comments/{comment_id}/like', unlike_comment, methods=['DELETE']),
+]
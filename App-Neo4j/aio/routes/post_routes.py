@@ -0,0 +1,281 @@
+from starlette.routing import Route
+from services.pagination import parse_page_args, InvalidCursorError
+from services.projection import parse_projection_args, InvalidProjectionError
+from services.batching import parse_ids, InvalidIdsError
+from services.search import parse_search_args, InvalidSearchError
+from services.conditional import projection_variant, is_not_modified, version_headers
+from models.comment import Comment
+from aio.models import AsyncPost, AsyncComment
+from aio.responses import jsonify, read_json, wants_ndjson, ndjson_response, not_modified
+
+
+async def get_posts(request):
+    """Récupère tous les posts, page par page (?limit=&after=<curseur>), par id (?ids=) ou en flux NDJSON"""
+    try:
+        projection = parse_projection_args(request.query_params, 'post')
+        if request.query_params.get('ids') is not None:
+            ids = parse_ids(request.query_params.get('ids'))
+            posts = await AsyncPost.get_many(ids, projection)
+            return jsonify({"success": True, "data": posts,
+                            "missing": [post_id for post_id in ids if post_id not in posts]})
+        if wants_ndjson(request):
+            return await ndjson_response(AsyncPost.iter_all(projection))
+        limit, after = parse_page_args(request.query_params)
+        posts, next_cursor = await AsyncPost.get_page(limit, after, projection)
+        return jsonify({"success": True, "data": posts, "next_cursor": next_cursor})
+    except (InvalidCursorError, InvalidProjectionError, InvalidIdsError) as e:
+        return jsonify({"success": False, "error": str(e)}, 400)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def search_posts(request):
+    """Recherche plein texte dans les titres et contenus (?q=, ?limit=&after=), par pertinence"""
+    try:
+        search = parse_search_args(request.query_params)
+        limit, after = parse_page_args(request.query_params)
+        posts, next_cursor = await AsyncPost.search(search, limit, after)
+        return jsonify({"success": True, "data": posts, "next_cursor": next_cursor})
+    except (InvalidSearchError, InvalidCursorError) as e:
+        return jsonify({"success": False, "error": str(e)}, 400)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def get_post(request):
+    """Récupère un post par son ID (?fields=, ?include=), réponse conditionnelle sauf avec ?include="""
+    try:
+        post_id = request.path_params['post_id']
+        projection = parse_projection_args(request.query_params, 'post')
+        variant = projection_variant(projection)
+        headers = None
+        if variant is not None:
+            version = await AsyncPost.version(post_id, variant)
+            if version is None:
+                return jsonify({
+                    "success": False,
+                    "error": "Post non trouvé"
+                }, 404)
+            headers = version_headers(version)
+            if is_not_modified(request.headers, version):
+                return not_modified(headers)
+
+        if projection:
+            post_data = await AsyncPost.find_projected(post_id, projection)
+        else:
+            post = await AsyncPost.find_by_id(post_id)
+            post_data = post.to_dict() if post else None
+        if not post_data:
+            return jsonify({
+                "success": False,
+                "error": "Post non trouvé"
+            }, 404)
+
+        return jsonify({"success": True, "data": post_data}, headers=headers)
+    except InvalidProjectionError as e:
+        return jsonify({"success": False, "error": str(e)}, 400)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def update_post(request):
+    """Met à jour un post"""
+    try:
+        data = await read_json(request)
+        if not data:
+            return jsonify({
+                "success": False,
+                "error": "Aucune donnée fournie"
+            }, 400)
+
+        post = await AsyncPost.find_by_id(request.path_params['post_id'])
+        if not post:
+            return jsonify({
+                "success": False,
+                "error": "Post non trouvé"
+            }, 404)
+
+        await AsyncPost.update(post, title=data.get('title', post.title),
+                               content=data.get('content', post.content))
+
+        return jsonify({
+            "success": True,
+            "message": "Post mis à jour avec succès",
+            "data": post.to_dict()
+        })
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def delete_post(request):
+    """Supprime un post"""
+    try:
+        if not await AsyncPost.delete_by_id(request.path_params['post_id']):
+            return jsonify({
+                "success": False,
+                "error": "Post non trouvé"
+            }, 404)
+
+        return jsonify({
+            "success": True,
+            "message": "Post supprimé avec succès"
+        })
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def like_post(request):
+    """Ajoute un like à un post"""
+    try:
+        data = await read_json(request)
+        if not data or 'user_id' not in data:
+            return jsonify({
+                "success": False,
+                "error": "L'ID de l'utilisateur est requis"
+            }, 400)
+
+        status = await AsyncPost.like(request.path_params['post_id'], data['user_id'])
+        if status == 'post_not_found':
+            return jsonify({
+                "success": False,
+                "error": "Post non trouvé"
+            }, 404)
+        if status == 'user_not_found':
+            return jsonify({
+                "success": False,
+                "error": "Utilisateur non trouvé"
+            }, 404)
+
+        return jsonify({
+            "success": True,
+            "message": "Like ajouté avec succès"
+        }, 201)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def unlike_post(request):
+    """Retire un like d'un post"""
+    try:
+        data = await read_json(request)
+        if not data or 'user_id' not in data:
+            return jsonify({
+                "success": False,
+                "error": "L'ID de l'utilisateur est requis"
+            }, 400)
+
+        status = await AsyncPost.unlike(request.path_params['post_id'], data['user_id'])
+        if status == 'post_not_found':
+            return jsonify({
+                "success": False,
+                "error": "Post non trouvé"
+            }, 404)
+        if status == 'user_not_found':
+            return jsonify({
+                "success": False,
+                "error": "Utilisateur non trouvé"
+            }, 404)
+
+        return jsonify({
+            "success": True,
+            "message": "Like retiré avec succès"
+        })
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def get_post_comments(request):
+    """Récupère les commentaires d'un post page par page (?limit=&after=), réponse conditionnelle"""
+    try:
+        post_id = request.path_params['post_id']
+        limit, after = parse_page_args(request.query_params)
+        version = await AsyncPost.comments_version(post_id, f"{limit}:{request.query_params.get('after', '')}")
+        if version is None:
+            return jsonify({
+                "success": False,
+                "error": "Post non trouvé"
+            }, 404)
+        headers = version_headers(version)
+        if is_not_modified(request.headers, version):
+            return not_modified(headers)
+
+        comments, next_cursor = await AsyncComment.get_post_comments(post_id, limit, after)
+        return jsonify({"success": True, "data": comments, "next_cursor": next_cursor}, headers=headers)
+    except InvalidCursorError as e:
+        return jsonify({"success": False, "error": str(e)}, 400)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def add_comment(request):
+    """Ajoute un commentaire à un post, ou une réponse avec parent_id"""
+    try:
+        data = await read_json(request)
+        if not data or 'content' not in data or 'user_id' not in data:
+            return jsonify({
+                "success": False,
+                "error": "Les champs content et user_id sont requis"
+            }, 400)
+
+        comment = Comment(content=data['content'], author_id=data['user_id'],
+                          post_id=request.path_params['post_id'], parent_id=data.get('parent_id'))
+        status = await AsyncComment.save(comment)
+        if status == 'post_not_found':
+            return jsonify({
+                "success": False,
+                "error": "Post non trouvé"
+            }, 404)
+        if status == 'user_not_found':
+            return jsonify({
+                "success": False,
+                "error": "Utilisateur non trouvé"
+            }, 404)
+        if status == 'parent_not_found':
+            return jsonify({
+                "success": False,
+                "error": "Commentaire parent non trouvé dans ce post"
+            }, 404)
+
+        return jsonify({
+            "success": True,
+            "message": "Commentaire ajouté avec succès",
+            "data": comment.to_dict()
+        }, 201)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def delete_post_comment(request):
+    """Supprime un commentaire d'un post"""
+    try:
+        status = await AsyncComment.delete_from_post(request.path_params['post_id'],
+                                                     request.path_params['comment_id'])
+        if status == 'post_not_found':
+            return jsonify({
+                "success": False,
+                "error": "Post non trouvé"
+            }, 404)
+        if status == 'comment_not_found':
+            return jsonify({
+                "success": False,
+                "error": "Commentaire non trouvé"
+            }, 404)
+        if status == 'wrong_post':
+            return jsonify({
+                "success": False,
+                "error": "Ce commentaire n'appartient pas à ce post"
+            }, 400)
+
+        return jsonify({
+            "success": True,
+            "message": "Commentaire supprimé avec succès"
+        })
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+
+# Table de routage (équivalent du blueprint post_bp monté sur /posts)
+post_routes = [
+    Route('/posts', get_posts, methods=['GET']),
+    # Avant /posts/{post_id} : Starlette essaie les routes dans l'ordre
+    Route('/posts/search', search_posts, methods=['GET']),
+    Route('/posts/{post_id}', get_post, methods=['GET']),
+    Route('/posts/{post_id}', update_post, methods=['PUT']),
+    Route('/posts/{post_id}', delete_post, methods=['DELETE']),
+    Route('/posts/{post_id}/like', like_post, methods=['POST']),
+    Route('/posts/{post_id}/like', unlike_post, methods=['DELETE']),
+    Route('/posts/{post_id}/comments', get_post_comments, methods=['GET']),
+    Route('/posts/{post_id}/comments', add_comment, methods=['POST']),
+    Route('/posts/{post_id}/comments/{comment_id}', delete_post_comment, methods=['DELETE']),
+]
@@ -0,0 +1,399 @@
+from starlette.routing import Route
+from services.pagination import parse_page_args, InvalidCursorError
+from services.projection import parse_projection_args, InvalidProjectionError
+from services.batching import parse_ids, InvalidIdsError
+from services.conditional import projection_variant, is_not_modified, version_headers
+from models.user import User
+from models.post import Post
+from aio.models import AsyncUser, AsyncPost
+from aio.responses import jsonify, read_json, wants_ndjson, ndjson_response, not_modified
+
+
+async def get_users(request):
+    """Récupère tous les utilisateurs, page par page (?limit=&after=<curseur>), par id (?ids=) ou en flux NDJSON"""
+    try:
+        projection = parse_projection_args(request.query_params, 'user')
+        if request.query_params.get('ids') is not None:
+            ids = parse_ids(request.query_params.get('ids'))
+            users = await AsyncUser.get_many(ids, projection)
+            return jsonify({"success": True, "data": users,
+                            "missing": [user_id for user_id in ids if user_id not in users]})
+        if wants_ndjson(request):
+            return await ndjson_response(AsyncUser.iter_all(projection))
+        limit, after = parse_page_args(request.query_params)
+        users, next_cursor = await AsyncUser.get_page(limit, after, projection)
+        return jsonify({"success": True, "data": users, "next_cursor": next_cursor})
+    except (InvalidCursorError, InvalidProjectionError, InvalidIdsError) as e:
+        return jsonify({"success": False, "error": str(e)}, 400)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def create_user(request):
+    """Crée un nouvel utilisateur"""
+    try:
+        data = await read_json(request)
+        if not data or 'name' not in data or 'email' not in data:
+            return jsonify({
+                "success": False,
+                "error": "Les champs name et email sont requis"
+            }, 400)
+
+        if await AsyncUser.find_by_email(data['email']):
+            return jsonify({
+                "success": False,
+                "error": "Un utilisateur avec cet email existe déjà"
+            }, 409)
+
+        user = await AsyncUser.save(User(name=data['name'], email=data['email']))
+
+        return jsonify({
+            "success": True,
+            "message": "Utilisateur créé avec succès",
+            "data": user.to_dict()
+        }, 201)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def get_user(request):
+    """Récupère un utilisateur par son ID (?fields=, ?include=), réponse conditionnelle sauf avec ?include="""
+    try:
+        user_id = request.path_params['user_id']
+        projection = parse_projection_args(request.query_params, 'user')
+        variant = projection_variant(projection)
+        headers = None
+        if variant is not None:
+            version = await AsyncUser.version(user_id, variant)
+            if version is None:
+                return jsonify({
+                    "success": False,
+                    "error": "Utilisateur non trouvé"
+                }, 404)
+            headers = version_headers(version)
+            if is_not_modified(request.headers, version):
+                return not_modified(headers)
+
+        if projection:
+            user_data = await AsyncUser.find_projected(user_id, projection)
+        else:
+            user = await AsyncUser.find_by_id(user_id)
+            user_data = user.to_dict() if user else None
+        if not user_data:
+            return jsonify({
+                "success": False,
+                "error": "Utilisateur non trouvé"
+            }, 404)
+
+        return jsonify({"success": True, "data": user_data}, headers=headers)
+    except InvalidProjectionError as e:
+        return jsonify({"success": False, "error": str(e)}, 400)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def update_user(request):
+    """Met à jour un utilisateur"""
+    try:
+        user_id = request.path_params['user_id']
+        data = await read_json(request)
+        if not data:
+            return jsonify({
+                "success": False,
+                "error": "Aucune donnée fournie"
+            }, 400)
+
+        user = await AsyncUser.find_by_id(user_id)
+        if not user:
+            return jsonify({
+                "success": False,
+                "error": "Utilisateur non trouvé"
+            }, 404)
+
+        # Vérification si l'email est déjà utilisé par un autre utilisateur
+        if 'email' in data and data['email'] != user.email:
+            existing_user = await AsyncUser.find_by_email(data['email'])
+            if existing_user and existing_user.id != user_id:
+                return jsonify({
+                    "success": False,
+                    "error": "Cet email est déjà utilisé par un autre utilisateur"
+                }, 409)
+
+        await AsyncUser.update(user, name=data.get('name', user.name),
+                               email=data.get('email', user.email))
+
+        return jsonify({
+            "success": True,
+            "message": "Utilisateur mis à jour avec succès",
+            "data": user.to_dict()
+        })
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def delete_user(request):
+    """Supprime un utilisateur"""
+    try:
+        if not await AsyncUser.delete_by_id(request.path_params['user_id']):
+            return jsonify({
+                "success": False,
+                "error": "Utilisateur non trouvé"
+            }, 404)
+
+        return jsonify({
+            "success": True,
+            "message": "Utilisateur supprimé avec succès"
+        })
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def get_friends(request):
+    """Récupère les amis d'un utilisateur (réponse conditionnelle : ETag, Last-Modified, 304)"""
+    try:
+        user_id = request.path_params['user_id']
+        version = await AsyncUser.friends_version(user_id)
+        if version is None:
+            return jsonify({
+                "success": False,
+                "error": "Utilisateur non trouvé"
+            }, 404)
+        if is_not_modified(request.headers, version):
+            return not_modified(version_headers(version))
+
+        return jsonify({"success": True, "data": await AsyncUser.get_friends(user_id)},
+                       headers=version_headers(version))
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def add_friend(request):
+    """Ajoute un ami à l'utilisateur"""
+    try:
+        data = await read_json(request)
+        if not data or 'friend_id' not in data:
+            return jsonify({
+                "success": False,
+                "error": "L'ID de l'ami est requis"
+            }, 400)
+
+        status = await AsyncUser.befriend(request.path_params['user_id'], data['friend_id'])
+        if status == 'user_not_found':
+            return jsonify({
+                "success": False,
+                "error": "Utilisateur non trouvé"
+            }, 404)
+        if status == 'friend_not_found':
+            return jsonify({
+                "success": False,
+                "error": "Ami non trouvé"
+            }, 404)
+        if status == 'already_exists':
+            return jsonify({
+                "success": False,
+                "error": "Ces utilisateurs sont déjà amis"
+            }, 409)
+
+        return jsonify({
+            "success": True,
+            "message": "Ami ajouté avec succès"
+        }, 201)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def check_friendship(request):
+    """Vérifie si deux utilisateurs sont amis"""
+    try:
+        user_id = request.path_params['user_id']
+        friend_id = request.path_params['friend_id']
+        if not await AsyncUser.find_by_id(user_id):
+            return jsonify({
+                "success": False,
+                "error": "Utilisateur non trouvé"
+            }, 404)
+        if not await AsyncUser.find_by_id(friend_id):
+            return jsonify({
+                "success": False,
+                "error": "Ami non trouvé"
+            }, 404)
+
+        return jsonify({
+            "success": True,
+            "data": {
+                "is_friend": await AsyncUser.is_friend_with(user_id, friend_id)
+            }
+        })
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def remove_friend(request):
+    """Supprime une relation d'amitié"""
+    try:
+        status = await AsyncUser.unfriend(request.path_params['user_id'],
+                                          request.path_params['friend_id'])
+        if status == 'user_not_found':
+            return jsonify({
+                "success": False,
+                "error": "Utilisateur non trouvé"
+            }, 404)
+        if status == 'friend_not_found':
+            return jsonify({
+                "success": False,
+                "error": "Ami non trouvé"
+            }, 404)
+        if status == 'relation_not_found':
+            return jsonify({
+                "success": False,
+                "error": "Ces utilisateurs ne sont pas amis"
+            }, 404)
+
+        return jsonify({
+            "success": True,
+            "message": "Relation d'amitié supprimée avec succès"
+        })
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def get_mutual_friends(request):
+    """Récupère les amis en commun entre deux utilisateurs"""
+    try:
+        user_id = request.path_params['user_id']
+        other_id = request.path_params['other_id']
+        if not await AsyncUser.find_by_id(user_id):
+            return jsonify({
+                "success": False,
+                "error": "Utilisateur non trouvé"
+            }, 404)
+        if not await AsyncUser.find_by_id(other_id):
+            return jsonify({
+                "success": False,
+                "error": "Autre utilisateur non trouvé"
+            }, 404)
+
+        return jsonify({
+            "success": True,
+            "data": await AsyncUser.get_mutual_friends(user_id, other_id)
+        })
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def get_feed(request):
+    """Fil d'actualité : posts des amis, du plus récent au plus ancien (?limit=&after=<curseur>)"""
+    try:
+        user_id = request.path_params['user_id']
+        limit, after = parse_page_args(request.query_params)
+        if not await AsyncUser.find_by_id(user_id):
+            return jsonify({
+                "success": False,
+                "error": "Utilisateur non trouvé"
+            }, 404)
+
+        posts, next_cursor = await AsyncPost.get_feed(user_id, limit, after)
+        return jsonify({"success": True, "data": posts, "next_cursor": next_cursor})
+    except InvalidCursorError as e:
+        return jsonify({"success": False, "error": str(e)}, 400)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def get_recommendations(request):
+    """Suggestions d'amis (?limit=, 10 par défaut) : amis d'amis classés par amis communs"""
+    try:
+        limit = max(1, min(int(request.query_params.get('limit', 10)), 100))
+    except ValueError:
+        return jsonify({
+            "success": False,
+            "error": "Le paramètre limit doit être un entier"
+        }, 400)
+
+    try:
+        user_id = request.path_params['user_id']
+        if not await AsyncUser.find_by_id(user_id):
+            return jsonify({
+                "success": False,
+                "error": "Utilisateur non trouvé"
+            }, 404)
+
+        return jsonify({"success": True, "data": await AsyncUser.get_recommendations(user_id, limit)})
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def get_viewer_state(request):
+    """État de posts pour ce lecteur (?post_ids=a,b) : like, auteur, amitié avec l'auteur"""
+    try:
+        user_id = request.path_params['user_id']
+        post_ids = parse_ids(request.query_params.get('post_ids'))
+        states = await AsyncPost.viewer_state(user_id, post_ids)
+        if states is None:
+            return jsonify({
+                "success": False,
+                "error": "Utilisateur non trouvé"
+            }, 404)
+
+        return jsonify({
+            "success": True,
+            "data": states,
+            "missing": [post_id for post_id in post_ids if post_id not in states]
+        })
+    except InvalidIdsError as e:
+        return jsonify({"success": False, "error": str(e)}, 400)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def get_user_posts(request):
+    """Récupère les posts d'un utilisateur (?fields=, ?include=)"""
+    try:
+        user_id = request.path_params['user_id']
+        projection = parse_projection_args(request.query_params, 'post')
+        if not await AsyncUser.find_by_id(user_id):
+            return jsonify({
+                "success": False,
+                "error": "Utilisateur non trouvé"
+            }, 404)
+
+        return jsonify({"success": True, "data": await AsyncPost.get_user_posts(user_id, projection)})
+    except InvalidProjectionError as e:
+        return jsonify({"success": False, "error": str(e)}, 400)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+async def create_post(request):
+    """Crée un nouveau post pour un utilisateur"""
+    try:
+        user_id = request.path_params['user_id']
+        data = await read_json(request)
+        if not data or 'title' not in data or 'content' not in data:
+            return jsonify({
+                "success": False,
+                "error": "Les champs title et content sont requis"
+            }, 400)
+
+        if not await AsyncUser.find_by_id(user_id):
+            return jsonify({
+                "success": False,
+                "error": "Utilisateur non trouvé"
+            }, 404)
+
+        post = await AsyncPost.save(Post(title=data['title'], content=data['content'],
+                                         author_id=user_id))
+
+        return jsonify({
+            "success": True,
+            "message": "Post créé avec succès",
+            "data": post.to_dict()
+        }, 201)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}, 500)
+
+
+# Table de routage (équivalent du blueprint user_bp monté sur /users)
+user_routes = [
+    Route('/users', get_users, methods=['GET']),
+    Route('/users', create_user, methods=['POST']),
+    Route('/users/{user_id}', get_user, methods=['GET']),
+    Route('/users/{user_id}', update_user, methods=['PUT']),
+    Route('/users/{user_id}', delete_user, methods=['DELETE']),
+    Route('/users/{user_id}/friends', get_friends, methods=['GET']),
+    Route('/users/{user_id}/friends', add_friend, methods=['POST']),
+    Route('/users/{user_id}/friends/{friend_id}', check_friendship, methods=['GET']),
+    Route('/users/{user_id}/friends/{friend_id}', remove_friend, methods=['DELETE']),
+    Route('/users/{user_id}/mutual-friends/{other_id}', get_mutual_friends, methods=['GET']),
+    Route('/users/{user_id}/feed', get_feed, methods=['GET']),
+    Route('/users/{user_id}/recommendations', get_recommendations, methods=['GET']),
+    Route('/users/{user_id}/viewer-state', get_viewer_state, methods=['GET']),
+    Route('/users/{user_id}/posts', get_user_posts, methods=['GET']),
+    Route('/users/{user_id}/posts', create_post, methods=['POST']),
+]
@@ -1,17 +1,25 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request, g
 from flask_cors import CORS
-from config import DEBUG, SECRET_KEY
+from config import DEBUG, SECRET_KEY, SCHEMA_BOOTSTRAP_ON_START
 from services.db_service import get_db
+from services.compression import compress_response
+from services.admission import track_request, OverloadedError
+from services.json_codec import TimedJSONProvider
 
 # Import des routes
 from routes.user_routes import user_bp
 from routes.post_routes import post_bp
 from routes.comment_routes import comment_bp
+from routes.admin_routes import admin_bp
+from routes.bulk_routes import bulk_bp
+from routes.metrics_routes import metrics_bp
 
 # Initialisation de l'application Flask
 app = Flask(__name__)
 app.config['SECRET_KEY'] = SECRET_KEY
 app.config['DEBUG'] = DEBUG
+# Sérialisation JSON mesurée (http_response_serialization_seconds), par orjson s'il est installé
+app.json = TimedJSONProvider(app)
 
 # Activation de CORS
 CORS(app)
@@ -20,6 +28,39 @@ CORS(app)
 app.register_blueprint(user_bp, url_prefix='/users')
 app.register_blueprint(post_bp, url_prefix='/posts')
 app.register_blueprint(comment_bp, url_prefix='/comments')
+app.register_blueprint(admin_bp, url_prefix='/admin')
+app.register_blueprint(bulk_bp)
+app.register_blueprint(metrics_bp)
+
+@app.after_request
+def compress(response):
+    """Compression gzip/brotli des réponses JSON et des flux NDJSON (Accept-Encoding)"""
+    return compress_response(response, request.headers.get('Accept-Encoding', ''))
+
+def overloaded_response(retry_after):
+    response = jsonify({"success": False, "error": "Base de données surchargée, réessayez plus tard"})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+@app.before_request
+def track_admission():
+    """Note les refus du contrôle d'admission Neo4j pendant la requête"""
+    g.admission = track_request()
+
+# Enregistré après compress : exécuté avant lui (ordre inverse)
+@app.after_request
+def shed_overload(response):
+    """503 + Retry-After si une requête Neo4j a été refusée, même interceptée par la route"""
+    admission = g.pop('admission', None)
+    if admission is None or admission.retry_after is None:
+        return response
+    return overloaded_response(admission.retry_after)
+
+@app.errorhandler(OverloadedError)
+def overloaded(error):
+    """Refus d'admission hors d'une route (gestionnaire global)"""
+    return overloaded_response(error.retry_after)
 
 @app.route('/')
 def index():
@@ -65,4 +106,10 @@ def server_error(error):
     return jsonify({"error": "Erreur interne du serveur"}), 500
 
 if __name__ == '__main__':
+    # Schéma appliqué une fois avant de servir (en production : manage.py ou gunicorn.conf.py)
+    if SCHEMA_BOOTSTRAP_ON_START:
+        try:
+            get_db().bootstrap_schema()
+        except Exception as e:
+            print(f"Erreur lors de l'application du schéma: {e}")
     app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
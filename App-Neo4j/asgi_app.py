@@ -0,0 +1,4 @@
+# Point d'entrée ASGI : uvicorn asgi_app:app --host 0.0.0.0 --port 5001
+from aio import create_app
+
+app = create_app()
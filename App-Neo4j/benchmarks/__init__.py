@@ -0,0 +1 @@
+"""Scripts de mesure de performance (lancer depuis App-Neo4j : python -m benchmarks.<module>)"""
@@ -0,0 +1,299 @@
+"""Charge toutes les routes de l'API et enregistre débit et p50/p95/p99 par endpoint.
+
+    python -m benchmarks.api_load --backend memory --scale small --output bench/HEAD.json
+    python -m benchmarks.api_load --backend neo4j --scale medium --app asgi
+    python -m benchmarks.api_load --base-url http://127.0.0.1:5000 --scale small
+    python -m benchmarks.api_load --backend memory --baseline bench/HEAD~1.json
+
+Sans --base-url, le serveur (benchmarks.serve) est lancé dans un processus
+séparé, pour que le générateur de charge ne partage pas son GIL. Avec
+--base-url, le serveur doit avoir été chargé avec les mêmes --scale et --seed.
+Le rapport JSON porte le commit courant ; --baseline ajoute le rapport de
+chaque endpoint à un rapport précédent (ratio > 1 : plus lent qu'avant).
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from urllib.parse import quote
+from benchmarks.http_load import Request, run_load, fetch_json
+from benchmarks.social_graph import SCALES, WORDS, generate, summary
+
+# Statuts acceptés pour les écritures qui peuvent légitimement échouer au fil des tirages
+CONFLICT_OK = (200, 201, 404, 409)
+GONE_OK = (200, 404)
+
+
+def _pool(items, rng):
+    items = list(items)
+    rng.shuffle(items)
+    return items
+
+
+def _take(pool, missing):
+    """Retire un élément à usage unique ; `missing` une fois le stock épuisé (404 attendu)"""
+    return pool.pop() if pool else missing
+
+
+def build_requests(dataset, sample=500, seed=0, admin=True, schema=True):
+    """Mélange pondéré couvrant chaque route de routes/ (lectures majoritaires).
+
+    Les lectures portent sur un échantillon d'utilisateurs et sur leurs posts ;
+    les suppressions consomment des objets hors échantillon, pour que les
+    lectures ne tombent pas sur des 404. `admin` et `schema` retirent les
+    routes /admin (absentes de l'ASGI) et /admin/schema (absente du graphe en
+    mémoire).
+    """
+    rng = random.Random(seed)
+    tag = uuid.uuid4().hex[:8]
+    counter = itertools.count()
+
+    hot = set(row['id'] for row in rng.sample(dataset['users'], min(sample, len(dataset['users']))))
+    users = sorted(hot)
+    posts = [row['id'] for row in dataset['posts'] if row['author_id'] in hot][:sample]
+    hot_posts = set(posts)
+    comments = [row['id'] for row in dataset['comments'] if row['post_id'] in hot_posts][:sample]
+    if not users or not posts or not comments:
+        raise SystemExit("Jeu de données trop petit pour couvrir toutes les routes")
+
+    spare_users = _pool((row['id'] for row in dataset['users'] if row['id'] not in hot), rng)
+    spare_posts = _pool((row['id'] for row in dataset['posts'] if row['id'] not in hot_posts), rng)
+    spare_comments = _pool(((row['post_id'], row['id']) for row in dataset['comments']
+                            if row['post_id'] not in hot_posts), rng)
+
+    def user():
+        return rng.choice(users)
+
+    def pair():
+        a, b = rng.sample(users, 2)
+        return a, b
+
+    def post():
+        return rng.choice(posts)
+
+    def comment():
+        return rng.choice(comments)
+
+    def new_user():
+        return {"name": "Charge", "email": f"load-{tag}-{next(counter)}@example.com"}
+
+    def new_post():
+        return {"title": "Post de charge", "content": "Lorem ipsum " * 8}
+
+    def search():
+        # Un ou deux mots du vocabulaire des posts, fréquents ou rares
+        return quote(' '.join(rng.sample(WORDS, rng.choice((1, 2)))))
+
+    def with_user(**extra):
+        return lambda: dict(extra, user_id=user())
+
+    def bulk(build, size=10):
+        return lambda: [build() for _ in range(size)]
+
+    requests = [
+        # --- /users ---
+        Request('GET', '/users?limit=50', None, 'GET /users', weight=3),
+        Request('POST', '/users', new_user, 'POST /users', (201,)),
+        Request('GET', lambda: f'/users/{user()}', None, 'GET /users/<id>', weight=10),
+        Request('PUT', lambda: f'/users/{user()}', {"name": "Renommé"}, 'PUT /users/<id>'),
+        Request('DELETE', lambda: f'/users/{_take(spare_users, "absent")}', None,
+                'DELETE /users/<id>', GONE_OK),
+        Request('GET', lambda: f'/users/{user()}/friends', None, 'GET /users/<id>/friends', weight=6),
+        Request('POST', lambda: f'/users/{user()}/friends', lambda: {"friend_id": user()},
+                'POST /users/<id>/friends', CONFLICT_OK),
+        Request('GET', lambda: '/users/{}/friends/{}'.format(*pair()), None,
+                'GET /users/<id>/friends/<friend_id>', weight=3),
+        Request('DELETE', lambda: '/users/{}/friends/{}'.format(*pair()), None,
+                'DELETE /users/<id>/friends/<friend_id>', GONE_OK),
+        Request('GET', lambda: '/users/{}/mutual-friends/{}'.format(*pair()), None,
+                'GET /users/<id>/mutual-friends/<other_id>', weight=3),
+        Request('GET', lambda: f'/users/{user()}/feed?limit=20', None, 'GET /users/<id>/feed', weight=8),
+        Request('GET', lambda: f'/users/{user()}/recommendations', None,
+                'GET /users/<id>/recommendations', weight=3),
+        Request('GET', lambda: f'/users/{user()}/posts', None, 'GET /users/<id>/posts', weight=4),
+        Request('GET', lambda: '/users?ids=' + ','.join(user() for _ in range(20)), None,
+                'GET /users?ids', weight=3),
+        Request('GET', lambda: f'/users/{user()}/viewer-state?post_ids=' + ','.join(post() for _ in range(20)),
+                None, 'GET /users/<id>/viewer-state', weight=4),
+        Request('POST', lambda: f'/users/{user()}/posts', new_post, 'POST /users/<id>/posts', (201,),
+                weight=2),
+        # --- /posts ---
+        Request('GET', '/posts?limit=50', None, 'GET /posts', weight=3),
+        Request('GET', lambda: f'/posts/{post()}', None, 'GET /posts/<id>', weight=10),
+        Request('GET', '/posts?limit=50&fields=id,title', None, 'GET /posts?fields', weight=2),
+        Request('GET', lambda: f'/posts/search?q={search()}&limit=20', None, 'GET /posts/search', weight=3),
+        Request('GET', lambda: '/posts?ids=' + ','.join(post() for _ in range(20)), None,
+                'GET /posts?ids', weight=3),
+        Request('GET', lambda: f'/posts/{post()}?include=author,comments', None,
+                'GET /posts/<id>?include', weight=4),
+        Request('PUT', lambda: f'/posts/{post()}', {"title": "Titre modifié"}, 'PUT /posts/<id>'),
+        Request('DELETE', lambda: f'/posts/{_take(spare_posts, "absent")}', None,
+                'DELETE /posts/<id>', GONE_OK),
+        Request('POST', lambda: f'/posts/{post()}/like', with_user(), 'POST /posts/<id>/like', weight=2),
+        Request('DELETE', lambda: f'/posts/{post()}/like', with_user(), 'DELETE /posts/<id>/like', GONE_OK),
+        Request('GET', lambda: f'/posts/{post()}/comments', None, 'GET /posts/<id>/comments', weight=4),
+        Request('POST', lambda: f'/posts/{post()}/comments', with_user(content="Commentaire de charge"),
+                'POST /posts/<id>/comments', (201,), weight=2),
+        Request('DELETE', lambda: '/posts/{}/comments/{}'.format(*_take(spare_comments, ("absent", "absent"))),
+                None, 'DELETE /posts/<id>/comments/<comment_id>', GONE_OK),
+        # --- /comments ---
+        Request('GET', '/comments?limit=50', None, 'GET /comments', weight=2),
+        Request('GET', lambda: f'/comments/{comment()}', None, 'GET /comments/<id>', weight=4),
+        Request('GET', lambda: f'/comments/{comment()}/thread', None, 'GET /comments/<id>/thread', weight=2),
+        Request('PUT', lambda: f'/comments/{comment()}', {"content": "Modifié"}, 'PUT /comments/<id>'),
+        Request('DELETE', lambda: f'/comments/{_take(spare_comments, ("", "absent"))[1]}', None,
+                'DELETE /comments/<id>', GONE_OK),
+        Request('POST', lambda: f'/comments/{comment()}/like', with_user(), 'POST /comments/<id>/like'),
+        Request('DELETE', lambda: f'/comments/{comment()}/like', with_user(),
+                'DELETE /comments/<id>/like', GONE_OK),
+        # --- écritures en masse ---
+        Request('POST', '/users/bulk', bulk(new_user), 'POST /users/bulk', (201, 207)),
+        Request('POST', '/posts/bulk', bulk(lambda: dict(new_post(), author_id=user())),
+                'POST /posts/bulk', (201, 207)),
+        Request('POST', '/friendships/bulk',
+                bulk(lambda: dict(zip(('user_id', 'friend_id'), pair()))),
+                'POST /friendships/bulk', (201, 207)),
+        Request('POST', '/likes/bulk', bulk(lambda: {"user_id": user(), "post_id": post()}),
+                'POST /likes/bulk', (201, 207)),
+        Request('GET', '/metrics', None, 'GET /metrics', weight=0.5),
+    ]
+    if admin:
+        # --- /admin ---
+        requests += [
+            Request('GET', '/admin/cache', None, 'GET /admin/cache', weight=0.5),
+            Request('GET', '/admin/pool', None, 'GET /admin/pool', weight=0.5),
+            Request('GET', '/admin/friend-graph', None, 'GET /admin/friend-graph', weight=0.5),
+            # Reconstruction complète : rare, comme en production
+            Request('POST', '/admin/friend-graph/reload', None, 'POST /admin/friend-graph/reload',
+                    (200, 409), weight=0.05),
+        ]
+    if admin and schema:
+        requests.append(Request('GET', '/admin/schema', None, 'GET /admin/schema', weight=0.2))
+    return requests
+
+
+def git_revision():
+    """Commit courant (et modifications non commitées) pour situer le rapport"""
+    def git(*args):
+        return subprocess.run(['git', *args], capture_output=True, text=True, check=True).stdout.strip()
+    try:
+        return {"commit": git('rev-parse', '--short', 'HEAD'), "dirty": bool(git('status', '--porcelain'))}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def compare(report, baseline):
+    """Ratios courant / référence par concurrence et par endpoint (p50, p99, débit)"""
+    def ratio(current, previous):
+        return round(current / previous, 3) if current and previous else None
+
+    previous_runs = {run['concurrency']: run for run in baseline.get('runs', [])}
+    comparison = {"baseline_commit": baseline.get('commit'), "runs": []}
+    for run in report['runs']:
+        previous = previous_runs.get(run['concurrency'])
+        if previous is None:
+            continue
+        endpoints = {}
+        for endpoint, current in run.get('endpoints', {}).items():
+            before = previous.get('endpoints', {}).get(endpoint)
+            if before:
+                endpoints[endpoint] = {
+                    "p50_ratio": ratio(current['p50_ms'], before['p50_ms']),
+                    "p99_ratio": ratio(current['p99_ms'], before['p99_ms']),
+                    "throughput_ratio": ratio(current['throughput_rps'], before['throughput_rps']),
+                }
+        comparison["runs"].append({
+            "concurrency": run['concurrency'],
+            "p99_ratio": ratio(run['p99_ms'], previous['p99_ms']),
+            "throughput_ratio": ratio(run['throughput_rps'], previous['throughput_rps']),
+            "endpoints": endpoints,
+        })
+    return comparison
+
+
+def start_server(args):
+    """Lance benchmarks.serve dans un processus séparé et attend qu'il réponde"""
+    command = [sys.executable, '-m', 'benchmarks.serve', '--backend', args.backend, '--app', args.app,
+               '--scale', args.scale, '--seed', str(args.seed), '--port', str(args.port)]
+    process = subprocess.Popen(command, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    base_url = f'http://127.0.0.1:{args.port}'
+    deadline = time.monotonic() + args.startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"Le serveur de test s'est arrêté (code {process.returncode})")
+        try:
+            status, _ = asyncio.run(fetch_json(base_url, '/'))
+            if status == 200:
+                return process, base_url
+        except OSError:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise SystemExit("Le serveur de test n'a pas démarré à temps")
+
+
+async def run_suite(args, base_url, requests):
+    runs = []
+    for concurrency in args.concurrency:
+        result = await run_load(base_url, requests, concurrency, args.duration,
+                                warmup=args.warmup, seed=args.seed)
+        result["concurrency"] = concurrency
+        runs.append(result)
+        print(json.dumps({key: value for key, value in result.items() if key != 'endpoints'}),
+              file=sys.stderr)
+    return runs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backend', choices=['memory', 'neo4j'], default='memory')
+    parser.add_argument('--app', choices=['wsgi', 'asgi'], default='wsgi')
+    parser.add_argument('--base-url', help="serveur déjà lancé (sinon benchmarks.serve est démarré)")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[16])
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--warmup', type=float, default=2.0)
+    parser.add_argument('--sample', type=int, default=500, help="utilisateurs lus par le mélange")
+    parser.add_argument('--startup-timeout', type=float, default=600.0)
+    parser.add_argument('--output', help="fichier JSON du rapport (sinon sortie standard)")
+    parser.add_argument('--baseline', help="rapport précédent à comparer")
+    args = parser.parse_args(argv)
+
+    dataset = generate(**SCALES[args.scale], seed=args.seed)
+    requests = build_requests(dataset, args.sample, args.seed, admin=args.app == 'wsgi',
+                              schema=args.backend == 'neo4j' or bool(args.base_url))
+
+    process, base_url = (None, args.base_url) if args.base_url else start_server(args)
+    try:
+        runs = asyncio.run(run_suite(args, base_url, requests))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    report = dict(git_revision(), backend=None if args.base_url else args.backend,
+                  app=None if args.base_url else args.app, base_url=base_url, scale=args.scale,
+                  seed=args.seed, dataset=summary(dataset), duration_s=args.duration, runs=runs)
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = compare(report, json.load(f))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Compare l'application Flask (WSGI) et la variante ASGI à charge égale.
+
+Les deux serveurs doivent tourner sur la même base, par exemple :
+
+    gunicorn -c gunicorn.conf.py app:app                   # :5000
+    uvicorn asgi_app:app --port 5001 --workers 4          # :5001
+    python -m benchmarks.async_vs_sync --concurrency 64 --duration 30
+
+Chaque niveau de concurrence est joué sur les deux serveurs avec le même
+mélange de requêtes ; le rapport JSON donne débit et p50/p95/p99.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from benchmarks.http_load import run_load, fetch_json
+
+
+async def build_requests(base_url, sample):
+    """Mélange de lectures représentatif : listes paginées et recherches par ID"""
+    _, users = await fetch_json(base_url, f'/users?limit={sample}')
+    _, posts = await fetch_json(base_url, f'/posts?limit={sample}')
+    user_ids = [user['id'] for user in (users or {}).get('data', [])]
+    post_ids = [post['id'] for post in (posts or {}).get('data', [])]
+    if not user_ids or not post_ids:
+        raise SystemExit("La base doit contenir des utilisateurs et des posts")
+
+    requests = [('GET', '/users?limit=50', None), ('GET', '/posts?limit=50', None)]
+    requests += [('GET', f'/users/{user_id}', None) for user_id in user_ids]
+    requests += [('GET', f'/users/{user_id}/friends', None) for user_id in user_ids]
+    requests += [('GET', f'/posts/{post_id}', None) for post_id in post_ids]
+    return requests
+
+
+async def compare(args):
+    requests = await build_requests(args.sync_url, args.sample)
+    report = {"duration_s": args.duration, "distinct_requests": len(requests), "runs": []}
+    for concurrency in args.concurrency:
+        for name, base_url in (("sync", args.sync_url), ("async", args.async_url)):
+            result = await run_load(base_url, requests, concurrency, args.duration,
+                                    warmup=args.warmup, seed=args.seed)
+            result.update(server=name, base_url=base_url, concurrency=concurrency)
+            report["runs"].append(result)
+            print(json.dumps(result), file=sys.stderr)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sync-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--async-url', default='http://127.0.0.1:5001')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[16, 64, 256])
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--warmup', type=float, default=2.0)
+    parser.add_argument('--sample', type=int, default=200, help="nombre d'IDs utilisés")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(json.dumps(asyncio.run(compare(args)), indent=2))
+
+
+if __name__ == '__main__':
+    main()
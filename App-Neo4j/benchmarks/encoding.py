@@ -0,0 +1,150 @@
+"""Coût d'encodage JSON et de compression des réponses, en millisecondes par Mo.
+
+    python -m benchmarks.encoding --scale small
+    python -m benchmarks.encoding --scale medium --repeat 5 --output bench/encoding.json
+
+Les charges sont construites depuis le réseau social synthétique : une page
+de posts (GET /posts?limit=500), la liste complète des posts et leur flux
+NDJSON. Pour chaque charge, le rapport donne la taille produite et le temps
+par Mo de JSON pour : l'ancien chemin (json.dumps comme flask.jsonify, sans
+compression), chaque encodeur disponible (json, orjson), puis chaque
+encodeur suivi de chaque compression disponible (gzip, brotli ; flux
+compressé au fil de l'eau comme par services/compression.py).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import zlib
+from benchmarks.social_graph import SCALES, generate
+from config import COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_QUALITY, COMPRESSION_STREAM_FLUSH_BYTES
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _posts(dataset):
+    """Posts au format de l'API (to_dict)"""
+    return [{"id": row['id'], "title": row['title'], "content": row['content'],
+             "author_id": row['author_id'], "created_at": row['created_at'],
+             "likes_count": row.get('likes_count', 0), "comments_count": row.get('comments_count', 0)}
+            for row in dataset['posts']]
+
+
+def _flask_default(payload):
+    # flask.jsonify hors DEBUG : json.dumps compact, clés triées, ASCII échappé
+    return json.dumps(payload, separators=(',', ':'), sort_keys=True).encode('utf-8')
+
+
+def _encoders():
+    encoders = {"json": lambda payload: json.dumps(payload, ensure_ascii=False,
+                                                   separators=(',', ':')).encode('utf-8')}
+    if orjson is not None:
+        encoders["orjson"] = orjson.dumps
+    return encoders
+
+
+def _compressors():
+    compressors = {"gzip": lambda: zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)}
+    if brotli is not None:
+        compressors["br"] = lambda: brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+    return compressors
+
+
+def _compress(make, chunks):
+    """Compression incrémentale avec vidage périodique (même logique que compress_chunks)"""
+    stream = make()
+    is_brotli = not hasattr(stream, 'compress')
+    process = stream.process if is_brotli else stream.compress
+    total, pending = 0, 0
+    for chunk in chunks:
+        total += len(process(chunk))
+        pending += len(chunk)
+        if pending >= COMPRESSION_STREAM_FLUSH_BYTES:
+            total += len(stream.flush() if is_brotli else stream.flush(zlib.Z_SYNC_FLUSH))
+            pending = 0
+    total += len(stream.finish() if is_brotli else stream.flush(zlib.Z_FINISH))
+    return total
+
+
+def _timed(fn, repeat):
+    """Meilleur temps sur `repeat` exécutions, et le résultat de la dernière"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def measure(name, payload, streamed, repeat):
+    """Mesures d'une charge : un document (streamed=False) ou une liste envoyée en NDJSON"""
+    def encode_with(encoder):
+        if streamed:
+            return [encoder(row) + b'\n' for row in payload]
+        return [encoder(payload)]
+
+    reference = sum(len(chunk) for chunk in encode_with(_encoders()["json"]))
+    megabytes = reference / 1e6
+    results = []
+
+    def record(path, seconds, size):
+        results.append({"path": path, "bytes": size, "ratio": round(size / reference, 4),
+                        "ms_per_mb": round(seconds * 1000 / megabytes, 3)})
+
+    if not streamed:
+        seconds, body = _timed(lambda: _flask_default(payload), repeat)
+        record("flask.jsonify (avant)", seconds, len(body))
+    for encoder_name, encoder in _encoders().items():
+        seconds, chunks = _timed(lambda: encode_with(encoder), repeat)
+        record(encoder_name, seconds, sum(len(chunk) for chunk in chunks))
+        for compressor_name, make in _compressors().items():
+            seconds, size = _timed(lambda: _compress(make, encode_with(encoder)), repeat)
+            record(f"{encoder_name}+{compressor_name}", seconds, size)
+    return {"payload": name, "streamed": streamed, "json_bytes": reference, "results": results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help="meilleur temps sur N exécutions")
+    parser.add_argument('--output', help="fichier JSON du rapport (sinon sortie standard)")
+    args = parser.parse_args(argv)
+
+    posts = _posts(generate(**SCALES[args.scale], seed=args.seed))
+    page = {"success": True, "data": posts[:500], "next_cursor": "x" * 40}
+    full = {"success": True, "data": posts, "next_cursor": None}
+    report = {
+        "scale": args.scale,
+        "encoders": list(_encoders()),
+        "compressions": list(_compressors()),
+        "payloads": [measure("GET /posts?limit=500", page, False, args.repeat),
+                     measure("liste complète des posts", full, False, args.repeat),
+                     measure("flux NDJSON des posts", posts, True, args.repeat)],
+    }
+    for payload in report["payloads"]:
+        print(f"{payload['payload']} ({payload['json_bytes'] / 1e6:.2f} Mo)", file=sys.stderr)
+        for result in payload["results"]:
+            print(f"  {result['path']:<24} {result['ms_per_mb']:>9.2f} ms/Mo  ratio {result['ratio']:.3f}",
+                  file=sys.stderr)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
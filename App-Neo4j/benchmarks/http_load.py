@@ -0,0 +1,162 @@
+"""Générateur de charge HTTP/1.1 minimal (asyncio, connexions keep-alive, sans dépendance)"""
+import asyncio
+import json
+import random
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+# Requête du mélange de charge. `path` et `body` peuvent être des fonctions
+# appelées à chaque envoi (id à usage unique, email inédit). `endpoint` regroupe
+# les mesures par route ; `expect` liste les statuts acceptés (défaut : < 400).
+Request = namedtuple('Request', ['method', 'path', 'body', 'endpoint', 'expect', 'weight'],
+                     defaults=[None, None, None, 1])
+
+
+def percentile(sorted_values, p):
+    """Percentile par rang le plus proche sur une liste triée"""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies, errors, elapsed):
+    """Débit et percentiles (en millisecondes) d'une série de latences en secondes"""
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(values) / elapsed, 1) if elapsed else None,
+        "p50_ms": round(1000 * percentile(values, 50), 3) if values else None,
+        "p95_ms": round(1000 * percentile(values, 95), 3) if values else None,
+        "p99_ms": round(1000 * percentile(values, 99), 3) if values else None,
+        "max_ms": round(1000 * values[-1], 3) if values else None,
+    }
+
+
+class Connection:
+    """Connexion HTTP/1.1 persistante vers un hôte"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, body=None):
+        """Envoie une requête et retourne (statut, corps)"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        payload = b'' if body is None else json.dumps(body).encode('utf-8')
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n")
+        self.writer.write(head.encode('ascii') + payload)
+        await self.writer.drain()
+        try:
+            return await self._read_response()
+        except Exception:
+            await self.close()
+            raise
+
+    async def _read_response(self):
+        status_line = await self.reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                chunks.append(chunk[:-2])
+            body = b''.join(chunks)
+        else:
+            body = await self.reader.readexactly(int(headers.get('content-length', 0)))
+
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, body
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except Exception:
+                pass
+        self.reader = self.writer = None
+
+
+async def run_load(base_url, requests, concurrency, duration, warmup=1.0, seed=0):
+    """Lance `concurrency` clients keep-alive pendant `duration` secondes.
+
+    `requests` est une liste de Request (ou de tuples (méthode, chemin, corps))
+    tirés au hasard selon leur poids ; les réponses hors statuts attendus
+    comptent comme erreurs. Les `warmup` premières secondes ne sont pas
+    mesurées. Si des requêtes portent un `endpoint`, le résultat contient
+    aussi le détail par endpoint.
+    """
+    url = urlsplit(base_url)
+    rng = random.Random(seed)
+    requests = [Request(*request) for request in requests]
+    weights = [request.weight for request in requests]
+    latencies, errors = {}, {}
+    start = time.perf_counter()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+
+    async def client():
+        connection = Connection(url.hostname, url.port or 80)
+        try:
+            while True:
+                now = time.perf_counter()
+                if now >= stop_at:
+                    return
+                request = rng.choices(requests, weights)[0]
+                path = request.path() if callable(request.path) else request.path
+                body = request.body() if callable(request.body) else request.body
+                try:
+                    status, _ = await connection.request(request.method, path, body)
+                    ok = status in request.expect if request.expect else status < 400
+                except Exception:
+                    ok = False
+                if now < measure_from:
+                    continue
+                if ok:
+                    latencies.setdefault(request.endpoint, []).append(time.perf_counter() - now)
+                else:
+                    errors[request.endpoint] = errors.get(request.endpoint, 0) + 1
+        finally:
+            await connection.close()
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - measure_from
+    result = summarize([value for values in latencies.values() for value in values],
+                       sum(errors.values()), elapsed)
+    endpoints = sorted({request.endpoint for request in requests if request.endpoint is not None})
+    if endpoints:
+        result["endpoints"] = {endpoint: summarize(latencies.get(endpoint, []),
+                                                   errors.get(endpoint, 0), elapsed)
+                               for endpoint in endpoints}
+    return result
+
+
+async def fetch_json(base_url, path):
+    """GET ponctuel qui décode la réponse JSON (préparation des scénarios)"""
+    url = urlsplit(base_url)
+    connection = Connection(url.hostname, url.port or 80)
+    try:
+        status, body = await connection.request('GET', path)
+        return status, json.loads(body) if body else None
+    finally:
+        await connection.close()
@@ -0,0 +1,897 @@
+"""Graphe en mémoire qui remplace Neo4j pour les mesures hors base.
+
+MemoryGraph expose l'interface de DatabaseService utilisée par les modèles
+(run(...).data(), stream, transactions, pool_metrics) et répond aux requêtes
+nommées de models/queries.py : chaque constante est associée à une fonction
+Python qui reproduit son effet et ses colonnes de retour. Une requête
+inconnue lève NotImplementedError ; toute nouvelle constante doit donc être
+ajoutée ici pour rester mesurable sans serveur. Les requêtes compilées pour
+?fields= et ?include= sont évaluées à partir de leur projection.
+
+Les listes triées par (created_at, id) jouent le rôle des index de plage :
+une page keyset coûte une dichotomie, comme le seek de Neo4j. L'index
+plein texte post_search est remplacé par un services.search.InvertedIndex.
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+from models import queries
+from services.friend_graph import FRIENDSHIP_EDGES
+from services.metrics import observe_query
+from services.projection import compiled_queries
+from config import INCLUDE_LIST_LIMIT
+from benchmarks.social_graph import COMMENT_BULK_CREATE
+from services import importer, exporter
+from services.search import InvertedIndex, query_words
+
+# Requête de /test-db (app.py)
+NODE_COUNT = "MATCH (n) RETURN count(n) AS count"
+
+
+class MemoryResult:
+    """Résultat d'une requête : même usage que services.db_service.Result"""
+
+    def __init__(self, rows):
+        self._rows = rows
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def data(self):
+        return self._rows
+
+    def close(self):
+        pass
+
+
+class MemoryTransaction:
+    """Transaction factice : les requêtes sont appliquées immédiatement"""
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def run(self, query, parameters=None, **kwargs):
+        return self.graph.run(query, parameters, **kwargs)
+
+
+class _SortedIndex:
+    """Clés (created_at, id) triées ; la page keyset la plus récente d'abord"""
+
+    def __init__(self):
+        self.keys = []
+
+    def add(self, created_at, item_id):
+        insort(self.keys, (created_at, item_id))
+
+    def remove(self, created_at, item_id):
+        position = bisect_left(self.keys, (created_at, item_id))
+        if position < len(self.keys) and self.keys[position] == (created_at, item_id):
+            del self.keys[position]
+
+    def page(self, limit, after_ts=None, after_id=None):
+        end = len(self.keys) if after_ts is None else bisect_left(self.keys, (after_ts, after_id))
+        return [item_id for _, item_id in reversed(self.keys[max(0, end - limit):end])]
+
+
+class MemoryGraph:
+    """Stockage Python des noeuds User, Post, Comment et de leurs relations.
+
+    Toutes les requêtes sont sérialisées par un verrou : le serveur de test
+    peut être multi-thread sans incohérence.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.users = {}
+        self.users_by_email = {}
+        self.posts = {}
+        self.comments = {}
+        # Relations : auteur d'un post, posts par auteur, commentaires par post
+        self.author_of = {}
+        self.posts_by_author = {}
+        self.comments_by_post = {}
+        # FRIENDS_WITH : arêtes dans leur sens de création et voisins non orientés
+        self.edges = set()
+        self.friends = {}
+        # LIKES : noeuds aimés par utilisateur et utilisateurs par noeud aimé
+        self.likes = {}
+        self.liked_by = {}
+        self.user_index = _SortedIndex()
+        self.post_index = _SortedIndex()
+        self.comment_index = _SortedIndex()
+        self.search_index = InvertedIndex(('title', 'content'))
+        self.queries = 0
+        self._handlers = self._build_handlers()
+
+    def _build_handlers(self):
+        handlers = {
+            queries.USER_CREATE: self._user_create,
+            queries.USER_UPDATE: self._user_update,
+            queries.USER_DELETE_BY_ID: self._user_delete,
+            queries.USER_BEFRIEND: self._user_befriend,
+            queries.USER_UNFRIEND: self._user_unfriend,
+            queries.USER_BULK_CREATE: self._user_bulk_create,
+            queries.USER_BULK_BEFRIEND: self._user_bulk_befriend,
+            queries.USER_IS_FRIEND_WITH: self._user_is_friend_with,
+            queries.USER_FRIENDS: self._user_friends,
+            queries.USER_MUTUAL_FRIENDS: self._user_mutual_friends,
+            queries.USER_RECOMMENDATIONS: self._user_recommendations,
+            queries.USER_FIND_MANY: self._user_find_many,
+            queries.USER_FIND_BY_ID: self._user_find_by_id,
+            queries.USER_FIND_BY_EMAIL: self._user_find_by_email,
+            queries.USER_VERSION: self._user_version,
+            queries.USER_FRIENDS_VERSION: self._user_friends_version,
+            queries.USER_ALL: self._user_all,
+            queries.POST_CREATE: self._post_create,
+            queries.POST_UPDATE: self._post_update,
+            queries.POST_DELETE_BY_ID: self._post_delete,
+            queries.POST_LIKE: self._post_like,
+            queries.POST_UNLIKE: self._post_unlike,
+            queries.POST_BULK_CREATE: self._post_bulk_create,
+            queries.POST_BULK_LIKE: self._post_bulk_like,
+            queries.POST_LIKES_COUNT: self._post_likes_count,
+            queries.POST_COMMENTS: self._post_comments,
+            queries.POST_FIND_MANY: self._post_find_many,
+            queries.POST_VIEWER_STATE: self._post_viewer_state,
+            queries.POST_FIND_BY_ID: self._post_find_by_id,
+            queries.POST_VERSION: self._post_version,
+            queries.POST_COMMENTS_VERSION: self._post_comments_version,
+            queries.POST_ALL: self._post_all,
+            queries.POST_BY_AUTHOR: self._post_by_author,
+            queries.COMMENT_CREATE: self._comment_create,
+            queries.COMMENT_LIKE: self._comment_like,
+            queries.COMMENT_UNLIKE: self._comment_unlike,
+            queries.COMMENT_DELETE_FROM_POST: self._comment_delete_from_post,
+            queries.COMMENT_DELETE_BY_ID: self._comment_delete_by_id,
+            queries.COMMENT_FIND_BY_ID: self._comment_find_by_id,
+            queries.COMMENT_UPDATE: self._comment_update,
+            queries.COMMENT_THREAD: self._comment_thread,
+            queries.COMMENT_ALL: self._comment_all,
+            queries.COMMENT_VERSION: self._comment_version,
+            queries.FEED_TIMELINE: self._feed_timeline,
+            queries.FEED_AUTHOR_RECENT: self._feed_author_recent,
+            COMMENT_BULK_CREATE: self._comment_bulk_create,
+            exporter.EXPORT_USERS: self._export_users,
+            exporter.EXPORT_POSTS: self._export_posts,
+            exporter.EXPORT_COMMENTS: self._export_comments,
+            exporter.EXPORT_FRIENDSHIPS: self._export_friendships,
+            exporter.EXPORT_LIKES: self._export_likes,
+            exporter.EXPORT_COMMENT_LIKES: self._export_comment_likes,
+            exporter.EXPORT_COUNTS: self._export_counts,
+            importer.IMPORT_USERS: self._import_users,
+            importer.IMPORT_POSTS: self._import_posts,
+            importer.IMPORT_FRIENDSHIPS: self._import_friendships,
+            importer.IMPORT_LIKES: self._import_likes,
+            importer.IMPORT_COMMENTS: self._import_comments,
+            FRIENDSHIP_EDGES: self._friendship_edges,
+            NODE_COUNT: self._node_count,
+        }
+        # Les deux variantes keyset (première page, pages suivantes) partagent une fonction
+        for variants, handler in ((queries.USER_PAGE, self._user_page),
+                                  (queries.POST_PAGE, self._post_page),
+                                  (queries.COMMENT_PAGE, self._comment_page),
+                                  (queries.POST_COMMENTS_PAGE, self._post_comments_page),
+                                  (queries.POST_SEARCH, self._post_search)):
+            for query in variants:
+                handlers[query] = handler
+        return handlers
+
+    # --- Interface de DatabaseService ---
+
+    def run(self, query, parameters=None, **kwargs):
+        """Exécute une requête nommée ; le résultat s'utilise comme celui de Neo4j"""
+        handler = self._handlers.get(query) or self._projected_handler(query)
+        if handler is None:
+            first_line = next((line.strip() for line in query.splitlines() if line.strip()), "")
+            raise NotImplementedError(f"Requête non prise en charge par le graphe en mémoire: {first_line}")
+        params = dict(parameters or {}, **kwargs)
+        started = time.perf_counter()
+        with self._lock:
+            self.queries += 1
+            rows = handler(**params)
+        # Mêmes métriques que DatabaseService : /metrics reste utilisable hors base
+        observe_query(query, time.perf_counter() - started, rows=len(rows))
+        return MemoryResult(rows)
+
+    def stream(self, query, parameters=None, **kwargs):
+        for row in self.run(query, parameters, **kwargs):
+            yield row
+
+    def read_transaction(self, work, *args, **kwargs):
+        return work(MemoryTransaction(self), *args, **kwargs)
+
+    def write_transaction(self, work, *args, **kwargs):
+        return work(MemoryTransaction(self), *args, **kwargs)
+
+    def bootstrap_schema(self, force=False):
+        return {"version": None, "applied": [], "errors": []}
+
+    def warm_up(self, connections=0):
+        return 0
+
+    def pool_metrics(self):
+        return {"backend": "memory", "queries": self.queries}
+
+    def close(self):
+        pass
+
+    def get_db(self):
+        return self
+
+    # --- Outils ---
+
+    @staticmethod
+    def _copy(node):
+        return dict(node) if node is not None else None
+
+    def _neighbours(self, user_id):
+        return self.friends.get(user_id, ())
+
+    @staticmethod
+    def _touch(node, prefix=''):
+        # Équivalent de queries.touch
+        if node is not None:
+            node[prefix + 'revision'] = (node.get(prefix + 'revision') or 0) + 1
+            node[prefix + 'updated_at'] = time.time()
+
+    @staticmethod
+    def _version(node, prefix=''):
+        return {"revision": node.get(prefix + 'revision') or 0,
+                "updated_at": node.get(prefix + 'updated_at') or node['created_at']}
+
+    def _members_version(self, node, prefix, members):
+        return [dict(self._version(node, prefix), count=len(members),
+                     members_revision=sum(member.get('revision') or 0 for member in members),
+                     members_updated_at=max((member.get('updated_at') or member['created_at']
+                                             for member in members), default=None))]
+
+    def _link_friends(self, a, b):
+        self.edges.add((a, b))
+        self.friends.setdefault(a, set()).add(b)
+        self.friends.setdefault(b, set()).add(a)
+        self._touch(self.users.get(a), 'friends_')
+        self._touch(self.users.get(b), 'friends_')
+
+    def _unlink_friends(self, a, b):
+        existed = (a, b) in self.edges or (b, a) in self.edges
+        self.edges.discard((a, b))
+        self.edges.discard((b, a))
+        self.friends.get(a, set()).discard(b)
+        self.friends.get(b, set()).discard(a)
+        if existed:
+            self._touch(self.users.get(a), 'friends_')
+            self._touch(self.users.get(b), 'friends_')
+        return existed
+
+    def _add_like(self, user_id, node):
+        self.likes.setdefault(user_id, set()).add(node['id'])
+        self.liked_by.setdefault(node['id'], set()).add(user_id)
+        node['likes_count'] = (node.get('likes_count') or 0) + 1
+        self._touch(node)
+
+    def _remove_like(self, user_id, node):
+        self.likes.get(user_id, set()).discard(node['id'])
+        self.liked_by.get(node['id'], set()).discard(user_id)
+        node['likes_count'] = (node['likes_count'] if node.get('likes_count') is not None else 1) - 1
+        self._touch(node)
+
+    def _liked(self, user_id, node_id):
+        return node_id in self.likes.get(user_id, ())
+
+    def _liked_node(self, node_id):
+        return self.posts.get(node_id) or self.comments.get(node_id)
+
+    def _post_row(self, post_id):
+        author = self.author_of.get(post_id)
+        return {"p": self._copy(self.posts[post_id]), "author_id": author}
+
+    def _post_projection(self, post_id):
+        # Même forme que post_projection() de models/queries.py
+        post = self.posts[post_id]
+        return {"post": dict(post, author_id=self.author_of.get(post_id),
+                             likes_count=post.get('likes_count') or 0,
+                             comments_count=post.get('comments_count') or 0)}
+
+    def _comment_values(self, comment_id):
+        # comment_projection : le chemin matérialisé n'est pas renvoyé
+        comment = self.comments[comment_id]
+        values = {key: value for key, value in comment.items() if key != 'path'}
+        values['likes_count'] = comment.get('likes_count') or 0
+        return values
+
+    def _comment_projection(self, comment_id):
+        return {"comment": self._comment_values(comment_id)}
+
+    # --- Projections (?fields=, ?include=, voir services/projection.py) ---
+
+    def _projected_handler(self, query):
+        compiled = compiled_queries.get(query)
+        if compiled is None:
+            return None
+        kind, projection = compiled
+        entity = projection.entity
+        nodes, index = {'user': (self.users, self.user_index), 'post': (self.posts, self.post_index),
+                        'comment': (self.comments, self.comment_index)}[entity]
+
+        def handler(id=None, ids=None, user_id=None, limit=None, after_ts=None, after_id=None):
+            if kind == 'PAGE':
+                ids, extra = index.page(limit, after_ts, after_id), ('created_at',)
+            elif kind == 'FIND_BY_ID':
+                ids, extra = [id] if id in nodes else [], ()
+            elif kind == 'FIND_MANY':
+                ids, extra = [item_id for item_id in ids if item_id in nodes], ()
+            elif kind == 'BY_AUTHOR':
+                ids, extra = [post_id for _, post_id in self.posts_by_author.get(user_id, ())], ()
+            else:
+                ids, extra = list(nodes), ()
+            return [{entity: self._project(projection, item_id, extra)} for item_id in ids]
+
+        return handler
+
+    def _project(self, projection, item_id, extra):
+        entity = projection.entity
+        if entity == 'user':
+            node = self.users[item_id]
+            values = dict(node)
+        elif entity == 'post':
+            node = self.posts[item_id]
+            values = dict(node, author_id=self.author_of.get(item_id))
+        else:
+            node = self.comments[item_id]
+            values = dict(node)
+        for counter in ('likes_count', 'comments_count'):
+            if counter in values:
+                values[counter] = values[counter] or 0
+        result = {name: values.get(name) for name in set(projection.fields) | set(extra)}
+
+        for name in projection.includes:
+            if name == 'posts':
+                result[name] = [{key: self.posts[post_id].get(key) or (0 if key.endswith('_count') else None)
+                                 for key in ('id', 'title', 'created_at', 'likes_count', 'comments_count')}
+                                for _, post_id in self.posts_by_author.get(item_id, ())][:INCLUDE_LIST_LIMIT]
+            elif name == 'posts_count':
+                result[name] = len(self.posts_by_author.get(item_id, ()))
+            elif name == 'friends_count':
+                result[name] = len(self._neighbours(item_id))
+            elif name == 'author':
+                author_id = self.author_of.get(item_id) if entity == 'post' else node.get('author_id')
+                result[name] = self._copy(self.users.get(author_id))
+            elif name == 'comments':
+                result[name] = [self._comment_values(comment_id)
+                                for comment_id in self.comments_by_post.get(item_id, ())][:INCLUDE_LIST_LIMIT]
+            elif name == 'post':
+                post = self.posts.get(node.get('post_id'))
+                result[name] = {"id": post['id'], "title": post['title']} if post else None
+        return result
+
+    # --- Utilisateurs ---
+
+    def _user_create(self, id, name, email, created_at):
+        self.users[id] = {"id": id, "name": name, "email": email, "created_at": created_at}
+        self.users_by_email[email] = id
+        self.user_index.add(created_at, id)
+        return []
+
+    def _user_update(self, id, name, email):
+        user = self.users.get(id)
+        if user is None:
+            return []
+        if self.users_by_email.get(user['email']) == id:
+            del self.users_by_email[user['email']]
+        user.update(name=name, email=email)
+        self._touch(user)
+        self.users_by_email[email] = id
+        return [{"u": self._copy(user)}]
+
+    def _user_delete(self, id):
+        user = self.users.pop(id, None)
+        if user is None:
+            return []
+        if self.users_by_email.get(user['email']) == id:
+            del self.users_by_email[user['email']]
+        self.user_index.remove(user['created_at'], id)
+        # DETACH DELETE : les posts restent, sans auteur
+        post_ids = [key for _, key in self.posts_by_author.pop(id, [])]
+        for post_id in post_ids:
+            self.author_of[post_id] = None
+        liked_post_ids = []
+        for node_id in list(self.likes.get(id, ())):
+            node = self._liked_node(node_id)
+            if node is not None:
+                self._remove_like(id, node)
+                if node_id in self.posts:
+                    liked_post_ids.append(node_id)
+        self.likes.pop(id, None)
+        for friend_id in list(self._neighbours(id)):
+            self._unlink_friends(id, friend_id)
+        self.friends.pop(id, None)
+        return [{"email": user['email'], "post_ids": post_ids, "liked_post_ids": liked_post_ids}]
+
+    def _befriend(self, user_id, friend_id):
+        user_found, friend_found = user_id in self.users, friend_id in self.users
+        existed = user_found and friend_found and friend_id in self._neighbours(user_id)
+        if user_found and friend_found and not existed:
+            self._link_friends(user_id, friend_id)
+        return {"user_found": user_found, "friend_found": friend_found, "existed": existed}
+
+    def _user_befriend(self, user_id, friend_id):
+        return [self._befriend(user_id, friend_id)]
+
+    def _user_unfriend(self, user_id, friend_id):
+        user_found, friend_found = user_id in self.users, friend_id in self.users
+        existed = user_found and friend_found and self._unlink_friends(user_id, friend_id)
+        return [{"user_found": user_found, "friend_found": friend_found, "existed": existed}]
+
+    def _user_bulk_create(self, rows):
+        results = []
+        for row in rows:
+            existing = self.users_by_email.get(row['email'])
+            if existing is None:
+                self._user_create(row['id'], row['name'], row['email'], row['created_at'])
+                existing = row['id']
+            results.append({"idx": row['idx'], "id": row['id'], "created": existing == row['id']})
+        return results
+
+    def _user_bulk_befriend(self, rows):
+        return [dict(self._befriend(row['user_id'], row['friend_id']), idx=row['idx']) for row in rows]
+
+    def _user_is_friend_with(self, user_id, friend_id):
+        if user_id in self.users and friend_id in self._neighbours(user_id):
+            return [{"u2": self._copy(self.users[friend_id])}]
+        return []
+
+    def _user_version(self, id):
+        return [self._version(self.users[id])] if id in self.users else []
+
+    def _user_friends_version(self, id):
+        if id not in self.users:
+            return []
+        return self._members_version(self.users[id], 'friends_',
+                                     [self.users[friend_id] for friend_id in self._neighbours(id)])
+
+    def _user_friends(self, id):
+        return [{"user": self._copy(self.users[friend_id])} for friend_id in self._neighbours(id)]
+
+    def _user_mutual_friends(self, user_id, other_id):
+        if user_id == other_id:
+            return []
+        mutual = set(self._neighbours(user_id)) & set(self._neighbours(other_id))
+        return [{"user": self._copy(self.users[user])} for user in mutual]
+
+    def _user_recommendations(self, id, limit):
+        friends = self._neighbours(id)
+        counts = {}
+        for friend_id in friends:
+            for candidate in self._neighbours(friend_id):
+                if candidate != id and candidate not in friends:
+                    counts[candidate] = counts.get(candidate, 0) + 1
+        best = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [{"id": candidate, "common_friends": count} for candidate, count in best]
+
+    def _user_find_many(self, ids):
+        return [{"u": self._copy(self.users[user_id])} for user_id in ids if user_id in self.users]
+
+    def _user_find_by_id(self, id):
+        return self._user_find_many([id])
+
+    def _user_find_by_email(self, email):
+        user_id = self.users_by_email.get(email)
+        return self._user_find_many([user_id]) if user_id is not None else []
+
+    def _user_all(self):
+        return [{"user": self._copy(user)} for user in self.users.values()]
+
+    def _user_page(self, limit, after_ts=None, after_id=None):
+        return [{"user": self._copy(self.users[user_id])}
+                for user_id in self.user_index.page(limit, after_ts, after_id)]
+
+    # --- Posts ---
+
+    def _create_post(self, author_id, id, title, content, created_at):
+        self.posts[id] = {"id": id, "title": title, "content": content, "created_at": created_at,
+                          "likes_count": 0, "comments_count": 0}
+        self.author_of[id] = author_id
+        insort(self.posts_by_author.setdefault(author_id, []), (created_at, id))
+        self.post_index.add(created_at, id)
+        self.search_index.add(id, self.posts[id])
+
+    def _post_create(self, author_id, id, title, content, created_at, fanout_limit):
+        if author_id not in self.users:
+            return []
+        self._create_post(author_id, id, title, content, created_at)
+        friends = self._neighbours(author_id)
+        return [{"p": self._copy(self.posts[id]), "friend_count": len(friends),
+                 "friend_ids": list(friends) if len(friends) < fanout_limit else None}]
+
+    def _post_update(self, id, title, content):
+        post = self.posts.get(id)
+        if post is None:
+            return []
+        post.update(title=title, content=content)
+        self._touch(post)
+        self.search_index.add(id, post)
+        return [{"p": self._copy(post)}]
+
+    def _post_delete(self, id):
+        post = self.posts.pop(id, None)
+        if post is None:
+            return [{"deleted": 0}]
+        self.post_index.remove(post['created_at'], id)
+        self.search_index.remove(id)
+        author_id = self.author_of.pop(id, None)
+        if author_id is not None:
+            self.posts_by_author[author_id].remove((post['created_at'], id))
+        for user_id in self.liked_by.pop(id, ()):
+            self.likes.get(user_id, set()).discard(id)
+        for comment_id in self.comments_by_post.pop(id, ()):
+            comment = self.comments.pop(comment_id)
+            self.comment_index.remove(comment['created_at'], comment_id)
+            for user_id in self.liked_by.pop(comment_id, ()):
+                self.likes.get(user_id, set()).discard(comment_id)
+        return [{"deleted": 1}]
+
+    def _like(self, node, user_id):
+        found, user_found = node is not None, user_id in self.users
+        existed = found and user_found and self._liked(user_id, node['id'])
+        if found and user_found and not existed:
+            self._add_like(user_id, node)
+        return found, user_found, existed
+
+    def _unlike(self, node, user_id):
+        found, user_found = node is not None, user_id in self.users
+        existed = found and user_found and self._liked(user_id, node['id'])
+        if existed:
+            self._remove_like(user_id, node)
+        return found, user_found, existed
+
+    def _post_like(self, post_id, user_id):
+        found, user_found, existed = self._like(self.posts.get(post_id), user_id)
+        return [{"post_found": found, "user_found": user_found, "existed": existed}]
+
+    def _post_unlike(self, post_id, user_id):
+        found, user_found, existed = self._unlike(self.posts.get(post_id), user_id)
+        return [{"post_found": found, "user_found": user_found, "existed": existed}]
+
+    def _post_bulk_create(self, rows):
+        results = []
+        for row in rows:
+            author_found = row['author_id'] in self.users
+            if author_found:
+                self._create_post(row['author_id'], row['id'], row['title'], row['content'],
+                                  row['created_at'])
+            results.append({"idx": row['idx'], "id": row['id'], "author_found": author_found})
+        return results
+
+    def _post_bulk_like(self, rows):
+        results = []
+        for row in rows:
+            found, user_found, existed = self._like(self.posts.get(row['post_id']), row['user_id'])
+            results.append({"idx": row['idx'], "post_found": found, "user_found": user_found,
+                            "existed": existed})
+        return results
+
+    def _post_likes_count(self, id):
+        post = self.posts.get(id)
+        return [{"likes_count": post.get('likes_count') or 0}] if post is not None else []
+
+    def _post_comments(self, id):
+        return [self._comment_projection(comment_id) for comment_id in self.comments_by_post.get(id, ())]
+
+    def _post_find_many(self, ids):
+        return [self._post_row(post_id) for post_id in ids if post_id in self.posts]
+
+    def _post_viewer_state(self, user_id, post_ids):
+        viewer_found = user_id in self.users
+        liked = self.likes.get(user_id, ())
+        friends = self._neighbours(user_id)
+        rows = []
+        for post_id in post_ids:
+            author_id = self.author_of.get(post_id) if post_id in self.posts else None
+            rows.append({
+                "post_id": post_id, "viewer_found": viewer_found, "post_found": post_id in self.posts,
+                "author_id": author_id,
+                "liked": viewer_found and post_id in liked,
+                "friend_of_author": viewer_found and author_id is not None and author_id != user_id
+                                    and author_id in friends,
+            })
+        return rows
+
+    def _post_version(self, id):
+        return [self._version(self.posts[id])] if id in self.posts else []
+
+    def _post_comments_version(self, id):
+        if id not in self.posts:
+            return []
+        return self._members_version(self.posts[id], '', [self.comments[comment_id] for comment_id
+                                                          in self.comments_by_post.get(id, ())])
+
+    def _post_find_by_id(self, id):
+        return self._post_find_many([id])
+
+    def _post_all(self):
+        return [self._post_projection(post_id) for post_id in self.posts]
+
+    def _post_by_author(self, user_id):
+        return [self._post_projection(post_id) for _, post_id in self.posts_by_author.get(user_id, ())]
+
+    def _post_page(self, limit, after_ts=None, after_id=None):
+        return [self._post_projection(post_id) for post_id in self.post_index.page(limit, after_ts, after_id)]
+
+    def _post_search(self, text, limit, after_ts=None, after_id=None):
+        analyze = self.search_index.analyze
+        terms = {term for word in query_words(text) for term in analyze(word)}
+        return [dict(self._post_projection(post_id), score=score)
+                for score, post_id in self.search_index.search(terms, limit, after_ts, after_id)]
+
+    # --- Commentaires ---
+
+    @staticmethod
+    def _segment(created_at, comment_id):
+        # Équivalent de queries.comment_segment
+        return f"{int(created_at * 1000):015d}-{comment_id}"
+
+    def _path(self, comment):
+        return comment.get('path') or self._segment(comment['created_at'], comment['id'])
+
+    def _create_comment(self, id, content, author_id, post_id, created_at, parent_id=None):
+        segment = self._segment(created_at, id)
+        path = segment if parent_id is None else f"{self._path(self.comments[parent_id])}/{segment}"
+        self.comments[id] = {"id": id, "content": content, "author_id": author_id, "post_id": post_id,
+                             "parent_id": parent_id, "created_at": created_at, "likes_count": 0,
+                             "path": path}
+        self.comments_by_post.setdefault(post_id, []).append(id)
+        self.comment_index.add(created_at, id)
+        post = self.posts[post_id]
+        post['comments_count'] = (post.get('comments_count') or 0) + 1
+        self._touch(post)
+
+    def _comment_create(self, id, content, author_id, post_id, created_at, parent_id=None):
+        post_found, user_found = post_id in self.posts, author_id in self.users
+        parent_found = parent_id is None or self.comments.get(parent_id, {}).get('post_id') == post_id
+        if post_found and user_found and parent_found:
+            self._create_comment(id, content, author_id, post_id, created_at, parent_id)
+        return [{"post_found": post_found, "user_found": user_found, "parent_found": parent_found}]
+
+    def _comment_bulk_create(self, rows):
+        results = []
+        for row in rows:
+            if row['post_id'] in self.posts and row['author_id'] in self.users:
+                self._create_comment(row['id'], row['content'], row['author_id'], row['post_id'],
+                                     row['created_at'])
+                results.append({"idx": row['idx']})
+        return results
+
+    def _comment_like(self, comment_id, user_id):
+        found, user_found, existed = self._like(self.comments.get(comment_id), user_id)
+        return [{"comment_found": found, "user_found": user_found, "existed": existed}]
+
+    def _comment_unlike(self, comment_id, user_id):
+        found, user_found, existed = self._unlike(self.comments.get(comment_id), user_id)
+        return [{"comment_found": found, "user_found": user_found, "existed": existed}]
+
+    def _comment_delete_from_post(self, post_id, comment_id):
+        post, comment = self.posts.get(post_id), self.comments.get(comment_id)
+        belongs = comment is not None and comment['post_id'] == post_id
+        if post is not None and belongs:
+            self._remove_subtree(comment, post)
+        return [{"post_found": post is not None, "comment_found": comment is not None, "belongs": belongs}]
+
+    def _subtree(self, comment):
+        prefix = self._path(comment) + '/'
+        return [comment] + sorted((other for other in self.comments.values()
+                                   if (other.get('path') or '').startswith(prefix)),
+                                  key=lambda other: other['path'])
+
+    def _remove_subtree(self, comment, post):
+        removed = self._subtree(comment)
+        for node in removed:
+            del self.comments[node['id']]
+            self.comment_index.remove(node['created_at'], node['id'])
+            siblings = self.comments_by_post.get(node['post_id'], [])
+            if node['id'] in siblings:
+                siblings.remove(node['id'])
+            for user_id in self.liked_by.pop(node['id'], ()):
+                self.likes.get(user_id, set()).discard(node['id'])
+        if post is not None:
+            count = post['comments_count'] if post.get('comments_count') is not None else len(removed)
+            post['comments_count'] = count - len(removed)
+            self._touch(post)
+        return len(removed)
+
+    def _comment_delete_by_id(self, id):
+        comment = self.comments.get(id)
+        if comment is None:
+            return []
+        # Seul un commentaire relié au post (HAS_COMMENT) change son compteur
+        post = self.posts.get(comment['post_id']) if id in self.comments_by_post.get(comment['post_id'], ()) else None
+        deleted = self._remove_subtree(comment, post)
+        return [{"post_id": comment['post_id'], "deleted": deleted}]
+
+    def _comment_find_by_id(self, id):
+        return [{"c": self._copy(self.comments[id])}] if id in self.comments else []
+
+    def _comment_update(self, id, content):
+        comment = self.comments.get(id)
+        if comment is None:
+            return []
+        comment['content'] = content
+        self._touch(comment)
+        return [{"c": self._copy(comment)}]
+
+    def _comment_thread(self, id, limit):
+        if id not in self.comments:
+            return []
+        replies = self._subtree(self.comments[id])[1:limit + 1]
+        return [{"root": self._comment_values(id),
+                 "replies": [self._comment_values(reply['id']) for reply in replies]}]
+
+    def _comment_version(self, id):
+        return [self._version(self.comments[id])] if id in self.comments else []
+
+    def _comment_all(self):
+        return [self._comment_projection(comment_id) for comment_id in self.comments]
+
+    def _post_comments_page(self, post_id, limit, after_ts=None, after_id=None):
+        comments = sorted((self.comments[comment_id] for comment_id in self.comments_by_post.get(post_id, ())),
+                          key=lambda comment: (comment['created_at'], comment['id']), reverse=True)
+        if after_ts is not None:
+            comments = [comment for comment in comments
+                        if (comment['created_at'], comment['id']) < (after_ts, after_id)]
+        return [self._comment_projection(comment['id']) for comment in comments[:limit]]
+
+    def _comment_page(self, limit, after_ts=None, after_id=None):
+        return [self._comment_projection(comment_id)
+                for comment_id in self.comment_index.page(limit, after_ts, after_id)]
+
+    # --- Export du graphe (services/exporter.py) ---
+
+    @staticmethod
+    def _in_range(ids, lo, hi):
+        return sorted(item_id for item_id in ids if lo <= item_id < hi)
+
+    def _export_users(self, lo, hi):
+        return [{"row": {key: self.users[user_id].get(key) for key in ('id', 'name', 'email', 'created_at')}}
+                for user_id in self._in_range(self.users, lo, hi)]
+
+    def _export_posts(self, lo, hi):
+        rows = []
+        for post_id in self._in_range(self.posts, lo, hi):
+            post = self.posts[post_id]
+            rows.append({"row": {"id": post_id, "author_id": self.author_of.get(post_id), "title": post['title'],
+                                 "content": post['content'], "created_at": post['created_at'],
+                                 "likes_count": post.get('likes_count') or 0,
+                                 "comments_count": post.get('comments_count') or 0}})
+        return rows
+
+    def _export_comments(self, lo, hi):
+        rows = []
+        for comment_id in self._in_range(self.comments, lo, hi):
+            comment = self.comments[comment_id]
+            # post_id de la relation HAS_COMMENT, comme EXPORT_COMMENTS
+            post_id = comment['post_id'] if comment_id in self.comments_by_post.get(comment['post_id'], ()) else None
+            rows.append({"row": {"id": comment_id, "post_id": post_id,
+                                 "author_id": comment['author_id'] if comment['author_id'] in self.users else None,
+                                 "parent_id": comment.get('parent_id'), "content": comment['content'],
+                                 "created_at": comment['created_at'],
+                                 "likes_count": comment.get('likes_count') or 0}})
+        return rows
+
+    def _export_friendships(self, lo, hi):
+        return [{"row": {"user_id": a, "friend_id": b}} for a, b in sorted(self.edges) if lo <= a < hi]
+
+    def _export_liked(self, lo, hi, nodes, column):
+        return [{"row": {"user_id": user_id, column: node_id}}
+                for user_id in self._in_range(self.likes, lo, hi)
+                for node_id in sorted(self.likes[user_id]) if node_id in nodes]
+
+    def _export_likes(self, lo, hi):
+        return self._export_liked(lo, hi, self.posts, 'post_id')
+
+    def _export_comment_likes(self, lo, hi):
+        return self._export_liked(lo, hi, self.comments, 'comment_id')
+
+    def _export_counts(self):
+        liked = [node_id for node_ids in self.likes.values() for node_id in node_ids]
+        return [{"users": len(self.users), "posts": len(self.posts), "comments": len(self.comments),
+                 "friendships": len(self.edges),
+                 "likes": sum(1 for node_id in liked if node_id in self.posts),
+                 "comment_likes": sum(1 for node_id in liked if node_id in self.comments)}]
+
+    # --- Import de fichiers (services/importer.py) ---
+    # Les compteurs sont tenus à jour au fil de l'eau : même état final qu'après la réconciliation
+
+    def _import_users(self, rows):
+        for row in rows:
+            if row['id'] not in self.users:
+                self._user_create(row['id'], row['name'], row['email'], row['created_at'])
+        return [{"written": len(rows)}]
+
+    def _import_posts(self, rows):
+        written = [row for row in rows if row['author_id'] in self.users]
+        for row in written:
+            if row['id'] not in self.posts:
+                self._create_post(row['author_id'], row['id'], row['title'], row['content'], row['created_at'])
+        return [{"written": len(written)}]
+
+    def _import_friendships(self, rows):
+        written = [row for row in rows if row['user_id'] in self.users and row['friend_id'] in self.users]
+        for row in written:
+            self._befriend(row['user_id'], row['friend_id'])
+        return [{"written": len(written)}]
+
+    def _import_likes(self, rows):
+        written = [row for row in rows if row['user_id'] in self.users and row['post_id'] in self.posts]
+        for row in written:
+            self._like(self.posts[row['post_id']], row['user_id'])
+        return [{"written": len(written)}]
+
+    def _import_comments(self, rows):
+        written = 0
+        for row in rows:
+            parent = self.comments.get(row['parent_id']) if row['parent_id'] is not None else None
+            if (row['post_id'] not in self.posts or row['author_id'] not in self.users
+                    or (row['parent_id'] is not None and (parent or {}).get('post_id') != row['post_id'])):
+                continue
+            written += 1
+            if row['id'] not in self.comments:
+                self._create_comment(row['id'], row['content'], row['author_id'], row['post_id'],
+                                     row['created_at'], row['parent_id'])
+        return [{"written": written}]
+
+    # --- Fil d'actualité ---
+
+    def _latest_posts(self, author_id, length):
+        return [[created_at, post_id]
+                for created_at, post_id in reversed(self.posts_by_author.get(author_id, [])[-length:])]
+
+    def _feed_timeline(self, id, fanout_limit, length):
+        if id not in self.users:
+            return []
+        rows = []
+        for friend_id in self._neighbours(id):
+            celebrity = len(self._neighbours(friend_id)) >= fanout_limit
+            rows.append({"friend_id": friend_id, "celebrity": celebrity,
+                         "posts": [] if celebrity else self._latest_posts(friend_id, length)})
+        return rows
+
+    def _feed_author_recent(self, id, length):
+        return [{"posts": self._latest_posts(id, length) if id in self.users else []}]
+
+    # --- Divers ---
+
+    def _friendship_edges(self):
+        return [{"a": a, "b": b} for a, b in self.edges]
+
+    def _node_count(self):
+        return [{"count": len(self.users) + len(self.posts) + len(self.comments)}]
+
+
+class AsyncMemoryGraph:
+    """Façade asynchrone de MemoryGraph, même interface que AsyncDatabaseService"""
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    async def run(self, query, parameters=None, **kwargs):
+        return self.graph.run(query, parameters, **kwargs)
+
+    async def stream(self, query, parameters=None, **kwargs):
+        for row in self.graph.stream(query, parameters, **kwargs):
+            yield row
+
+    async def close(self):
+        pass
+
+
+def install(graph):
+    """Fait servir `graph` par get_db() dans le processus courant (modèles synchrones)"""
+    from services.db_service import db_service
+    db_service.get_db = lambda: graph
+    return graph
+
+
+def install_async(graph):
+    """Fait servir `graph` par get_async_db() (couche aio)"""
+    import aio.db
+    aio.db.async_db_service = AsyncMemoryGraph(graph)
+    return graph
@@ -0,0 +1,61 @@
+"""Sert l'API sur un jeu de données synthétique, en mémoire ou dans un Neo4j local.
+
+    python -m benchmarks.serve --backend memory --scale small --port 5055
+    python -m benchmarks.serve --backend neo4j --scale medium --app asgi
+
+Le jeu de données est régénéré à l'identique depuis (--scale, --seed) : le
+générateur de charge connaît donc les id sans interroger l'API. Avec
+--backend neo4j, la base désignée par NEO4J_URI est chargée si elle ne
+contient pas déjà ce jeu de données.
+"""
+import argparse
+import json
+import sys
+from benchmarks.social_graph import SCALES, generate, seed, summary
+
+
+def prepare(backend, dataset, app_kind='wsgi', batch_size=5000):
+    """Branche le stockage demandé et y charge le jeu de données ; retourne le rapport de chargement"""
+    from models import queries
+
+    if backend == 'memory':
+        from benchmarks.memory_graph import MemoryGraph, install, install_async
+        graph = install(MemoryGraph())
+        if app_kind == 'asgi':
+            install_async(graph)
+    else:
+        from services.db_service import get_db
+        graph = get_db()
+        graph.bootstrap_schema()
+        # Id déterministes : le premier utilisateur suffit à reconnaître un jeu déjà chargé
+        if graph.run(queries.USER_FIND_BY_ID, id=dataset['users'][0]['id']).data():
+            return {"skipped": "jeu de données déjà présent"}
+    return seed(graph, dataset, batch_size=batch_size)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backend', choices=['memory', 'neo4j'], default='memory')
+    parser.add_argument('--app', choices=['wsgi', 'asgi'], default='wsgi')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5055)
+    args = parser.parse_args(argv)
+
+    dataset = generate(**SCALES[args.scale], seed=args.seed)
+    report = prepare(args.backend, dataset, args.app)
+    print(json.dumps({"dataset": summary(dataset), "seed_failures": report}), file=sys.stderr, flush=True)
+
+    if args.app == 'asgi':
+        import uvicorn
+        from aio import create_app
+        uvicorn.run(create_app(), host=args.host, port=args.port, log_level='warning')
+    else:
+        from werkzeug.serving import make_server
+        from app import app
+        make_server(args.host, args.port, app, threaded=True).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""Générateur déterministe de graphes sociaux à loi de puissance.
+
+Chaque utilisateur reçoit un poids w_i = (i + 1) ** (-1 / (exponent - 1)) :
+le nombre d'amis, de posts, de likes donnés et la popularité suivent alors
+une loi de puissance d'exposant `exponent` (modèle de Chung-Lu). Les
+amitiés sont tirées en choisissant leurs deux extrémités proportionnellement
+aux poids ; les likes et commentaires visent les posts des auteurs
+populaires. Avec la même graine, le jeu de données (id compris) est
+identique d'une exécution à l'autre.
+
+    dataset = generate(**SCALES['small'], seed=1)
+    seed(get_db(), dataset)
+"""
+import random
+import uuid
+from itertools import accumulate
+from models import queries
+from services.batching import run_batches
+
+# Tailles prédéfinies (utilisateurs, amis moyens, posts, likes et commentaires par post)
+SCALES = {
+    "tiny": {"users": 200, "avg_friends": 10, "posts_per_user": 3, "likes_per_post": 4, "comments_per_post": 1},
+    "small": {"users": 2000, "avg_friends": 20, "posts_per_user": 5, "likes_per_post": 6, "comments_per_post": 2},
+    "medium": {"users": 20000, "avg_friends": 40, "posts_per_user": 8, "likes_per_post": 10, "comments_per_post": 3},
+    "large": {"users": 200000, "avg_friends": 60, "posts_per_user": 10, "likes_per_post": 12, "comments_per_post": 3},
+}
+
+# Vocabulaire des titres et contenus de posts, tiré selon une loi de Zipf :
+# la recherche plein texte (GET /posts/search) a des mots fréquents et des mots rares
+WORDS = """
+neo4j graphe cypher requête index noeud relation python flask serveur cache latence
+débit mémoire disque réseau journal métrique page curseur tri score analyse lucene
+recherche commentaire ami like profil photo voyage musique cuisine football montagne
+plage livre film concert marché jardin vélo café chat chien pluie soleil hiver
+""".split()
+
+# Date du premier objet généré ; les suivants s'étalent sur `span` secondes
+EPOCH = 1_700_000_000.0
+
+# Création de commentaires en masse (chargement du jeu de données uniquement)
+COMMENT_BULK_CREATE = f"""
+UNWIND $rows AS row
+MATCH (p:Post {{id: row.post_id}})
+MATCH (author:User {{id: row.author_id}})
+CREATE (author)-[:WROTE]->(c:Comment {{id: row.id, content: row.content, author_id: row.author_id,
+                                      post_id: row.post_id, created_at: row.created_at,
+                                      likes_count: 0,
+                                      path: {queries.comment_segment('row.created_at', 'row.id')}}})
+CREATE (p)-[:HAS_COMMENT]->(c)
+SET p.comments_count = coalesce(p.comments_count, 0) + 1
+RETURN row.idx AS idx
+"""
+
+
+def _uuid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _weights(count, exponent):
+    return [(i + 1) ** (-1.0 / (exponent - 1.0)) for i in range(count)]
+
+
+def generate(users=2000, avg_friends=20, posts_per_user=5, likes_per_post=6,
+             comments_per_post=2, exponent=2.5, span=90 * 86400, seed=0):
+    """Construit un jeu de données : dictionnaire de listes de lignes prêtes pour les requêtes UNWIND"""
+    rng = random.Random(seed)
+    weights = _weights(users, exponent)
+    cumulative = list(accumulate(weights))
+    # Le poids n'est pas lié à l'ordre des id : on mélange l'attribution
+    order = list(range(users))
+    rng.shuffle(order)
+
+    def pick_users(count):
+        return [order[i] for i in rng.choices(range(users), cum_weights=cumulative, k=count)]
+
+    user_rows = []
+    for i in range(users):
+        user_rows.append({"id": _uuid(rng), "name": f"Utilisateur {i}",
+                          "email": f"bench-{seed}-{i}@example.com",
+                          "created_at": EPOCH + span * i / max(1, users)})
+    user_ids = [row['id'] for row in user_rows]
+
+    # Amitiés : arêtes non orientées sans boucle ni doublon
+    ends = pick_users(users * avg_friends)
+    pairs = {(min(a, b), max(a, b)) for a, b in zip(ends[::2], ends[1::2]) if a != b}
+    friendships = [{"user_id": user_ids[a], "friend_id": user_ids[b]} for a, b in sorted(pairs)]
+
+    # Textes tirés avec leur propre générateur : les id et le reste du graphe
+    # ne dépendent pas du vocabulaire
+    text_rng = random.Random(seed)
+    word_cumulative = list(accumulate(_weights(len(WORDS), 2.0)))
+
+    def words(count):
+        return ' '.join(text_rng.choices(WORDS, cum_weights=word_cumulative, k=count))
+
+    # Posts : les utilisateurs actifs (poids élevé) publient davantage
+    post_rows = []
+    for author in pick_users(users * posts_per_user):
+        post_rows.append({"id": _uuid(rng), "author_id": user_ids[author],
+                          "title": f"Post {len(post_rows)} {words(2)}", "content": words(16),
+                          "created_at": EPOCH + span * rng.random()})
+    post_rows.sort(key=lambda row: row['created_at'])
+    if not post_rows:
+        return {"seed": seed, "users": user_rows, "friendships": friendships, "posts": [],
+                "likes": [], "comments": []}
+
+    # Popularité des posts : loi de puissance indépendante de l'auteur
+    post_cumulative = list(accumulate(_weights(len(post_rows), exponent)))
+    post_order = list(range(len(post_rows)))
+    rng.shuffle(post_order)
+
+    def pick_posts(count):
+        return [post_rows[post_order[i]]
+                for i in rng.choices(range(len(post_rows)), cum_weights=post_cumulative, k=count)]
+
+    count = len(post_rows) * likes_per_post
+    likes = {(user_ids[user], post['id']) for user, post in zip(pick_users(count), pick_posts(count))}
+    like_rows = [{"user_id": user_id, "post_id": post_id} for user_id, post_id in sorted(likes)]
+
+    count = len(post_rows) * comments_per_post
+    comment_rows = []
+    for author, post in zip(pick_users(count), pick_posts(count)):
+        comment_rows.append({"id": _uuid(rng), "post_id": post['id'],
+                             "author_id": user_ids[author], "content": "Commentaire " * 4,
+                             "created_at": post['created_at'] + rng.random() * 3600})
+
+    return {"seed": seed, "users": user_rows, "friendships": friendships, "posts": post_rows,
+            "likes": like_rows, "comments": comment_rows}
+
+
+def summary(dataset):
+    """Taille du jeu de données et degré maximal (contrôle de la loi de puissance)"""
+    degrees = {}
+    for row in dataset['friendships']:
+        for user_id in (row['user_id'], row['friend_id']):
+            degrees[user_id] = degrees.get(user_id, 0) + 1
+    return {
+        "users": len(dataset['users']),
+        "friendships": len(dataset['friendships']),
+        "posts": len(dataset['posts']),
+        "likes": len(dataset['likes']),
+        "comments": len(dataset['comments']),
+        "max_degree": max(degrees.values(), default=0),
+        "mean_degree": round(2 * len(dataset['friendships']) / max(1, len(dataset['users'])), 2),
+    }
+
+
+def seed(db, dataset, batch_size=5000):
+    """Charge le jeu de données avec les requêtes UNWIND des écritures en masse.
+
+    `db` est le service Neo4j ou un MemoryGraph. Retourne le nombre de lignes
+    rejetées par type (0 attendu sur une base vide).
+    """
+    def indexed(rows):
+        return [dict(row, idx=index) for index, row in enumerate(rows)]
+
+    def failures(statement, rows, accepted):
+        reports = run_batches(db, statement, indexed(rows), batch_size,
+                              lambda result: {"success": accepted(result)}, [None] * len(rows))
+        return sum(1 for report in reports if not (report and report['success']))
+
+    return {
+        "users": failures(queries.USER_BULK_CREATE, dataset['users'], lambda r: r['created']),
+        "posts": failures(queries.POST_BULK_CREATE, dataset['posts'], lambda r: r['author_found']),
+        "friendships": failures(queries.USER_BULK_BEFRIEND, dataset['friendships'],
+                                lambda r: r['user_found'] and r['friend_found'] and not r['existed']),
+        "likes": failures(queries.POST_BULK_LIKE, dataset['likes'],
+                          lambda r: r['post_found'] and r['user_found'] and not r['existed']),
+        "comments": failures(COMMENT_BULK_CREATE, dataset['comments'], lambda r: True),
+    }
@@ -8,7 +8,116 @@ load_dotenv()
 NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
 NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "password")
+NEO4J_DATABASE = os.getenv("NEO4J_DATABASE") or None  # None = base par défaut du serveur
+
+# Pool de connexions du driver Neo4j (à dimensionner selon workers x threads)
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "50"))
+NEO4J_MAX_CONNECTION_LIFETIME = float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600"))
+NEO4J_CONNECTION_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", "30"))
+NEO4J_FETCH_SIZE = int(os.getenv("NEO4J_FETCH_SIZE", "1000"))
+# Nombre de connexions ouvertes au démarrage de chaque worker (0 = aucune)
+NEO4J_WARMUP_CONNECTIONS = int(os.getenv("NEO4J_WARMUP_CONNECTIONS", "0"))
+# Application du schéma au lancement de `python app.py` (sinon : python manage.py schema apply)
+SCHEMA_BOOTSTRAP_ON_START = os.getenv("SCHEMA_BOOTSTRAP_ON_START", "True") == "True"
 
 # Configuration de l'application Flask
 DEBUG = os.getenv("DEBUG", "True") == "True"
-SECRET_KEY = os.getenv("SECRET_KEY", "dev_key_for_testing")
\ No newline at end of file
+SECRET_KEY = os.getenv("SECRET_KEY", "dev_key_for_testing")
+
+# Pagination des listes (keyset sur created_at, id)
+PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", "50"))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "500"))
+# Listes incluses par ?include= (commentaires d'un post, posts d'un utilisateur) : nombre maximal d'éléments
+INCLUDE_LIST_LIMIT = int(os.getenv("INCLUDE_LIST_LIMIT", "20"))
+# Lectures groupées (?ids=a,b, ?post_ids=) : nombre maximal d'id par requête
+MULTI_GET_MAX_IDS = int(os.getenv("MULTI_GET_MAX_IDS", "200"))
+# Fil de réponses (GET /comments/<id>/thread) : nombre maximal de réponses renvoyées
+COMMENT_THREAD_LIMIT = int(os.getenv("COMMENT_THREAD_LIMIT", "500"))
+
+# Écritures en masse (UNWIND) : taille d'un lot et nombre maximal d'éléments par requête
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "1000"))
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "100000"))
+
+# Import de fichiers (manage.py import) : répertoire partagé avec Neo4j, taille des lots,
+# threads d'écriture et nombre de partitions par extrémité de relation
+IMPORT_DIR = os.getenv("IMPORT_DIR", "import")
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "10000"))
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", "4"))
+IMPORT_PARTITIONS = int(os.getenv("IMPORT_PARTITIONS", "8"))
+
+# Export du graphe (manage.py export) : répertoire, processus, tranches d'id par type,
+# lignes par groupe Parquet
+EXPORT_DIR = os.getenv("EXPORT_DIR", "export")
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "4"))
+EXPORT_SHARDS = int(os.getenv("EXPORT_SHARDS", "16"))
+EXPORT_ROW_GROUP_SIZE = int(os.getenv("EXPORT_ROW_GROUP_SIZE", "50000"))
+
+# Cache des recherches par id/email (LRU + TTL, en secondes)
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "True") == "True"
+CACHE_MAX_SIZE = int(os.getenv("CACHE_MAX_SIZE", "10000"))
+CACHE_TTL = float(os.getenv("CACHE_TTL", "30"))
+CACHE_NEGATIVE_TTL = float(os.getenv("CACHE_NEGATIVE_TTL", "5"))
+# Invalidation entre workers : "local" (un seul processus) ou "socket" (sockets Unix dans CACHE_BUS_DIR)
+CACHE_BUS = os.getenv("CACHE_BUS", "local")
+CACHE_BUS_DIR = os.getenv("CACHE_BUS_DIR", "/tmp/neo4j_app_cache_bus")
+# Réconciliation des compteurs matérialisés (python manage.py counters reconcile)
+COUNTERS_RECONCILE_BATCH_SIZE = int(os.getenv("COUNTERS_RECONCILE_BATCH_SIZE", "1000"))
+# Intervalle en secondes du mode périodique (--every), 0 = une seule passe
+COUNTERS_RECONCILE_INTERVAL = float(os.getenv("COUNTERS_RECONCILE_INTERVAL", "0"))
+# Graphe d'amitiés en mémoire (CSR) pour amis, amis communs et suggestions
+FRIEND_GRAPH_ENABLED = os.getenv("FRIEND_GRAPH_ENABLED", "False") == "True"
+# Reconstruction complète depuis la base toutes les N secondes
+FRIEND_GRAPH_REFRESH_INTERVAL = float(os.getenv("FRIEND_GRAPH_REFRESH_INTERVAL", "900"))
+# Nombre de modifications gardées en delta avant fusion dans le CSR
+FRIEND_GRAPH_COMPACT_THRESHOLD = int(os.getenv("FRIEND_GRAPH_COMPACT_THRESHOLD", "50000"))
+# Fil d'actualité (GET /users/<id>/feed) : longueur maximale d'une timeline
+FEED_TIMELINE_LENGTH = int(os.getenv("FEED_TIMELINE_LENGTH", "800"))
+# Auteurs avec au moins N amis : posts lus à la demande au lieu d'être poussés
+FEED_FANOUT_LIMIT = int(os.getenv("FEED_FANOUT_LIMIT", "5000"))
+# Nombre de timelines gardées en mémoire par processus, et leur durée de vie (s)
+FEED_TIMELINE_CACHE_SIZE = int(os.getenv("FEED_TIMELINE_CACHE_SIZE", "10000"))
+FEED_TIMELINE_TTL = float(os.getenv("FEED_TIMELINE_TTL", "600"))
+# Métriques Prometheus (GET /metrics) : requêtes Cypher par constante et routes HTTP
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True") == "True"
+# Plusieurs workers : répertoire où chaque processus écrit ses valeurs (vide = un seul processus)
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+# Journal des requêtes lentes (GET /admin/slow-queries) : seuil en millisecondes, 0 = désactivé
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "500"))
+# Fraction des requêtes lentes dont le plan est capturé (PROFILE en lecture, EXPLAIN en écriture)
+SLOW_QUERY_PROFILE_SAMPLE = float(os.getenv("SLOW_QUERY_PROFILE_SAMPLE", "0.1"))
+# Au plus une capture de plan par requête toutes les N secondes
+SLOW_QUERY_PROFILE_COOLDOWN = float(os.getenv("SLOW_QUERY_PROFILE_COOLDOWN", "60"))
+# Tampon circulaire sur disque partagé par les workers, et son nombre d'entrées
+SLOW_QUERY_LOG_PATH = os.getenv("SLOW_QUERY_LOG_PATH", "/tmp/neo4j_app_slow_queries.ring")
+SLOW_QUERY_RING_SIZE = int(os.getenv("SLOW_QUERY_RING_SIZE", "1000"))
+# Encodeur JSON des réponses : auto (orjson s'il est installé), orjson ou json
+JSON_ENCODER = os.getenv("JSON_ENCODER", "auto")
+# Compression des réponses selon Accept-Encoding (gzip, brotli si le module est installé)
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "True") == "True"
+# Taille minimale en octets d'un corps compressé (les flux sont toujours compressés)
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+# Niveau gzip 1 : près de deux fois moins de CPU que 6 pour un corps à peine plus gros (benchmarks/encoding.py)
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "1"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+# Flux : vidage du compresseur dès que N octets non compressés sont en attente
+COMPRESSION_STREAM_FLUSH_BYTES = int(os.getenv("COMPRESSION_STREAM_FLUSH_BYTES", "16384"))
+# Recherche plein texte (GET /posts/search) : analyseur Lucene de l'index post_search
+# (standard-no-stop-words, standard, simple, whitespace, english, french...). Le changer
+# impose de supprimer l'index (DROP INDEX post_search) puis de réappliquer le schéma
+SEARCH_ANALYZER = os.getenv("SEARCH_ANALYZER", "standard-no-stop-words")
+SEARCH_MAX_QUERY_LENGTH = int(os.getenv("SEARCH_MAX_QUERY_LENGTH", "200"))
+# Longueur en caractères de l'extrait surligné du contenu dans chaque résultat
+SEARCH_SNIPPET_LENGTH = int(os.getenv("SEARCH_SNIPPET_LENGTH", "160"))
+# Contrôle d'admission vers Neo4j (par processus) : requêtes simultanées en lecture et en
+# écriture. Lectures + écritures <= NEO4J_MAX_POOL_SIZE : le pool n'est jamais la file d'attente
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "True") == "True"
+ADMISSION_READ_LIMIT = int(os.getenv("ADMISSION_READ_LIMIT", "32"))
+ADMISSION_WRITE_LIMIT = int(os.getenv("ADMISSION_WRITE_LIMIT", "16"))
+# Au-delà : file d'attente bornée (par type), attente maximale en secondes avant un 503
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "64"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "1.0"))
+# Part des places que peuvent occuper les parcours de listes (le reste est gardé aux lectures par id)
+ADMISSION_SCAN_SHARE = float(os.getenv("ADMISSION_SCAN_SHARE", "0.75"))
+# Valeur de l'en-tête Retry-After des réponses 503 (secondes)
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
\ No newline at end of file
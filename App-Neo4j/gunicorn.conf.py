@@ -0,0 +1,38 @@
+# Configuration Gunicorn : gunicorn -c gunicorn.conf.py app:app
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", "4"))
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+preload_app = True
+
+
+def on_starting(server):
+    """Application unique du schéma dans le processus maître, avant le fork des workers"""
+    from config import SCHEMA_BOOTSTRAP_ON_START
+    from services.db_service import get_db
+    from services.metrics import clear_metrics_dir
+
+    # Les métriques des workers d'un lancement précédent ne sont pas reprises
+    clear_metrics_dir()
+    if not SCHEMA_BOOTSTRAP_ON_START:
+        return
+    db = get_db()
+    try:
+        db.bootstrap_schema()
+    except Exception as e:
+        server.log.error(f"Erreur lors de l'application du schéma: {e}")
+    finally:
+        # Le maître ne garde aucune connexion : les workers n'en héritent pas
+        db.close()
+
+
+def post_fork(server, worker):
+    """Driver neuf dans chaque worker, et préchauffage du pool avant de servir"""
+    from services.db_service import get_db
+
+    db = get_db()
+    db.reset_after_fork()
+    opened = db.warm_up()
+    if opened:
+        server.log.info(f"Worker {worker.pid}: {opened} connexion(s) Neo4j préouvertes")
@@ -0,0 +1,138 @@
+import argparse
+import json
+import sys
+import time
+
+
+def cmd_schema(args):
+    """Applique le schéma ou affiche le rapport d'index"""
+    from services.db_service import get_db
+    from services.schema import schema_report
+
+    db = get_db()
+    try:
+        if args.action == 'apply':
+            result = db.bootstrap_schema(force=args.force)
+        else:
+            result = schema_report(db)
+    finally:
+        db.close()
+    print(json.dumps(result, indent=2))
+
+
+def cmd_counters(args):
+    """Vérifie et répare les compteurs matérialisés, une fois ou périodiquement"""
+    from services.db_service import get_db
+    from services.counters import reconcile_counters
+
+    db = get_db()
+    try:
+        while True:
+            try:
+                result = reconcile_counters(db, batch_size=args.batch_size, repair=not args.dry_run)
+                print(json.dumps(result, indent=2), flush=True)
+            except Exception as e:
+                if not args.every:
+                    raise
+                print(f"Erreur lors de la réconciliation des compteurs: {e}", flush=True)
+            if not args.every:
+                break
+            time.sleep(args.every)
+    finally:
+        db.close()
+
+
+def cmd_import(args):
+    """Importe les fichiers CSV / NDJSON du répertoire d'import (reprise sur point de reprise)"""
+    from services.db_service import get_db
+    from services.counters import reconcile_counters
+    from services.importer import Importer
+
+    db = get_db()
+    try:
+        # Contraintes d'unicité : les MERGE de l'import passent par leurs index
+        db.bootstrap_schema()
+        importer = Importer(db, args.directory, args.checkpoint, batch_size=args.batch_size,
+                            workers=args.workers, partitions=args.partitions,
+                            log=lambda message: print(message, file=sys.stderr, flush=True))
+        if args.restart:
+            importer.reset()
+        result = importer.run(args.only)
+        # Compteurs recalculés en une passe plutôt qu'incrémentés à chaque ligne
+        if not args.skip_counters and set(result['files']) & {'posts', 'likes', 'comments'}:
+            result['counters'] = reconcile_counters(db, repair=True)
+    finally:
+        db.close()
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+def cmd_export(args):
+    """Exporte noeuds et relations en fichiers NDJSON, CSV ou Parquet, avec un manifeste"""
+    from services.db_service import get_db
+    from services.exporter import export_graph
+
+    db = get_db()
+    try:
+        manifest = export_graph(db, args.directory, fmt=args.format, compression=args.compress,
+                                shards=args.shards, workers=args.workers, datasets=args.only,
+                                log=lambda message: print(message, file=sys.stderr, flush=True))
+    finally:
+        db.close()
+    summary = {key: value for key, value in manifest.items() if key != 'files'}
+    summary['rows'] = {name: item['rows'] for name, item in manifest['files'].items()}
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Commandes d'administration de l'API Neo4j")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    schema = subparsers.add_parser('schema', help="Contraintes et index Neo4j")
+    schema.add_argument('action', choices=['apply', 'report'])
+    schema.add_argument('--force', action='store_true', help="Réapplique même si la version est à jour")
+    schema.set_defaults(func=cmd_schema)
+
+    from config import COUNTERS_RECONCILE_BATCH_SIZE, COUNTERS_RECONCILE_INTERVAL
+
+    counters = subparsers.add_parser('counters', help="Compteurs likes_count / comments_count")
+    counters.add_argument('action', choices=['reconcile'])
+    counters.add_argument('--dry-run', action='store_true', help="Signale les écarts sans les corriger")
+    counters.add_argument('--batch-size', type=int, default=COUNTERS_RECONCILE_BATCH_SIZE)
+    counters.add_argument('--every', type=float, default=COUNTERS_RECONCILE_INTERVAL,
+                          help="Relance toutes les N secondes (tâche de fond)")
+    counters.set_defaults(func=cmd_counters)
+
+    from config import IMPORT_DIR, IMPORT_BATCH_SIZE, IMPORT_WORKERS, IMPORT_PARTITIONS
+
+    bulk_import = subparsers.add_parser('import', help="Import de fichiers CSV / NDJSON")
+    bulk_import.add_argument('directory', nargs='?', default=IMPORT_DIR,
+                             help="users, posts, friendships, likes, comments (.csv, .ndjson, .jsonl)")
+    bulk_import.add_argument('--only', nargs='+',
+                             choices=['users', 'posts', 'friendships', 'likes', 'comments'])
+    bulk_import.add_argument('--checkpoint', help="Point de reprise (défaut : <répertoire>/.import-checkpoint.json)")
+    bulk_import.add_argument('--restart', action='store_true', help="Ignore le point de reprise existant")
+    bulk_import.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+    bulk_import.add_argument('--workers', type=int, default=IMPORT_WORKERS)
+    bulk_import.add_argument('--partitions', type=int, default=IMPORT_PARTITIONS)
+    bulk_import.add_argument('--skip-counters', action='store_true',
+                             help="Ne recalcule pas likes_count / comments_count après l'import")
+    bulk_import.set_defaults(func=cmd_import)
+
+    from config import EXPORT_DIR, EXPORT_WORKERS, EXPORT_SHARDS
+
+    export = subparsers.add_parser('export', help="Export du graphe (NDJSON, CSV, Parquet)")
+    export.add_argument('directory', nargs='?', default=EXPORT_DIR)
+    export.add_argument('--format', choices=['ndjson', 'csv', 'parquet'], default='ndjson')
+    export.add_argument('--compress', help="gzip ou br (NDJSON, CSV) ; codec pyarrow pour parquet")
+    export.add_argument('--only', nargs='+',
+                        choices=['users', 'posts', 'friendships', 'likes', 'comments', 'comment_likes'])
+    export.add_argument('--shards', type=int, default=EXPORT_SHARDS, help="Tranches d'id par type")
+    export.add_argument('--workers', type=int, default=EXPORT_WORKERS, help="Processus d'export")
+    export.set_defaults(func=cmd_export)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,212 @@
 # models/comment.py
 import uuid
 from datetime import datetime
-from py2neo import Node, Relationship
 from services.db_service import get_db
+from models import queries
+from config import COMMENT_THREAD_LIMIT
+from services.pagination import page_query, page_params, build_page
+from services.projection import page_queries, find_query, all_query
+from services.conditional import version_from
+from models.post import Post
 
 class Comment:
-    def __init__(self, content, author_id, post_id, comment_id=None, created_at=None):
+    # Pas de __dict__ par instance : moins de mémoire quand des objets sont encore construits
+    __slots__ = ('id', 'content', 'author_id', 'post_id', 'parent_id', 'created_at', 'likes_count')
+
+    def __init__(self, content, author_id, post_id, comment_id=None, created_at=None, likes_count=0,
+                 parent_id=None):
         self.id = comment_id or str(uuid.uuid4())
         self.content = content
         self.author_id = author_id
         self.post_id = post_id
+        # Commentaire auquel celui-ci répond (None pour un commentaire de premier niveau)
+        self.parent_id = parent_id
         self.created_at = created_at or datetime.now().timestamp()
+        # Compteur matérialisé, tenu à jour par COMMENT_LIKE / COMMENT_UNLIKE
+        self.likes_count = likes_count
+    
+    def to_dict(self):
+        """Convertit le commentaire en dictionnaire"""
+        return {
+            "id": self.id,
+            "content": self.content,
+            "author_id": self.author_id,
+            "post_id": self.post_id,
+            "parent_id": self.parent_id,
+            "created_at": self.created_at,
+            "likes_count": self.likes_count
+        }
+    
+    @classmethod
+    def from_node(cls, node):
+        """Construit un commentaire depuis les propriétés d'un noeud :Comment"""
+        return cls(
+            comment_id=node['id'],
+            content=node['content'],
+            author_id=node['author_id'],
+            post_id=node['post_id'],
+            created_at=node['created_at'],
+            likes_count=node.get('likes_count') or 0,
+            parent_id=node.get('parent_id')
+        )
+    
+    def save(self):
+        """Crée le commentaire avec ses relations HAS_COMMENT et WROTE en une seule requête.
+
+        Le chemin matérialisé est calculé dans la même requête depuis celui du
+        parent. Retourne 'ok', 'post_not_found', 'user_not_found' ou
+        'parent_not_found' (parent absent ou d'un autre post).
+        """
+        db = get_db()
+        result = db.run(queries.COMMENT_CREATE, id=self.id, content=self.content,
+                        author_id=self.author_id, post_id=self.post_id, parent_id=self.parent_id,
+                        created_at=self.created_at).data()[0]
+        # comments_count du post a changé
+        return Post.after_count_change(self.post_id, self.save_status(result))
+    
+    @staticmethod
+    def save_status(result):
+        """Traduit la ligne retournée par COMMENT_CREATE en statut"""
+        if not result['post_found']:
+            return 'post_not_found'
+        if not result['user_found']:
+            return 'user_not_found'
+        if not result['parent_found']:
+            return 'parent_not_found'
+        return 'ok'
+    
+    @classmethod
+    def like(cls, comment_id, user_id):
+        """Ajoute un like en une seule requête.
+
+        Retourne 'ok', 'already_exists', 'comment_not_found' ou 'user_not_found'.
+        """
+        db = get_db()
+        result = db.run(queries.COMMENT_LIKE, comment_id=comment_id, user_id=user_id).data()[0]
+        return cls.like_status(result)
+    
+    @staticmethod
+    def like_status(result):
+        """Traduit la ligne retournée par COMMENT_LIKE en statut"""
+        if not result['comment_found']:
+            return 'comment_not_found'
+        if not result['user_found']:
+            return 'user_not_found'
+        return 'already_exists' if result['existed'] else 'ok'
+    
+    @classmethod
+    def unlike(cls, comment_id, user_id):
+        """Retire un like en une seule requête.
+
+        Retourne 'ok', 'relation_not_found', 'comment_not_found' ou 'user_not_found'.
+        """
+        db = get_db()
+        result = db.run(queries.COMMENT_UNLIKE, comment_id=comment_id, user_id=user_id).data()[0]
+        return cls.unlike_status(result)
+    
+    @staticmethod
+    def unlike_status(result):
+        """Traduit la ligne retournée par COMMENT_UNLIKE en statut"""
+        if not result['comment_found']:
+            return 'comment_not_found'
+        if not result['user_found']:
+            return 'user_not_found'
+        return 'ok' if result['existed'] else 'relation_not_found'
+    
+    @classmethod
+    def delete_from_post(cls, post_id, comment_id):
+        """Supprime un commentaire d'un post en une seule requête.
+
+        Retourne 'ok', 'post_not_found', 'comment_not_found' ou 'wrong_post'.
+        """
+        db = get_db()
+        result = db.run(queries.COMMENT_DELETE_FROM_POST, post_id=post_id, comment_id=comment_id).data()[0]
+        return Post.after_count_change(post_id, cls.delete_from_post_status(result))
+    
+    @staticmethod
+    def delete_from_post_status(result):
+        """Traduit la ligne retournée par COMMENT_DELETE_FROM_POST en statut"""
+        if not result['post_found']:
+            return 'post_not_found'
+        if not result['comment_found']:
+            return 'comment_not_found'
+        return 'ok' if result['belongs'] else 'wrong_post'
+    
+    @classmethod
+    def version(cls, comment_id, variant=''):
+        """Version du commentaire (ETag, Last-Modified) par une requête légère"""
+        db = get_db()
+        result = db.run(queries.COMMENT_VERSION, id=comment_id).data()
+        return version_from('comment', comment_id, result[0], variant) if result else None
+    
+    @classmethod
+    def find_projected(cls, comment_id, projection):
+        """Commentaire réduit aux champs et inclusions demandés (?fields=/?include=)"""
+        db = get_db()
+        result = db.run(find_query(projection), id=comment_id).data()
+        return result[0]['comment'] if result else None
+    
+    @classmethod
+    def get_page(cls, limit, after=None, projection=None):
+        """Récupère une page de commentaires (created_at décroissant) et le curseur suivant"""
+        db = get_db()
+        variants = page_queries(projection) if projection else queries.COMMENT_PAGE
+        results = db.run(page_query(variants, after), **page_params(limit, after))
+        
+        return build_page([record['comment'] for record in results], limit)
+    
+    @classmethod
+    def iter_all(cls, projection=None):
+        """Itère paresseusement sur tous les commentaires (lecture du curseur au fil de l'eau)"""
+        db = get_db()
+        for record in db.stream(all_query(projection) if projection else queries.COMMENT_ALL):
+            yield record['comment']
+    
+    @classmethod
+    def find_by_id(cls, comment_id):
+        """Trouve un commentaire par son ID"""
+        db = get_db()
+        result = db.run(queries.COMMENT_FIND_BY_ID, id=comment_id).data()
+        return cls.from_node(result[0]['c']) if result else None
+    
+    def update(self, content):
+        """Met à jour le contenu du commentaire"""
+        db = get_db()
+        self.content = content
+        db.run(queries.COMMENT_UPDATE, id=self.id, content=self.content)
+        return self
+    
+    def delete(self):
+        """Supprime le commentaire et ses réponses en une seule requête"""
+        db = get_db()
+        result = db.run(queries.COMMENT_DELETE_BY_ID, id=self.id).data()
+        if result and result[0]['post_id'] is not None:
+            Post.after_count_change(result[0]['post_id'], 'ok')
+        return bool(result)
+    
+    @classmethod
+    def get_post_comments(cls, post_id, limit, after=None):
+        """Récupère une page des commentaires d'un post (created_at décroissant) et le curseur suivant"""
+        db = get_db()
+        results = db.run(page_query(queries.POST_COMMENTS_PAGE, after), post_id=post_id,
+                         **page_params(limit, after))
+        return build_page([record['comment'] for record in results], limit)
+    
+    @classmethod
+    def get_thread(cls, comment_id, limit=COMMENT_THREAD_LIMIT):
+        """Commentaire et toutes ses réponses dans l'ordre du fil, par une lecture de plage sur path.
+
+        Retourne None si le commentaire n'existe pas, sinon
+        {root, replies, truncated}.
+        """
+        db = get_db()
+        result = db.run(queries.COMMENT_THREAD, id=comment_id, limit=limit + 1).data()
+        return cls.thread_from(result, limit)
     
-    # All the Comment methods should follow here
-    # Make sure the entire Comment class is properly defined
\ No newline at end of file
+    @staticmethod
+    def thread_from(result, limit):
+        """Met en forme la ligne retournée par COMMENT_THREAD"""
+        if not result:
+            return None
+        replies = result[0]['replies']
+        return {"root": result[0]['root'], "replies": replies[:limit], "truncated": len(replies) > limit}
@@ -1,16 +1,30 @@
 import uuid
 from datetime import datetime
-from py2neo import Node, Relationship
 from services.db_service import get_db
-from models.user import User
+from models import queries
+from services.pagination import page_query, page_params, build_page
+from services.projection import page_queries, find_query, all_query, user_posts_query, many_query
+from services.batching import validate_item, item_error, item_success, run_batches
+from services.cache import post_cache, timeline_cache, author_posts_cache
+from services.conditional import version_from, node_version
+from services.search import with_highlights
+from services import feed
+from config import BULK_BATCH_SIZE, FEED_FANOUT_LIMIT, FEED_TIMELINE_LENGTH
 
 class Post:
-    def __init__(self, title, content, author_id, post_id=None, created_at=None):
+    # Pas de __dict__ par instance : moins de mémoire quand des objets sont encore construits
+    __slots__ = ('id', 'title', 'content', 'author_id', 'created_at', 'likes_count', 'comments_count')
+
+    def __init__(self, title, content, author_id, post_id=None, created_at=None,
+                 likes_count=0, comments_count=0):
         self.id = post_id or str(uuid.uuid4())
         self.title = title
         self.content = content
         self.author_id = author_id
         self.created_at = created_at or datetime.now().timestamp()
+        # Compteurs matérialisés, tenus à jour par les requêtes d'écriture
+        self.likes_count = likes_count
+        self.comments_count = comments_count
     
     def to_dict(self):
         """Convertit le post en dictionnaire"""
@@ -19,22 +33,41 @@ class Post:
             "title": self.title,
             "content": self.content,
             "author_id": self.author_id,
-            "created_at": self.created_at
+            "created_at": self.created_at,
+            "likes_count": self.likes_count,
+            "comments_count": self.comments_count
         }
     
+    @classmethod
+    def from_node(cls, node, author_id):
+        """Construit un post depuis les propriétés d'un noeud :Post et l'id de son auteur"""
+        return cls(
+            post_id=node['id'],
+            title=node['title'],
+            content=node['content'],
+            author_id=author_id,
+            created_at=node['created_at'],
+            # Absents sur les posts antérieurs aux compteurs (voir manage.py counters)
+            likes_count=node.get('likes_count') or 0,
+            comments_count=node.get('comments_count') or 0
+        )
+    
     def save(self):
         """Enregistre le post dans la base de données"""
         db = get_db()
         
         # Exécuter une transaction pour créer le post et sa relation avec l'auteur
-        result = db.run("""
-            MATCH (author:User {id: $author_id})
-            CREATE (p:Post {id: $id, title: $title, content: $content, created_at: $created_at})
-            CREATE (author)-[r:CREATED]->(p)
-            RETURN p
-        """, id=self.id, title=self.title, content=self.content, 
-             created_at=self.created_at, author_id=self.author_id).data()
+        result = db.run(queries.POST_CREATE, id=self.id, title=self.title, content=self.content,
+                        created_at=self.created_at, author_id=self.author_id,
+                        fanout_limit=FEED_FANOUT_LIMIT).data()
         
+        return self.after_create(result)
+    
+    def after_create(self, result):
+        """Purge l'entrée négative du cache et pousse le post dans les fils des amis"""
+        post_cache.invalidate(self.id)
+        if result:
+            feed.fan_out(self.author_id, self.id, self.created_at, result[0]['friend_ids'])
         return self
     
     def update(self, title=None, content=None):
@@ -48,129 +81,313 @@ class Post:
             self.content = content
             
         # Mise à jour dans la base de données
-        db.run("""
-            MATCH (p:Post {id: $id})
-            SET p.title = $title, p.content = $content
-            RETURN p
-        """, id=self.id, title=self.title, content=self.content)
+        db.run(queries.POST_UPDATE, id=self.id, title=self.title, content=self.content)
         
+        post_cache.invalidate(self.id)
         return self
     
-    def delete(self):
-        """Supprime le post et ses relations"""
+    @classmethod
+    def like(cls, post_id, user_id):
+        """Ajoute un like en une seule requête.
+
+        Retourne 'ok', 'already_exists', 'post_not_found' ou 'user_not_found'.
+        """
         db = get_db()
-        # Suppression du post et de toutes ses relations
-        db.run("""
-            MATCH (p:Post {id: $id})
-            DETACH DELETE p
-        """, id=self.id)
-        
-        return True
+        result = db.run(queries.POST_LIKE, post_id=post_id, user_id=user_id).data()[0]
+        return cls.after_count_change(post_id, cls.like_status(result))
     
-    def add_like(self, user_id):
-        """Ajoute un like au post"""
+    @staticmethod
+    def like_status(result):
+        """Traduit la ligne retournée par POST_LIKE en statut"""
+        if not result['post_found']:
+            return 'post_not_found'
+        if not result['user_found']:
+            return 'user_not_found'
+        return 'already_exists' if result['existed'] else 'ok'
+    
+    @classmethod
+    def unlike(cls, post_id, user_id):
+        """Retire un like en une seule requête.
+
+        Retourne 'ok', 'relation_not_found', 'post_not_found' ou 'user_not_found'.
+        """
         db = get_db()
-        result = db.run("""
-            MATCH (u:User {id: $user_id}), (p:Post {id: $post_id})
-            MERGE (u)-[r:LIKES]->(p)
-            RETURN r
-        """, user_id=user_id, post_id=self.id).data()
-        
-        return bool(result)
+        result = db.run(queries.POST_UNLIKE, post_id=post_id, user_id=user_id).data()[0]
+        return cls.after_count_change(post_id, cls.unlike_status(result))
+    
+    @staticmethod
+    def unlike_status(result):
+        """Traduit la ligne retournée par POST_UNLIKE en statut"""
+        if not result['post_found']:
+            return 'post_not_found'
+        if not result['user_found']:
+            return 'user_not_found'
+        return 'ok' if result['existed'] else 'relation_not_found'
     
-    def remove_like(self, user_id):
-        """Retire un like du post"""
+    @staticmethod
+    def after_count_change(post_id, status):
+        """Purge le post du cache quand un de ses compteurs a changé ; retourne le statut"""
+        if status == 'ok':
+            post_cache.invalidate(post_id)
+        return status
+    
+    @classmethod
+    def delete_by_id(cls, post_id):
+        """Supprime un post et ses relations en une seule requête ; retourne False s'il n'existe pas"""
         db = get_db()
-        db.run("""
-            MATCH (u:User {id: $user_id})-[r:LIKES]->(p:Post {id: $post_id})
-            DELETE r
-        """, user_id=user_id, post_id=self.id)
+        result = db.run(queries.POST_DELETE_BY_ID, id=post_id).data()
         
-        return True
+        post_cache.invalidate(post_id)
+        return bool(result and result[0]['deleted'])
+    
+    @classmethod
+    def bulk_create(cls, items, batch_size=BULK_BATCH_SIZE):
+        """Crée des posts par lots (UNWIND) et retourne un rapport par élément"""
+        reports, rows = cls.bulk_create_rows(items)
+        reports = run_batches(get_db(), queries.POST_BULK_CREATE, rows, batch_size,
+                              cls.bulk_create_report, reports)
+        return cls.after_bulk_create(rows, reports)
+    
+    @classmethod
+    def bulk_create_rows(cls, items):
+        """Valide les éléments : retourne (rapports des rejets, lignes à écrire)"""
+        reports = [None] * len(items)
+        rows = []
+        for index, item in enumerate(items):
+            error = validate_item(item, ('title', 'content', 'author_id'))
+            if error:
+                reports[index] = item_error(index, error)
+                continue
+            post = cls(title=item['title'], content=item['content'], author_id=item['author_id'])
+            rows.append({"idx": index, "id": post.id, "title": post.title, "content": post.content,
+                         "author_id": post.author_id, "created_at": post.created_at})
+        return reports, rows
+    
+    @staticmethod
+    def bulk_create_report(result):
+        """Ligne de rapport pour une ligne retournée par POST_BULK_CREATE"""
+        if result['author_found']:
+            return item_success(result['idx'], id=result['id'])
+        return item_error(result['idx'], "Utilisateur non trouvé")
+    
+    @staticmethod
+    def after_bulk_create(rows, reports):
+        """Purge les entrées négatives des posts créés.
+
+        Les posts créés en masse ne sont pas poussés : ils apparaissent dans les
+        timelines en cache à leur expiration (FEED_TIMELINE_TTL).
+        """
+        created = [row for row in rows if reports[row['idx']]['success']]
+        post_cache.invalidate(*(row['id'] for row in created))
+        author_posts_cache.invalidate(*{row['author_id'] for row in created})
+        return reports
+    
+    @classmethod
+    def bulk_like(cls, items, batch_size=BULK_BATCH_SIZE):
+        """Ajoute des likes par lots (UNWIND) et retourne un rapport par élément"""
+        reports, rows = cls.bulk_like_rows(items)
+        reports = run_batches(get_db(), queries.POST_BULK_LIKE, rows, batch_size,
+                              cls.bulk_like_report, reports)
+        return cls.after_bulk_like(rows, reports)
+    
+    @staticmethod
+    def bulk_like_rows(items):
+        """Valide et dédoublonne les likes : retourne (rapports des rejets, lignes à écrire)"""
+        reports = [None] * len(items)
+        rows = []
+        seen = set()
+        for index, item in enumerate(items):
+            error = validate_item(item, ('user_id', 'post_id'))
+            if not error:
+                pair = (item['user_id'], item['post_id'])
+                error = "Like en double dans la requête" if pair in seen else None
+                seen.add(pair)
+            if error:
+                reports[index] = item_error(index, error)
+                continue
+            rows.append({"idx": index, "user_id": item['user_id'], "post_id": item['post_id']})
+        return reports, rows
+    
+    @staticmethod
+    def bulk_like_report(result):
+        """Ligne de rapport pour une ligne retournée par POST_BULK_LIKE"""
+        if not result['post_found']:
+            return item_error(result['idx'], "Post non trouvé")
+        if not result['user_found']:
+            return item_error(result['idx'], "Utilisateur non trouvé")
+        if result['existed']:
+            return item_error(result['idx'], "Ce post est déjà aimé par cet utilisateur")
+        return item_success(result['idx'])
+    
+    @staticmethod
+    def after_bulk_like(rows, reports):
+        """Purge du cache les posts dont le compteur de likes a changé"""
+        post_cache.invalidate(*{row['post_id'] for row in rows if reports[row['idx']]['success']})
+        return reports
     
     def get_likes_count(self):
-        """Récupère le nombre de likes du post"""
+        """Récupère le nombre de likes du post (compteur matérialisé, sans parcours des relations)"""
         db = get_db()
-        result = db.run("""
-            MATCH (u:User)-[:LIKES]->(p:Post {id: $id})
-            RETURN count(u) as likes_count
-        """, id=self.id).data()
+        result = db.run(queries.POST_LIKES_COUNT, id=self.id).data()
         
         return result[0]['likes_count'] if result else 0
     
     def get_comments(self):
-        """Récupère les commentaires du post"""
-        from models.comment import Comment  # Import ici pour éviter les imports circulaires
-        
+        """Récupère les commentaires du post (dictionnaires projetés par la requête)"""
         db = get_db()
-        results = db.run("""
-            MATCH (p:Post {id: $id})-[:HAS_COMMENT]->(c:Comment)
-            RETURN c, p.id as post_id
-        """, id=self.id).data()
+        return [record['comment'] for record in db.run(queries.POST_COMMENTS, id=self.id)]
+    
+    @classmethod
+    def find_many(cls, post_ids):
+        """Trouve plusieurs posts par ID (ordre conservé, absents ignorés).
+
+        Les id absents du cache sont lus en une seule requête UNWIND.
+        """
+        if not post_ids:
+            return []
+        by_id = post_cache.get_many_or_load(post_ids, cls.load_many)
+        return [cls.from_node(by_id[post_id], by_id[post_id]['author_id'])
+                for post_id in post_ids if post_id in by_id]
+    
+    @staticmethod
+    def load_many(post_ids):
+        """Propriétés des posts trouvés et id de leur auteur, par id (valeurs du cache)"""
+        db = get_db()
+        results = db.run(queries.POST_FIND_MANY, ids=list(post_ids)).data()
+        return {result['p']['id']: dict(result['p'], author_id=result['author_id']) for result in results}
+    
+    @classmethod
+    def get_many(cls, post_ids, projection=None):
+        """Posts par id, en dictionnaire {id: post} (absents omis)"""
+        if projection:
+            db = get_db()
+            results = db.run(many_query(projection), ids=list(post_ids))
+            return {record['post']['id']: record['post'] for record in results}
+        return {post.id: post.to_dict() for post in cls.find_many(post_ids)}
+    
+    @classmethod
+    def viewer_state(cls, user_id, post_ids):
+        """État des posts pour un lecteur, en une requête : {id: {author_id, is_author, liked, friend_of_author}}.
+
+        Retourne None si le lecteur n'existe pas ; les posts inconnus sont omis.
+        """
+        db = get_db()
+        results = db.run(queries.POST_VIEWER_STATE, user_id=user_id, post_ids=list(post_ids)).data()
+        return cls.viewer_state_from(user_id, results)
+    
+    @staticmethod
+    def viewer_state_from(user_id, results):
+        if not results or not results[0]['viewer_found']:
+            return None
+        return {result['post_id']: {
+            "author_id": result['author_id'],
+            "is_author": result['author_id'] == user_id,
+            "liked": result['liked'],
+            "friend_of_author": result['friend_of_author'],
+        } for result in results if result['post_found']}
+    
+    @classmethod
+    def get_feed(cls, user_id, limit, after=None):
+        """Fil d'actualité d'un utilisateur : posts de ses amis, du plus récent au plus ancien.
+
+        La timeline poussée à l'écriture est fusionnée avec les posts récents
+        des amis célèbres (voir services/feed.py), puis la page est lue par id.
+        """
+        db = get_db()
+        
+        def load_timeline():
+            rows = db.run(queries.FEED_TIMELINE, id=user_id, fanout_limit=FEED_FANOUT_LIMIT,
+                          length=FEED_TIMELINE_LENGTH).data()
+            return feed.timeline_from_rows(rows)
+        
+        def load_author_posts(author_id):
+            rows = db.run(queries.FEED_AUTHOR_RECENT, id=author_id, length=FEED_TIMELINE_LENGTH).data()
+            return feed.author_posts_from_rows(rows)
         
-        return [Comment(
-            comment_id=result['c']['id'],
-            content=result['c']['content'],
-            author_id=result['c']['author_id'],
-            post_id=result['post_id'],
-            created_at=result['c']['created_at']
-        ).to_dict() for result in results]
+        timeline = timeline_cache.get_or_load(user_id, load_timeline)
+        sources = [timeline['items']]
+        for author_id in timeline['celebrities']:
+            sources.append(author_posts_cache.get_or_load(author_id, lambda: load_author_posts(author_id)))
+        
+        # Le curseur suit les entrées de la timeline : un post supprimé depuis n'arrête pas la pagination
+        entries, next_cursor = build_page(feed.merge_page(sources, limit, after), limit)
+        posts = cls.find_many([entry['id'] for entry in entries])
+        return [post.to_dict() for post in posts], next_cursor
     
     @classmethod
     def find_by_id(cls, post_id):
-        """Trouve un post par son ID"""
-        db = get_db()
-        result = db.run("""
-            MATCH (p:Post {id: $id})
-            MATCH (author:User)-[:CREATED]->(p)
-            RETURN p, author.id as author_id
-        """, id=post_id).data()
+        """Trouve un post par son ID (lecture traversante via le cache)"""
+        def load():
+            db = get_db()
+            result = db.run(queries.POST_FIND_BY_ID, id=post_id).data()
+            return dict(result[0]['p'], author_id=result[0]['author_id']) if result else None
         
-        if not result:
+        post_data = post_cache.get_or_load(post_id, load)
+        if not post_data:
             return None
-            
-        post_data = result[0]['p']
-        author_id = result[0]['author_id']
         
-        return cls(
-            post_id=post_data['id'],
-            title=post_data['title'],
-            content=post_data['content'],
-            author_id=author_id,
-            created_at=post_data['created_at']
-        )
+        return cls.from_node(post_data, post_data['author_id'])
+    
+    @classmethod
+    def version(cls, post_id, variant=''):
+        """Version du post (ETag, Last-Modified) : lue dans le cache, sinon par une requête légère"""
+        found, post_data = post_cache.peek(post_id)
+        if found:
+            return node_version('post', post_data, variant) if post_data else None
+        db = get_db()
+        result = db.run(queries.POST_VERSION, id=post_id).data()
+        return version_from('post', post_id, result[0], variant) if result else None
+    
+    @classmethod
+    def comments_version(cls, post_id, variant=''):
+        """Version de la liste des commentaires (None si le post n'existe pas) ; `variant` : page demandée"""
+        db = get_db()
+        result = db.run(queries.POST_COMMENTS_VERSION, id=post_id).data()
+        return version_from('comments', post_id, result[0], variant) if result else None
+    
+    @classmethod
+    def find_projected(cls, post_id, projection):
+        """Post réduit aux champs et inclusions demandés (?fields=/?include=), hors cache"""
+        db = get_db()
+        result = db.run(find_query(projection), id=post_id).data()
+        return result[0]['post'] if result else None
     
     @classmethod
     def get_all(cls):
-        """Récupère tous les posts"""
+        """Récupère tous les posts (dictionnaires projetés par la requête)"""
         db = get_db()
-        results = db.run("""
-            MATCH (p:Post)
-            MATCH (author:User)-[:CREATED]->(p)
-            RETURN p, author.id as author_id
-        """).data()
-        
-        return [cls(
-            post_id=result['p']['id'],
-            title=result['p']['title'],
-            content=result['p']['content'],
-            author_id=result['author_id'],
-            created_at=result['p']['created_at']
-        ).to_dict() for result in results]
-    
-    @classmethod
-    def get_user_posts(cls, user_id):
-        """Récupère tous les posts d'un utilisateur"""
-        db = get_db()
-        results = db.run("""
-            MATCH (author:User {id: $user_id})-[:CREATED]->(p:Post)
-            RETURN p, author.id as author_id
-        """, user_id=user_id).data()
+        return [record['post'] for record in db.run(queries.POST_ALL)]
+    
+    @classmethod
+    def get_user_posts(cls, user_id, projection=None):
+        """Récupère tous les posts d'un utilisateur (dictionnaires projetés par la requête)"""
+        db = get_db()
+        query = user_posts_query(projection) if projection else queries.POST_BY_AUTHOR
+        return [record['post'] for record in db.run(query, user_id=user_id)]
+    
+    @classmethod
+    def get_page(cls, limit, after=None, projection=None):
+        """Récupère une page de posts (created_at décroissant) et le curseur suivant"""
+        db = get_db()
+        variants = page_queries(projection) if projection else queries.POST_PAGE
+        results = db.run(page_query(variants, after), **page_params(limit, after))
         
-        return [cls(
-            post_id=result['p']['id'],
-            title=result['p']['title'],
-            content=result['p']['content'],
-            author_id=result['author_id'],
-            created_at=result['p']['created_at']
-        ).to_dict() for result in results]
\ No newline at end of file
+        return build_page([record['post'] for record in results], limit)
+    
+    @classmethod
+    def search(cls, search, limit, after=None):
+        """Posts trouvés par une recherche plein texte (services/search.py), par pertinence
+        décroissante, avec leur score et leurs extraits surlignés, et le curseur suivant"""
+        db = get_db()
+        results = db.run(page_query(queries.POST_SEARCH, after), text=search.query,
+                         **page_params(limit, after))
+        posts, next_cursor = build_page([dict(record['post'], score=record['score']) for record in results],
+                                        limit, 'score')
+        return [with_highlights(post, search) for post in posts], next_cursor
+    
+    @classmethod
+    def iter_all(cls, projection=None):
+        """Itère paresseusement sur tous les posts (lecture du curseur au fil de l'eau)"""
+        db = get_db()
+        for record in db.stream(all_query(projection) if projection else queries.POST_ALL):
+            yield record['post']
\ No newline at end of file
@@ -0,0 +1,497 @@
+"""Requêtes Cypher des modèles.
+
+Chaque requête est une constante nommée : les modèles synchrones (models/)
+et la couche asynchrone (aio/) exécutent exactement le même texte.
+"""
+from services.pagination import keyset_queries
+from services.metrics import name_queries
+from services.schema import POST_SEARCH_INDEX
+
+
+# Projections des listes : exactement les champs de to_dict(), lus en dictionnaires
+# sans construire de modèle (les compteurs absents valent 0, comme dans from_node)
+
+def user_projection(alias):
+    return f"{alias} {{.id, .name, .email, .created_at}}"
+
+
+def post_projection(alias, author_alias):
+    return (f"{alias} {{.id, .title, .content, author_id: {author_alias}.id, .created_at, "
+            f"likes_count: coalesce({alias}.likes_count, 0), "
+            f"comments_count: coalesce({alias}.comments_count, 0)}}")
+
+
+def comment_projection(alias):
+    return (f"{alias} {{.id, .content, .author_id, .post_id, .parent_id, .created_at, "
+            f"likes_count: coalesce({alias}.likes_count, 0)}}")
+
+
+# Marqueur de version (ETag, Last-Modified) : chaque écriture qui change ce que
+# renvoie une lecture incrémente `revision` et date `updated_at` (secondes).
+# Les amitiés ont leur propre marqueur (friends_revision) : elles ne changent
+# pas la fiche de l'utilisateur, gardée en cache.
+
+def touch(alias, prefix=''):
+    return (f"{alias}.{prefix}revision = coalesce({alias}.{prefix}revision, 0) + 1, "
+            f"{alias}.{prefix}updated_at = timestamp() / 1000.0")
+
+
+def version_of(alias, prefix=''):
+    return (f"coalesce({alias}.{prefix}revision, 0) AS revision, "
+            f"coalesce({alias}.{prefix}updated_at, {alias}.created_at) AS updated_at")
+
+
+# Chemin matérialisé des commentaires : chemin du parent + '/' + segment.
+# Le segment (created_at en millisecondes sur 15 chiffres, puis id) se trie
+# dans l'ordre chronologique : trier un fil par `path` donne l'arbre en
+# profondeur, les réponses d'un même parent dans l'ordre de création. Un
+# sous-arbre est lu par `path STARTS WITH` sur l'index de plage comment_path.
+
+def comment_segment(created_at, item_id):
+    return f"right('000000000000000' + toString(toInteger({created_at} * 1000)), 15) + '-' + {item_id}"
+
+
+def comment_path(alias):
+    # Commentaires créés avant l'ajout des chemins : segment recalculé
+    return f"coalesce({alias}.path, {comment_segment(f'{alias}.created_at', f'{alias}.id')})"
+
+
+# --- Utilisateurs ---
+
+USER_CREATE = """
+CREATE (u:User {id: $id, name: $name, email: $email, created_at: $created_at})
+"""
+
+USER_UPDATE = f"""
+MATCH (u:User {{id: $id}})
+SET u.name = $name, u.email = $email, {touch('u')}
+RETURN u
+"""
+
+USER_BEFRIEND = f"""
+OPTIONAL MATCH (u1:User {{id: $user_id}})
+OPTIONAL MATCH (u2:User {{id: $friend_id}})
+OPTIONAL MATCH (u1)-[existing:FRIENDS_WITH]-(u2)
+WITH u1, u2, count(existing) > 0 AS existed
+FOREACH (_ IN CASE WHEN u1 IS NOT NULL AND u2 IS NOT NULL AND NOT existed THEN [1] ELSE [] END |
+    MERGE (u1)-[:FRIENDS_WITH]->(u2)
+    SET {touch('u1', 'friends_')}, {touch('u2', 'friends_')}
+)
+RETURN u1 IS NOT NULL AS user_found, u2 IS NOT NULL AS friend_found, existed
+"""
+
+USER_UNFRIEND = f"""
+OPTIONAL MATCH (u1:User {{id: $user_id}})
+OPTIONAL MATCH (u2:User {{id: $friend_id}})
+OPTIONAL MATCH (u1)-[r:FRIENDS_WITH]-(u2)
+WITH u1, u2, collect(r) AS rels
+FOREACH (r IN rels | DELETE r)
+FOREACH (_ IN CASE WHEN size(rels) > 0 THEN [1] ELSE [] END |
+    SET {touch('u1', 'friends_')}, {touch('u2', 'friends_')}
+)
+RETURN u1 IS NOT NULL AS user_found, u2 IS NOT NULL AS friend_found, size(rels) > 0 AS existed
+"""
+
+USER_DELETE_BY_ID = f"""
+MATCH (u:User {{id: $id}})
+OPTIONAL MATCH (u)-[:CREATED]->(p:Post)
+WITH u, u.email AS email, collect(p.id) AS post_ids
+OPTIONAL MATCH (u)-[:LIKES]->(liked)
+WITH u, email, post_ids, collect(liked) AS liked
+FOREACH (n IN liked | SET n.likes_count = coalesce(n.likes_count, 1) - 1, {touch('n')})
+FOREACH (f IN [(u)-[:FRIENDS_WITH]-(friend:User) | friend] | SET {touch('f', 'friends_')})
+WITH u, email, post_ids, [n IN liked WHERE n:Post | n.id] AS liked_post_ids
+DETACH DELETE u
+RETURN email, post_ids, liked_post_ids
+"""
+
+USER_BULK_CREATE = """
+UNWIND $rows AS row
+MERGE (u:User {email: row.email})
+ON CREATE SET u.id = row.id, u.name = row.name, u.created_at = row.created_at
+RETURN row.idx AS idx, row.id AS id, u.id = row.id AS created
+"""
+
+USER_BULK_BEFRIEND = f"""
+UNWIND $rows AS row
+OPTIONAL MATCH (u1:User {{id: row.user_id}})
+OPTIONAL MATCH (u2:User {{id: row.friend_id}})
+OPTIONAL MATCH (u1)-[existing:FRIENDS_WITH]-(u2)
+WITH row, u1, u2, count(existing) > 0 AS existed
+FOREACH (_ IN CASE WHEN u1 IS NOT NULL AND u2 IS NOT NULL AND NOT existed THEN [1] ELSE [] END |
+    MERGE (u1)-[:FRIENDS_WITH]->(u2)
+    SET {touch('u1', 'friends_')}, {touch('u2', 'friends_')}
+)
+RETURN row.idx AS idx, u1 IS NOT NULL AS user_found, u2 IS NOT NULL AS friend_found, existed
+"""
+
+USER_IS_FRIEND_WITH = """
+MATCH (u1:User {id: $user_id})-[:FRIENDS_WITH]-(u2:User {id: $friend_id})
+RETURN u2
+"""
+
+USER_FRIENDS = f"""
+MATCH (u:User {{id: $id}})-[:FRIENDS_WITH]-(friend:User)
+RETURN {user_projection('friend')} AS user
+"""
+
+USER_MUTUAL_FRIENDS = f"""
+MATCH (u1:User {{id: $user_id}})-[:FRIENDS_WITH]-(mutual:User)-[:FRIENDS_WITH]-(u2:User {{id: $other_id}})
+RETURN {user_projection('mutual')} AS user
+"""
+
+USER_RECOMMENDATIONS = """
+MATCH (u:User {id: $id})-[:FRIENDS_WITH]-(friend:User)-[:FRIENDS_WITH]-(candidate:User)
+WHERE candidate <> u AND NOT (u)-[:FRIENDS_WITH]-(candidate)
+WITH candidate, count(DISTINCT friend) AS common_friends
+ORDER BY common_friends DESC, candidate.id
+LIMIT $limit
+RETURN candidate.id AS id, common_friends
+"""
+
+USER_FIND_MANY = """
+UNWIND $ids AS id
+MATCH (u:User {id: id})
+RETURN u
+"""
+
+USER_FIND_BY_ID = """
+MATCH (u:User {id: $id})
+RETURN u
+"""
+
+# Versions (requêtes conditionnelles) : propriétés du noeud seulement, jamais le corps
+USER_VERSION = f"""
+MATCH (u:User {{id: $id}})
+RETURN {version_of('u')}
+"""
+
+# Liste d'amis : marqueur des amitiés de l'utilisateur et version des fiches des amis
+USER_FRIENDS_VERSION = f"""
+MATCH (u:User {{id: $id}})
+OPTIONAL MATCH (u)-[:FRIENDS_WITH]-(f:User)
+RETURN {version_of('u', 'friends_')}, count(f) AS count, sum(coalesce(f.revision, 0)) AS members_revision,
+       max(coalesce(f.updated_at, f.created_at)) AS members_updated_at
+"""
+
+USER_FIND_BY_EMAIL = """
+MATCH (u:User {email: $email})
+RETURN u
+"""
+
+USER_ALL = f"""
+MATCH (u:User)
+RETURN {user_projection('u')} AS user
+"""
+
+USER_PAGE = keyset_queries("MATCH (u:User)", "u", f"""
+RETURN {user_projection('u')} AS user
+ORDER BY u.created_at DESC, u.id DESC
+""")
+
+
+# --- Posts ---
+
+POST_CREATE = """
+MATCH (author:User {id: $author_id})
+CREATE (p:Post {id: $id, title: $title, content: $content, created_at: $created_at,
+              likes_count: 0, comments_count: 0})
+CREATE (author)-[r:CREATED]->(p)
+WITH p, author, size([(author)-[:FRIENDS_WITH]-(f:User) | f]) AS friend_count
+RETURN p, friend_count,
+       CASE WHEN friend_count < $fanout_limit
+            THEN [(author)-[:FRIENDS_WITH]-(f:User) | f.id] END AS friend_ids
+"""
+
+POST_UPDATE = f"""
+MATCH (p:Post {{id: $id}})
+SET p.title = $title, p.content = $content, {touch('p')}
+RETURN p
+"""
+
+POST_LIKE = f"""
+OPTIONAL MATCH (p:Post {{id: $post_id}})
+OPTIONAL MATCH (u:User {{id: $user_id}})
+OPTIONAL MATCH (u)-[existing:LIKES]->(p)
+WITH p, u, existing IS NOT NULL AS existed
+FOREACH (_ IN CASE WHEN p IS NOT NULL AND u IS NOT NULL AND NOT existed THEN [1] ELSE [] END |
+    MERGE (u)-[:LIKES]->(p)
+    SET p.likes_count = coalesce(p.likes_count, 0) + 1, {touch('p')}
+)
+RETURN p IS NOT NULL AS post_found, u IS NOT NULL AS user_found, existed
+"""
+
+POST_UNLIKE = f"""
+OPTIONAL MATCH (p:Post {{id: $post_id}})
+OPTIONAL MATCH (u:User {{id: $user_id}})
+OPTIONAL MATCH (u)-[r:LIKES]->(p)
+WITH p, u, r, r IS NOT NULL AS existed
+FOREACH (_ IN CASE WHEN existed THEN [1] ELSE [] END |
+    DELETE r
+    SET p.likes_count = coalesce(p.likes_count, 1) - 1, {touch('p')}
+)
+RETURN p IS NOT NULL AS post_found, u IS NOT NULL AS user_found, existed
+"""
+
+# Les commentaires du post et leurs réponses partent avec lui (tous portent post_id, indexé)
+POST_DELETE_BY_ID = """
+MATCH (p:Post {id: $id})
+OPTIONAL MATCH (c:Comment {post_id: $id})
+WITH p, collect(c) AS comments
+FOREACH (c IN comments | DETACH DELETE c)
+DETACH DELETE p
+RETURN count(*) AS deleted
+"""
+
+POST_BULK_CREATE = """
+UNWIND $rows AS row
+OPTIONAL MATCH (author:User {id: row.author_id})
+FOREACH (_ IN CASE WHEN author IS NULL THEN [] ELSE [1] END |
+    CREATE (author)-[:CREATED]->(:Post {id: row.id, title: row.title, content: row.content,
+                                        created_at: row.created_at,
+                                        likes_count: 0, comments_count: 0})
+)
+RETURN row.idx AS idx, row.id AS id, author IS NOT NULL AS author_found
+"""
+
+POST_BULK_LIKE = f"""
+UNWIND $rows AS row
+OPTIONAL MATCH (p:Post {{id: row.post_id}})
+OPTIONAL MATCH (u:User {{id: row.user_id}})
+OPTIONAL MATCH (u)-[existing:LIKES]->(p)
+WITH row, p, u, existing IS NOT NULL AS existed
+FOREACH (_ IN CASE WHEN p IS NOT NULL AND u IS NOT NULL AND NOT existed THEN [1] ELSE [] END |
+    MERGE (u)-[:LIKES]->(p)
+    SET p.likes_count = coalesce(p.likes_count, 0) + 1, {touch('p')}
+)
+RETURN row.idx AS idx, p IS NOT NULL AS post_found, u IS NOT NULL AS user_found, existed
+"""
+
+POST_LIKES_COUNT = """
+MATCH (p:Post {id: $id})
+RETURN coalesce(p.likes_count, 0) as likes_count
+"""
+
+POST_COMMENTS = f"""
+MATCH (p:Post {{id: $id}})-[:HAS_COMMENT]->(c:Comment)
+RETURN {comment_projection('c')} AS comment
+"""
+
+POST_FIND_MANY = """
+UNWIND $ids AS id
+MATCH (p:Post {id: id})
+OPTIONAL MATCH (author:User)-[:CREATED]->(p)
+RETURN p, author.id as author_id
+"""
+
+# Un lecteur et une liste de posts : like, auteur, amitié avec l'auteur (une ligne par id demandé)
+POST_VIEWER_STATE = """
+OPTIONAL MATCH (viewer:User {id: $user_id})
+UNWIND $post_ids AS post_id
+OPTIONAL MATCH (p:Post {id: post_id})
+OPTIONAL MATCH (author:User)-[:CREATED]->(p)
+RETURN post_id, viewer IS NOT NULL AS viewer_found, p IS NOT NULL AS post_found, author.id AS author_id,
+       CASE WHEN viewer IS NULL OR p IS NULL THEN false
+            ELSE size([(viewer)-[:LIKES]->(p) | 1]) > 0 END AS liked,
+       CASE WHEN viewer IS NULL OR author IS NULL OR author = viewer THEN false
+            ELSE size([(viewer)-[:FRIENDS_WITH]-(author) | 1]) > 0 END AS friend_of_author
+"""
+
+POST_VERSION = f"""
+MATCH (p:Post {{id: $id}})
+RETURN {version_of('p')}
+"""
+
+# Commentaires d'un post : version du post (créations, suppressions) et des commentaires
+POST_COMMENTS_VERSION = f"""
+MATCH (p:Post {{id: $id}})
+OPTIONAL MATCH (p)-[:HAS_COMMENT]->(c:Comment)
+RETURN {version_of('p')}, count(c) AS count, sum(coalesce(c.revision, 0)) AS members_revision,
+       max(coalesce(c.updated_at, c.created_at)) AS members_updated_at
+"""
+
+# Un post dont l'auteur a été supprimé reste lisible, avec author_id null, comme dans les listes
+POST_FIND_BY_ID = """
+MATCH (p:Post {id: $id})
+OPTIONAL MATCH (author:User)-[:CREATED]->(p)
+RETURN p, author.id as author_id
+"""
+
+POST_ALL = f"""
+MATCH (p:Post)
+OPTIONAL MATCH (author:User)-[:CREATED]->(p)
+RETURN {post_projection('p', 'author')} AS post
+"""
+
+POST_BY_AUTHOR = f"""
+MATCH (author:User {{id: $user_id}})-[:CREATED]->(p:Post)
+RETURN {post_projection('p', 'author')} AS post
+"""
+
+POST_PAGE = keyset_queries("MATCH (p:Post)", "p", f"""
+OPTIONAL MATCH (author:User)-[:CREATED]->(p)
+RETURN {post_projection('p', 'author')} AS post
+ORDER BY p.created_at DESC, p.id DESC
+""")
+
+
+# Recherche plein texte (services/search.py) : même pagination keyset que
+# keyset_queries, sur (score, id) au lieu de (created_at, id). Lucene calcule
+# toujours tous les résultats ; seule la page est projetée avec son auteur.
+POST_SEARCH = tuple(f"""
+CALL db.index.fulltext.queryNodes('{POST_SEARCH_INDEX}', $text) YIELD node AS p, score
+{where}
+WITH p, score
+ORDER BY score DESC, p.id DESC
+LIMIT $limit
+OPTIONAL MATCH (author:User)-[:CREATED]->(p)
+RETURN {post_projection('p', 'author')} AS post, score
+ORDER BY score DESC, p.id DESC
+""" for where in ("", "WHERE score <= $after_ts AND (score < $after_ts OR p.id < $after_id)"))
+
+
+# --- Commentaires ---
+
+COMMENT_CREATE = f"""
+OPTIONAL MATCH (p:Post {{id: $post_id}})
+OPTIONAL MATCH (author:User {{id: $author_id}})
+OPTIONAL MATCH (parent:Comment {{id: $parent_id}})
+WITH p, author, parent, $parent_id IS NULL OR coalesce(parent.post_id = $post_id, false) AS parent_found,
+     {comment_segment('$created_at', '$id')} AS segment
+FOREACH (_ IN CASE WHEN p IS NOT NULL AND author IS NOT NULL AND parent_found THEN [1] ELSE [] END |
+    CREATE (author)-[:WROTE]->(c:Comment {{id: $id, content: $content, author_id: $author_id,
+                                          post_id: $post_id, parent_id: $parent_id,
+                                          created_at: $created_at, likes_count: 0}})
+    CREATE (p)-[:HAS_COMMENT]->(c)
+    SET c.path = CASE WHEN parent IS NULL THEN segment ELSE {comment_path('parent')} + '/' + segment END,
+        p.comments_count = coalesce(p.comments_count, 0) + 1, {touch('p')}
+)
+RETURN p IS NOT NULL AS post_found, author IS NOT NULL AS user_found, parent_found
+"""
+
+COMMENT_LIKE = f"""
+OPTIONAL MATCH (c:Comment {{id: $comment_id}})
+OPTIONAL MATCH (u:User {{id: $user_id}})
+OPTIONAL MATCH (u)-[existing:LIKES]->(c)
+WITH c, u, existing IS NOT NULL AS existed
+FOREACH (_ IN CASE WHEN c IS NOT NULL AND u IS NOT NULL AND NOT existed THEN [1] ELSE [] END |
+    MERGE (u)-[:LIKES]->(c)
+    SET c.likes_count = coalesce(c.likes_count, 0) + 1, {touch('c')}
+)
+RETURN c IS NOT NULL AS comment_found, u IS NOT NULL AS user_found, existed
+"""
+
+COMMENT_UNLIKE = f"""
+OPTIONAL MATCH (c:Comment {{id: $comment_id}})
+OPTIONAL MATCH (u:User {{id: $user_id}})
+OPTIONAL MATCH (u)-[r:LIKES]->(c)
+WITH c, u, r, r IS NOT NULL AS existed
+FOREACH (_ IN CASE WHEN existed THEN [1] ELSE [] END |
+    DELETE r
+    SET c.likes_count = coalesce(c.likes_count, 1) - 1, {touch('c')}
+)
+RETURN c IS NOT NULL AS comment_found, u IS NOT NULL AS user_found, existed
+"""
+
+# Les suppressions emportent le sous-arbre des réponses (une lecture de plage sur path)
+COMMENT_DELETE_FROM_POST = f"""
+OPTIONAL MATCH (p:Post {{id: $post_id}})
+OPTIONAL MATCH (c:Comment {{id: $comment_id}})
+WITH p, c, p IS NOT NULL AS post_found, c IS NOT NULL AS comment_found,
+     c IS NOT NULL AND c.post_id = $post_id AS belongs
+OPTIONAL MATCH (reply:Comment)
+WHERE post_found AND belongs AND reply.path STARTS WITH {comment_path('c')} + '/'
+WITH p, c, post_found, comment_found, belongs, collect(reply) AS replies
+WITH p, post_found, comment_found, belongs,
+     CASE WHEN post_found AND belongs THEN [c] + replies ELSE [] END AS removed
+FOREACH (n IN removed | DETACH DELETE n)
+FOREACH (_ IN CASE WHEN size(removed) > 0 THEN [1] ELSE [] END |
+    SET p.comments_count = coalesce(p.comments_count, size(removed)) - size(removed), {touch('p')}
+)
+RETURN post_found, comment_found, belongs
+"""
+
+COMMENT_DELETE_BY_ID = f"""
+MATCH (c:Comment {{id: $id}})
+OPTIONAL MATCH (p:Post)-[:HAS_COMMENT]->(c)
+OPTIONAL MATCH (reply:Comment)
+WHERE reply.path STARTS WITH {comment_path('c')} + '/'
+WITH p, c, collect(reply) AS replies
+WITH p, c.post_id AS post_id, [c] + replies AS removed
+FOREACH (n IN removed | DETACH DELETE n)
+FOREACH (_ IN CASE WHEN p IS NOT NULL THEN [1] ELSE [] END |
+    SET p.comments_count = coalesce(p.comments_count, size(removed)) - size(removed), {touch('p')}
+)
+RETURN post_id, size(removed) AS deleted
+"""
+
+COMMENT_FIND_BY_ID = """
+MATCH (c:Comment {id: $id})
+RETURN c
+"""
+
+COMMENT_UPDATE = f"""
+MATCH (c:Comment {{id: $id}})
+SET c.content = $content, {touch('c')}
+RETURN c
+"""
+
+# Un commentaire et ses réponses à toutes profondeurs, dans l'ordre du fil
+COMMENT_THREAD = f"""
+MATCH (root:Comment {{id: $id}})
+OPTIONAL MATCH (c:Comment)
+WHERE c.path STARTS WITH {comment_path('root')} + '/'
+WITH root, c
+ORDER BY c.path
+LIMIT $limit
+RETURN {comment_projection('root')} AS root, collect({comment_projection('c')}) AS replies
+"""
+
+COMMENT_VERSION = f"""
+MATCH (c:Comment {{id: $id}})
+RETURN {version_of('c')}
+"""
+
+COMMENT_ALL = f"""
+MATCH (c:Comment)
+RETURN {comment_projection('c')} AS comment
+"""
+
+COMMENT_PAGE = keyset_queries("MATCH (c:Comment)", "c", f"""
+RETURN {comment_projection('c')} AS comment
+ORDER BY c.created_at DESC, c.id DESC
+""")
+
+# Commentaires d'un post (réponses comprises), page par page
+POST_COMMENTS_PAGE = keyset_queries("MATCH (:Post {id: $post_id})-[:HAS_COMMENT]->(c:Comment)", "c", f"""
+RETURN {comment_projection('c')} AS comment
+ORDER BY c.created_at DESC, c.id DESC
+""")
+
+
+
+# --- Fil d'actualité ---
+
+FEED_TIMELINE = """
+MATCH (u:User {id: $id})-[:FRIENDS_WITH]-(f:User)
+WITH DISTINCT f
+WITH f, size([(f)-[:FRIENDS_WITH]-(other:User) | other]) >= $fanout_limit AS celebrity
+CALL {
+    WITH f, celebrity
+    OPTIONAL MATCH (f)-[:CREATED]->(p:Post)
+    WHERE NOT celebrity
+    WITH p ORDER BY p.created_at DESC LIMIT $length
+    RETURN collect(CASE WHEN p IS NOT NULL THEN [p.created_at, p.id] END) AS posts
+}
+RETURN f.id AS friend_id, celebrity, posts
+"""
+
+FEED_AUTHOR_RECENT = """
+MATCH (a:User {id: $id})-[:CREATED]->(p:Post)
+WITH p ORDER BY p.created_at DESC LIMIT $length
+RETURN collect([p.created_at, p.id]) AS posts
+"""
+
+
+# Les métriques désignent chaque requête par le nom de sa constante
+name_queries(globals())
\ No newline at end of file
@@ -1,9 +1,20 @@
 import uuid
 from datetime import datetime
-from py2neo import Node, Relationship
 from services.db_service import get_db
+from models import queries
+from services.pagination import page_query, page_params, build_page
+from services.projection import page_queries, find_query, all_query, many_query
+from services.batching import validate_item, item_error, item_success, run_batches
+from services.cache import user_cache, user_email_cache, post_cache
+from services.conditional import version_from, node_version
+from services.friend_graph import friend_graph
+from services import feed
+from config import BULK_BATCH_SIZE
 
 class User:
+    # Pas de __dict__ par instance : moins de mémoire quand des objets sont encore construits
+    __slots__ = ('id', 'name', 'email', 'created_at')
+
     def __init__(self, name, email, user_id=None, created_at=None):
         self.id = user_id or str(uuid.uuid4())
         self.name = name
@@ -19,23 +30,30 @@ class User:
             "created_at": self.created_at
         }
     
+    @classmethod
+    def from_node(cls, node):
+        """Construit un utilisateur depuis les propriétés d'un noeud :User"""
+        return cls(
+            user_id=node['id'],
+            name=node['name'],
+            email=node['email'],
+            created_at=node['created_at']
+        )
+    
     def save(self):
         """Enregistre l'utilisateur dans la base de données"""
         db = get_db()
-        # Créer un nœud avec les propriétés de l'utilisateur
-        user_node = Node("User", 
-                        id=self.id,
-                        name=self.name,
-                        email=self.email,
-                        created_at=self.created_at)
-        
-        # Insertion du nœud dans la base de données
-        db.create(user_node)
+        # Insertion du nœud avec les propriétés de l'utilisateur
+        db.run(queries.USER_CREATE, id=self.id, name=self.name, email=self.email, created_at=self.created_at)
+        # Purge d'éventuelles entrées négatives (id ou email inconnus jusqu'ici)
+        user_cache.invalidate(self.id)
+        user_email_cache.invalidate(self.email)
         return self
     
     def update(self, name=None, email=None):
         """Met à jour les informations de l'utilisateur"""
         db = get_db()
+        old_email = self.email
         # Mise à jour uniquement des champs fournis
         if name:
             self.name = name
@@ -43,99 +61,259 @@ class User:
             self.email = email
             
         # Mise à jour dans la base de données
-        db.run("""
-            MATCH (u:User {id: $id})
-            SET u.name = $name, u.email = $email
-            RETURN u
-        """, id=self.id, name=self.name, email=self.email)
+        db.run(queries.USER_UPDATE, id=self.id, name=self.name, email=self.email)
         
+        user_cache.invalidate(self.id)
+        user_email_cache.invalidate(old_email, self.email)
         return self
     
-    def delete(self):
-        """Supprime l'utilisateur et ses relations"""
+    @classmethod
+    def befriend(cls, user_id, friend_id):
+        """Crée une amitié en une seule requête.
+
+        Retourne 'ok', 'already_exists', 'user_not_found' ou 'friend_not_found'.
+        """
         db = get_db()
-        # Suppression de l'utilisateur et de toutes ses relations
-        db.run("""
-            MATCH (u:User {id: $id})
-            DETACH DELETE u
-        """, id=self.id)
-        
-        return True
+        result = db.run(queries.USER_BEFRIEND, user_id=user_id, friend_id=friend_id).data()[0]
+        return cls.after_befriend(user_id, friend_id, cls.befriend_status(result))
+    
+    @staticmethod
+    def befriend_status(result):
+        """Traduit la ligne retournée par USER_BEFRIEND en statut"""
+        if not result['user_found']:
+            return 'user_not_found'
+        if not result['friend_found']:
+            return 'friend_not_found'
+        return 'already_exists' if result['existed'] else 'ok'
+    
+    @staticmethod
+    def after_befriend(user_id, friend_id, status):
+        """Reporte une amitié créée dans le graphe en mémoire ; retourne le statut"""
+        if status == 'ok':
+            friend_graph.add_friendship(user_id, friend_id)
+            feed.invalidate_timelines(user_id, friend_id)
+        return status
     
-    def add_friend(self, friend_id):
-        """Ajoute une relation d'amitié avec un autre utilisateur"""
+    @classmethod
+    def unfriend(cls, user_id, friend_id):
+        """Supprime une amitié (dans les deux sens) en une seule requête.
+
+        Retourne 'ok', 'relation_not_found', 'user_not_found' ou 'friend_not_found'.
+        """
         db = get_db()
-        result = db.run("""
-            MATCH (u1:User {id: $user_id}), (u2:User {id: $friend_id})
-            MERGE (u1)-[r:FRIENDS_WITH]->(u2)
-            RETURN r
-        """, user_id=self.id, friend_id=friend_id).data()
-        
-        return bool(result)
+        result = db.run(queries.USER_UNFRIEND, user_id=user_id, friend_id=friend_id).data()[0]
+        return cls.after_unfriend(user_id, friend_id, cls.unfriend_status(result))
     
-    def remove_friend(self, friend_id):
-        """Supprime une relation d'amitié"""
+    @staticmethod
+    def unfriend_status(result):
+        """Traduit la ligne retournée par USER_UNFRIEND en statut"""
+        if not result['user_found']:
+            return 'user_not_found'
+        if not result['friend_found']:
+            return 'friend_not_found'
+        return 'ok' if result['existed'] else 'relation_not_found'
+    
+    @staticmethod
+    def after_unfriend(user_id, friend_id, status):
+        """Reporte une amitié supprimée dans le graphe en mémoire ; retourne le statut"""
+        if status == 'ok':
+            friend_graph.remove_friendship(user_id, friend_id)
+            feed.invalidate_timelines(user_id, friend_id)
+        return status
+    
+    @classmethod
+    def delete_by_id(cls, user_id):
+        """Supprime un utilisateur et ses relations en une seule requête ; retourne False s'il n'existe pas"""
         db = get_db()
-        db.run("""
-            MATCH (u1:User {id: $user_id})-[r:FRIENDS_WITH]-(u2:User {id: $friend_id})
-            DELETE r
-        """, user_id=self.id, friend_id=friend_id)
+        result = db.run(queries.USER_DELETE_BY_ID, id=user_id).data()
         
+        return cls.after_delete(user_id, result)
+    
+    @staticmethod
+    def after_delete(user_id, result):
+        """Invalide les caches après USER_DELETE_BY_ID ; retourne False si rien n'a été supprimé"""
+        if not result:
+            return False
+        user_cache.invalidate(user_id)
+        user_email_cache.invalidate(result[0]['email'])
+        post_cache.invalidate(*result[0]['post_ids'], *result[0]['liked_post_ids'])
+        friend_graph.remove_user(user_id)
+        feed.invalidate_timelines(user_id)
         return True
     
+    @classmethod
+    def bulk_create(cls, items, batch_size=BULK_BATCH_SIZE):
+        """Crée des utilisateurs par lots (UNWIND) et retourne un rapport par élément"""
+        reports, rows = cls.bulk_create_rows(items)
+        # MERGE sur l'email : un email déjà présent (en base ou plus haut dans la liste) est rejeté
+        reports = run_batches(get_db(), queries.USER_BULK_CREATE, rows, batch_size,
+                              cls.bulk_create_report, reports)
+        return cls.after_bulk_create(rows, reports)
+    
+    @classmethod
+    def bulk_create_rows(cls, items):
+        """Valide les éléments : retourne (rapports des rejets, lignes à écrire)"""
+        reports = [None] * len(items)
+        rows = []
+        for index, item in enumerate(items):
+            error = validate_item(item, ('name', 'email'))
+            if error:
+                reports[index] = item_error(index, error)
+                continue
+            user = cls(name=item['name'], email=item['email'])
+            rows.append({"idx": index, "id": user.id, "name": user.name,
+                         "email": user.email, "created_at": user.created_at})
+        return reports, rows
+    
+    @staticmethod
+    def bulk_create_report(result):
+        """Ligne de rapport pour une ligne retournée par USER_BULK_CREATE"""
+        if result['created']:
+            return item_success(result['idx'], id=result['id'])
+        return item_error(result['idx'], "Un utilisateur avec cet email existe déjà")
+    
+    @staticmethod
+    def after_bulk_create(rows, reports):
+        """Purge les entrées négatives des utilisateurs créés"""
+        created = [row for row in rows if reports[row['idx']]['success']]
+        user_cache.invalidate(*(row['id'] for row in created))
+        user_email_cache.invalidate(*(row['email'] for row in created))
+        return reports
+    
+    @classmethod
+    def bulk_befriend(cls, items, batch_size=BULK_BATCH_SIZE):
+        """Crée des amitiés par lots (UNWIND) et retourne un rapport par élément"""
+        reports, rows = cls.bulk_befriend_rows(items)
+        reports = run_batches(get_db(), queries.USER_BULK_BEFRIEND, rows, batch_size,
+                              cls.bulk_befriend_report, reports)
+        return cls.after_bulk_befriend(rows, reports)
+    
+    @staticmethod
+    def bulk_befriend_rows(items):
+        """Valide et dédoublonne les amitiés : retourne (rapports des rejets, lignes à écrire)"""
+        reports = [None] * len(items)
+        rows = []
+        seen = set()
+        for index, item in enumerate(items):
+            error = validate_item(item, ('user_id', 'friend_id'))
+            if not error and item['user_id'] == item['friend_id']:
+                # Même règle que l'import (services/importer.py)
+                error = "Un utilisateur ne peut pas être ami avec lui-même"
+            if not error:
+                # L'amitié n'est pas orientée : (a, b) et (b, a) sont des doublons
+                pair = frozenset((item['user_id'], item['friend_id']))
+                error = "Amitié en double dans la requête" if pair in seen else None
+                seen.add(pair)
+            if error:
+                reports[index] = item_error(index, error)
+                continue
+            rows.append({"idx": index, "user_id": item['user_id'], "friend_id": item['friend_id']})
+        return reports, rows
+    
+    @staticmethod
+    def bulk_befriend_report(result):
+        """Ligne de rapport pour une ligne retournée par USER_BULK_BEFRIEND"""
+        if not result['user_found']:
+            return item_error(result['idx'], "Utilisateur non trouvé")
+        if not result['friend_found']:
+            return item_error(result['idx'], "Ami non trouvé")
+        if result['existed']:
+            return item_error(result['idx'], "Ces utilisateurs sont déjà amis")
+        return item_success(result['idx'])
+    
+    @staticmethod
+    def after_bulk_befriend(rows, reports):
+        """Reporte les amitiés créées dans le graphe en mémoire"""
+        changed = set()
+        for row in rows:
+            if reports[row['idx']]['success']:
+                friend_graph.add_friendship(row['user_id'], row['friend_id'])
+                changed.update((row['user_id'], row['friend_id']))
+        feed.invalidate_timelines(*changed)
+        return reports
+    
     def is_friend_with(self, friend_id):
         """Vérifie si l'utilisateur est ami avec un autre utilisateur"""
         db = get_db()
-        result = db.run("""
-            MATCH (u1:User {id: $user_id})-[:FRIENDS_WITH]-(u2:User {id: $friend_id})
-            RETURN u2
-        """, user_id=self.id, friend_id=friend_id).data()
+        if friend_graph.ensure_loaded(db):
+            return friend_graph.are_friends(self.id, friend_id)
+        result = db.run(queries.USER_IS_FRIEND_WITH, user_id=self.id, friend_id=friend_id).data()
         
         return bool(result)
     
     def get_friends(self):
         """Récupère la liste des amis de l'utilisateur"""
         db = get_db()
-        results = db.run("""
-            MATCH (u:User {id: $id})-[:FRIENDS_WITH]-(friend:User)
-            RETURN friend
-        """, id=self.id).data()
-        
-        return [User(
-            user_id=result['friend']['id'],
-            name=result['friend']['name'],
-            email=result['friend']['email'],
-            created_at=result['friend']['created_at']
-        ).to_dict() for result in results]
+        if friend_graph.ensure_loaded(db):
+            return [user.to_dict() for user in User.find_many(friend_graph.friends(self.id))]
+        # Projection Cypher : les dictionnaires vont directement au sérialiseur
+        return [record['user'] for record in db.run(queries.USER_FRIENDS, id=self.id)]
     
     def get_mutual_friends(self, other_id):
         """Récupère les amis en commun avec un autre utilisateur"""
         db = get_db()
-        results = db.run("""
-            MATCH (u1:User {id: $user_id})-[:FRIENDS_WITH]-(mutual:User)-[:FRIENDS_WITH]-(u2:User {id: $other_id})
-            RETURN mutual
-        """, user_id=self.id, other_id=other_id).data()
-        
-        return [User(
-            user_id=result['mutual']['id'],
-            name=result['mutual']['name'],
-            email=result['mutual']['email'],
-            created_at=result['mutual']['created_at']
-        ).to_dict() for result in results]
+        if friend_graph.ensure_loaded(db):
+            mutual_ids = friend_graph.mutual_friends(self.id, other_id)
+            return [user.to_dict() for user in User.find_many(mutual_ids)]
+        return [record['user']
+                for record in db.run(queries.USER_MUTUAL_FRIENDS, user_id=self.id, other_id=other_id)]
+    
+    def get_recommendations(self, limit=10):
+        """Suggestions d'amis : amis d'amis classés par nombre d'amis communs"""
+        db = get_db()
+        if friend_graph.ensure_loaded(db):
+            ranked = friend_graph.recommendations(self.id, limit)
+        else:
+            ranked = [(result['id'], result['common_friends'])
+                      for result in db.run(queries.USER_RECOMMENDATIONS, id=self.id, limit=limit).data()]
+        return self.recommendations_from(ranked, User.find_many([user_id for user_id, _ in ranked]))
+    
+    @staticmethod
+    def recommendations_from(ranked, users):
+        """Associe à chaque utilisateur suggéré son nombre d'amis communs (ordre du classement)"""
+        by_id = {user.id: user for user in users}
+        return [dict(by_id[user_id].to_dict(), common_friends=common)
+                for user_id, common in ranked if user_id in by_id]
     
     @classmethod
-    def find_by_id(cls, user_id):
-        """Trouve un utilisateur par son ID"""
+    def find_many(cls, user_ids):
+        """Trouve plusieurs utilisateurs par ID (ordre conservé, absents ignorés).
+
+        Les id absents du cache sont lus en une seule requête UNWIND.
+        """
+        if not user_ids:
+            return []
+        by_id = user_cache.get_many_or_load(user_ids, cls.load_many)
+        return [cls.from_node(by_id[user_id]) for user_id in user_ids if user_id in by_id]
+    
+    @staticmethod
+    def load_many(user_ids):
+        """Propriétés des utilisateurs trouvés, par id (valeurs du cache)"""
         db = get_db()
-        result = db.run("""
-            MATCH (u:User {id: $id})
-            RETURN u
-        """, id=user_id).data()
+        results = db.run(queries.USER_FIND_MANY, ids=list(user_ids)).data()
+        return {result['u']['id']: dict(result['u']) for result in results}
+    
+    @classmethod
+    def get_many(cls, user_ids, projection=None):
+        """Utilisateurs par id, en dictionnaire {id: utilisateur} (absents omis)"""
+        if projection:
+            db = get_db()
+            results = db.run(many_query(projection), ids=list(user_ids))
+            return {record['user']['id']: record['user'] for record in results}
+        return {user.id: user.to_dict() for user in cls.find_many(user_ids)}
+    
+    @classmethod
+    def find_by_id(cls, user_id):
+        """Trouve un utilisateur par son ID (lecture traversante via le cache)"""
+        def load():
+            db = get_db()
+            result = db.run(queries.USER_FIND_BY_ID, id=user_id).data()
+            return dict(result[0]['u']) if result else None
         
-        if not result:
+        user_data = user_cache.get_or_load(user_id, load)
+        if not user_data:
             return None
             
-        user_data = result[0]['u']
         return cls(
             user_id=user_data['id'],
             name=user_data['name'],
@@ -144,18 +322,34 @@ class User:
         )
     
     @classmethod
-    def find_by_email(cls, email):
-        """Trouve un utilisateur par son email"""
+    def version(cls, user_id, variant=''):
+        """Version de la fiche (ETag, Last-Modified) : lue dans le cache, sinon par une requête légère"""
+        found, user_data = user_cache.peek(user_id)
+        if found:
+            return node_version('user', user_data, variant) if user_data else None
         db = get_db()
-        result = db.run("""
-            MATCH (u:User {email: $email})
-            RETURN u
-        """, email=email).data()
+        result = db.run(queries.USER_VERSION, id=user_id).data()
+        return version_from('user', user_id, result[0], variant) if result else None
+    
+    @classmethod
+    def friends_version(cls, user_id):
+        """Version de la liste d'amis (None si l'utilisateur n'existe pas)"""
+        db = get_db()
+        result = db.run(queries.USER_FRIENDS_VERSION, id=user_id).data()
+        return version_from('friends', user_id, result[0]) if result else None
+    
+    @classmethod
+    def find_by_email(cls, email):
+        """Trouve un utilisateur par son email (lecture traversante via le cache)"""
+        def load():
+            db = get_db()
+            result = db.run(queries.USER_FIND_BY_EMAIL, email=email).data()
+            return dict(result[0]['u']) if result else None
         
-        if not result:
+        user_data = user_email_cache.get_or_load(email, load)
+        if not user_data:
             return None
             
-        user_data = result[0]['u']
         return cls(
             user_id=user_data['id'],
             name=user_data['name'],
@@ -165,16 +359,29 @@ class User:
     
     @classmethod
     def get_all(cls):
-        """Récupère tous les utilisateurs"""
+        """Récupère tous les utilisateurs (dictionnaires projetés par la requête)"""
         db = get_db()
-        results = db.run("""
-            MATCH (u:User)
-            RETURN u
-        """).data()
+        return [record['user'] for record in db.run(queries.USER_ALL)]
+    
+    @classmethod
+    def find_projected(cls, user_id, projection):
+        """Utilisateur réduit aux champs et inclusions demandés (?fields=/?include=), hors cache"""
+        db = get_db()
+        result = db.run(find_query(projection), id=user_id).data()
+        return result[0]['user'] if result else None
+    
+    @classmethod
+    def get_page(cls, limit, after=None, projection=None):
+        """Récupère une page d'utilisateurs (created_at décroissant) et le curseur suivant"""
+        db = get_db()
+        variants = page_queries(projection) if projection else queries.USER_PAGE
+        results = db.run(page_query(variants, after), **page_params(limit, after))
         
-        return [cls(
-            user_id=result['u']['id'],
-            name=result['u']['name'],
-            email=result['u']['email'],
-            created_at=result['u']['created_at']
-        ).to_dict() for result in results]
\ No newline at end of file
+        return build_page([record['user'] for record in results], limit)
+    
+    @classmethod
+    def iter_all(cls, projection=None):
+        """Itère paresseusement sur tous les utilisateurs (lecture du curseur au fil de l'eau)"""
+        db = get_db()
+        for record in db.stream(all_query(projection) if projection else queries.USER_ALL):
+            yield record['user']
\ No newline at end of file
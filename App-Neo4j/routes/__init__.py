@@ -1,5 +1,7 @@
 from .user_routes import user_bp
 from .post_routes import post_bp
 from .comment_routes import comment_bp
+from .admin_routes import admin_bp
+from .bulk_routes import bulk_bp
 
-__all__ = ['user_bp', 'post_bp', 'comment_bp']
\ No newline at end of file
+__all__ = ['user_bp', 'post_bp', 'comment_bp', 'admin_bp', 'bulk_bp']
\ No newline at end of file
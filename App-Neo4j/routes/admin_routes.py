@@ -0,0 +1,62 @@
+from flask import Blueprint, jsonify, request
+from services.db_service import get_db
+from services.schema import schema_report
+from services.cache import cache_stats
+from services.friend_graph import friend_graph
+from services.slow_queries import slow_query_log
+
+# Création d'un blueprint pour les routes d'administration
+admin_bp = Blueprint('admin_routes', __name__)
+
+@admin_bp.route('/schema', methods=['GET'])
+def get_schema():
+    """Rapport sur le schéma : version, index manquants ou inutilisés"""
+    try:
+        report = schema_report(get_db())
+        return jsonify({"success": True, "data": report}), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@admin_bp.route('/cache', methods=['GET'])
+def get_cache_stats():
+    """Statistiques des caches (taille, hits, misses, évictions)"""
+    return jsonify({"success": True, "data": cache_stats()}), 200
+
+@admin_bp.route('/pool', methods=['GET'])
+def get_pool_metrics():
+    """Métriques du pool de connexions Neo4j (utilisées, libres, temps d'attente)"""
+    return jsonify({"success": True, "data": get_db().pool_metrics()}), 200
+
+@admin_bp.route('/friend-graph', methods=['GET'])
+def get_friend_graph_stats():
+    """État du graphe d'amitiés en mémoire (taille, delta, âge de l'instantané)"""
+    return jsonify({"success": True, "data": friend_graph.stats()}), 200
+
+@admin_bp.route('/friend-graph/reload', methods=['POST'])
+def reload_friend_graph():
+    """Reconstruit immédiatement le graphe d'amitiés depuis la base"""
+    if not friend_graph.enabled:
+        return jsonify({
+            "success": False,
+            "error": "Graphe d'amitiés désactivé (FRIEND_GRAPH_ENABLED)"
+        }), 409
+    try:
+        friend_graph.load(get_db())
+        return jsonify({"success": True, "data": friend_graph.stats()}), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@admin_bp.route('/slow-queries', methods=['GET'])
+def get_slow_queries():
+    """Requêtes lentes regroupées par constante, des pires aux moins pires, avec leur résumé de plan"""
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+    except ValueError:
+        return jsonify({"success": False, "error": "Le paramètre limit doit être un entier"}), 400
+    try:
+        return jsonify({
+            "success": True,
+            "data": dict(slow_query_log.stats(), queries=slow_query_log.worst_offenders(limit))
+        }), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
\ No newline at end of file
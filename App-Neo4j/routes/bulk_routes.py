@@ -0,0 +1,74 @@
+from flask import Blueprint, request, jsonify
+from config import BULK_BATCH_SIZE, BULK_MAX_ITEMS
+from models.user import User
+from models.post import Post
+
+# Création d'un blueprint pour les écritures en masse
+bulk_bp = Blueprint('bulk_routes', __name__)
+
+def _bulk_response(bulk_method):
+    """Valide le corps (liste JSON), lance l'écriture par lots et construit le rapport"""
+    items = request.json
+    if not isinstance(items, list) or not items:
+        return jsonify({
+            "success": False,
+            "error": "Le corps doit être une liste JSON non vide"
+        }), 400
+    if len(items) > BULK_MAX_ITEMS:
+        return jsonify({
+            "success": False,
+            "error": f"Au plus {BULK_MAX_ITEMS} éléments par requête"
+        }), 413
+    
+    try:
+        batch_size = max(1, int(request.args.get('batch_size', BULK_BATCH_SIZE)))
+    except ValueError:
+        return jsonify({
+            "success": False,
+            "error": "Le paramètre batch_size doit être un entier"
+        }), 400
+    
+    results = bulk_method(items, batch_size=batch_size)
+    failed = sum(1 for result in results if not result['success'])
+    
+    # 207 quand une partie des éléments a été rejetée
+    return jsonify({
+        "success": failed == 0,
+        "data": {
+            "succeeded": len(results) - failed,
+            "failed": failed,
+            "results": results
+        }
+    }), 201 if failed == 0 else 207
+
+@bulk_bp.route('/users/bulk', methods=['POST'])
+def bulk_create_users():
+    """Crée des utilisateurs en masse"""
+    try:
+        return _bulk_response(User.bulk_create)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@bulk_bp.route('/posts/bulk', methods=['POST'])
+def bulk_create_posts():
+    """Crée des posts en masse"""
+    try:
+        return _bulk_response(Post.bulk_create)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@bulk_bp.route('/friendships/bulk', methods=['POST'])
+def bulk_create_friendships():
+    """Crée des relations d'amitié en masse"""
+    try:
+        return _bulk_response(User.bulk_befriend)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@bulk_bp.route('/likes/bulk', methods=['POST'])
+def bulk_create_likes():
+    """Ajoute des likes en masse"""
+    try:
+        return _bulk_response(Post.bulk_like)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
\ No newline at end of file
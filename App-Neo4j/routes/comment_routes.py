@@ -1,26 +1,60 @@
 from flask import Blueprint, request, jsonify
+from services.pagination import parse_page_args, InvalidCursorError
+from services.projection import parse_projection_args, InvalidProjectionError
+from services.conditional import projection_variant, is_not_modified, version_headers
+from services.streaming import wants_ndjson, ndjson_response
 from models.comment import Comment
-from models.user import User
-from models.post import Post
 
 # Création d'un blueprint pour les routes commentaire
 comment_bp = Blueprint('comment_routes', __name__)
 
 @comment_bp.route('', methods=['GET'])
 def get_comments():
-    """Récupère tous les commentaires"""
+    """Récupère tous les commentaires, page par page (?limit=&after=<curseur>)
+
+    Avec `Accept: application/x-ndjson` ou `?stream=1`, la liste complète est
+    envoyée en flux NDJSON au lieu d'une page. ?fields= et ?include=
+    (author, post) choisissent les données renvoyées.
+    """
     try:
-        comments = Comment.get_all()
-        return jsonify({"success": True, "data": comments}), 200
+        projection = parse_projection_args(request.args, 'comment')
+        if wants_ndjson(request):
+            return ndjson_response(Comment.iter_all(projection))
+        limit, after = parse_page_args(request.args)
+        comments, next_cursor = Comment.get_page(limit, after, projection)
+        return jsonify({"success": True, "data": comments, "next_cursor": next_cursor}), 200
+    except (InvalidCursorError, InvalidProjectionError) as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 @comment_bp.route('/<comment_id>', methods=['GET'])
 def get_comment(comment_id):
-    """Récupère un commentaire par son ID"""
+    """Récupère un commentaire par son ID (?fields=, ?include= : voir get_comments)
+
+    Réponse conditionnelle (ETag, Last-Modified, 304) sauf avec ?include=.
+    """
     try:
-        comment = Comment.find_by_id(comment_id)
-        if not comment:
+        projection = parse_projection_args(request.args, 'comment')
+        variant = projection_variant(projection)
+        headers = {}
+        if variant is not None:
+            version = Comment.version(comment_id, variant)
+            if version is None:
+                return jsonify({
+                    "success": False,
+                    "error": "Commentaire non trouvé"
+                }), 404
+            headers = version_headers(version)
+            if is_not_modified(request.headers, version):
+                return '', 304, headers
+        
+        if projection:
+            comment_data = Comment.find_projected(comment_id, projection)
+        else:
+            comment = Comment.find_by_id(comment_id)
+            comment_data = comment.to_dict() if comment else None
+        if not comment_data:
             return jsonify({
                 "success": False,
                 "error": "Commentaire non trouvé"
@@ -28,7 +62,27 @@ def get_comment(comment_id):
             
         return jsonify({
             "success": True,
-            "data": comment.to_dict()
+            "data": comment_data
+        }), 200, headers
+    except InvalidProjectionError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@comment_bp.route('/<comment_id>/thread', methods=['GET'])
+def get_comment_thread(comment_id):
+    """Récupère un commentaire et toutes ses réponses, dans l'ordre du fil"""
+    try:
+        thread = Comment.get_thread(comment_id)
+        if thread is None:
+            return jsonify({
+                "success": False,
+                "error": "Commentaire non trouvé"
+            }), 404
+        
+        return jsonify({
+            "success": True,
+            "data": thread
         }), 200
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -64,7 +118,7 @@ def update_comment(comment_id):
 
 @comment_bp.route('/<comment_id>', methods=['DELETE'])
 def delete_comment(comment_id):
-    """Supprime un commentaire"""
+    """Supprime un commentaire et ses réponses"""
     try:
         comment = Comment.find_by_id(comment_id)
         if not comment:
@@ -93,21 +147,18 @@ def like_comment(comment_id):
                 "error": "L'ID de l'utilisateur est requis"
             }), 400
             
-        comment = Comment.find_by_id(comment_id)
-        if not comment:
+        # Vérifications et écriture en une seule requête
+        status = Comment.like(comment_id, data['user_id'])
+        if status == 'comment_not_found':
             return jsonify({
                 "success": False,
                 "error": "Commentaire non trouvé"
             }), 404
-            
-        user = User.find_by_id(data['user_id'])
-        if not user:
+        if status == 'user_not_found':
             return jsonify({
                 "success": False,
                 "error": "Utilisateur non trouvé"
             }), 404
-            
-        comment.add_like(data['user_id'])
         
         return jsonify({
             "success": True,
@@ -127,21 +178,18 @@ def unlike_comment(comment_id):
                 "error": "L'ID de l'utilisateur est requis"
             }), 400
             
-        comment = Comment.find_by_id(comment_id)
-        if not comment:
+        # Vérifications et suppression en une seule requête
+        status = Comment.unlike(comment_id, data['user_id'])
+        if status == 'comment_not_found':
             return jsonify({
                 "success": False,
                 "error": "Commentaire non trouvé"
             }), 404
-            
-        user = User.find_by_id(data['user_id'])
-        if not user:
+        if status == 'user_not_found':
             return jsonify({
                 "success": False,
                 "error": "Utilisateur non trouvé"
             }), 404
-            
-        comment.remove_like(data['user_id'])
         
         return jsonify({
             "success": True,
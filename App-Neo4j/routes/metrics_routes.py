@@ -0,0 +1,27 @@
+import time
+from flask import Blueprint, Response, g, request
+from services.metrics import render, observe_request
+
+# Création d'un blueprint pour l'export des métriques et la mesure des requêtes
+metrics_bp = Blueprint('metrics_routes', __name__)
+
+def _route():
+    """Gabarit de la route courante (/users/<user_id>), pas le chemin concret"""
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+@metrics_bp.before_app_request
+def start_request_timer():
+    g.metrics_started = time.perf_counter()
+
+@metrics_bp.after_app_request
+def record_request(response):
+    """Mesure la requête jusqu'au début de la réponse (avant le corps d'un flux NDJSON)"""
+    started = g.pop('metrics_started', None)
+    if started is not None:
+        observe_request(request.method, _route(), response.status_code, time.perf_counter() - started)
+    return response
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Métriques au format texte Prometheus"""
+    return Response(render(), mimetype='text/plain; version=0.0.4')
@@ -1,6 +1,11 @@
 from flask import Blueprint, request, jsonify
+from services.pagination import parse_page_args, InvalidCursorError
+from services.projection import parse_projection_args, InvalidProjectionError
+from services.batching import parse_ids, InvalidIdsError
+from services.conditional import projection_variant, is_not_modified, version_headers
+from services.streaming import wants_ndjson, ndjson_response
+from services.search import parse_search_args, InvalidSearchError
 from models.post import Post
-from models.user import User
 from models.comment import Comment
 
 # Création d'un blueprint pour les routes post
@@ -8,19 +13,76 @@ post_bp = Blueprint('post_routes', __name__)
 
 @post_bp.route('', methods=['GET'])
 def get_posts():
-    """Récupère tous les posts"""
+    """Récupère tous les posts, page par page (?limit=&after=<curseur>)
+
+    Avec `Accept: application/x-ndjson` ou `?stream=1`, la liste complète est
+    envoyée en flux NDJSON au lieu d'une page. ?fields=id,title restreint les
+    champs ; ?include=author,comments ajoute l'auteur et les commentaires dans
+    la même requête. ?ids=a,b lit ces posts en une requête : {id: post} et id
+    manquants.
+    """
+    try:
+        projection = parse_projection_args(request.args, 'post')
+        if request.args.get('ids') is not None:
+            ids = parse_ids(request.args.get('ids'))
+            posts = Post.get_many(ids, projection)
+            return jsonify({"success": True, "data": posts,
+                            "missing": [post_id for post_id in ids if post_id not in posts]}), 200
+        if wants_ndjson(request):
+            return ndjson_response(Post.iter_all(projection))
+        limit, after = parse_page_args(request.args)
+        posts, next_cursor = Post.get_page(limit, after, projection)
+        return jsonify({"success": True, "data": posts, "next_cursor": next_cursor}), 200
+    except (InvalidCursorError, InvalidProjectionError, InvalidIdsError) as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@post_bp.route('/search', methods=['GET'])
+def search_posts():
+    """Recherche plein texte dans les titres et contenus (?q=, puis ?limit=&after=<curseur>)
+
+    Tous les mots de q doivent être présents. Les posts sont triés par
+    pertinence (score) et portent `highlights` : titre et extrait du contenu,
+    échappés pour HTML, mots trouvés entourés de <mark>.
+    """
     try:
-        posts = Post.get_all()
-        return jsonify({"success": True, "data": posts}), 200
+        search = parse_search_args(request.args)
+        limit, after = parse_page_args(request.args)
+        posts, next_cursor = Post.search(search, limit, after)
+        return jsonify({"success": True, "data": posts, "next_cursor": next_cursor}), 200
+    except (InvalidSearchError, InvalidCursorError) as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 @post_bp.route('/<post_id>', methods=['GET'])
 def get_post(post_id):
-    """Récupère un post par son ID"""
+    """Récupère un post par son ID (?fields=, ?include= : voir get_posts)
+
+    Réponse conditionnelle (ETag, Last-Modified, 304) sauf avec ?include=.
+    """
     try:
-        post = Post.find_by_id(post_id)
-        if not post:
+        projection = parse_projection_args(request.args, 'post')
+        variant = projection_variant(projection)
+        headers = {}
+        if variant is not None:
+            version = Post.version(post_id, variant)
+            if version is None:
+                return jsonify({
+                    "success": False,
+                    "error": "Post non trouvé"
+                }), 404
+            headers = version_headers(version)
+            if is_not_modified(request.headers, version):
+                return '', 304, headers
+        
+        if projection:
+            post_data = Post.find_projected(post_id, projection)
+        else:
+            post = Post.find_by_id(post_id)
+            post_data = post.to_dict() if post else None
+        if not post_data:
             return jsonify({
                 "success": False,
                 "error": "Post non trouvé"
@@ -28,8 +90,10 @@ def get_post(post_id):
             
         return jsonify({
             "success": True,
-            "data": post.to_dict()
-        }), 200
+            "data": post_data
+        }), 200, headers
+    except InvalidProjectionError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -69,14 +133,11 @@ def update_post(post_id):
 def delete_post(post_id):
     """Supprime un post"""
     try:
-        post = Post.find_by_id(post_id)
-        if not post:
+        if not Post.delete_by_id(post_id):
             return jsonify({
                 "success": False,
                 "error": "Post non trouvé"
             }), 404
-            
-        post.delete()
         
         return jsonify({
             "success": True,
@@ -96,21 +157,18 @@ def like_post(post_id):
                 "error": "L'ID de l'utilisateur est requis"
             }), 400
             
-        post = Post.find_by_id(post_id)
-        if not post:
+        # Vérifications et écriture en une seule requête
+        status = Post.like(post_id, data['user_id'])
+        if status == 'post_not_found':
             return jsonify({
                 "success": False,
                 "error": "Post non trouvé"
             }), 404
-            
-        user = User.find_by_id(data['user_id'])
-        if not user:
+        if status == 'user_not_found':
             return jsonify({
                 "success": False,
                 "error": "Utilisateur non trouvé"
             }), 404
-            
-        post.add_like(data['user_id'])
         
         return jsonify({
             "success": True,
@@ -130,21 +188,18 @@ def unlike_post(post_id):
                 "error": "L'ID de l'utilisateur est requis"
             }), 400
             
-        post = Post.find_by_id(post_id)
-        if not post:
+        # Vérifications et suppression en une seule requête
+        status = Post.unlike(post_id, data['user_id'])
+        if status == 'post_not_found':
             return jsonify({
                 "success": False,
                 "error": "Post non trouvé"
             }), 404
-            
-        user = User.find_by_id(data['user_id'])
-        if not user:
+        if status == 'user_not_found':
             return jsonify({
                 "success": False,
                 "error": "Utilisateur non trouvé"
             }), 404
-            
-        post.remove_like(data['user_id'])
         
         return jsonify({
             "success": True,
@@ -155,27 +210,36 @@ def unlike_post(post_id):
 
 @post_bp.route('/<post_id>/comments', methods=['GET'])
 def get_post_comments(post_id):
-    """Récupère les commentaires d'un post"""
+    """Récupère les commentaires d'un post page par page (?limit=&after=<curseur>)
+
+    Réponse conditionnelle (ETag, Last-Modified, 304) ; l'ETag dépend de la page demandée.
+    """
     try:
-        post = Post.find_by_id(post_id)
-        if not post:
+        limit, after = parse_page_args(request.args)
+        version = Post.comments_version(post_id, f"{limit}:{request.args.get('after', '')}")
+        if version is None:
             return jsonify({
                 "success": False,
                 "error": "Post non trouvé"
             }), 404
+        if is_not_modified(request.headers, version):
+            return '', 304, version_headers(version)
             
-        comments = Comment.get_post_comments(post_id)
+        comments, next_cursor = Comment.get_post_comments(post_id, limit, after)
         
         return jsonify({
             "success": True,
-            "data": comments
-        }), 200
+            "data": comments,
+            "next_cursor": next_cursor
+        }), 200, version_headers(version)
+    except InvalidCursorError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 @post_bp.route('/<post_id>/comments', methods=['POST'])
 def add_comment(post_id):
-    """Ajoute un commentaire à un post"""
+    """Ajoute un commentaire à un post, ou une réponse avec parent_id"""
     try:
         data = request.json
         if not data or 'content' not in data or 'user_id' not in data:
@@ -184,27 +248,29 @@ def add_comment(post_id):
                 "error": "Les champs content et user_id sont requis"
             }), 400
             
-        post = Post.find_by_id(post_id)
-        if not post:
+        # Création du commentaire (vérification du post et de l'auteur dans la même requête)
+        comment = Comment(
+            content=data['content'],
+            author_id=data['user_id'],
+            post_id=post_id,
+            parent_id=data.get('parent_id')
+        )
+        status = comment.save()
+        if status == 'post_not_found':
             return jsonify({
                 "success": False,
                 "error": "Post non trouvé"
             }), 404
-            
-        user = User.find_by_id(data['user_id'])
-        if not user:
+        if status == 'user_not_found':
             return jsonify({
                 "success": False,
                 "error": "Utilisateur non trouvé"
             }), 404
-            
-        # Création du commentaire
-        comment = Comment(
-            content=data['content'],
-            author_id=data['user_id'],
-            post_id=post_id
-        )
-        comment.save()
+        if status == 'parent_not_found':
+            return jsonify({
+                "success": False,
+                "error": "Commentaire parent non trouvé dans ce post"
+            }), 404
         
         return jsonify({
             "success": True,
@@ -218,28 +284,24 @@ def add_comment(post_id):
 def delete_post_comment(post_id, comment_id):
     """Supprime un commentaire d'un post"""
     try:
-        post = Post.find_by_id(post_id)
-        if not post:
+        # Vérifications et suppression en une seule requête
+        status = Comment.delete_from_post(post_id, comment_id)
+        if status == 'post_not_found':
             return jsonify({
                 "success": False,
                 "error": "Post non trouvé"
             }), 404
-            
-        comment = Comment.find_by_id(comment_id)
-        if not comment:
+        if status == 'comment_not_found':
             return jsonify({
                 "success": False,
                 "error": "Commentaire non trouvé"
             }), 404
-            
         # Vérifier que le commentaire appartient bien au post
-        if comment.post_id != post_id:
+        if status == 'wrong_post':
             return jsonify({
                 "success": False,
                 "error": "Ce commentaire n'appartient pas à ce post"
             }), 400
-            
-        comment.delete()
         
         return jsonify({
             "success": True,
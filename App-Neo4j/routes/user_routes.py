@@ -1,4 +1,9 @@
 from flask import Blueprint, request, jsonify
+from services.pagination import parse_page_args, InvalidCursorError
+from services.projection import parse_projection_args, InvalidProjectionError
+from services.batching import parse_ids, InvalidIdsError
+from services.conditional import projection_variant, is_not_modified, version_headers
+from services.streaming import wants_ndjson, ndjson_response
 from models.user import User
 from models.post import Post
 
@@ -7,10 +12,27 @@ user_bp = Blueprint('user_routes', __name__)
 
 @user_bp.route('', methods=['GET'])
 def get_users():
-    """Récupère tous les utilisateurs"""
+    """Récupère tous les utilisateurs, page par page (?limit=&after=<curseur>)
+
+    Avec `Accept: application/x-ndjson` ou `?stream=1`, la liste complète est
+    envoyée en flux NDJSON au lieu d'une page. ?fields= et ?include=
+    (posts, posts_count, friends_count) choisissent les données renvoyées.
+    ?ids=a,b lit ces utilisateurs en une requête : {id: utilisateur} et id manquants.
+    """
     try:
-        users = User.get_all()
-        return jsonify({"success": True, "data": users}), 200
+        projection = parse_projection_args(request.args, 'user')
+        if request.args.get('ids') is not None:
+            ids = parse_ids(request.args.get('ids'))
+            users = User.get_many(ids, projection)
+            return jsonify({"success": True, "data": users,
+                            "missing": [user_id for user_id in ids if user_id not in users]}), 200
+        if wants_ndjson(request):
+            return ndjson_response(User.iter_all(projection))
+        limit, after = parse_page_args(request.args)
+        users, next_cursor = User.get_page(limit, after, projection)
+        return jsonify({"success": True, "data": users, "next_cursor": next_cursor}), 200
+    except (InvalidCursorError, InvalidProjectionError, InvalidIdsError) as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -48,10 +70,31 @@ def create_user():
 
 @user_bp.route('/<user_id>', methods=['GET'])
 def get_user(user_id):
-    """Récupère un utilisateur par son ID"""
+    """Récupère un utilisateur par son ID (?fields=, ?include= : voir get_users)
+
+    Réponse conditionnelle (ETag, Last-Modified, 304) sauf avec ?include=.
+    """
     try:
-        user = User.find_by_id(user_id)
-        if not user:
+        projection = parse_projection_args(request.args, 'user')
+        variant = projection_variant(projection)
+        headers = {}
+        if variant is not None:
+            version = User.version(user_id, variant)
+            if version is None:
+                return jsonify({
+                    "success": False,
+                    "error": "Utilisateur non trouvé"
+                }), 404
+            headers = version_headers(version)
+            if is_not_modified(request.headers, version):
+                return '', 304, headers
+        
+        if projection:
+            user_data = User.find_projected(user_id, projection)
+        else:
+            user = User.find_by_id(user_id)
+            user_data = user.to_dict() if user else None
+        if not user_data:
             return jsonify({
                 "success": False,
                 "error": "Utilisateur non trouvé"
@@ -59,8 +102,10 @@ def get_user(user_id):
             
         return jsonify({
             "success": True,
-            "data": user.to_dict()
-        }), 200
+            "data": user_data
+        }), 200, headers
+    except InvalidProjectionError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -109,14 +154,11 @@ def update_user(user_id):
 def delete_user(user_id):
     """Supprime un utilisateur"""
     try:
-        user = User.find_by_id(user_id)
-        if not user:
+        if not User.delete_by_id(user_id):
             return jsonify({
                 "success": False,
                 "error": "Utilisateur non trouvé"
             }), 404
-            
-        user.delete()
         
         return jsonify({
             "success": True,
@@ -127,8 +169,17 @@ def delete_user(user_id):
 
 @user_bp.route('/<user_id>/friends', methods=['GET'])
 def get_friends(user_id):
-    """Récupère les amis d'un utilisateur"""
+    """Récupère les amis d'un utilisateur (réponse conditionnelle : ETag, Last-Modified, 304)"""
     try:
+        version = User.friends_version(user_id)
+        if version is None:
+            return jsonify({
+                "success": False,
+                "error": "Utilisateur non trouvé"
+            }), 404
+        if is_not_modified(request.headers, version):
+            return '', 304, version_headers(version)
+        
         user = User.find_by_id(user_id)
         if not user:
             return jsonify({
@@ -141,7 +192,7 @@ def get_friends(user_id):
         return jsonify({
             "success": True,
             "data": friends
-        }), 200
+        }), 200, version_headers(version)
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -156,28 +207,23 @@ def add_friend(user_id):
                 "error": "L'ID de l'ami est requis"
             }), 400
             
-        user = User.find_by_id(user_id)
-        if not user:
+        # Vérifications et création de la relation en une seule requête
+        status = User.befriend(user_id, data['friend_id'])
+        if status == 'user_not_found':
             return jsonify({
                 "success": False,
                 "error": "Utilisateur non trouvé"
             }), 404
-            
-        friend = User.find_by_id(data['friend_id'])
-        if not friend:
+        if status == 'friend_not_found':
             return jsonify({
                 "success": False,
                 "error": "Ami non trouvé"
             }), 404
-            
-        # Vérifier si déjà amis
-        if user.is_friend_with(data['friend_id']):
+        if status == 'already_exists':
             return jsonify({
                 "success": False,
                 "error": "Ces utilisateurs sont déjà amis"
             }), 409
-            
-        user.add_friend(data['friend_id'])
         
         return jsonify({
             "success": True,
@@ -219,28 +265,23 @@ def check_friendship(user_id, friend_id):
 def remove_friend(user_id, friend_id):
     """Supprime une relation d'amitié"""
     try:
-        user = User.find_by_id(user_id)
-        if not user:
+        # Vérifications et suppression de la relation en une seule requête
+        status = User.unfriend(user_id, friend_id)
+        if status == 'user_not_found':
             return jsonify({
                 "success": False,
                 "error": "Utilisateur non trouvé"
             }), 404
-            
-        friend = User.find_by_id(friend_id)
-        if not friend:
+        if status == 'friend_not_found':
             return jsonify({
                 "success": False,
                 "error": "Ami non trouvé"
             }), 404
-            
-        # Vérifier si amis
-        if not user.is_friend_with(friend_id):
+        if status == 'relation_not_found':
             return jsonify({
                 "success": False,
                 "error": "Ces utilisateurs ne sont pas amis"
             }), 404
-            
-        user.remove_friend(friend_id)
         
         return jsonify({
             "success": True,
@@ -276,10 +317,78 @@ def get_mutual_friends(user_id, other_id):
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+@user_bp.route('/<user_id>/feed', methods=['GET'])
+def get_feed(user_id):
+    """Fil d'actualité : posts des amis, du plus récent au plus ancien (?limit=&after=<curseur>)"""
+    try:
+        limit, after = parse_page_args(request.args)
+        user = User.find_by_id(user_id)
+        if not user:
+            return jsonify({
+                "success": False,
+                "error": "Utilisateur non trouvé"
+            }), 404
+        
+        posts, next_cursor = Post.get_feed(user_id, limit, after)
+        return jsonify({"success": True, "data": posts, "next_cursor": next_cursor}), 200
+    except InvalidCursorError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@user_bp.route('/<user_id>/recommendations', methods=['GET'])
+def get_recommendations(user_id):
+    """Suggestions d'amis (?limit=, 10 par défaut) : amis d'amis classés par amis communs"""
+    try:
+        limit = max(1, min(int(request.args.get('limit', 10)), 100))
+    except ValueError:
+        return jsonify({
+            "success": False,
+            "error": "Le paramètre limit doit être un entier"
+        }), 400
+    
+    try:
+        user = User.find_by_id(user_id)
+        if not user:
+            return jsonify({
+                "success": False,
+                "error": "Utilisateur non trouvé"
+            }), 404
+        
+        return jsonify({
+            "success": True,
+            "data": user.get_recommendations(limit)
+        }), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@user_bp.route('/<user_id>/viewer-state', methods=['GET'])
+def get_viewer_state(user_id):
+    """État de posts pour ce lecteur (?post_ids=a,b) : like, auteur, amitié avec l'auteur, en une requête"""
+    try:
+        post_ids = parse_ids(request.args.get('post_ids'))
+        states = Post.viewer_state(user_id, post_ids)
+        if states is None:
+            return jsonify({
+                "success": False,
+                "error": "Utilisateur non trouvé"
+            }), 404
+        
+        return jsonify({
+            "success": True,
+            "data": states,
+            "missing": [post_id for post_id in post_ids if post_id not in states]
+        }), 200
+    except InvalidIdsError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
 @user_bp.route('/<user_id>/posts', methods=['GET'])
 def get_user_posts(user_id):
-    """Récupère les posts d'un utilisateur"""
+    """Récupère les posts d'un utilisateur (?fields=, ?include= : voir get_posts)"""
     try:
+        projection = parse_projection_args(request.args, 'post')
         user = User.find_by_id(user_id)
         if not user:
             return jsonify({
@@ -287,12 +396,14 @@ def get_user_posts(user_id):
                 "error": "Utilisateur non trouvé"
             }), 404
             
-        posts = Post.get_user_posts(user_id)
+        posts = Post.get_user_posts(user_id, projection)
         
         return jsonify({
             "success": True,
             "data": posts
         }), 200
+    except InvalidProjectionError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
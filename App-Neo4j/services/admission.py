@@ -0,0 +1,304 @@
+"""Contrôle d'admission des requêtes Neo4j, par processus.
+
+Quand Neo4j ralentit, chaque thread (ou coroutine) qui appelle la base
+attend sa réponse et la latence de toutes les routes s'envole. Les accès à la
+base (DatabaseService, AsyncDatabaseService) passent donc par deux
+contrôleurs, un pour les lectures et un pour les écritures, qui bornent le
+nombre de requêtes en cours. Au-delà, la requête attend dans une file bornée
+(ADMISSION_QUEUE_SIZE) au plus ADMISSION_QUEUE_TIMEOUT secondes, puis est
+refusée : OverloadedError, que l'application HTTP transforme en
+503 + Retry-After.
+
+Les lectures ponctuelles (par id, par email, par liste d'id) passent avant
+les parcours de listes : elles sortent de la file en premier, peuvent
+prendre la place d'un parcours quand la file est pleine, et les parcours
+n'occupent jamais plus de ADMISSION_SCAN_SHARE des places.
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager, asynccontextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from config import (ADMISSION_ENABLED, ADMISSION_READ_LIMIT, ADMISSION_WRITE_LIMIT, ADMISSION_QUEUE_SIZE,
+                    ADMISSION_QUEUE_TIMEOUT, ADMISSION_SCAN_SHARE, ADMISSION_RETRY_AFTER)
+from services.metrics import observe_admission, observe_admission_wait, observe_rejection
+
+# Priorités : la plus petite sort de la file en premier
+POINT, SCAN = 0, 1
+PRIORITY_NAMES = {POINT: 'point', SCAN: 'scan'}
+
+# Sélection par clé unique ($id, $email...) ou par liste d'id bornée (UNWIND $ids)
+_POINT_LOOKUP = re.compile(r"\{(?:id|email): \$\w+\}|UNWIND \$ids\b")
+# Tri, pagination ou index plein texte : la requête parcourt une liste
+_SCAN = re.compile(r"\bORDER BY\b|\bSKIP\b|db\.index\.fulltext|UNWIND \$rows\b")
+
+
+@lru_cache(maxsize=1024)
+def query_priority(query):
+    """POINT pour une lecture ou écriture par clé, SCAN pour un parcours de liste"""
+    if _POINT_LOOKUP.search(query) and not _SCAN.search(query):
+        return POINT
+    return SCAN
+
+
+class OverloadedError(Exception):
+    """Levée quand une requête Neo4j n'est pas admise : file pleine ou attente trop longue"""
+
+    def __init__(self, kind, reason, retry_after):
+        super().__init__(f"Base de données surchargée ({kind}, {reason}), réessayer dans {retry_after} s")
+        self.kind = kind
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class RequestAdmission:
+    """Refus d'admission survenus pendant une requête HTTP (voir track_request)"""
+    __slots__ = ('retry_after',)
+
+    def __init__(self):
+        self.retry_after = None
+
+
+_current_request = ContextVar('admission_request', default=None)
+
+
+def track_request():
+    """Début d'une requête HTTP : les refus qui suivent y sont notés, même si la route
+    intercepte l'exception, pour que la réponse devienne un 503"""
+    state = RequestAdmission()
+    _current_request.set(state)
+    return state
+
+
+class _Waiter:
+    __slots__ = ('priority', 'wake', 'granted', 'evicted', 'queued_at')
+
+    def __init__(self, priority, wake):
+        self.priority = priority
+        self.wake = wake
+        self.granted = False
+        self.evicted = False
+        self.queued_at = time.perf_counter()
+
+
+class AdmissionController:
+    """Au plus `limit` requêtes en cours, `queue_size` en attente pendant `timeout` secondes.
+
+    Les threads (DatabaseService) attendent sur un Event, les coroutines
+    (AsyncDatabaseService) sur un Future de leur boucle ; la file est commune.
+    Une place libérée est donnée directement au premier de la file.
+    """
+
+    def __init__(self, kind, limit, queue_size, timeout, scan_share=1.0, retry_after=1, enabled=True):
+        self.kind = kind
+        self.limit = max(1, limit)
+        self.scan_limit = max(1, int(self.limit * scan_share))
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        # File : tas de (priorité, ordre d'arrivée, attente)
+        self._queue = []
+        self._order = itertools.count()
+        self.in_flight = 0
+        self.scans_in_flight = 0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = {}
+
+    def reset_after_fork(self):
+        """Dans un processus enfant : file et compteurs repartent de zéro"""
+        self._lock = threading.Lock()
+        self._queue = []
+        self.in_flight = self.scans_in_flight = 0
+        self.admitted = self.queued = 0
+        self.rejected = {}
+
+    def _has_room(self, priority):
+        return self.in_flight < self.limit and (priority == POINT or self.scans_in_flight < self.scan_limit)
+
+    def _admit(self, priority):
+        self.in_flight += 1
+        self.admitted += 1
+        if priority == SCAN:
+            self.scans_in_flight += 1
+
+    def _reject(self, reason):
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        observe_rejection(self.kind, reason)
+        state = _current_request.get()
+        if state is not None:
+            state.retry_after = self.retry_after
+        return OverloadedError(self.kind, reason, self.retry_after)
+
+    def _observe(self):
+        observe_admission(self.kind, self.in_flight, len(self._queue))
+
+    def _enqueue(self, priority, wake):
+        """Sous verrou : admet directement (None) ou met en file (attente) ; lève si file pleine"""
+        if self._has_room(priority) and (not self._queue or self._queue[0][0] > priority):
+            self._admit(priority)
+            self._observe()
+            return None
+        if len(self._queue) >= self.queue_size:
+            worst = max(self._queue) if self._queue else None
+            if worst is None or worst[0] <= priority:
+                raise self._reject('queue_full')
+            # Une lecture ponctuelle prend la place du dernier parcours arrivé
+            self._queue.remove(worst)
+            heapq.heapify(self._queue)
+            worst[2].evicted = True
+            worst[2].wake()
+        waiter = _Waiter(priority, wake)
+        heapq.heappush(self._queue, (priority, next(self._order), waiter))
+        self.queued += 1
+        self._observe()
+        return waiter
+
+    def _dispatch(self):
+        """Sous verrou : donne les places libres aux premiers de la file"""
+        while self._queue and self._has_room(self._queue[0][0]):
+            priority, _, waiter = heapq.heappop(self._queue)
+            self._admit(priority)
+            waiter.granted = True
+            waiter.wake()
+        self._observe()
+
+    def _settle(self, waiter):
+        """Sous verrou, après l'attente : admis, évincé ou délai dépassé"""
+        if waiter.granted:
+            observe_admission_wait(self.kind, PRIORITY_NAMES[waiter.priority],
+                                   time.perf_counter() - waiter.queued_at)
+            return
+        if waiter.evicted:
+            raise self._reject('evicted')
+        self._remove(waiter)
+        raise self._reject('timeout')
+
+    def _remove(self, waiter):
+        self._queue = [entry for entry in self._queue if entry[2] is not waiter]
+        heapq.heapify(self._queue)
+        self._observe()
+
+    def _abandon(self, waiter):
+        """Sous verrou : l'attente est interrompue (annulation) ; rend la place si elle était donnée"""
+        if waiter.granted:
+            self._release(waiter.priority)
+        elif not waiter.evicted:
+            self._remove(waiter)
+
+    def _release(self, priority):
+        self.in_flight -= 1
+        if priority == SCAN:
+            self.scans_in_flight -= 1
+        self._dispatch()
+
+    def release(self, priority):
+        with self._lock:
+            self._release(priority)
+
+    def acquire(self, priority):
+        """Attend une place (thread) ; lève OverloadedError en cas de refus"""
+        event = threading.Event()
+        with self._lock:
+            waiter = self._enqueue(priority, event.set)
+        if waiter is None:
+            return
+        try:
+            event.wait(self.timeout)
+        except BaseException:
+            with self._lock:
+                self._abandon(waiter)
+            raise
+        with self._lock:
+            self._settle(waiter)
+
+    async def acquire_async(self, priority):
+        """Attend une place (coroutine) ; lève OverloadedError en cas de refus"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def resolve():
+            if not future.done():
+                future.set_result(None)
+
+        with self._lock:
+            waiter = self._enqueue(priority, lambda: loop.call_soon_threadsafe(resolve))
+        if waiter is None:
+            return
+        try:
+            await asyncio.wait([future], timeout=self.timeout)
+        except BaseException:
+            with self._lock:
+                self._abandon(waiter)
+            raise
+        with self._lock:
+            self._settle(waiter)
+
+    @contextmanager
+    def slot(self, priority=SCAN):
+        """Occupe une place pendant le bloc"""
+        if not self.enabled:
+            yield
+            return
+        self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    @asynccontextmanager
+    async def slot_async(self, priority=SCAN):
+        if not self.enabled:
+            yield
+            return
+        await self.acquire_async(priority)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "limit": self.limit,
+                "scan_limit": self.scan_limit,
+                "in_flight": self.in_flight,
+                "scans_in_flight": self.scans_in_flight,
+                "queue_depth": len(self._queue),
+                "queue_size": self.queue_size,
+                "queue_timeout": self.timeout,
+                "admitted": self.admitted,
+                "queued": self.queued,
+                "rejected": dict(self.rejected),
+            }
+
+
+def _controller(kind, limit):
+    return AdmissionController(kind, limit, ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT,
+                               scan_share=ADMISSION_SCAN_SHARE, retry_after=ADMISSION_RETRY_AFTER,
+                               enabled=ADMISSION_ENABLED)
+
+
+read_admission = _controller('read', ADMISSION_READ_LIMIT)
+write_admission = _controller('write', ADMISSION_WRITE_LIMIT)
+
+# Un worker forké n'hérite ni de la file ni des places occupées du parent
+os.register_at_fork(after_in_child=read_admission.reset_after_fork)
+os.register_at_fork(after_in_child=write_admission.reset_after_fork)
+
+
+def admission_for(write):
+    return write_admission if write else read_admission
+
+
+def admission_stats():
+    """État des deux contrôleurs, pour l'administration"""
+    return {"read": read_admission.stats(), "write": write_admission.stats()}
@@ -0,0 +1,63 @@
+from itertools import islice
+from config import MULTI_GET_MAX_IDS
+
+
+def chunked(iterable, size):
+    """Découpe un itérable en listes d'au plus `size` éléments"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class InvalidIdsError(ValueError):
+    """Levée quand une liste d'id (?ids=a,b) est vide ou trop longue"""
+
+
+def parse_ids(value, max_ids=MULTI_GET_MAX_IDS):
+    """Liste d'id séparés par des virgules, sans doublons (ordre conservé)"""
+    ids = list(dict.fromkeys(item.strip() for item in (value or '').split(',') if item.strip()))
+    if not ids:
+        raise InvalidIdsError("Au moins un id est requis")
+    if len(ids) > max_ids:
+        raise InvalidIdsError(f"Au plus {max_ids} id par requête ({len(ids)} fournis)")
+    return ids
+
+
+def item_error(index, message):
+    """Ligne de rapport pour un élément rejeté"""
+    return {"index": index, "success": False, "error": message}
+
+
+def item_success(index, **extra):
+    """Ligne de rapport pour un élément écrit"""
+    return {"index": index, "success": True, **extra}
+
+
+def validate_item(item, fields):
+    """Retourne un message d'erreur si l'élément n'est pas un objet avec tous les champs requis"""
+    if not isinstance(item, dict):
+        return "L'élément doit être un objet JSON"
+    missing = [field for field in fields if not item.get(field)]
+    if missing:
+        return f"Champs requis manquants: {', '.join(missing)}"
+    return None
+
+
+def run_batches(db, statement, rows, batch_size, on_result, reports):
+    """Exécute `statement` une fois par lot avec UNWIND $rows (une transaction par lot).
+
+    `on_result` convertit chaque ligne retournée (qui porte `idx`) en ligne de
+    rapport. Si un lot échoue, tous ses éléments sont marqués en erreur et les
+    lots suivants sont quand même exécutés.
+    """
+    for chunk in chunked(rows, batch_size):
+        try:
+            for result in db.run(statement, rows=chunk).data():
+                reports[result['idx']] = on_result(result)
+        except Exception as e:
+            for row in chunk:
+                reports[row['idx']] = item_error(row['idx'], str(e))
+    return reports
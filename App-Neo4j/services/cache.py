@@ -0,0 +1,309 @@
+import json
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+from services.batching import chunked
+from config import (CACHE_ENABLED, CACHE_MAX_SIZE, CACHE_TTL, CACHE_NEGATIVE_TTL,
+                    CACHE_BUS, CACHE_BUS_DIR, FEED_TIMELINE_CACHE_SIZE, FEED_TIMELINE_TTL)
+
+# Valeur stockée pour un identifiant connu comme absent (cache négatif)
+_MISSING = object()
+
+# Nombre de générations par cache : une invalidation n'écarte que les chargements
+# en cours des clés de sa tranche (hash(clé) % _GENERATION_SHARDS)
+_GENERATION_SHARDS = 256
+
+
+class LocalInvalidationBus:
+    """Bus sans diffusion : un seul processus, les caches sont invalidés directement"""
+
+    def subscribe(self, callback):
+        pass
+
+    def ensure_started(self):
+        pass
+
+    def publish(self, cache_name, keys):
+        pass
+
+
+class SocketInvalidationBus:
+    """Bus d'invalidation entre processus d'une même machine.
+
+    Chaque processus écoute sur une socket Unix datagramme dans `directory` ;
+    une publication est envoyée à toutes les autres sockets du répertoire. Les
+    sockets de processus morts sont supprimées au premier envoi en échec.
+    L'écoute démarre paresseusement dans chaque processus (donc après un fork).
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._subscribers = []
+        self._pid = None
+        self._lock = threading.Lock()
+        self._sock = None
+        self._path = None
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            self._path = os.path.join(self.directory, f"{os.getpid()}.sock")
+            if os.path.exists(self._path):
+                os.unlink(self._path)
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._sock.bind(self._path)
+            self._pid = os.getpid()
+            threading.Thread(target=self._listen, args=(self._sock,), daemon=True).start()
+
+    def _listen(self, sock):
+        while True:
+            try:
+                message = json.loads(sock.recv(65536))
+            except OSError:
+                return
+            except ValueError:
+                continue
+            for callback in self._subscribers:
+                callback(message['cache'], message['keys'])
+
+    def publish(self, cache_name, keys):
+        self.ensure_started()
+        # Un datagramme est limité en taille : les grosses invalidations sont découpées
+        for chunk in chunked(keys, 500):
+            self._send(json.dumps({"cache": cache_name, "keys": chunk}).encode('utf-8'))
+
+    def _send(self, payload):
+        for entry in os.listdir(self.directory):
+            path = os.path.join(self.directory, entry)
+            if path == self._path or not entry.endswith('.sock'):
+                continue
+            try:
+                self._sock.sendto(payload, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Processus terminé : on nettoie sa socket
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except OSError:
+                pass
+
+
+class LRUCache:
+    """Cache LRU borné avec TTL, cache négatif et compteurs de statistiques"""
+
+    def __init__(self, name, max_size, ttl, negative_ttl, bus=None, enabled=True):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.enabled = enabled
+        self.bus = bus
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Générations par tranche de clés, incrémentées par les invalidations : une
+        # valeur chargée pendant l'invalidation d'une clé de sa tranche n'est pas mise en cache
+        self._generations = [0] * _GENERATION_SHARDS
+        if bus is not None:
+            bus.subscribe(self._on_remote_invalidation)
+
+    def get_or_load(self, key, loader):
+        """Lecture traversante : retourne la valeur en cache ou appelle `loader` (None = absent)"""
+        if not self.enabled or key is None:
+            return loader()
+        found, value, generation = self._lookup(key)
+        if found:
+            return value
+        value = loader()
+        self._store(key, _MISSING if value is None else value, generation)
+        return value
+
+    async def get_or_load_async(self, key, loader):
+        """Variante de get_or_load pour un `loader` coroutine (couche asynchrone)"""
+        if not self.enabled or key is None:
+            return await loader()
+        found, value, generation = self._lookup(key)
+        if found:
+            return value
+        value = await loader()
+        self._store(key, _MISSING if value is None else value, generation)
+        return value
+
+    def get_many_or_load(self, keys, loader):
+        """Lecture traversante groupée : `loader(clés absentes du cache)` retourne {clé: valeur}.
+
+        Un seul appel à `loader` pour toutes les clés manquantes ; celles qu'il
+        ne retourne pas sont mises en cache négatif. Retourne {clé: valeur}
+        pour les clés trouvées.
+        """
+        if not self.enabled:
+            return loader(list(keys)) if keys else {}
+        found, missing = {}, []
+        for key in keys:
+            hit, value, generation = self._lookup(key)
+            if not hit:
+                missing.append((key, generation))
+            elif value is not None:
+                found[key] = value
+        if missing:
+            loaded = loader([key for key, _ in missing])
+            for key, generation in missing:
+                value = loaded.get(key)
+                self._store(key, _MISSING if value is None else value, generation)
+                if value is not None:
+                    found[key] = value
+        return found
+
+    async def get_many_or_load_async(self, keys, loader):
+        """Variante de get_many_or_load pour un `loader` coroutine"""
+        if not self.enabled:
+            return await loader(list(keys)) if keys else {}
+        found, missing = {}, []
+        for key in keys:
+            hit, value, generation = self._lookup(key)
+            if not hit:
+                missing.append((key, generation))
+            elif value is not None:
+                found[key] = value
+        if missing:
+            loaded = await loader([key for key, _ in missing])
+            for key, generation in missing:
+                value = loaded.get(key)
+                self._store(key, _MISSING if value is None else value, generation)
+                if value is not None:
+                    found[key] = value
+        return found
+
+    def peek(self, key):
+        """(trouvé, valeur) sans chargement ; valeur None pour une entrée négative"""
+        if not self.enabled or key is None:
+            return False, None
+        found, value, _ = self._lookup(key)
+        return found, value
+
+    @staticmethod
+    def _shard(key):
+        return hash(key) % _GENERATION_SHARDS
+
+    def _lookup(self, key):
+        """Retourne (trouvé, valeur, génération courante de la tranche de la clé)"""
+        if self.bus is not None:
+            self.bus.ensure_started()
+        now = time.monotonic()
+        with self._lock:
+            generation = self._generations[self._shard(key)]
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return True, None if entry[1] is _MISSING else entry[1], generation
+            self.misses += 1
+            return False, None, generation
+
+    def _store(self, key, value, generation):
+        ttl = self.negative_ttl if value is _MISSING else self.ttl
+        with self._lock:
+            if generation != self._generations[self._shard(key)]:
+                return
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def update(self, key, fn):
+        """Remplace une valeur présente par fn(valeur), sans chargement ni changement de TTL.
+
+        Les valeurs sont traitées comme immuables : `fn` retourne une nouvelle
+        valeur, les lecteurs qui détiennent l'ancienne ne la voient pas changer.
+        """
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now and entry[1] is not _MISSING:
+                self._data[key] = (entry[0], fn(entry[1]))
+
+    def invalidate(self, *keys):
+        """Invalide des clés localement et dans les autres processus"""
+        keys = [key for key in keys if key is not None]
+        if not self.enabled or not keys:
+            return
+        self._invalidate_local(keys)
+        if self.bus is not None:
+            self.bus.publish(self.name, keys)
+
+    def _invalidate_local(self, keys):
+        with self._lock:
+            for key in keys:
+                self._generations[self._shard(key)] += 1
+                if self._data.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def _on_remote_invalidation(self, cache_name, keys):
+        if cache_name == self.name:
+            self._invalidate_local(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            size = len(self._data)
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": size,
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "negative_ttl": self.negative_ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+def _make_bus():
+    if CACHE_BUS == 'socket':
+        return SocketInvalidationBus(CACHE_BUS_DIR)
+    return LocalInvalidationBus()
+
+
+invalidation_bus = _make_bus()
+
+# Caches des recherches par clé des modèles (valeurs : dictionnaires de propriétés)
+user_cache = LRUCache('user', CACHE_MAX_SIZE, CACHE_TTL, CACHE_NEGATIVE_TTL,
+                      bus=invalidation_bus, enabled=CACHE_ENABLED)
+user_email_cache = LRUCache('user_email', CACHE_MAX_SIZE, CACHE_TTL, CACHE_NEGATIVE_TTL,
+                            bus=invalidation_bus, enabled=CACHE_ENABLED)
+post_cache = LRUCache('post', CACHE_MAX_SIZE, CACHE_TTL, CACHE_NEGATIVE_TTL,
+                      bus=invalidation_bus, enabled=CACHE_ENABLED)
+
+# Fils d'actualité (services/feed.py) : timelines par lecteur, posts récents par auteur
+timeline_cache = LRUCache('timeline', FEED_TIMELINE_CACHE_SIZE, FEED_TIMELINE_TTL, CACHE_NEGATIVE_TTL,
+                          bus=invalidation_bus, enabled=CACHE_ENABLED)
+author_posts_cache = LRUCache('author_posts', CACHE_MAX_SIZE, FEED_TIMELINE_TTL, CACHE_NEGATIVE_TTL,
+                              bus=invalidation_bus, enabled=CACHE_ENABLED)
+
+
+def cache_stats():
+    """Statistiques de tous les caches, pour l'administration"""
+    return {cache.name: cache.stats() for cache in (user_cache, user_email_cache, post_cache,
+                                                    timeline_cache, author_posts_cache)}
@@ -0,0 +1,129 @@
+"""Compression des réponses (gzip, brotli) selon Accept-Encoding.
+
+Un corps complet est compressé s'il dépasse COMPRESSION_MIN_SIZE octets.
+Un flux (NDJSON chunké) est compressé au fil de l'eau : le compresseur est
+vidé (sync flush) dès que COMPRESSION_STREAM_FLUSH_BYTES octets sont en
+attente, le client reçoit donc les lignes sans attendre la fin du flux.
+brotli n'est proposé que si le module `brotli` est installé.
+"""
+import zlib
+from config import (COMPRESSION_ENABLED, COMPRESSION_MIN_SIZE, COMPRESSION_GZIP_LEVEL,
+                    COMPRESSION_BROTLI_QUALITY, COMPRESSION_STREAM_FLUSH_BYTES)
+
+try:
+    import brotli
+except ImportError:  # gzip seulement
+    brotli = None
+
+# Types de contenu qui gagnent à être compressés (les autres sont déjà compacts ou binaires)
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/')
+
+# Par ordre de préférence à qualité égale
+SUPPORTED_ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def choose_encoding(accept_encoding):
+    """Meilleur encodage accepté par le client (None = pas de compression)"""
+    if not COMPRESSION_ENABLED or not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.strip().lower()] = quality
+    candidates = [(accepted.get(encoding, accepted.get('*', 0.0)), -rank, encoding)
+                  for rank, encoding in enumerate(SUPPORTED_ENCODINGS)]
+    quality, _, encoding = max(candidates)
+    return encoding if quality > 0 else None
+
+
+def is_compressible(content_type):
+    return bool(content_type) and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class _GzipStream:
+    def __init__(self, level):
+        # wbits=31 : en-tête et contrôle gzip
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliStream:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def compressor(encoding):
+    """Compresseur incrémental : compress(), flush() (sync) et finish()"""
+    if encoding == 'br':
+        return _BrotliStream(COMPRESSION_BROTLI_QUALITY)
+    return _GzipStream(COMPRESSION_GZIP_LEVEL)
+
+
+def compress(body, encoding):
+    """Corps complet compressé"""
+    stream = compressor(encoding)
+    return stream.compress(body) + stream.finish()
+
+
+def compress_chunks(chunks, encoding, flush_bytes=COMPRESSION_STREAM_FLUSH_BYTES):
+    """Compresse un itérable de morceaux (octets) au fil de l'eau"""
+    stream = compressor(encoding)
+    pending = 0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        out = stream.compress(chunk)
+        pending += len(chunk)
+        if pending >= flush_bytes:
+            out += stream.flush()
+            pending = 0
+        if out:
+            yield out
+    yield stream.finish()
+
+
+def compress_response(response, accept_encoding):
+    """Compresse une réponse Flask (corps complet ou flux) si le client l'accepte"""
+    if (response.status_code < 200 or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers or not is_compressible(response.mimetype)):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = compress_chunks(response.iter_encoded(), encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < COMPRESSION_MIN_SIZE:
+            return response
+        response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,73 @@
+"""Requêtes conditionnelles (ETag, Last-Modified, 304) sur les ressources lues par id.
+
+Chaque noeud porte `revision` et `updated_at`, mis à jour par toutes les
+écritures qui changent ce que renvoie une lecture (voir `touch` dans
+models/queries.py). La version d'une ressource est lue par une requête
+légère (USER_VERSION, POST_COMMENTS_VERSION...) ou dans le cache, jamais en
+chargeant le corps. Pour une liste (amis, commentaires), elle combine la
+version du parent, le nombre d'éléments et la somme de leurs révisions.
+
+La version est lue avant le corps : si une écriture s'intercale, le client
+reçoit le nouveau corps avec l'ancien ETag et refera une lecture complète au
+prochain appel, mais ne reçoit jamais de 304 à tort. Les ETag sont faibles
+(W/) car le même contenu peut être envoyé compressé ou non.
+"""
+import hashlib
+from collections import namedtuple
+from email.utils import formatdate, parsedate_to_datetime
+
+Version = namedtuple('Version', 'etag last_modified')
+
+
+def version_from(kind, item_id, row, variant=''):
+    """Version d'une ressource depuis une ligne {revision, updated_at[, count, members_revision,
+    members_updated_at]} ; `variant` distingue les représentations (?fields=)"""
+    parts = [kind, item_id, row.get('revision') or 0, row.get('count'), row.get('members_revision'), variant]
+    digest = hashlib.blake2b('|'.join(map(str, parts)).encode('utf-8'), digest_size=10).hexdigest()
+    dates = [date for date in (row.get('updated_at'), row.get('members_updated_at')) if date is not None]
+    return Version(f'W/"{digest}"', max(dates) if dates else None)
+
+
+def node_version(kind, node, variant=''):
+    """Version depuis les propriétés d'un noeud déjà chargé (valeur en cache)"""
+    return version_from(kind, node['id'], {"revision": node.get('revision'),
+                                           "updated_at": node.get('updated_at') or node.get('created_at')},
+                        variant)
+
+
+def projection_variant(projection):
+    """Variante d'une représentation ; None si elle inclut des données liées non versionnées"""
+    if projection is None:
+        return ''
+    if projection.includes:
+        return None
+    return ','.join(projection.fields)
+
+
+def version_headers(version):
+    headers = {'ETag': version.etag, 'Cache-Control': 'no-cache'}
+    if version.last_modified is not None:
+        headers['Last-Modified'] = formatdate(version.last_modified, usegmt=True)
+    return headers
+
+
+def _opaque(tag):
+    tag = tag.strip()
+    return tag[2:] if tag.startswith('W/') else tag
+
+
+def is_not_modified(headers, version):
+    """Indique si la copie du client est à jour (If-None-Match, sinon If-Modified-Since)"""
+    if_none_match = headers.get('If-None-Match')
+    if if_none_match is not None:
+        tags = [_opaque(tag) for tag in if_none_match.split(',')]
+        return '*' in tags or _opaque(version.etag) in tags
+    if_modified_since = headers.get('If-Modified-Since')
+    if if_modified_since and version.last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        # Last-Modified est envoyé à la seconde près
+        return int(version.last_modified) <= since
+    return False
@@ -0,0 +1,95 @@
+import time
+from services.cache import post_cache
+from services.metrics import name_queries
+from models.queries import touch
+
+# Compteurs matérialisés (label, propriété, motif compté depuis le noeud n).
+# Les requêtes d'écriture les tiennent à jour ; la réconciliation corrige la dérive
+# (écritures antérieures aux compteurs, suppressions hors API, incidents).
+COUNTERS = [
+    ("Post", "likes_count", "(n)<-[:LIKES]-(:User)"),
+    ("Post", "comments_count", "(n)-[:HAS_COMMENT]->(:Comment)"),
+    ("Comment", "likes_count", "(n)<-[:LIKES]-(:User)"),
+]
+
+# Nombre maximal d'écarts détaillés dans le rapport
+SAMPLE_SIZE = 20
+
+
+def _counters(label):
+    return [(prop, pattern) for counter_label, prop, pattern in COUNTERS if counter_label == label]
+
+
+def _scan_query(label):
+    """Lit un lot de noeuds (ordre des id) avec valeurs stockées et valeurs réelles"""
+    counters = _counters(label)
+    stored = ", ".join(f"coalesce(n.{prop}, -1)" for prop, _ in counters)
+    actual = ", ".join(f"size([{pattern} | 1])" for _, pattern in counters)
+    return (f"MATCH (n:{label}) WHERE n.id > $after_id\n"
+            f"WITH n ORDER BY n.id LIMIT $limit\n"
+            f"RETURN n.id AS id, [{stored}] AS stored, [{actual}] AS actual")
+
+
+def _repair_query(label):
+    """Recompte et réécrit les compteurs des noeuds donnés.
+
+    Le noeud est verrouillé en écriture (SET d'une propriété temporaire) avant
+    le recomptage : un like ou un commentaire concurrent attend la fin de la
+    réparation au lieu d'être perdu entre le comptage et l'écriture.
+    """
+    assignments = ", ".join([f"n.{prop} = size([{pattern} | 1])" for prop, pattern in _counters(label)]
+                            + [touch('n')])
+    return (f"UNWIND $ids AS id\n"
+            f"MATCH (n:{label} {{id: id}})\n"
+            f"SET n._counters_lock = true\n"
+            f"WITH n\n"
+            f"SET {assignments}\n"
+            f"REMOVE n._counters_lock\n"
+            f"RETURN n.id AS id")
+
+
+# Requêtes générées : nommées par label pour les métriques
+for _label in dict.fromkeys(label for label, _, _ in COUNTERS):
+    name_queries({f"COUNTERS_SCAN_{_label.upper()}": _scan_query(_label),
+                  f"COUNTERS_REPAIR_{_label.upper()}": _repair_query(_label)})
+
+
+def reconcile_label(graph, label, batch_size=1000, repair=True):
+    """Parcourt tous les noeuds d'un label par lots et répare les compteurs divergents"""
+    props = [prop for prop, _ in _counters(label)]
+    scan, fix = _scan_query(label), _repair_query(label)
+    report = {"scanned": 0, "drifted": 0, "repaired": 0, "samples": []}
+    after_id = ""
+
+    while True:
+        rows = graph.run(scan, after_id=after_id, limit=batch_size).data()
+        if not rows:
+            return report
+        after_id = rows[-1]['id']
+        report["scanned"] += len(rows)
+
+        drifted = [row for row in rows if row['stored'] != row['actual']]
+        report["drifted"] += len(drifted)
+        for row in drifted[:max(0, SAMPLE_SIZE - len(report["samples"]))]:
+            report["samples"].append({
+                "id": row['id'],
+                # -1 : compteur absent
+                "stored": dict(zip(props, row['stored'])),
+                "actual": dict(zip(props, row['actual'])),
+            })
+
+        if repair and drifted:
+            ids = [row['id'] for row in drifted]
+            report["repaired"] += len(graph.run(fix, ids=ids).data())
+            if label == "Post":
+                post_cache.invalidate(*ids)
+
+
+def reconcile_counters(graph, batch_size=1000, repair=True):
+    """Vérifie (et répare si `repair`) tous les compteurs déclarés dans COUNTERS"""
+    started = time.monotonic()
+    labels = list(dict.fromkeys(label for label, _, _ in COUNTERS))
+    result = {label: reconcile_label(graph, label, batch_size, repair) for label in labels}
+    result["repair"] = repair
+    result["elapsed_s"] = round(time.monotonic() - started, 3)
+    return result
@@ -1,33 +1,293 @@
-from py2neo import Graph
-from config import NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+from neo4j import GraphDatabase, READ_ACCESS, WRITE_ACCESS
+from config import (NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, NEO4J_DATABASE,
+                    NEO4J_MAX_POOL_SIZE, NEO4J_MAX_CONNECTION_LIFETIME,
+                    NEO4J_CONNECTION_ACQUISITION_TIMEOUT, NEO4J_FETCH_SIZE,
+                    NEO4J_WARMUP_CONNECTIONS)
+from services.schema import apply_schema
+from services.metrics import observe_query
+from services.slow_queries import slow_query_log
+from services.admission import admission_for, admission_stats, query_priority, SCAN
+
+# Clauses qui font d'une requête une écriture (routage et mode de transaction)
+_WRITE_CLAUSES = re.compile(r"\b(CREATE|MERGE|SET|DELETE|REMOVE|DROP|FOREACH)\b", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def is_write_query(query):
+    """Indique si une requête Cypher contient une clause d'écriture"""
+    return bool(_WRITE_CLAUSES.search(query))
+
+
+class Result:
+    """Résultat entièrement lu d'une requête, compatible avec l'ancien curseur py2neo"""
+
+    def __init__(self, records):
+        self._records = records
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def data(self):
+        """Liste de dictionnaires (les noeuds deviennent des dictionnaires de propriétés)"""
+        return [record.data() for record in self._records]
+
+    def close(self):
+        pass
+
+
+class PoolMetrics:
+    """Compteurs d'utilisation du pool : transactions en cours et temps d'attente"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.transactions = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def start(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def finish(self, wait):
+        with self._lock:
+            self.in_flight -= 1
+            self.transactions += 1
+            if wait is not None:
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "in_flight_transactions": self.in_flight,
+                "transactions": self.transactions,
+                "avg_wait_ms": round(1000 * self.total_wait / self.transactions, 3) if self.transactions else None,
+                "max_wait_ms": round(1000 * self.max_wait, 3),
+            }
+
 
 class DatabaseService:
+    """Accès à Neo4j : driver créé paresseusement, un par processus.
+
+    Rien n'est ouvert à l'import : le driver est créé au premier usage dans
+    le processus courant. Après un fork (serveur pré-forké avec preload), le
+    processus enfant oublie le driver hérité et en crée un nouveau, de sorte
+    que deux workers ne partagent jamais une socket.
+    """
     _instance = None
-    
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(DatabaseService, cls).__new__(cls)
-            cls._instance.graph = Graph(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-            cls._instance._create_constraints()
+            cls._instance._lock = threading.Lock()
+            cls._instance._driver = None
+            cls._instance._pid = None
+            cls._instance.metrics = PoolMetrics()
         return cls._instance
-    
-    def _create_constraints(self):
-        """Crée les contraintes et index nécessaires sur les noeuds"""
-        # Contrainte d'unicité sur l'email des utilisateurs
+
+    @property
+    def driver(self):
+        """Driver du processus courant, créé au premier accès"""
+        if self._driver is None or self._pid != os.getpid():
+            with self._lock:
+                if self._driver is None or self._pid != os.getpid():
+                    self._driver = GraphDatabase.driver(
+                        NEO4J_URI,
+                        auth=(NEO4J_USER, NEO4J_PASSWORD),
+                        max_connection_pool_size=NEO4J_MAX_POOL_SIZE,
+                        max_connection_lifetime=NEO4J_MAX_CONNECTION_LIFETIME,
+                        connection_acquisition_timeout=NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+                    )
+                    self._pid = os.getpid()
+        return self._driver
+
+    def reset_after_fork(self):
+        """Oublie le driver hérité du processus parent (appelé dans l'enfant après un fork)"""
+        # On ne ferme pas le driver hérité : ses sockets appartiennent toujours au parent
+        self._lock = threading.Lock()
+        self._driver = None
+        self._pid = None
+        self.metrics = PoolMetrics()
+
+    def bootstrap_schema(self, force=False):
+        """Applique le schéma une seule fois (manage.py, démarrage du serveur maître)"""
+        # Les déclarations et la version du schéma sont centralisées dans services/schema.py
+        return apply_schema(self, force=force)
+
+    def warm_up(self, connections=NEO4J_WARMUP_CONNECTIONS):
+        """Ouvre `connections` connexions du pool avant que le worker ne serve des requêtes.
+
+        Chaque thread garde sa session ouverte jusqu'à ce que toutes soient
+        établies, pour que le pool contienne réellement N connexions.
+        """
+        if connections <= 0:
+            return 0
+        self.driver.verify_connectivity()
+        barrier = threading.Barrier(connections)
+        opened = []
+
+        def open_connection():
+            try:
+                with self._session(READ_ACCESS) as session:
+                    session.run("RETURN 1").consume()
+                    opened.append(True)
+                    barrier.wait(timeout=NEO4J_CONNECTION_ACQUISITION_TIMEOUT)
+            except Exception as e:
+                barrier.abort()
+                print(f"Erreur lors du préchauffage du pool: {e}")
+
+        threads = [threading.Thread(target=open_connection) for _ in range(connections)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return len(opened)
+
+    def _session(self, access_mode):
+        return self.driver.session(database=NEO4J_DATABASE, fetch_size=NEO4J_FETCH_SIZE,
+                                   default_access_mode=access_mode)
+
+    def _execute(self, access_mode, work, *args, **kwargs):
+        """Exécute `work(tx, ...)` dans une transaction gérée (rejouée sur erreur transitoire).
+
+        Le temps entre l'appel et le début de `work` (acquisition d'une
+        connexion du pool + BEGIN) est comptabilisé comme temps d'attente.
+        """
+        started = time.perf_counter()
+        wait = []
+
+        def timed_work(tx, *a, **kw):
+            if not wait:
+                wait.append(time.perf_counter() - started)
+            return work(tx, *a, **kw)
+
+        self.metrics.start()
+        try:
+            with self._session(access_mode) as session:
+                if access_mode == READ_ACCESS:
+                    return session.execute_read(timed_work, *args, **kwargs)
+                return session.execute_write(timed_work, *args, **kwargs)
+        finally:
+            self.metrics.finish(wait[0] if wait else None)
+
+    def read_transaction(self, work, *args, **kwargs):
+        """Exécute une fonction de transaction en lecture : work(tx, *args, **kwargs)"""
+        with admission_for(False).slot(SCAN):
+            return self._execute(READ_ACCESS, work, *args, **kwargs)
+
+    def write_transaction(self, work, *args, **kwargs):
+        """Exécute une fonction de transaction en écriture : work(tx, *args, **kwargs)
+
+        Permet de regrouper plusieurs requêtes dans une seule transaction.
+        """
+        with admission_for(True).slot(SCAN):
+            return self._execute(WRITE_ACCESS, work, *args, **kwargs)
+
+    def run(self, query, parameters=None, **kwargs):
+        """Exécute une requête dans une transaction gérée en lecture ou écriture selon son contenu.
+
+        La requête doit d'abord être admise (services/admission.py), sinon
+        OverloadedError est levée. Durée, nombre de lignes et erreurs sont
+        mesurés sous le nom de la constante de la requête (services/metrics.py) ;
+        au-delà du seuil, la requête est journalisée (services/slow_queries.py).
+        """
+        params = dict(parameters or {}, **kwargs)
+        write = is_write_query(query)
+        with admission_for(write).slot(query_priority(query)):
+            return self._run(WRITE_ACCESS if write else READ_ACCESS, query, params)
+
+    def _run(self, access_mode, query, params):
+        started = time.perf_counter()
         try:
-            self.graph.run("CREATE CONSTRAINT user_email IF NOT EXISTS ON (u:User) ASSERT u.email IS UNIQUE")
+            records = self._execute(access_mode, lambda tx: list(tx.run(query, params)))
         except Exception as e:
-            print(f"Erreur lors de la création de la contrainte d'email: {e}")
-            
-        # On peut ajouter d'autres contraintes ou index selon les besoins
+            elapsed = time.perf_counter() - started
+            observe_query(query, elapsed, error=True)
+            if elapsed >= slow_query_log.threshold:
+                slow_query_log.record(query, params, elapsed, error=str(e), profiler=self.query_plan)
+            raise
+        elapsed = time.perf_counter() - started
+        observe_query(query, elapsed, rows=len(records))
+        if elapsed >= slow_query_log.threshold:
+            slow_query_log.record(query, params, elapsed, rows=len(records), profiler=self.query_plan)
+        return Result(records)
+
+    def query_plan(self, query, parameters=None):
+        """Plan d'exécution d'une requête (dictionnaire du driver).
+
+        Une lecture est réexécutée sous PROFILE (db hits et lignes réels) ;
+        une écriture n'est jamais rejouée : EXPLAIN donne le plan estimé.
+        """
+        params = dict(parameters or {})
+        if is_write_query(query):
+            with admission_for(True).slot(SCAN):
+                return self._execute(WRITE_ACCESS, lambda tx: tx.run("EXPLAIN " + query, params).consume().plan)
+        with admission_for(False).slot(SCAN):
+            return self._execute(READ_ACCESS, lambda tx: tx.run("PROFILE " + query, params).consume().profile)
+
+    def stream(self, query, parameters=None, **kwargs):
+        """Générateur qui lit les enregistrements au fil de l'eau (par paquets de fetch_size)
+
+        Un parcours occupe une place de lecture (priorité SCAN) jusqu'à la fin du flux.
+        """
+        params = dict(parameters or {}, **kwargs)
+        with admission_for(False).slot(SCAN):
+            started = time.perf_counter()
+            rows, failed = 0, False
+            self.metrics.start()
+            try:
+                with self._session(READ_ACCESS) as session:
+                    with session.begin_transaction() as tx:
+                        for record in tx.run(query, params):
+                            rows += 1
+                            yield record
+            except Exception:
+                failed = True
+                raise
+            finally:
+                self.metrics.finish(None)
+                # Durée totale du parcours, consommation par l'appelant comprise
+                observe_query(query, time.perf_counter() - started, rows=rows, error=failed)
+
+    def pool_metrics(self):
+        """Métriques du pool : connexions utilisées/libres, transactions en cours, attente"""
+        metrics = self.metrics.snapshot()
+        metrics["max_pool_size"] = NEO4J_MAX_POOL_SIZE
+        metrics["admission"] = admission_stats()
+        try:
+            # API interne du driver : absente ou différente selon les versions
+            pool = self.driver._pool
+            with pool.lock:
+                connections = [c for queue in pool.connections.values() for c in queue]
+            metrics["connections_in_use"] = sum(1 for c in connections if c.in_use)
+            metrics["connections_idle"] = len(connections) - metrics["connections_in_use"]
+        except Exception:
+            metrics["connections_in_use"] = metrics["connections_idle"] = None
+        return metrics
+
+    def close(self):
+        """Ferme le driver du processus courant et toutes les connexions du pool"""
+        if self._driver is not None and self._pid == os.getpid():
+            self._driver.close()
+        self._driver = None
+        self._pid = None
 
     def get_db(self):
         """Retourne l'instance de connexion à la base de données"""
-        return self.graph
+        return self
 
-# Création d'une instance singleton
+# Création d'une instance singleton (aucune connexion n'est ouverte ici)
 db_service = DatabaseService()
 
+# Un processus enfant ne doit jamais réutiliser les sockets du parent
+os.register_at_fork(after_in_child=db_service.reset_after_fork)
+
 def get_db():
     """Fonction utilitaire pour obtenir la connexion à la base de données"""
-    return db_service.get_db()
\ No newline at end of file
+    return db_service.get_db()
@@ -0,0 +1,324 @@
+"""Export du graphe en fichiers NDJSON, CSV ou Parquet (python manage.py export).
+
+Chaque type (noeuds User, Post, Comment ; relations FRIENDS_WITH, LIKES)
+est découpé en tranches d'id : l'espace des id (uuid hexadécimaux) est
+partagé en EXPORT_SHARDS intervalles [lo, hi[ lus par un seek sur l'index
+d'unicité de `id`. Les tranches sont exportées par un pool de
+EXPORT_WORKERS processus ; chacune lit son curseur au fil de l'eau (mémoire
+constante) et écrit un fichier, compressé à la volée (gzip, brotli) ou en
+groupes de lignes Parquet.
+
+Les relations CREATED, WROTE et HAS_COMMENT sont portées par les colonnes
+author_id et post_id des posts et des commentaires, lues sur les relations
+elles-mêmes. Les colonnes sont celles de l'import (services/importer.py) :
+les parties d'un export NDJSON ou CSV, concaténées, se rechargent avec
+`manage.py import`.
+
+Le manifeste (manifest.json, écrit en dernier) liste chaque fichier avec
+son nombre de lignes, sa taille et son empreinte SHA-256. Les tranches sont
+lues dans des transactions distinctes : le manifeste compare les comptages
+de la base avant et après l'export aux lignes exportées, et n'est marqué
+`consistent` que s'ils sont identiques (sinon, des écritures ont eu lieu
+pendant l'export).
+"""
+import csv
+import hashlib
+import io
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from config import EXPORT_DIR, EXPORT_WORKERS, EXPORT_SHARDS, EXPORT_ROW_GROUP_SIZE
+from services.compression import compressor, SUPPORTED_ENCODINGS
+from services.json_codec import dumps, ndjson_line
+from services.metrics import name_queries
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # format parquet indisponible
+    pyarrow = None
+
+FORMATS = ('ndjson', 'csv', 'parquet')
+
+# Borne supérieure de la dernière tranche (au-delà de tout id)
+_MAX_ID = '\uffff'
+
+# Largeur (en chiffres hexadécimaux) des bornes des tranches
+_BOUND_WIDTH = 8
+
+EXPORT_USERS = """
+MATCH (u:User) WHERE u.id >= $lo AND u.id < $hi
+RETURN u {.id, .name, .email, .created_at} AS row
+"""
+
+EXPORT_POSTS = """
+MATCH (p:Post) WHERE p.id >= $lo AND p.id < $hi
+RETURN {id: p.id, author_id: head([(author:User)-[:CREATED]->(p) | author.id]), title: p.title,
+        content: p.content, created_at: p.created_at, likes_count: coalesce(p.likes_count, 0),
+        comments_count: coalesce(p.comments_count, 0)} AS row
+"""
+
+EXPORT_COMMENTS = """
+MATCH (c:Comment) WHERE c.id >= $lo AND c.id < $hi
+RETURN {id: c.id, post_id: head([(post:Post)-[:HAS_COMMENT]->(c) | post.id]),
+        author_id: head([(author:User)-[:WROTE]->(c) | author.id]), parent_id: c.parent_id,
+        content: c.content, created_at: c.created_at, likes_count: coalesce(c.likes_count, 0)} AS row
+"""
+
+# Relations : chaque relation une fois, depuis son origine (tranche sur l'id de l'origine)
+EXPORT_FRIENDSHIPS = """
+MATCH (u:User) WHERE u.id >= $lo AND u.id < $hi
+MATCH (u)-[:FRIENDS_WITH]->(friend:User)
+RETURN {user_id: u.id, friend_id: friend.id} AS row
+"""
+
+EXPORT_LIKES = """
+MATCH (u:User) WHERE u.id >= $lo AND u.id < $hi
+MATCH (u)-[:LIKES]->(p:Post)
+RETURN {user_id: u.id, post_id: p.id} AS row
+"""
+
+EXPORT_COMMENT_LIKES = """
+MATCH (u:User) WHERE u.id >= $lo AND u.id < $hi
+MATCH (u)-[:LIKES]->(c:Comment)
+RETURN {user_id: u.id, comment_id: c.id} AS row
+"""
+
+# Comptages lus dans le count store (un label, ou un type et un label) : coût constant
+EXPORT_COUNTS = """
+CALL { MATCH (n:User) RETURN count(n) AS users }
+CALL { MATCH (n:Post) RETURN count(n) AS posts }
+CALL { MATCH (n:Comment) RETURN count(n) AS comments }
+CALL { MATCH (:User)-[r:FRIENDS_WITH]->() RETURN count(r) AS friendships }
+CALL { MATCH ()-[r:LIKES]->(:Post) RETURN count(r) AS likes }
+CALL { MATCH ()-[r:LIKES]->(:Comment) RETURN count(r) AS comment_likes }
+RETURN users, posts, comments, friendships, likes, comment_likes
+"""
+
+name_queries(globals())
+
+# name : fichier exporté ; columns : colonnes dans l'ordre (created_at et compteurs numériques)
+Dataset = namedtuple('Dataset', 'name columns statement')
+
+DATASETS = [
+    Dataset('users', ('id', 'name', 'email', 'created_at'), EXPORT_USERS),
+    Dataset('posts', ('id', 'author_id', 'title', 'content', 'created_at', 'likes_count', 'comments_count'),
+            EXPORT_POSTS),
+    Dataset('friendships', ('user_id', 'friend_id'), EXPORT_FRIENDSHIPS),
+    Dataset('likes', ('user_id', 'post_id'), EXPORT_LIKES),
+    Dataset('comments', ('id', 'post_id', 'author_id', 'parent_id', 'content', 'created_at', 'likes_count'),
+            EXPORT_COMMENTS),
+    Dataset('comment_likes', ('user_id', 'comment_id'), EXPORT_COMMENT_LIKES),
+]
+
+# Relations du graphe et où elles se trouvent dans l'export
+RELATIONSHIPS = {
+    "FRIENDS_WITH": "friendships",
+    "LIKES": "likes, comment_likes",
+    "CREATED": "posts.author_id",
+    "WROTE": "comments.author_id",
+    "HAS_COMMENT": "comments.post_id",
+}
+
+_NUMERIC = {'created_at': 'float64', 'likes_count': 'int64', 'comments_count': 'int64'}
+
+
+class InvalidExportError(ValueError):
+    """Levée quand les options d'export sont invalides (format, compression, dépendance absente)"""
+
+
+def shard_bounds(shards):
+    """Intervalles [lo, hi[ qui couvrent tous les id, répartis uniformément sur les uuid"""
+    space = 16 ** _BOUND_WIDTH
+    cuts = [format(space * i // shards, f'0{_BOUND_WIDTH}x') for i in range(1, shards)]
+    # Première tranche ouverte vers le bas : les id non hexadécimaux y sont aussi couverts
+    return list(zip([''] + cuts, cuts + [_MAX_ID]))
+
+
+def file_name(dataset, shard, fmt, compression):
+    suffix = {'gzip': '.gz', 'br': '.br'}.get(compression, '')
+    return os.path.join(dataset, f"part-{shard:05d}.{fmt}{suffix}")
+
+
+class _HashingWriter:
+    """Fichier binaire qui compte les octets écrits et calcule leur SHA-256"""
+
+    def __init__(self, path):
+        self._file = open(path, 'wb')
+        self.sha256 = hashlib.sha256()
+        self.bytes = 0
+
+    def write(self, data):
+        self._file.write(data)
+        self.sha256.update(data)
+        self.bytes += len(data)
+        return len(data)
+
+    def close(self):
+        self._file.close()
+
+
+def _file_digest(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha256.update(block)
+    return os.path.getsize(path), sha256.hexdigest()
+
+
+def _encoded_rows(rows, columns, fmt):
+    """Morceaux d'octets d'un flux de lignes (NDJSON, ou CSV avec en-tête)"""
+    if fmt == 'ndjson':
+        chunk = []
+        for row in rows:
+            chunk.append(ndjson_line(row))
+            if len(chunk) >= 1000:
+                yield b''.join(chunk)
+                chunk = []
+        yield b''.join(chunk)
+        return
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore', lineterminator='\n')
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= 65536:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def _write_text(out, rows, columns, fmt, compression):
+    stream = compressor(compression) if compression else None
+    for chunk in _encoded_rows(rows, columns, fmt):
+        out.write(stream.compress(chunk) if stream else chunk)
+    if stream:
+        out.write(stream.finish())
+
+
+def _write_parquet(path, rows, columns, row_group_size, compression):
+    """Fichier Parquet écrit par groupes de `row_group_size` lignes"""
+    schema = pyarrow.schema([(column, _NUMERIC.get(column, 'string')) for column in columns])
+    writer = pyarrow.parquet.ParquetWriter(path, schema, compression=compression or 'none')
+    try:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= row_group_size:
+                writer.write_table(pyarrow.Table.from_pylist(batch, schema=schema))
+                batch = []
+        if batch:
+            writer.write_table(pyarrow.Table.from_pylist(batch, schema=schema))
+    finally:
+        writer.close()
+
+
+def export_shard(task):
+    """Exporte une tranche d'un type (exécuté dans un processus du pool)"""
+    from services.db_service import get_db
+
+    dataset, shard, lo, hi, directory, fmt, compression, row_group_size = task
+    dataset = next(item for item in DATASETS if item.name == dataset)
+    relative = file_name(dataset.name, shard, fmt, None if fmt == 'parquet' else compression)
+    path = os.path.join(directory, relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    count = [0]
+
+    def rows():
+        for record in get_db().stream(dataset.statement, lo=lo, hi=hi):
+            count[0] += 1
+            yield record['row']
+
+    started = time.perf_counter()
+    if fmt == 'parquet':
+        # pyarrow écrit lui-même le fichier : l'empreinte est calculée en le relisant
+        _write_parquet(path, rows(), dataset.columns, row_group_size, compression)
+        size, digest = _file_digest(path)
+    else:
+        out = _HashingWriter(path)
+        try:
+            _write_text(out, rows(), dataset.columns, fmt, compression)
+        finally:
+            out.close()
+        size, digest = out.bytes, out.sha256.hexdigest()
+    return {"dataset": dataset.name, "shard": shard, "path": relative, "rows": count[0],
+            "bytes": size, "sha256": digest, "elapsed_s": round(time.perf_counter() - started, 3)}
+
+
+def count_graph(db):
+    """Nombre de noeuds et de relations par type exporté"""
+    return db.run(EXPORT_COUNTS).data()[0]
+
+
+def export_graph(db, directory=EXPORT_DIR, fmt='ndjson', compression=None, shards=EXPORT_SHARDS,
+                 workers=EXPORT_WORKERS, datasets=None, row_group_size=EXPORT_ROW_GROUP_SIZE, log=None):
+    """Exporte le graphe dans `directory` et retourne le manifeste (aussi écrit dans manifest.json).
+
+    `compression` : 'gzip' ou 'br' pour NDJSON et CSV ; pour Parquet, un
+    codec de pyarrow ('snappy', 'zstd', 'gzip'...).
+    """
+    log = log or (lambda message: None)
+    if fmt not in FORMATS:
+        raise InvalidExportError(f"Format inconnu: {fmt} ({', '.join(FORMATS)})")
+    if fmt == 'parquet' and pyarrow is None:
+        raise InvalidExportError("Le format parquet nécessite le module pyarrow")
+    if fmt != 'parquet' and compression not in (None, *SUPPORTED_ENCODINGS):
+        raise InvalidExportError(f"Compression inconnue: {compression} ({', '.join(SUPPORTED_ENCODINGS)})")
+
+    selected = [dataset for dataset in DATASETS if not datasets or dataset.name in datasets]
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, 'manifest.json')
+    # Un manifeste présent signale un export complet : on le retire avant de réécrire les fichiers
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+    started_at = time.time()
+    started = time.perf_counter()
+    counts_before = count_graph(db)
+    tasks = [(dataset.name, shard, lo, hi, directory, fmt, compression, row_group_size)
+             for dataset in selected for shard, (lo, hi) in enumerate(shard_bounds(shards))]
+    parts = {dataset.name: [] for dataset in selected}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(export_shard, tasks):
+            parts[result['dataset']].append(result)
+            log(f"{result['path']}: {result['rows']} lignes, {result['bytes']} octets")
+    counts_after = count_graph(db)
+    elapsed = time.perf_counter() - started
+
+    files = {}
+    for dataset in selected:
+        rows = sum(part['rows'] for part in parts[dataset.name])
+        files[dataset.name] = {
+            "columns": list(dataset.columns),
+            "rows": rows,
+            "bytes": sum(part['bytes'] for part in parts[dataset.name]),
+            "parts": [{key: part[key] for key in ('path', 'rows', 'bytes', 'sha256')}
+                      for part in parts[dataset.name]],
+        }
+    exported = {name: files[name]['rows'] for name in files}
+    consistent = counts_before == counts_after and all(
+        exported[name] == counts_before.get(name) for name in exported)
+    total_rows = sum(exported.values())
+
+    manifest = {
+        "format": fmt,
+        "compression": compression,
+        "shards": shards,
+        "started_at": started_at,
+        "finished_at": time.time(),
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_sec": round(total_rows / elapsed) if elapsed else None,
+        "counts_before": counts_before,
+        "counts_after": counts_after,
+        "consistent": consistent,
+        "relationships": RELATIONSHIPS,
+        "files": files,
+    }
+    tmp = manifest_path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(dumps(manifest))
+    os.replace(tmp, manifest_path)
+    return manifest
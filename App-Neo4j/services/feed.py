@@ -0,0 +1,94 @@
+"""Fil d'actualité hybride : timelines poussées à l'écriture, auteurs très suivis lus à la demande.
+
+Une timeline est la liste bornée des entrées (created_at, post_id) des amis
+d'un lecteur, triée par ordre croissant, gardée dans `timeline_cache` avec la
+liste de ses amis « célèbres » (au moins FEED_FANOUT_LIMIT amis). Un post
+d'auteur ordinaire est inséré dans la timeline en cache de chacun de ses amis ;
+ceux d'un auteur célèbre ne sont pas poussés mais lus depuis
+`author_posts_cache` et fusionnés (tas, k voies) au moment de la lecture. Le
+coût d'une page ne dépend donc ni du nombre d'amis du lecteur ni de celui
+des auteurs.
+"""
+import heapq
+from bisect import insort
+from config import FEED_TIMELINE_LENGTH
+from services.cache import invalidation_bus, timeline_cache, author_posts_cache
+
+# Nom des messages de fan-out sur le bus d'invalidation entre processus
+BUS_NAME = 'timeline_push'
+
+
+def timeline_from_rows(rows, length=FEED_TIMELINE_LENGTH):
+    """Construit une timeline depuis les lignes de FEED_TIMELINE (une par ami)"""
+    entries = sorted({tuple(entry) for row in rows for entry in row['posts']})
+    return {
+        "items": entries[-length:],
+        "celebrities": sorted(row['friend_id'] for row in rows if row['celebrity']),
+    }
+
+
+def author_posts_from_rows(rows):
+    """Entrées (created_at, post_id) croissantes depuis FEED_AUTHOR_RECENT"""
+    return sorted(tuple(entry) for entry in rows[0]['posts']) if rows else []
+
+
+def _insert(entry, length):
+    def apply(timeline):
+        items = list(timeline['items'])
+        insort(items, entry)
+        return dict(timeline, items=items[-length:])
+    return apply
+
+
+def _apply_push(pushes):
+    for recipient, created_at, post_id in pushes:
+        timeline_cache.update(recipient, _insert((created_at, post_id), FEED_TIMELINE_LENGTH))
+
+
+def _on_bus_message(name, pushes):
+    if name == BUS_NAME:
+        _apply_push(pushes)
+
+
+invalidation_bus.subscribe(_on_bus_message)
+
+
+def fan_out(author_id, post_id, created_at, friend_ids):
+    """Publie un nouveau post : poussé vers les timelines des amis, sauf auteur célèbre.
+
+    `friend_ids` vaut None pour un auteur célèbre. Seules les timelines déjà
+    en cache sont modifiées, les autres seront construites à la lecture.
+    """
+    author_posts_cache.invalidate(author_id)
+    if friend_ids is None:
+        return
+    pushes = [[friend_id, created_at, post_id] for friend_id in set(friend_ids)]
+    _apply_push(pushes)
+    if pushes:
+        invalidation_bus.publish(BUS_NAME, pushes)
+
+
+def invalidate_timelines(*user_ids):
+    """Oublie des timelines (amitié créée ou supprimée, utilisateur supprimé)"""
+    timeline_cache.invalidate(*user_ids)
+
+
+def merge_page(sources, limit, after=None):
+    """Fusionne des listes croissantes d'entrées, du plus récent au plus ancien.
+
+    Retourne au plus limit + 1 entrées {"created_at", "id"} strictement
+    antérieures au curseur `after` (created_at, id), sans doublon ; la ligne
+    en trop sert à build_page.
+    """
+    merged = heapq.merge(*(reversed(source) for source in sources), reverse=True)
+    entries, seen = [], set()
+    for created_at, post_id in merged:
+        if after is not None and (created_at, post_id) >= tuple(after):
+            continue
+        if post_id in seen:
+            continue
+        seen.add(post_id)
+        entries.append({"created_at": created_at, "id": post_id})
+        if len(entries) > limit:
+            break
+    return entries
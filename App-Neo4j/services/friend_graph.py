@@ -0,0 +1,374 @@
+import heapq
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from config import (FRIEND_GRAPH_ENABLED, FRIEND_GRAPH_REFRESH_INTERVAL,
+                    FRIEND_GRAPH_COMPACT_THRESHOLD)
+from services.cache import invalidation_bus
+from services.metrics import name_queries
+
+try:
+    import numpy as np
+except ImportError:  # Moteur en pur Python (module array), mêmes résultats
+    np = None
+
+# Export complet des amitiés (chaque relation une fois, dans son sens de création)
+FRIENDSHIP_EDGES = """
+MATCH (a:User)-[:FRIENDS_WITH]->(b:User)
+RETURN a.id AS a, b.id AS b
+"""
+
+name_queries({"FRIENDSHIP_EDGES": FRIENDSHIP_EDGES})
+
+# Nom des messages d'amitié sur le bus d'invalidation entre processus
+BUS_NAME = 'friend_graph'
+
+
+def _empty():
+    return np.empty(0, dtype=np.int32) if np is not None else array('i')
+
+
+def _from_rows(rows):
+    """Construit (offsets, voisins) CSR depuis des listes de voisins déjà triées"""
+    if np is not None:
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(row) for row in rows], out=offsets[1:])
+        neighbours = (np.concatenate([np.asarray(row, dtype=np.int32) for row in rows])
+                      if rows else _empty())
+        return offsets, neighbours
+    offsets, neighbours = array('q', [0]), array('i')
+    for row in rows:
+        neighbours.extend(row)
+        offsets.append(len(neighbours))
+    return offsets, neighbours
+
+
+def _from_edges(count, src, dst):
+    """Construit le CSR depuis des arcs dirigés (src, dst) ; trie et dédoublonne chaque ligne"""
+    if np is not None:
+        src = np.asarray(src, dtype=np.int32)
+        dst = np.asarray(dst, dtype=np.int32)
+        order = np.lexsort((dst, src))
+        src, dst = src[order], dst[order]
+        keep = np.ones(len(src), dtype=bool)
+        keep[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+        src, dst = src[keep], dst[keep]
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=count), out=offsets[1:])
+        return offsets, dst
+    rows = [set() for _ in range(count)]
+    for a, b in zip(src, dst):
+        rows[a].add(b)
+    return _from_rows([sorted(row) for row in rows])
+
+
+def _intersect_sorted(a, b):
+    """Intersection de deux tableaux triés sans doublons"""
+    if np is not None:
+        return np.intersect1d(a, b, assume_unique=True)
+    if len(a) > len(b):
+        a, b = b, a
+    # On parcourt le plus petit et on cherche par dichotomie dans le plus grand
+    result, lo = [], 0
+    for value in a:
+        lo = bisect_left(b, value, lo)
+        if lo == len(b):
+            break
+        if b[lo] == value:
+            result.append(value)
+    return result
+
+
+class FriendGraph:
+    """Instantané en mémoire du graphe FRIENDS_WITH au format CSR.
+
+    Les id utilisateur sont internés en entiers ; les voisins du noeud i sont
+    neighbours[offsets[i]:offsets[i + 1]], triés. Les amitiés créées ou
+    supprimées depuis la construction sont gardées dans un delta (ajouts et
+    retraits par noeud), fusionné dans le CSR au-delà de `compact_threshold`
+    modifications. Les autres processus reçoivent les modifications par le bus
+    d'invalidation des caches, et l'instantané est reconstruit depuis la base
+    toutes les `refresh_interval` secondes.
+
+    Tant que l'instantané n'est pas prêt, ensure_loaded() retourne False et
+    les modèles interrogent Neo4j.
+    """
+
+    def __init__(self, enabled=True, refresh_interval=900, compact_threshold=50000, bus=None):
+        self.enabled = enabled
+        self.refresh_interval = refresh_interval
+        self.compact_threshold = compact_threshold
+        self.bus = bus
+        self._lock = threading.Lock()
+        self._loading = False
+        self._pending = None
+        self._built_at = None
+        self._build_seconds = None
+        self._reset()
+        if bus is not None:
+            bus.subscribe(self._on_bus_message)
+
+    def _reset(self):
+        self._ids = []
+        self._index = {}
+        self._offsets, self._neighbours = _from_rows([])
+        self._added = {}
+        self._removed = {}
+        self._delta_size = 0
+
+    @property
+    def ready(self):
+        return self._built_at is not None
+
+    def reset_after_fork(self):
+        """Dans un processus enfant : garde l'instantané hérité, oublie un chargement en cours"""
+        self._lock = threading.Lock()
+        self._loading = False
+        self._pending = None
+
+    # --- Chargement ---
+
+    def ensure_loaded(self, db):
+        """Indique si l'instantané est utilisable ; lance sa (re)construction en arrière-plan"""
+        if not self.enabled:
+            return False
+        if self.bus is not None:
+            self.bus.ensure_started()
+        stale = not self.ready or time.monotonic() - self._built_at > self.refresh_interval
+        if stale and not self._loading:
+            with self._lock:
+                if self._loading:
+                    return self.ready
+                self._loading = True
+                self._pending = []
+            threading.Thread(target=self._load_in_background, args=(db,), daemon=True).start()
+        return self.ready
+
+    def _load_in_background(self, db):
+        try:
+            self.load(db)
+        except Exception as e:
+            print(f"Erreur lors du chargement du graphe d'amitiés: {e}")
+            with self._lock:
+                self._loading = False
+                self._pending = None
+
+    def load(self, db):
+        """Reconstruit l'instantané depuis un export complet des amitiés"""
+        started = time.monotonic()
+        with self._lock:
+            self._loading = True
+            if self._pending is None:
+                self._pending = []
+        ids, index = [], {}
+        src, dst = array('i'), array('i')
+        for record in db.stream(FRIENDSHIP_EDGES):
+            a = index.get(record['a'])
+            if a is None:
+                a = index[record['a']] = len(ids)
+                ids.append(record['a'])
+            b = index.get(record['b'])
+            if b is None:
+                b = index[record['b']] = len(ids)
+                ids.append(record['b'])
+            if a != b:
+                src.append(a)
+                dst.append(b)
+                src.append(b)
+                dst.append(a)
+        offsets, neighbours = _from_edges(len(ids), src, dst)
+
+        with self._lock:
+            self._ids, self._index = ids, index
+            self._offsets, self._neighbours = offsets, neighbours
+            self._added, self._removed, self._delta_size = {}, {}, 0
+            # Les écritures survenues pendant l'export sont rejouées (opérations idempotentes)
+            for event in self._pending or []:
+                self._apply(event)
+            self._pending = None
+            self._loading = False
+            self._built_at = time.monotonic()
+            self._build_seconds = round(self._built_at - started, 3)
+        return len(ids)
+
+    # --- Modifications ---
+
+    def add_friendship(self, user_id, friend_id):
+        self._record(['+', user_id, friend_id])
+
+    def remove_friendship(self, user_id, friend_id):
+        self._record(['-', user_id, friend_id])
+
+    def remove_user(self, user_id):
+        self._record(['x', user_id, None])
+
+    def _record(self, event):
+        """Applique une modification localement et la diffuse aux autres processus"""
+        if not self.enabled:
+            return
+        self._apply_locked([event])
+        if self.bus is not None:
+            self.bus.publish(BUS_NAME, [event])
+
+    def _on_bus_message(self, name, events):
+        if name == BUS_NAME:
+            self._apply_locked(events)
+
+    def _apply_locked(self, events):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.extend(events)
+            for event in events:
+                self._apply(event)
+            if self._delta_size > self.compact_threshold:
+                self._compact()
+
+    def _apply(self, event):
+        op, a, b = event
+        if op == 'x':
+            node = self._index.get(a)
+            if node is not None:
+                for other in self._row(node).tolist():
+                    self._unlink(node, other)
+                    self._unlink(other, node)
+            return
+        if a == b:
+            return
+        u, v = self._intern(a), self._intern(b)
+        if op == '+':
+            self._link(u, v)
+            self._link(v, u)
+        else:
+            self._unlink(u, v)
+            self._unlink(v, u)
+
+    def _intern(self, user_id):
+        node = self._index.get(user_id)
+        if node is None:
+            node = self._index[user_id] = len(self._ids)
+            self._ids.append(user_id)
+        return node
+
+    def _in_base(self, u, v):
+        if u + 1 >= len(self._offsets):
+            return False
+        lo, hi = int(self._offsets[u]), int(self._offsets[u + 1])
+        position = bisect_left(self._neighbours, v, lo, hi)
+        return position < hi and self._neighbours[position] == v
+
+    def _link(self, u, v):
+        removed = self._removed.get(u)
+        if removed and v in removed:
+            removed.discard(v)
+        elif not self._in_base(u, v):
+            self._added.setdefault(u, set()).add(v)
+        self._delta_size += 1
+
+    def _unlink(self, u, v):
+        added = self._added.get(u)
+        if added and v in added:
+            added.discard(v)
+        elif self._in_base(u, v):
+            self._removed.setdefault(u, set()).add(v)
+        self._delta_size += 1
+
+    def _compact(self):
+        """Fusionne le delta dans un nouveau CSR (les id internés ne changent pas)"""
+        rows = [self._row(node) for node in range(len(self._ids))]
+        self._offsets, self._neighbours = _from_rows(rows)
+        self._added, self._removed, self._delta_size = {}, {}, 0
+
+    # --- Lectures ---
+
+    def _row(self, node):
+        """Voisins triés d'un noeud interné, delta compris"""
+        if node + 1 < len(self._offsets):
+            base = self._neighbours[int(self._offsets[node]):int(self._offsets[node + 1])]
+        else:
+            base = _empty()
+        added, removed = self._added.get(node), self._removed.get(node)
+        if not added and not removed:
+            return base
+        merged = sorted((set(base.tolist()) - (removed or set())) | (added or set()))
+        return np.asarray(merged, dtype=np.int32) if np is not None else array('i', merged)
+
+    def are_friends(self, user_id, friend_id):
+        with self._lock:
+            u, v = self._index.get(user_id), self._index.get(friend_id)
+            if u is None or v is None:
+                return False
+            row = self._row(u)
+            position = bisect_left(row, v)
+            return position < len(row) and row[position] == v
+
+    def friends(self, user_id):
+        """Id des amis d'un utilisateur"""
+        with self._lock:
+            node = self._index.get(user_id)
+            if node is None:
+                return []
+            return [self._ids[other] for other in self._row(node)]
+
+    def mutual_friends(self, user_id, other_id):
+        """Id des amis communs (intersection de deux tableaux triés)"""
+        with self._lock:
+            u, v = self._index.get(user_id), self._index.get(other_id)
+            if u is None or v is None:
+                return []
+            return [self._ids[node] for node in _intersect_sorted(self._row(u), self._row(v))]
+
+    def recommendations(self, user_id, limit=10):
+        """Amis d'amis qui ne sont pas déjà amis, classés par nombre d'amis communs.
+
+        Retourne une liste de (id, nombre d'amis communs), ex aequo départagés par id.
+        """
+        with self._lock:
+            node = self._index.get(user_id)
+            if node is None:
+                return []
+            friends = self._row(node)
+            if np is not None:
+                if not len(friends):
+                    return []
+                candidates, counts = np.unique(
+                    np.concatenate([self._row(int(friend)) for friend in friends]), return_counts=True)
+                keep = ~np.isin(candidates, friends) & (candidates != node)
+                scores = zip(candidates[keep].tolist(), counts[keep].tolist())
+            else:
+                counter = Counter()
+                for friend in friends:
+                    counter.update(self._row(friend))
+                excluded = set(friends)
+                excluded.add(node)
+                scores = ((other, count) for other, count in counter.items() if other not in excluded)
+            best = heapq.nsmallest(limit, ((-count, self._ids[other]) for other, count in scores))
+        return [(other_id, -count) for count, other_id in best]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "ready": self.ready,
+                "loading": self._loading,
+                "backend": "numpy" if np is not None else "array",
+                "users": len(self._ids),
+                # Chaque amitié occupe deux entrées (une par sens)
+                "friendships": len(self._neighbours) // 2,
+                "delta_size": self._delta_size,
+                "memory_bytes": (len(self._neighbours) * self._neighbours.itemsize
+                                 + len(self._offsets) * self._offsets.itemsize),
+                "age_s": round(time.monotonic() - self._built_at, 1) if self.ready else None,
+                "build_s": self._build_seconds,
+            }
+
+
+friend_graph = FriendGraph(enabled=FRIEND_GRAPH_ENABLED,
+                           refresh_interval=FRIEND_GRAPH_REFRESH_INTERVAL,
+                           compact_threshold=FRIEND_GRAPH_COMPACT_THRESHOLD,
+                           bus=invalidation_bus)
+
+# Le processus enfant garde l'instantané (partagé en copie sur écriture) mais pas le chargement
+os.register_at_fork(after_in_child=friend_graph.reset_after_fork)
@@ -0,0 +1,391 @@
+"""Import en masse de fichiers CSV ou NDJSON (python manage.py import).
+
+Le répertoire d'import (IMPORT_DIR, monté aussi dans le conteneur Neo4j)
+contient un fichier par type, lus dans cet ordre : users, posts, friendships,
+likes, comments (extension .csv, .ndjson ou .jsonl). Chaque fichier est lu
+au fil de l'eau, validé et dédoublonné, puis réparti sur disque en
+partitions selon le hachage des noeuds qu'une ligne verrouille (l'auteur
+d'un post, les deux extrémités d'une relation).
+
+Les partitions sont écrites par IMPORT_WORKERS threads, en transactions
+UNWIND de IMPORT_BATCH_SIZE lignes. Pour une relation, les partitions
+forment une grille P x P (partition de l'origine, partition de la cible) :
+le tour r écrit en parallèle les cases (k, k + r mod P), qui n'ont deux à
+deux aucun noeud en commun. Deux transactions simultanées ne se disputent
+donc jamais le verrou d'un même noeud, même très connecté (un post viral,
+un utilisateur suivi par tous). Seules les amitiés, dont les deux
+extrémités sont des utilisateurs, peuvent encore se croiser ; les
+transactions gérées rejouent alors les interblocages.
+
+Les écritures sont des MERGE : rejouer un lot ne crée pas de doublon. Le
+point de reprise (fichier JSON à côté des partitions) enregistre les
+partitions terminées ; relancer la commande reprend là où elle s'était
+arrêtée tant que les fichiers sources n'ont pas changé. Les compteurs
+likes_count / comments_count ne sont pas incrémentés ligne par ligne (ce
+serait un verrou par like sur les posts populaires) : ils sont recalculés
+à la fin par la réconciliation des compteurs.
+
+Les réponses (commentaires avec parent_id) sont écrites après les
+commentaires de premier niveau, dans l'ordre du fichier : un parent doit
+précéder ses réponses.
+"""
+import csv
+import os
+import shutil
+import threading
+import time
+import zlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from config import IMPORT_DIR, IMPORT_BATCH_SIZE, IMPORT_WORKERS, IMPORT_PARTITIONS
+from models.queries import comment_segment, comment_path
+from services.batching import chunked, validate_item
+from services.json_codec import dumps, loads, ndjson_line
+from services.metrics import name_queries
+
+# Nombre maximal d'erreurs détaillées par fichier dans le rapport
+SAMPLE_SIZE = 20
+
+# Version du format du point de reprise
+CHECKPOINT_VERSION = 1
+
+IMPORT_USERS = """
+UNWIND $rows AS row
+MERGE (u:User {id: row.id})
+ON CREATE SET u.name = row.name, u.email = row.email, u.created_at = row.created_at
+RETURN count(*) AS written
+"""
+
+IMPORT_POSTS = """
+UNWIND $rows AS row
+MATCH (author:User {id: row.author_id})
+MERGE (p:Post {id: row.id})
+ON CREATE SET p.title = row.title, p.content = row.content, p.created_at = row.created_at,
+              p.likes_count = 0, p.comments_count = 0
+MERGE (author)-[:CREATED]->(p)
+RETURN count(*) AS written
+"""
+
+# MERGE non orienté : une amitié déjà créée dans l'autre sens n'est pas dupliquée
+IMPORT_FRIENDSHIPS = """
+UNWIND $rows AS row
+MATCH (u1:User {id: row.user_id})
+MATCH (u2:User {id: row.friend_id})
+MERGE (u1)-[:FRIENDS_WITH]-(u2)
+RETURN count(*) AS written
+"""
+
+IMPORT_LIKES = """
+UNWIND $rows AS row
+MATCH (u:User {id: row.user_id})
+MATCH (p:Post {id: row.post_id})
+MERGE (u)-[:LIKES]->(p)
+RETURN count(*) AS written
+"""
+
+IMPORT_COMMENTS = f"""
+UNWIND $rows AS row
+MATCH (p:Post {{id: row.post_id}})
+MATCH (author:User {{id: row.author_id}})
+OPTIONAL MATCH (parent:Comment {{id: row.parent_id}})
+WITH row, p, author, parent
+WHERE row.parent_id IS NULL OR parent.post_id = row.post_id
+MERGE (c:Comment {{id: row.id}})
+ON CREATE SET c.content = row.content, c.author_id = row.author_id, c.post_id = row.post_id,
+              c.parent_id = row.parent_id, c.created_at = row.created_at, c.likes_count = 0,
+              c.path = CASE WHEN parent IS NULL THEN {comment_segment('row.created_at', 'row.id')}
+                            ELSE {comment_path('parent')} + '/' + {comment_segment('row.created_at', 'row.id')} END
+MERGE (author)-[:WROTE]->(c)
+MERGE (p)-[:HAS_COMMENT]->(c)
+RETURN count(*) AS written
+"""
+
+name_queries(globals())
+
+# name : type importé ; fields : champs requis ; key : champs qui identifient une ligne
+# (dédoublonnage) ; ends : champs des noeuds verrouillés (partitionnement)
+Kind = namedtuple('Kind', 'name fields key ends statement')
+
+KINDS = [
+    Kind('users', ('id', 'name', 'email'), ('id',), ('id',), IMPORT_USERS),
+    Kind('posts', ('id', 'author_id', 'title'), ('id',), ('author_id',), IMPORT_POSTS),
+    Kind('friendships', ('user_id', 'friend_id'), ('user_id', 'friend_id'), ('user_id', 'friend_id'),
+         IMPORT_FRIENDSHIPS),
+    Kind('likes', ('user_id', 'post_id'), ('user_id', 'post_id'), ('user_id', 'post_id'), IMPORT_LIKES),
+    Kind('comments', ('id', 'post_id', 'author_id', 'content'), ('id',), ('post_id', 'author_id'),
+         IMPORT_COMMENTS),
+]
+
+EXTENSIONS = ('.csv', '.ndjson', '.jsonl')
+
+# Propriétés lues dans les fichiers, par type (les autres colonnes sont ignorées)
+_COLUMNS = {
+    'users': ('id', 'name', 'email', 'created_at'),
+    'posts': ('id', 'author_id', 'title', 'content', 'created_at'),
+    'friendships': ('user_id', 'friend_id'),
+    'likes': ('user_id', 'post_id'),
+    'comments': ('id', 'post_id', 'author_id', 'parent_id', 'content', 'created_at'),
+}
+
+
+class InvalidImportError(ValueError):
+    """Levée quand l'import ne peut pas démarrer (répertoire ou point de reprise invalide)"""
+
+
+def find_source(directory, kind):
+    """Chemin du fichier d'un type dans le répertoire d'import (None s'il n'y en a pas)"""
+    for extension in EXTENSIONS:
+        path = os.path.join(directory, kind + extension)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def read_rows(path):
+    """Itère sur les lignes d'un fichier : (numéro de ligne, dictionnaire ou message d'erreur)"""
+    if path.endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as f:
+            # Ligne 1 : en-tête
+            for number, row in enumerate(csv.DictReader(f), start=2):
+                yield number, {key: value for key, value in row.items() if key and value != ''}
+    else:
+        with open(path, 'rb') as f:
+            for number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield number, loads(line)
+                except ValueError:
+                    yield number, "JSON invalide"
+
+
+def clean_row(kind, item, now):
+    """Ligne prête pour la requête d'import, ou message d'erreur"""
+    error = validate_item(item, kind.fields)
+    if error:
+        return error
+    row = {column: item.get(column) for column in _COLUMNS[kind.name]}
+    for column, value in row.items():
+        if value is not None and column != 'created_at' and not isinstance(value, str):
+            row[column] = str(value)
+    if 'created_at' in row:
+        try:
+            row['created_at'] = float(row['created_at']) if row['created_at'] is not None else now
+        except (TypeError, ValueError):
+            return "created_at doit être un nombre (timestamp en secondes)"
+    if kind.name == 'posts' and row['content'] is None:
+        row['content'] = ''
+    if kind.name == 'friendships':
+        if row['user_id'] == row['friend_id']:
+            return "Un utilisateur ne peut pas être ami avec lui-même"
+        # Amitié non orientée : une seule orientation, pour le dédoublonnage
+        if row['friend_id'] < row['user_id']:
+            row['user_id'], row['friend_id'] = row['friend_id'], row['user_id']
+    return row
+
+
+def bucket(value, partitions):
+    """Partition d'un identifiant, stable d'une exécution à l'autre (reprise)"""
+    return zlib.crc32(value.encode('utf-8')) % partitions
+
+
+def cells(kind, partitions):
+    """Tours d'écriture : listes de cases dont les noeuds verrouillés sont disjoints"""
+    if len(kind.ends) == 1:
+        return [[(k,) for k in range(partitions)]]
+    return [[(k, (k + r) % partitions) for k in range(partitions)] for r in range(partitions)]
+
+
+def cell_name(cell):
+    return '-'.join(map(str, cell))
+
+
+class Checkpoint:
+    """Point de reprise : état de chaque fichier, réécrit atomiquement après chaque partition"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.state = {"version": CHECKPOINT_VERSION, "files": {}}
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                state = loads(f.read())
+            if state.get('version') != CHECKPOINT_VERSION:
+                raise InvalidImportError(f"Point de reprise {path} d'une version incompatible")
+            self.state = state
+
+    def entry(self, kind, source):
+        """État d'un fichier ; remis à zéro si le fichier source a changé"""
+        stat = os.stat(source)
+        signature = {"source": os.path.abspath(source), "size": stat.st_size, "mtime": stat.st_mtime}
+        with self._lock:
+            entry = self.state['files'].get(kind)
+            if entry is None or entry.get('signature') != signature:
+                entry = {"signature": signature, "partitioned": False, "done": {}, "finished": False}
+                self.state['files'][kind] = entry
+            return entry
+
+    def save(self):
+        with self._lock:
+            payload = dumps(self.state)
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(tmp, self.path)
+
+
+class Importer:
+    """Import d'un répertoire de fichiers, avec reprise.
+
+    `db` expose run(statement, rows=...) (DatabaseService ou MemoryGraph).
+    """
+
+    def __init__(self, db, directory=IMPORT_DIR, checkpoint=None, batch_size=IMPORT_BATCH_SIZE,
+                 workers=IMPORT_WORKERS, partitions=IMPORT_PARTITIONS, log=None):
+        self.db = db
+        self.directory = directory
+        self.batch_size = batch_size
+        self.workers = workers
+        self.partitions = partitions
+        self.log = log or (lambda message: None)
+        checkpoint = checkpoint or os.path.join(directory, '.import-checkpoint.json')
+        self.checkpoint = Checkpoint(checkpoint)
+        # Partitions des fichiers en cours, à côté du point de reprise
+        self.work_dir = checkpoint + '.d'
+
+    def reset(self):
+        """Oublie le point de reprise et les partitions : le prochain import repart de zéro"""
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+        if os.path.exists(self.checkpoint.path):
+            os.remove(self.checkpoint.path)
+        self.checkpoint = Checkpoint(self.checkpoint.path)
+
+    def run(self, kinds=None):
+        """Importe les types demandés (tous par défaut) ; retourne le rapport par fichier"""
+        if not os.path.isdir(self.directory):
+            raise InvalidImportError(f"Répertoire d'import introuvable: {self.directory}")
+        started = time.perf_counter()
+        report = {}
+        for kind in KINDS:
+            if kinds and kind.name not in kinds:
+                continue
+            source = find_source(self.directory, kind.name)
+            if source is None:
+                continue
+            report[kind.name] = self.import_file(kind, source)
+        if os.path.isdir(self.work_dir) and not os.listdir(self.work_dir):
+            os.rmdir(self.work_dir)
+        elapsed = time.perf_counter() - started
+        written = sum(item['written'] for item in report.values())
+        return {"files": report, "written": written, "elapsed_s": round(elapsed, 3),
+                "rows_per_sec": round(written / elapsed) if elapsed else None}
+
+    def import_file(self, kind, source):
+        entry = self.checkpoint.entry(kind.name, source)
+        directory = os.path.join(self.work_dir, kind.name)
+        if entry['finished']:
+            self.log(f"{kind.name}: déjà importé ({source})")
+            return dict(entry['stats'], resumed=True, elapsed_s=0.0, rows_per_sec=None)
+
+        started = time.perf_counter()
+        if not entry['partitioned'] or entry.get('partitions') != self.partitions:
+            shutil.rmtree(directory, ignore_errors=True)
+            entry.update(partitioned=False, done={}, partitions=self.partitions,
+                         stats=self.partition(kind, source, directory))
+            entry['partitioned'] = True
+            self.checkpoint.save()
+            self.log(f"{kind.name}: {entry['stats']['rows']} lignes lues, "
+                     f"{entry['stats']['invalid']} invalides, {entry['stats']['duplicates']} doublons")
+
+        for number, round_cells in enumerate(cells(kind, self.partitions), start=1):
+            pending = [cell for cell in round_cells if cell_name(cell) not in entry['done']]
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                for cell, result in zip(pending, pool.map(
+                        lambda cell: self.write_cell(kind, os.path.join(directory, cell_name(cell))),
+                        pending)):
+                    entry['done'][cell_name(cell)] = result
+                    self.checkpoint.save()
+            if len(kind.ends) > 1:
+                self.log(f"{kind.name}: tour {number}/{self.partitions}")
+        if 'replies' not in entry['done']:
+            # Réponses : après leurs parents, dans l'ordre du fichier
+            entry['done']['replies'] = self.write_cell(kind, os.path.join(directory, 'replies'))
+            self.checkpoint.save()
+
+        stats = dict(entry['stats'])
+        for name in ('written', 'missing_refs', 'failed'):
+            stats[name] = sum(result[name] for result in entry['done'].values())
+        stats['errors'] = (stats['errors'] + [error for result in entry['done'].values()
+                                              for error in result['errors']])[:SAMPLE_SIZE]
+        entry.update(stats=stats, finished=True)
+        self.checkpoint.save()
+        shutil.rmtree(directory, ignore_errors=True)
+
+        elapsed = time.perf_counter() - started
+        self.log(f"{kind.name}: {stats['written']} lignes écrites en {elapsed:.1f} s")
+        return dict(stats, resumed=False, elapsed_s=round(elapsed, 3),
+                    rows_per_sec=round(stats['written'] / elapsed) if elapsed else None)
+
+    def partition(self, kind, source, directory):
+        """Lit, valide et dédoublonne un fichier, et le répartit en fichiers de partition NDJSON"""
+        os.makedirs(directory, exist_ok=True)
+        now = time.time()
+        # hash() suffit pour dédoublonner dans ce processus et coûte 8 octets par clé
+        seen, seen_emails = set(), set()
+        files = {}
+        stats = {"rows": 0, "invalid": 0, "duplicates": 0, "errors": []}
+
+        def reject(number, message):
+            stats['invalid'] += 1
+            if len(stats['errors']) < SAMPLE_SIZE:
+                stats['errors'].append({"line": number, "error": message})
+
+        def target(name):
+            handle = files.get(name)
+            if handle is None:
+                handle = files[name] = open(os.path.join(directory, name), 'wb')
+            return handle
+
+        try:
+            for number, item in read_rows(source):
+                stats['rows'] += 1
+                row = item if isinstance(item, str) else clean_row(kind, item, now)
+                if isinstance(row, str):
+                    reject(number, row)
+                    continue
+                key = hash(tuple(row[field] for field in kind.key))
+                if key in seen or (kind.name == 'users' and row['email'] in seen_emails):
+                    stats['duplicates'] += 1
+                    continue
+                seen.add(key)
+                if kind.name == 'users':
+                    seen_emails.add(row['email'])
+                if row.get('parent_id') is not None:
+                    name = 'replies'
+                else:
+                    name = cell_name(tuple(bucket(row[field], self.partitions) for field in kind.ends))
+                target(name).write(ndjson_line(row))
+        finally:
+            for handle in files.values():
+                handle.close()
+        return stats
+
+    def write_cell(self, kind, path):
+        """Écrit un fichier de partition par lots UNWIND successifs"""
+        result = {"written": 0, "missing_refs": 0, "failed": 0, "errors": []}
+        if not os.path.exists(path):
+            return result
+        with open(path, 'rb') as f:
+            for batch in chunked((loads(line) for line in f), self.batch_size):
+                try:
+                    written = self.db.run(kind.statement, rows=batch).data()[0]['written']
+                except Exception as e:
+                    result['failed'] += len(batch)
+                    if len(result['errors']) < SAMPLE_SIZE:
+                        result['errors'].append({"batch_first_id": batch[0].get('id') or batch[0].get('user_id'),
+                                                 "error": str(e)})
+                    continue
+                result['written'] += written
+                # Lignes dont un noeud référencé n'existe pas (MATCH sans résultat)
+                result['missing_refs'] += len(batch) - written
+        return result
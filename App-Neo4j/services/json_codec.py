@@ -0,0 +1,99 @@
+"""Encodage JSON des réponses : orjson s'il est installé, module json sinon.
+
+JSON_ENCODER choisit l'encodeur ('auto', 'orjson' ou 'json'). Les deux
+produisent un JSON compact en UTF-8 (caractères accentués non échappés) ;
+les valeurs non sérialisables (dates, ensembles...) sont converties par
+`_default`, comme le fournisseur par défaut de Flask. TimedJSONProvider
+branche cet encodage sur jsonify et mesure la sérialisation de chaque réponse.
+"""
+import json
+import time
+from datetime import date
+from flask import request, has_request_context
+from flask.json.provider import DefaultJSONProvider
+from config import JSON_ENCODER
+from services.metrics import observe_serialization
+
+try:
+    import orjson
+except ImportError:  # Encodeur de la bibliothèque standard, même sortie
+    orjson = None
+
+if JSON_ENCODER == 'orjson' and orjson is None:
+    raise ImportError("JSON_ENCODER=orjson mais le module orjson n'est pas installé")
+
+ENCODER = 'orjson' if orjson is not None and JSON_ENCODER != 'json' else 'json'
+
+
+def _default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    return str(value)
+
+
+def _stdlib_dumps(obj, pretty=False):
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2, sort_keys=True, default=_default).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=_default).encode('utf-8')
+
+
+if ENCODER == 'orjson':
+    # OPT_NON_STR_KEYS : clés entières ou None acceptées, comme avec json.dumps
+    _OPTIONS = orjson.OPT_NON_STR_KEYS
+    _PRETTY_OPTIONS = _OPTIONS | orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS
+
+    def dumps_bytes(obj, pretty=False):
+        """Document JSON en octets UTF-8 : compact, ou indenté et trié si `pretty`"""
+        try:
+            return orjson.dumps(obj, default=_default, option=_PRETTY_OPTIONS if pretty else _OPTIONS)
+        except TypeError:
+            # Entiers hors 64 bits, sous-classes exotiques : repli sur le module json
+            return _stdlib_dumps(obj, pretty)
+
+    loads = orjson.loads
+else:
+    dumps_bytes = _stdlib_dumps
+    loads = json.loads
+
+
+def dumps(obj):
+    """Document JSON compact, en texte"""
+    return dumps_bytes(obj).decode('utf-8')
+
+
+def ndjson_line(row):
+    """Une ligne NDJSON (octets, terminée par un saut de ligne)"""
+    return dumps_bytes(row) + b'\n'
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Fournisseur JSON de Flask qui mesure la sérialisation de chaque réponse jsonify.
+
+    L'encodage passe par dumps_bytes/loads ci-dessus, en mode DEBUG comme en
+    production : DEBUG n'ajoute que l'indentation et le tri des clés.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        started = time.perf_counter()
+        payload = self._prepare_response_obj(args, kwargs)
+        response = self._app.response_class(dumps_bytes(payload, pretty=self._app.debug),
+                                            mimetype=self.mimetype)
+        if has_request_context():
+            # Gabarit de la route, comme http_request_duration_seconds (routes/metrics_routes.py)
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            observe_serialization(route, time.perf_counter() - started)
+        return response
@@ -0,0 +1,357 @@
+"""Métriques au format texte Prometheus, sans dépendance.
+
+Chaque requête Cypher est mesurée sous le nom de sa constante (voir
+name_queries) : latence, lignes retournées et erreurs. Les routes HTTP sont
+mesurées par gabarit d'URL (/users/<user_id>), jamais par chemin concret,
+pour garder un nombre de séries borné.
+
+Sur le chemin critique, une mesure coûte une recherche dans un dictionnaire,
+une dichotomie sur les seuils et un verrou. Avec plusieurs workers
+(METRICS_DIR), chaque processus écrit périodiquement ses valeurs dans un
+fichier du répertoire ; /metrics additionne les fichiers de tous les
+processus, y compris ceux qui se sont arrêtés (les compteurs restent
+croissants).
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from config import METRICS_ENABLED, METRICS_DIR, METRICS_FLUSH_INTERVAL
+
+# Seuils des histogrammes de latence (secondes)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Nom utilisé pour les requêtes non déclarées (Cypher construit à la volée)
+OTHER_QUERY = 'other'
+
+_query_names = {}
+
+
+def name_queries(namespace):
+    """Enregistre les constantes Cypher d'un module : texte de la requête -> nom de la constante.
+
+    Les paires de keyset_queries (première page, pages suivantes) partagent
+    le nom de leur constante.
+    """
+    for name, value in namespace.items():
+        if not name.isupper():
+            continue
+        if isinstance(value, str):
+            _query_names[value] = name
+        elif isinstance(value, tuple) and value and all(isinstance(item, str) for item in value):
+            for item in value:
+                _query_names[item] = name
+
+
+def query_name(query):
+    return _query_names.get(query, OTHER_QUERY)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _alive(pid):
+    try:
+        os.kill(int(pid), 0)
+    except ValueError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+class Counter:
+    """Compteur croissant par combinaison de labels"""
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(labels), [value]] for labels, value in self._series.items()]
+
+    def reset(self):
+        self._lock = threading.Lock()
+        self._series = {}
+
+
+class Gauge:
+    """Valeur instantanée par combinaison de labels (additionnée entre processus vivants)"""
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def set(self, labels, value):
+        with self._lock:
+            self._series[labels] = value
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(labels), [value]] for labels, value in self._series.items()]
+
+    def reset(self):
+        self._lock = threading.Lock()
+        self._series = {}
+
+
+class Histogram:
+    """Histogramme à seuils fixes : effectifs par seuil (non cumulés), somme et nombre"""
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        # Dernière case : au-delà du plus grand seuil (+Inf)
+        position = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 3)
+            series[position] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(labels), list(series)] for labels, series in self._series.items()]
+
+    def reset(self):
+        self._lock = threading.Lock()
+        self._series = {}
+
+
+class Registry:
+    """Ensemble des métriques d'un processus et export au format texte"""
+
+    def __init__(self, enabled=True, directory=None, flush_interval=5.0):
+        self.enabled = enabled
+        self.directory = directory or None
+        self.flush_interval = flush_interval
+        self._metrics = []
+        self._flusher_pid = None
+
+    def counter(self, name, help_text, labels=()):
+        metric = Counter(name, help_text, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name, help_text, labels=()):
+        metric = Gauge(name, help_text, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help_text, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def snapshot(self):
+        return {metric.name: metric.snapshot() for metric in self._metrics}
+
+    def reset_after_fork(self):
+        """Dans un processus enfant : repart de zéro (les valeurs héritées sont celles du parent)"""
+        for metric in self._metrics:
+            metric.reset()
+        self._flusher_pid = None
+
+    # --- Plusieurs processus ---
+
+    def _path(self, pid=None):
+        return os.path.join(self.directory, f"{pid or os.getpid()}.json")
+
+    def ensure_flusher(self):
+        """Démarre (une fois par processus) l'écriture périodique des valeurs dans METRICS_DIR"""
+        if self.directory is None or self._flusher_pid == os.getpid():
+            return
+        self._flusher_pid = os.getpid()
+        threading.Thread(target=self._flush_loop, daemon=True).start()
+
+    def _flush_loop(self):
+        pid = os.getpid()
+        while self._flusher_pid == pid:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"Erreur lors de l'écriture des métriques: {e}")
+
+    def flush(self):
+        """Écrit les valeurs du processus (remplacement atomique du fichier)"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path()
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(path + '.tmp', path)
+
+    def _collect_snapshots(self):
+        if self.directory is None:
+            return [self.snapshot()]
+        self.flush()
+        gauges = [metric.name for metric in self._metrics if metric.kind == 'gauge']
+        snapshots = []
+        for entry in os.listdir(self.directory):
+            if not entry.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, entry)) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            # Un processus arrêté garde ses compteurs mais plus ses valeurs instantanées
+            if not _alive(entry[:-len('.json')]):
+                for name in gauges:
+                    snapshot.pop(name, None)
+            snapshots.append(snapshot)
+        return snapshots
+
+    # --- Export ---
+
+    def render(self):
+        """Texte d'exposition Prometheus (version 0.0.4), tous processus confondus"""
+        merged = {}
+        for snapshot in self._collect_snapshots():
+            for name, series in snapshot.items():
+                target = merged.setdefault(name, {})
+                for labels, values in series:
+                    key = tuple(labels)
+                    current = target.get(key)
+                    target[key] = values if current is None else [a + b for a, b in zip(current, values)]
+
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for labels, values in sorted(merged.get(metric.name, {}).items()):
+                if metric.kind in ('counter', 'gauge'):
+                    lines.append(f"{metric.name}{_format_labels(metric.labels, labels)} {values[0]}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float('inf'),), values[:-2]):
+                    cumulative += count
+                    le = 'le="{}"'.format('+Inf' if bound == float('inf') else repr(bound))
+                    lines.append(f"{metric.name}_bucket{_format_labels(metric.labels, labels, le)} {cumulative}")
+                lines.append(f"{metric.name}_sum{_format_labels(metric.labels, labels)} {values[-2]!r}")
+                lines.append(f"{metric.name}_count{_format_labels(metric.labels, labels)} {values[-1]}")
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry(enabled=METRICS_ENABLED, directory=METRICS_DIR, flush_interval=METRICS_FLUSH_INTERVAL)
+
+query_duration = registry.histogram(
+    'neo4j_query_duration_seconds', "Durée d'exécution des requêtes Cypher, par constante", ('query',))
+query_rows = registry.counter(
+    'neo4j_query_rows_total', "Lignes retournées par les requêtes Cypher", ('query',))
+query_errors = registry.counter(
+    'neo4j_query_errors_total', "Requêtes Cypher en erreur", ('query',))
+request_duration = registry.histogram(
+    'http_request_duration_seconds', "Durée des requêtes HTTP jusqu'au début de la réponse",
+    ('method', 'route'))
+requests_total = registry.counter(
+    'http_requests_total', "Requêtes HTTP par statut", ('method', 'route', 'status'))
+serialization_duration = registry.histogram(
+    'http_response_serialization_seconds', "Temps de sérialisation JSON des réponses", ('route',))
+admission_in_flight = registry.gauge(
+    'neo4j_admission_in_flight', "Requêtes Neo4j admises en cours, par type (read, write)", ('kind',))
+admission_queue_depth = registry.gauge(
+    'neo4j_admission_queue_depth', "Requêtes Neo4j en attente d'admission", ('kind',))
+admission_rejections = registry.counter(
+    'neo4j_admission_rejections_total', "Requêtes Neo4j refusées (503), par type et motif",
+    ('kind', 'reason'))
+admission_wait = registry.histogram(
+    'neo4j_admission_wait_seconds', "Attente dans la file d'admission des requêtes finalement admises",
+    ('kind', 'priority'))
+
+
+def observe_query(query, seconds, rows=0, error=False):
+    """Enregistre l'exécution d'une requête Cypher (appelé par DatabaseService)"""
+    if not registry.enabled:
+        return
+    registry.ensure_flusher()
+    labels = (query_name(query),)
+    query_duration.observe(labels, seconds)
+    if error:
+        query_errors.inc(labels)
+    elif rows:
+        query_rows.inc(labels, rows)
+
+
+def observe_request(method, route, status, seconds):
+    """Enregistre une requête HTTP (route = gabarit d'URL, 'unmatched' pour un 404 de routage)"""
+    if not registry.enabled:
+        return
+    registry.ensure_flusher()
+    request_duration.observe((method, route), seconds)
+    requests_total.inc((method, route, str(status)))
+
+
+def observe_serialization(route, seconds):
+    if registry.enabled:
+        serialization_duration.observe((route,), seconds)
+
+
+def observe_admission(kind, in_flight, queued):
+    """Occupation d'un contrôleur d'admission (services/admission.py)"""
+    if registry.enabled:
+        admission_in_flight.set((kind,), in_flight)
+        admission_queue_depth.set((kind,), queued)
+
+
+def observe_admission_wait(kind, priority, seconds):
+    if registry.enabled:
+        admission_wait.observe((kind, priority), seconds)
+
+
+def observe_rejection(kind, reason):
+    if registry.enabled:
+        registry.ensure_flusher()
+        admission_rejections.inc((kind, reason))
+
+
+def render():
+    return registry.render()
+
+
+def clear_metrics_dir():
+    """Supprime les fichiers des processus précédents (démarrage du serveur maître)"""
+    if not registry.directory or not os.path.isdir(registry.directory):
+        return
+    for entry in os.listdir(registry.directory):
+        try:
+            os.unlink(os.path.join(registry.directory, entry))
+        except OSError:
+            pass
+
+
+# Un worker forké ne doit pas recompter les valeurs du parent
+os.register_at_fork(after_in_child=registry.reset_after_fork)
@@ -0,0 +1,81 @@
+import base64
+import json
+from config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+
+
+class InvalidCursorError(ValueError):
+    """Levée quand un curseur de pagination est illisible"""
+
+
+def encode_cursor(created_at, item_id):
+    """Encode la position (created_at, id) du dernier élément en curseur opaque"""
+    raw = json.dumps([created_at, item_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Décode un curseur opaque en tuple (created_at, id)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise InvalidCursorError("Curseur de pagination invalide")
+
+    if not isinstance(created_at, (int, float)) or not isinstance(item_id, str):
+        raise InvalidCursorError("Curseur de pagination invalide")
+    return created_at, item_id
+
+
+def parse_page_args(args):
+    """Lit ?limit= et ?after= depuis la query string et retourne (limit, after)"""
+    try:
+        limit = int(args.get('limit', PAGE_SIZE_DEFAULT))
+    except (TypeError, ValueError):
+        raise InvalidCursorError("Le paramètre limit doit être un entier")
+    limit = max(1, min(limit, PAGE_SIZE_MAX))
+
+    after = args.get('after')
+    return limit, decode_cursor(after) if after else None
+
+
+def keyset_queries(match, alias, tail):
+    """Construit les deux variantes keyset (created_at DESC, id DESC) d'une requête de liste.
+
+    Retourne (première page, pages suivantes). La première page utilise un
+    prédicat IS NOT NULL pour que le planner parcoure l'index de plage sur
+    created_at dans l'ordre ; les pages suivantes font un seek sur
+    created_at <= $after_ts, si bien que le coût d'une page ne dépend pas de
+    sa position. `tail` est ajouté après la sélection de la page.
+    """
+    def build(where):
+        return (f"{match}\nWHERE {where}\nWITH {alias}\n"
+                f"ORDER BY {alias}.created_at DESC, {alias}.id DESC\nLIMIT $limit\n{tail.lstrip()}")
+
+    return (
+        build(f"{alias}.created_at IS NOT NULL"),
+        build(f"{alias}.created_at <= $after_ts "
+              f"AND ({alias}.created_at < $after_ts OR {alias}.id < $after_id)"),
+    )
+
+
+def page_query(queries, after):
+    """Choisit la variante de keyset_queries selon qu'un curseur est fourni"""
+    return queries[0] if after is None else queries[1]
+
+
+def page_params(limit, after):
+    """Paramètres Cypher associés à keyset_queries (une ligne de plus pour détecter la suite)"""
+    params = {"limit": limit + 1}
+    if after is not None:
+        params["after_ts"], params["after_id"] = after
+    return params
+
+
+def build_page(items, limit, sort_key='created_at'):
+    """Coupe la ligne sentinelle et calcule le next_cursor ; `sort_key` : premier champ du tri
+    (score pour la recherche plein texte)"""
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    last = items[-1]
+    return items, encode_cursor(last[sort_key], last['id'])
@@ -0,0 +1,180 @@
+"""Champs clairsemés (?fields=) et inclusions (?include=) compilés en projection Cypher.
+
+`?fields=id,title` restreint les propriétés renvoyées ; `?include=author,comments`
+ajoute des données liées, lues dans la même requête par des compréhensions de
+motif au lieu d'appels séparés du client. Chaque combinaison est compilée une
+fois (lru_cache) et nommée pour les métriques (POST_PAGE_PROJECTED...).
+
+Les listes incluses (comments, posts) sont limitées à INCLUDE_LIST_LIMIT
+éléments, sans ordre garanti : la liste complète reste disponible sur sa
+propre route. Dans les pages, id et created_at sont toujours renvoyés car le
+curseur en dépend.
+"""
+from collections import namedtuple
+from functools import lru_cache
+from config import INCLUDE_LIST_LIMIT
+from services.pagination import keyset_queries
+from services.metrics import name_queries
+
+
+# Requêtes compilées : texte -> (type de requête, projection), pour le graphe en mémoire des mesures
+compiled_queries = {}
+
+
+class InvalidProjectionError(ValueError):
+    """Levée quand ?fields= ou ?include= contient un nom inconnu"""
+
+
+# entity : 'user', 'post' ou 'comment' ; fields et includes : tuples dans l'ordre de déclaration
+Projection = namedtuple('Projection', 'entity fields includes')
+
+# Cartes des objets inclus (mêmes champs que to_dict)
+_USER_MAP = "{.id, .name, .email, .created_at}"
+_POST_SUMMARY_MAP = ("{.id, .title, .created_at, likes_count: coalesce(post.likes_count, 0), "
+                     "comments_count: coalesce(post.comments_count, 0)}")
+_COMMENT_MAP = ("{.id, .content, .author_id, .post_id, .parent_id, .created_at, "
+                "likes_count: coalesce(comment.likes_count, 0)}")
+
+# Par entité : label, alias, expression de chaque champ et de chaque inclusion ({a} = alias)
+_ENTITIES = {
+    'user': ('User', 'u', {
+        'id': ".id",
+        'name': ".name",
+        'email': ".email",
+        'created_at': ".created_at",
+    }, {
+        'posts': (f"posts: [({{a}})-[:CREATED]->(post:Post) | post {_POST_SUMMARY_MAP}]"
+                  f"[..{INCLUDE_LIST_LIMIT}]"),
+        'posts_count': "posts_count: size([({a})-[:CREATED]->(post:Post) | 1])",
+        'friends_count': "friends_count: size([({a})-[:FRIENDS_WITH]-(friend:User) | 1])",
+    }),
+    'post': ('Post', 'p', {
+        'id': ".id",
+        'title': ".title",
+        'content': ".content",
+        'author_id': "author_id: head([({a})<-[:CREATED]-(author:User) | author.id])",
+        'created_at': ".created_at",
+        'likes_count': "likes_count: coalesce({a}.likes_count, 0)",
+        'comments_count': "comments_count: coalesce({a}.comments_count, 0)",
+    }, {
+        'author': f"author: head([({{a}})<-[:CREATED]-(author:User) | author {_USER_MAP}])",
+        'comments': (f"comments: [({{a}})-[:HAS_COMMENT]->(comment:Comment) | comment {_COMMENT_MAP}]"
+                     f"[..{INCLUDE_LIST_LIMIT}]"),
+    }),
+    'comment': ('Comment', 'c', {
+        'id': ".id",
+        'content': ".content",
+        'author_id': ".author_id",
+        'post_id': ".post_id",
+        'parent_id': ".parent_id",
+        'created_at': ".created_at",
+        'likes_count': "likes_count: coalesce({a}.likes_count, 0)",
+    }, {
+        'author': f"author: head([({{a}})<-[:WROTE]-(author:User) | author {_USER_MAP}])",
+        'post': "post: head([({a})<-[:HAS_COMMENT]-(post:Post) | post {.id, .title}])",
+    }),
+}
+
+
+def _split(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def parse_projection_args(args, entity):
+    """Lit ?fields= et ?include= ; retourne None si aucun des deux n'est fourni.
+
+    Un champ peut aussi être demandé dans include (?include=likes_count) :
+    il s'ajoute alors aux champs retenus.
+    """
+    if args.get('fields') is None and args.get('include') is None:
+        return None
+    _, _, fields, includes = _ENTITIES[entity]
+
+    requested = _split(args.get('fields') or '') or list(fields)
+    unknown = [name for name in requested if name not in fields]
+    if unknown:
+        raise InvalidProjectionError(
+            f"Champs inconnus: {', '.join(unknown)} (disponibles: {', '.join(fields)})")
+
+    included = []
+    for name in _split(args.get('include') or ''):
+        if name in fields:
+            requested.append(name)
+        elif name in includes:
+            included.append(name)
+        else:
+            raise InvalidProjectionError(
+                f"Inclusion inconnue: {name} (disponibles: {', '.join(list(includes) + list(fields))})")
+
+    # L'id est toujours renvoyé ; ordre canonique pour partager les requêtes compilées
+    requested = set(requested) | {'id'}
+    return Projection(entity, tuple(name for name in fields if name in requested),
+                      tuple(name for name in includes if name in included))
+
+
+def projection_map(projection, alias=None, extra_fields=()):
+    """Carte Cypher de la projection : alias {.id, .title, author: ...}"""
+    _, default_alias, fields, includes = _ENTITIES[projection.entity]
+    alias = alias or default_alias
+    wanted = set(projection.fields) | set(extra_fields)
+    parts = [fields[name] for name in fields if name in wanted]
+    parts += [includes[name] for name in projection.includes]
+    return f"{alias} {{{', '.join(parts)}}}".replace('{a}', alias)
+
+
+def _named(kind, projection, query):
+    name_queries({f"{projection.entity.upper()}_{kind}_PROJECTED": query})
+    for text in (query if isinstance(query, tuple) else (query,)):
+        compiled_queries[text] = (kind, projection)
+    return query
+
+
+@lru_cache(maxsize=256)
+def page_queries(projection):
+    """Variantes keyset (première page, pages suivantes) ; created_at est ajouté pour le curseur"""
+    label, alias, _, _ = _ENTITIES[projection.entity]
+    queries = keyset_queries(f"MATCH ({alias}:{label})", alias, f"""
+RETURN {projection_map(projection, extra_fields=('created_at',))} AS {projection.entity}
+ORDER BY {alias}.created_at DESC, {alias}.id DESC
+""")
+    return _named('PAGE', projection, queries)
+
+
+@lru_cache(maxsize=256)
+def find_query(projection):
+    """Un élément par id ($id)"""
+    label, alias, _, _ = _ENTITIES[projection.entity]
+    return _named('FIND_BY_ID', projection, f"""
+MATCH ({alias}:{label} {{id: $id}})
+RETURN {projection_map(projection)} AS {projection.entity}
+""")
+
+
+@lru_cache(maxsize=256)
+def many_query(projection):
+    """Plusieurs éléments par id ($ids), en une requête UNWIND"""
+    label, alias, _, _ = _ENTITIES[projection.entity]
+    return _named('FIND_MANY', projection, f"""
+UNWIND $ids AS id
+MATCH ({alias}:{label} {{id: id}})
+RETURN {projection_map(projection)} AS {projection.entity}
+""")
+
+
+@lru_cache(maxsize=256)
+def all_query(projection):
+    """Tous les éléments (flux NDJSON)"""
+    label, alias, _, _ = _ENTITIES[projection.entity]
+    return _named('ALL', projection, f"""
+MATCH ({alias}:{label})
+RETURN {projection_map(projection)} AS {projection.entity}
+""")
+
+
+@lru_cache(maxsize=256)
+def user_posts_query(projection):
+    """Posts d'un utilisateur ($user_id)"""
+    return _named('BY_AUTHOR', projection, f"""
+MATCH (:User {{id: $user_id}})-[:CREATED]->(p:Post)
+RETURN {projection_map(projection)} AS post
+""")
@@ -0,0 +1,116 @@
+from datetime import datetime
+from config import SEARCH_ANALYZER
+
+# Version du schéma : à incrémenter à chaque modification des déclarations ci-dessous
+SCHEMA_VERSION = 4
+
+# Contraintes d'unicité (nom, label, propriété) ; chacune crée aussi un index
+CONSTRAINTS = [
+    ("user_email", "User", "email"),
+    ("user_id", "User", "id"),
+    ("post_id", "Post", "id"),
+    ("comment_id", "Comment", "id"),
+]
+
+# Index de plage (nom, label, propriété)
+INDEXES = [
+    ("user_created_at", "User", "created_at"),
+    ("post_created_at", "Post", "created_at"),
+    ("comment_created_at", "Comment", "created_at"),
+    ("comment_post_id", "Comment", "post_id"),
+    # Chemin matérialisé des fils de réponses : seek sur préfixe (STARTS WITH)
+    ("comment_path", "Comment", "path"),
+]
+
+# Index plein texte (nom, label, propriétés) ; analyseur Lucene SEARCH_ANALYZER
+POST_SEARCH_INDEX = "post_search"
+FULLTEXT_INDEXES = [
+    (POST_SEARCH_INDEX, "Post", ("title", "content")),
+]
+
+
+def _statements():
+    """Génère les ordres DDL idempotents (syntaxe Neo4j 4.4)"""
+    for name, label, prop in CONSTRAINTS:
+        yield name, (f"CREATE CONSTRAINT {name} IF NOT EXISTS "
+                     f"ON (n:{label}) ASSERT n.{prop} IS UNIQUE")
+    for name, label, prop in INDEXES:
+        yield name, f"CREATE INDEX {name} IF NOT EXISTS FOR (n:{label}) ON (n.{prop})"
+    for name, label, props in FULLTEXT_INDEXES:
+        fields = ", ".join(f"n.{prop}" for prop in props)
+        yield name, (f"CREATE FULLTEXT INDEX {name} IF NOT EXISTS FOR (n:{label}) ON EACH [{fields}] "
+                     f"OPTIONS {{indexConfig: {{`fulltext.analyzer`: '{SEARCH_ANALYZER}'}}}}")
+
+
+def get_schema_version(graph):
+    """Retourne la version de schéma enregistrée dans la base (0 si aucune)"""
+    result = graph.run("""
+        MATCH (s:SchemaVersion {key: 'app'})
+        RETURN s.version AS version
+    """).data()
+    return result[0]['version'] if result else 0
+
+
+def apply_schema(graph, force=False):
+    """Applique contraintes et index puis enregistre la version du schéma.
+
+    Tous les ordres utilisent IF NOT EXISTS : relancer l'opération est sans
+    effet. Si la version enregistrée est déjà à jour, rien n'est exécuté sauf
+    avec force=True. La version n'est enregistrée que si tout a réussi.
+    """
+    current = get_schema_version(graph)
+    if current >= SCHEMA_VERSION and not force:
+        return {"version": current, "applied": [], "errors": []}
+
+    applied, errors = [], []
+    for name, statement in _statements():
+        try:
+            graph.run(statement)
+            applied.append(name)
+        except Exception as e:
+            print(f"Erreur lors de la création de {name}: {e}")
+            errors.append({"name": name, "error": str(e)})
+
+    if not errors:
+        graph.run("""
+            MERGE (s:SchemaVersion {key: 'app'})
+            SET s.version = $version, s.applied_at = $applied_at
+        """, version=SCHEMA_VERSION, applied_at=datetime.now().timestamp())
+        current = SCHEMA_VERSION
+
+    return {"version": current, "applied": applied, "errors": errors}
+
+
+def _existing_indexes(graph):
+    """Liste les index présents, avec leur nombre de lectures si Neo4j l'expose (5.x)"""
+    try:
+        return graph.run("""
+            SHOW INDEXES
+            YIELD name, type, labelsOrTypes, properties, state, readCount
+            RETURN name, type, labelsOrTypes, properties, state, readCount
+        """).data()
+    except Exception:
+        # Neo4j 4.4 n'a pas de statistiques d'utilisation des index
+        return graph.run("""
+            SHOW INDEXES
+            YIELD name, type, labelsOrTypes, properties, state
+            RETURN name, type, labelsOrTypes, properties, state, null AS readCount
+        """).data()
+
+
+def schema_report(graph):
+    """Compare le schéma déclaré à la base : index manquants, inutilisés ou non déclarés"""
+    declared = {name for name, _, _ in CONSTRAINTS + INDEXES + FULLTEXT_INDEXES}
+    existing = [row for row in _existing_indexes(graph) if row['type'] != 'LOOKUP']
+    existing_names = {row['name'] for row in existing}
+
+    return {
+        "expected_version": SCHEMA_VERSION,
+        "recorded_version": get_schema_version(graph),
+        "missing": sorted(declared - existing_names),
+        "undeclared": sorted(existing_names - declared),
+        "not_online": sorted(row['name'] for row in existing if row['state'] != 'ONLINE'),
+        # None quand la version de Neo4j ne fournit pas readCount
+        "unused": (sorted(row['name'] for row in existing if row['readCount'] == 0)
+                   if any(row['readCount'] is not None for row in existing) else None),
+    }
@@ -0,0 +1,263 @@
+"""Recherche plein texte dans les posts (GET /posts/search?q=).
+
+En production, la recherche passe par l'index plein texte Neo4j post_search
+(services/schema.py) sur title et content, avec l'analyseur Lucene
+SEARCH_ANALYZER. Le texte de l'utilisateur n'est jamais transmis tel quel à
+Lucene : il est découpé en mots, et tous les mots doivent être présents
+(AND), dans le titre ou dans le contenu. Les résultats sont triés par score
+décroissant puis id, et paginés par un curseur (score, id).
+
+Les analyseurs de ce module reproduisent en Python ceux de Lucene (en
+approximation pour english et french). Ils servent à surligner les mots
+trouvés dans les extraits et à InvertedIndex, index inversé en mémoire
+classé par BM25 comme Lucene, utilisé par le graphe en mémoire des mesures.
+"""
+import html
+import math
+import re
+import unicodedata
+from collections import namedtuple
+from config import SEARCH_ANALYZER, SEARCH_MAX_QUERY_LENGTH, SEARCH_SNIPPET_LENGTH
+
+
+class InvalidSearchError(ValueError):
+    """Levée quand le paramètre de recherche est absent ou inutilisable"""
+
+
+# Mots comme les découpe le StandardTokenizer de Lucene : l'apostrophe interne est gardée (l'eau)
+_WORD = re.compile(r"\w+(?:['’]\w+)*")
+
+# Mots vides anglais de Lucene (EnglishAnalyzer.ENGLISH_STOP_WORDS_SET)
+ENGLISH_STOP_WORDS = frozenset("""
+a an and are as at be but by for if in into is it no not of on or such that the their then
+there these they this to was will with
+""".split())
+
+# Extrait des mots vides français de Lucene (FrenchAnalyzer)
+FRENCH_STOP_WORDS = frozenset("""
+au aux avec ce ces dans de des du elle en et eux il je la le les leur lui ma mais me meme mes
+moi mon ne nos notre nous on ou par pas pour qu que qui sa se ses son sur ta te tes toi ton tu
+un une vos votre vous c d j l m n s t y ete etre avoir est sont
+""".split())
+
+# Élisions retirées par le FrenchAnalyzer (l'eau -> eau)
+_FRENCH_ELISION = re.compile(r"^(?:l|m|t|qu|n|s|j|d|c|jusqu|quoiqu|lorsqu|puisqu)['’]")
+
+
+def _fold(word):
+    """Retire les accents (é -> e), comme l'ASCIIFoldingFilter"""
+    return ''.join(char for char in unicodedata.normalize('NFD', word) if not unicodedata.combining(char))
+
+
+def _whitespace(text):
+    return text.split()
+
+
+def _simple(text):
+    # Lucene SimpleAnalyzer : suites de lettres, en minuscules
+    return re.findall(r"[^\W\d_]+", text.lower())
+
+
+def _standard_no_stop_words(text):
+    return _WORD.findall(text.lower())
+
+
+def _standard(text):
+    return [word for word in _standard_no_stop_words(text) if word not in ENGLISH_STOP_WORDS]
+
+
+def _english(text):
+    words = []
+    for word in _standard_no_stop_words(text):
+        word = re.sub(r"['’]s$", '', word)
+        if word in ENGLISH_STOP_WORDS:
+            continue
+        # Pluriels réguliers seulement (approximation du stemmer de Porter)
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        words.append(word)
+    return words
+
+
+def _french(text):
+    words = []
+    for word in _standard_no_stop_words(text):
+        word = _fold(_FRENCH_ELISION.sub('', word))
+        if word in FRENCH_STOP_WORDS:
+            continue
+        # Pluriels en -s et -x (approximation du FrenchLightStemmer)
+        if len(word) > 3 and word[-1] in 'sx':
+            word = word[:-1]
+        words.append(word)
+    return words
+
+
+# Analyseurs Neo4j reproduits, par nom (db.index.fulltext.listAvailableAnalyzers)
+ANALYZERS = {
+    "standard-no-stop-words": _standard_no_stop_words,
+    "standard": _standard,
+    "simple": _simple,
+    "whitespace": _whitespace,
+    "english": _english,
+    "french": _french,
+}
+
+
+def get_analyzer(name=SEARCH_ANALYZER):
+    """Analyseur Python d'un nom Lucene ; les analyseurs sans équivalent sont approchés sans mots vides"""
+    return ANALYZERS.get(name, _standard_no_stop_words)
+
+
+Search = namedtuple('Search', 'text query terms')
+
+
+def lucene_query(words):
+    """Requête Lucene où tous les mots sont requis ; les mots n'ont aucun caractère spécial Lucene"""
+    # En minuscules : AND, OR et NOT saisis par l'utilisateur ne sont pas des opérateurs
+    return ' AND '.join(word.lower() for word in words)
+
+
+def query_words(query):
+    """Mots d'une requête construite par lucene_query"""
+    return [word for word in _WORD.findall(query) if word != 'AND']
+
+
+def parse_search_args(args, analyzer=None):
+    """Lit ?q= depuis la query string et retourne une Search (texte, requête Lucene, termes analysés)"""
+    text = (args.get('q') or '').strip()
+    if not text:
+        raise InvalidSearchError("Le paramètre q est requis")
+    if len(text) > SEARCH_MAX_QUERY_LENGTH:
+        raise InvalidSearchError(f"Le paramètre q est limité à {SEARCH_MAX_QUERY_LENGTH} caractères")
+    words = _WORD.findall(text)
+    if not words:
+        raise InvalidSearchError("La recherche ne contient aucun mot")
+    analyze = analyzer or get_analyzer()
+    return Search(text, lucene_query(words), frozenset(term for word in words for term in analyze(word)))
+
+
+def highlight(text, terms, length=None, analyzer=None):
+    """Texte échappé pour HTML, mots recherchés entourés de <mark>.
+
+    Avec `length`, seul un extrait d'environ `length` caractères autour du
+    premier mot trouvé est renvoyé (début du texte si aucun), avec … aux coupures.
+    """
+    text = text or ''
+    analyze = analyzer or get_analyzer()
+    spans = [match.span() for match in _WORD.finditer(text)
+             if terms.intersection(analyze(match.group()))]
+    start, end = 0, len(text)
+    if length is not None and len(text) > length:
+        if spans:
+            # Le mot trouvé au premier tiers de l'extrait, coupure sur un espace
+            start = max(0, spans[0][0] - length // 3)
+            if start > 0:
+                space = text.find(' ', start)
+                start = space + 1 if 0 <= space < spans[0][0] else start
+        end = min(len(text), start + length)
+        if end < len(text):
+            space = text.rfind(' ', start, end)
+            end = space if space > start else end
+
+    parts, position = [], start
+    for span_start, span_end in spans:
+        if span_start < start or span_end > end:
+            continue
+        parts.append(html.escape(text[position:span_start]))
+        parts.append(f"<mark>{html.escape(text[span_start:span_end])}</mark>")
+        position = span_end
+    parts.append(html.escape(text[position:end]))
+    return ('…' if start > 0 else '') + ''.join(parts) + ('…' if end < len(text) else '')
+
+
+def with_highlights(post, search, analyzer=None):
+    """Ajoute à un résultat le titre surligné et un extrait surligné du contenu"""
+    return dict(post, highlights={
+        "title": highlight(post.get('title'), search.terms, analyzer=analyzer),
+        "content": highlight(post.get('content'), search.terms, SEARCH_SNIPPET_LENGTH, analyzer),
+    })
+
+
+class InvertedIndex:
+    """Index inversé en mémoire sur plusieurs champs, classé par BM25 comme Lucene.
+
+    Le score d'un document est la somme, pour chaque terme et chaque champ
+    où il apparaît, de idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * longueur / longueur moyenne)).
+    Un document n'est trouvé que s'il contient tous les termes (dans l'un des champs).
+    """
+
+    def __init__(self, fields, analyzer=SEARCH_ANALYZER, k1=1.2, b=0.75):
+        self.fields = tuple(fields)
+        self.analyze = get_analyzer(analyzer) if isinstance(analyzer, str) else analyzer
+        self.k1 = k1
+        self.b = b
+        # {champ: {terme: {id: fréquence}}}, {champ: {id: nombre de termes}}
+        self._postings = {field: {} for field in self.fields}
+        self._lengths = {field: {} for field in self.fields}
+        self._total_length = dict.fromkeys(self.fields, 0)
+        # Termes distincts de chaque document par champ, pour le retirer sans parcourir l'index
+        self._documents = {}
+
+    def add(self, doc_id, document):
+        """Indexe (ou réindexe) un document {champ: texte}"""
+        self.remove(doc_id)
+        indexed = {}
+        for field in self.fields:
+            terms = self.analyze(document.get(field) or '')
+            if not terms:
+                continue
+            indexed[field] = set(terms)
+            self._lengths[field][doc_id] = len(terms)
+            self._total_length[field] += len(terms)
+            postings = self._postings[field]
+            for term in terms:
+                entries = postings.setdefault(term, {})
+                entries[doc_id] = entries.get(doc_id, 0) + 1
+        self._documents[doc_id] = indexed
+
+    def remove(self, doc_id):
+        for field, terms in self._documents.pop(doc_id, {}).items():
+            self._total_length[field] -= self._lengths[field].pop(doc_id)
+            postings = self._postings[field]
+            for term in terms:
+                del postings[term][doc_id]
+                if not postings[term]:
+                    del postings[term]
+
+    def scores(self, terms):
+        """{id: score} des documents qui contiennent tous les termes"""
+        terms = set(terms)
+        if not terms:
+            return {}
+        matching = None
+        for term in terms:
+            docs = set()
+            for field in self.fields:
+                docs.update(self._postings[field].get(term, ()))
+            matching = docs if matching is None else matching & docs
+            if not matching:
+                return {}
+
+        scores = dict.fromkeys(matching, 0.0)
+        for field in self.fields:
+            lengths = self._lengths[field]
+            if not lengths:
+                continue
+            average = self._total_length[field] / len(lengths)
+            for term in terms:
+                entries = self._postings[field].get(term, {})
+                if not entries:
+                    continue
+                idf = math.log(1 + (len(lengths) - len(entries) + 0.5) / (len(entries) + 0.5))
+                for doc_id in matching.intersection(entries):
+                    tf = entries[doc_id]
+                    norm = self.k1 * (1 - self.b + self.b * lengths[doc_id] / average)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, terms, limit, after_score=None, after_id=None):
+        """Page de (score, id) par score décroissant puis id décroissant, après la position donnée"""
+        hits = sorted(((score, doc_id) for doc_id, score in self.scores(terms).items()), reverse=True)
+        if after_score is not None:
+            hits = [hit for hit in hits if hit < (after_score, after_id)]
+        return hits[:limit]
@@ -0,0 +1,255 @@
+"""Journal des requêtes lentes avec capture échantillonnée du plan d'exécution.
+
+Une requête qui dépasse SLOW_QUERY_THRESHOLD_MS est journalisée (nom de la
+constante, paramètres masqués, durée, lignes) et ajoutée à un tampon
+circulaire sur disque partagé par les workers. Pour une fraction
+SLOW_QUERY_PROFILE_SAMPLE des requêtes lentes, au plus une fois par
+SLOW_QUERY_PROFILE_COOLDOWN secondes et par requête, le plan est capturé en
+arrière-plan : PROFILE pour une lecture (réexécutée), EXPLAIN pour une
+écriture (jamais rejouée). Seul un résumé du plan est conservé.
+"""
+import fcntl
+import json
+import logging
+import os
+import random
+import struct
+import threading
+import time
+from config import (SLOW_QUERY_THRESHOLD_MS, SLOW_QUERY_PROFILE_SAMPLE, SLOW_QUERY_PROFILE_COOLDOWN,
+                    SLOW_QUERY_LOG_PATH, SLOW_QUERY_RING_SIZE)
+from services.metrics import query_name
+
+logger = logging.getLogger(__name__)
+
+# Paramètres affichés en clair : identifiants et valeurs techniques, jamais le contenu saisi
+CLEAR_PARAMS = {'id', 'ids', 'limit', 'after_ts', 'after_id', 'length', 'fanout_limit',
+                'batch_size', 'version'}
+
+# Opérateurs qui parcourent tout un label (ou toute la base) au lieu d'un index
+FULL_SCAN_OPERATORS = ('AllNodesScan', 'NodeByLabelScan', 'DirectedRelationshipTypeScan',
+                       'UndirectedRelationshipTypeScan')
+
+
+def redact(params):
+    """Copie des paramètres où les valeurs saisies par les utilisateurs sont masquées"""
+    def clear(key):
+        return key in CLEAR_PARAMS or key.endswith('_id') or key.endswith('_ids')
+
+    def mask(key, value):
+        if isinstance(value, (bool, int, float)) or value is None:
+            return value
+        if isinstance(value, str):
+            return value if clear(key) else f"<{len(value)} caractères>"
+        if isinstance(value, (list, tuple)):
+            if key == 'ids' or (value and all(isinstance(item, str) for item in value) and clear(key)):
+                return list(value[:10]) + ([f"<+{len(value) - 10}>"] if len(value) > 10 else [])
+            return f"<liste de {len(value)}>"
+        if isinstance(value, dict):
+            return {k: mask(k, v) for k, v in value.items()}
+        return f"<{type(value).__name__}>"
+
+    return {key: mask(key, value) for key, value in params.items()}
+
+
+def summarize_plan(plan):
+    """Résumé d'un plan PROFILE ou EXPLAIN (dictionnaire du driver) : db hits, opérateurs, scans complets"""
+    operators, full_scans, db_hits = [], [], 0
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        operator = node.get('operatorType', '?').split('@')[0]
+        args = node.get('args') or {}
+        db_hits += node.get('dbHits') or 0
+        if operator not in operators:
+            operators.append(operator)
+        if operator.startswith(FULL_SCAN_OPERATORS):
+            full_scans.append({"operator": operator, "details": args.get('Details'),
+                               "rows": node.get('rows'), "estimated_rows": args.get('EstimatedRows')})
+        stack.extend(node.get('children') or [])
+    return {
+        "profiled": 'dbHits' in plan,
+        "db_hits": db_hits if 'dbHits' in plan else None,
+        "rows": plan.get('rows'),
+        "estimated_rows": (plan.get('args') or {}).get('EstimatedRows'),
+        "operators": operators,
+        "full_scans": full_scans,
+    }
+
+
+class DiskRingBuffer:
+    """Tampon circulaire de `slots` entrées JSON dans un fichier de taille fixe.
+
+    En-tête : signature, nombre et taille des cases, numéro de la prochaine
+    écriture. Les processus se coordonnent par un verrou fcntl sur le
+    fichier ; une entrée trop grande pour sa case est tronquée (plan retiré).
+    """
+    MAGIC = b'SQRB'
+    HEADER = struct.Struct('<4sIIQ')
+
+    def __init__(self, path, slots=1000, slot_size=4096):
+        self.path = path
+        self.slots = slots
+        self.slot_size = slot_size
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        return os.fdopen(fd, 'r+b')
+
+    def _header(self, f):
+        f.seek(0)
+        raw = f.read(self.HEADER.size)
+        if len(raw) == self.HEADER.size:
+            magic, slots, slot_size, written = self.HEADER.unpack(raw)
+            if magic == self.MAGIC and slots == self.slots and slot_size == self.slot_size:
+                return written
+        # Fichier neuf ou géométrie modifiée : on repart d'un tampon vide
+        f.seek(0)
+        f.truncate()
+        f.write(self.HEADER.pack(self.MAGIC, self.slots, self.slot_size, 0))
+        return 0
+
+    def _encode(self, entry):
+        # Trop grande pour la case : on retire d'abord le plan, puis les paramètres et l'erreur
+        for dropped in ((), ('plan',), ('plan', 'params', 'error')):
+            reduced = dict(entry, **{key: None for key in dropped}, truncated=True) if dropped else entry
+            payload = json.dumps(reduced, default=str).encode('utf-8')
+            if len(payload) + 4 <= self.slot_size:
+                break
+        else:
+            payload = b'{}'
+        return struct.pack('<I', len(payload)) + payload.ljust(self.slot_size - 4, b'\0')
+
+    def append(self, entry):
+        with self._open() as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            written = self._header(f)
+            f.seek(self.HEADER.size + (written % self.slots) * self.slot_size)
+            f.write(self._encode(entry))
+            f.seek(0)
+            f.write(self.HEADER.pack(self.MAGIC, self.slots, self.slot_size, written + 1))
+
+    def read(self):
+        """Entrées présentes, de la plus ancienne à la plus récente"""
+        if not os.path.exists(self.path):
+            return []
+        with self._open() as f:
+            fcntl.flock(f, fcntl.LOCK_SH)
+            written = self._header(f)
+            first = max(0, written - self.slots)
+            entries = []
+            for number in range(first, written):
+                f.seek(self.HEADER.size + (number % self.slots) * self.slot_size)
+                length, = struct.unpack('<I', f.read(4))
+                try:
+                    entries.append(json.loads(f.read(length)))
+                except ValueError:
+                    continue
+            return entries
+
+
+class SlowQueryLog:
+    """Journalise les requêtes lentes et capture un échantillon de leurs plans"""
+
+    def __init__(self, threshold_ms, profile_sample, profile_cooldown, ring):
+        # 0 désactive le journal
+        self.threshold = threshold_ms / 1000 if threshold_ms > 0 else float('inf')
+        self.profile_sample = profile_sample
+        self.profile_cooldown = profile_cooldown
+        self.ring = ring
+        self._last_profiled = {}
+        self._lock = threading.Lock()
+
+    def record(self, query, params, seconds, rows=0, error=None, profiler=None):
+        """Appelé pour toute requête au-delà du seuil ; `profiler(query, params)` retourne le plan"""
+        entry = {
+            "query": query_name(query),
+            "at": time.time(),
+            "duration_ms": round(seconds * 1000, 3),
+            "rows": rows,
+            "params": redact(params),
+            "error": error,
+            "pid": os.getpid(),
+        }
+        logger.warning("Requête lente: %s", json.dumps(entry, default=str, ensure_ascii=False))
+
+        if profiler is not None and self._should_profile(entry["query"]):
+            threading.Thread(target=self._profile_and_store, args=(entry, profiler, query, params),
+                             daemon=True).start()
+        else:
+            self._store(entry)
+
+    def reset_after_fork(self):
+        self._lock = threading.Lock()
+        self._last_profiled = {}
+
+    def _should_profile(self, name):
+        if self.profile_sample <= 0 or random.random() >= self.profile_sample:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_profiled.get(name)
+            if last is not None and now - last < self.profile_cooldown:
+                return False
+            self._last_profiled[name] = now
+        return True
+
+    def _profile_and_store(self, entry, profiler, query, params):
+        try:
+            entry["plan"] = summarize_plan(profiler(query, params))
+        except Exception as e:
+            entry["plan_error"] = str(e)
+        self._store(entry)
+
+    def _store(self, entry):
+        try:
+            self.ring.append(entry)
+        except OSError as e:
+            print(f"Erreur lors de l'écriture du journal des requêtes lentes: {e}")
+
+    def worst_offenders(self, limit=20):
+        """Requêtes lentes regroupées par constante, de la pire durée à la moins pire.
+
+        Chaque groupe porte le dernier résumé de plan capturé.
+        """
+        groups = {}
+        for entry in self.ring.read():
+            if 'query' not in entry:
+                continue
+            group = groups.setdefault(entry['query'], {
+                "query": entry['query'], "count": 0, "errors": 0, "max_ms": 0.0, "total_ms": 0.0,
+                "max_rows": 0, "last_at": None, "last_params": None, "plan": None, "plan_at": None,
+            })
+            group["count"] += 1
+            group["errors"] += 1 if entry.get('error') else 0
+            group["max_ms"] = max(group["max_ms"], entry['duration_ms'])
+            group["total_ms"] += entry['duration_ms']
+            group["max_rows"] = max(group["max_rows"], entry.get('rows') or 0)
+            group["last_at"], group["last_params"] = entry['at'], entry.get('params')
+            if entry.get('plan'):
+                group["plan"], group["plan_at"] = entry['plan'], entry['at']
+
+        offenders = sorted(groups.values(), key=lambda group: group["max_ms"], reverse=True)[:limit]
+        for group in offenders:
+            group["avg_ms"] = round(group.pop("total_ms") / group["count"], 3)
+        return offenders
+
+    def stats(self):
+        return {
+            "threshold_ms": None if self.threshold == float('inf') else self.threshold * 1000,
+            "profile_sample": self.profile_sample,
+            "profile_cooldown_s": self.profile_cooldown,
+            "path": self.ring.path,
+            "capacity": self.ring.slots,
+        }
+
+
+slow_query_log = SlowQueryLog(SLOW_QUERY_THRESHOLD_MS, SLOW_QUERY_PROFILE_SAMPLE,
+                              SLOW_QUERY_PROFILE_COOLDOWN,
+                              DiskRingBuffer(SLOW_QUERY_LOG_PATH, slots=SLOW_QUERY_RING_SIZE))
+
+# Verrou et délais de capture propres à chaque worker
+os.register_at_fork(after_in_child=slow_query_log.reset_after_fork)
@@ -0,0 +1,40 @@
+import itertools
+from flask import Response
+from services.json_codec import ndjson_line
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def wants_ndjson(req):
+    """Indique si le client demande un flux NDJSON (Accept ou ?stream=1)"""
+    if req.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return True
+    best = req.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+
+def ndjson_response(rows):
+    """Construit une réponse chunkée qui écrit une ligne JSON par élément.
+
+    `rows` est un itérable paresseux : chaque ligne est encodée et envoyée
+    dès qu'elle arrive, la mémoire du worker reste donc constante. Le premier
+    élément est lu avant de répondre : un refus du contrôle d'admission
+    (services/admission.py) donne encore un 503, pas un flux interrompu.
+    """
+    rows = iter(rows)
+    first = list(itertools.islice(rows, 1))
+
+    def generate():
+        try:
+            for row in itertools.chain(first, rows):
+                yield ndjson_line(row)
+        finally:
+            # Client parti avant la fin : la lecture (et sa place d'admission) est libérée
+            close = getattr(rows, 'close', None)
+            if close is not None:
+                close()
+
+    response = Response(generate(), mimetype=NDJSON_MIMETYPE)
+    # Empêche un reverse proxy (nginx) de bufferiser tout le flux
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,52 @@
+"""Fixtures communes des tests.
+
+Les modèles et les routes sont servis par le graphe en mémoire des mesures
+(benchmarks/memory_graph.py), qui exécute les mêmes requêtes nommées que
+Neo4j : aucune base n'est nécessaire.
+"""
+import pytest
+from benchmarks.memory_graph import MemoryGraph, install, install_async
+from benchmarks.social_graph import generate, seed, SCALES
+from services.cache import user_cache, user_email_cache, post_cache, timeline_cache, author_posts_cache
+
+CACHES = (user_cache, user_email_cache, post_cache, timeline_cache, author_posts_cache)
+
+
+@pytest.fixture(scope='session')
+def dataset():
+    return generate(**SCALES['tiny'], seed=1)
+
+
+@pytest.fixture
+def graph(dataset):
+    """Graphe en mémoire chargé avec le jeu de données, servi par get_db() et get_async_db()"""
+    # Les caches sont globaux au processus : rien ne doit survivre d'un graphe à l'autre
+    for cache in CACHES:
+        cache.clear()
+    graph = MemoryGraph()
+    seed(graph, dataset)
+    install(graph)
+    install_async(graph)
+    yield graph
+    for cache in CACHES:
+        cache.clear()
+
+
+@pytest.fixture
+def client(graph):
+    """Client de test de l'application Flask"""
+    from app import app
+    app.config['TESTING'] = True
+    return app.test_client()
+
+
+@pytest.fixture
+def post_id(dataset, graph):
+    return dataset['posts'][0]['id']
+
+
+@pytest.fixture
+def user_id(graph):
+    """Nouvel utilisateur : aucun like, aucune amitié"""
+    from models.user import User
+    return User("Test", "test@example.com").save().id
@@ -0,0 +1,186 @@
+"""Contrôle d'admission des requêtes Neo4j : file, priorités, éviction et 503"""
+import asyncio
+import threading
+import time
+import pytest
+from services.admission import AdmissionController, OverloadedError, POINT, SCAN, query_priority
+from models import queries
+
+
+def controller(limit=1, queue_size=2, timeout=2.0, scan_share=1.0):
+    return AdmissionController('test', limit, queue_size, timeout, scan_share=scan_share, retry_after=3)
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition jamais atteinte"
+        time.sleep(0.005)
+
+
+class Waiter(threading.Thread):
+    """Demande une place dans un thread et note le résultat (admis ou raison du refus)"""
+
+    def __init__(self, admission, priority):
+        super().__init__(daemon=True)
+        self.admission = admission
+        self.priority = priority
+        self.outcome = None
+
+    def run(self):
+        try:
+            self.admission.acquire(self.priority)
+            self.outcome = 'admitted'
+        except OverloadedError as error:
+            self.outcome = error.reason
+
+
+def queued(admission, count):
+    wait_for(lambda: admission.stats()['queue_depth'] == count)
+
+
+def test_query_priority():
+    assert query_priority(queries.POST_FIND_BY_ID) == POINT
+    assert query_priority(queries.POST_FIND_MANY) == POINT
+    assert query_priority(queries.POST_PAGE[0]) == SCAN
+    assert query_priority(queries.POST_SEARCH[0]) == SCAN
+
+
+def test_admits_up_to_the_limit_then_queues():
+    admission = controller(limit=2)
+    admission.acquire(SCAN)
+    admission.acquire(SCAN)
+    waiter = Waiter(admission, SCAN)
+    waiter.start()
+    queued(admission, 1)
+    assert admission.stats()['in_flight'] == 2
+
+    admission.release(SCAN)
+    waiter.join(1)
+    assert waiter.outcome == 'admitted'
+    assert admission.stats()['in_flight'] == 2
+    assert admission.stats()['queued'] == 1
+
+
+def test_queue_timeout():
+    admission = controller(timeout=0.05)
+    admission.acquire(POINT)
+    with pytest.raises(OverloadedError) as error:
+        admission.acquire(POINT)
+    assert error.value.reason == 'timeout'
+    assert error.value.retry_after == 3
+    assert admission.stats()['queue_depth'] == 0
+    assert admission.stats()['rejected'] == {'timeout': 1}
+
+
+def test_queue_full():
+    admission = controller(queue_size=1)
+    admission.acquire(POINT)
+    waiter = Waiter(admission, POINT)
+    waiter.start()
+    queued(admission, 1)
+    with pytest.raises(OverloadedError) as error:
+        admission.acquire(SCAN)
+    assert error.value.reason == 'queue_full'
+    admission.release(POINT)
+    waiter.join(1)
+    assert waiter.outcome == 'admitted'
+
+
+def test_point_lookup_evicts_a_queued_scan():
+    admission = controller(queue_size=1)
+    admission.acquire(SCAN)
+    scan = Waiter(admission, SCAN)
+    scan.start()
+    queued(admission, 1)
+
+    point = Waiter(admission, POINT)
+    point.start()
+    scan.join(1)
+    assert scan.outcome == 'evicted'
+    queued(admission, 1)
+
+    admission.release(SCAN)
+    point.join(1)
+    assert point.outcome == 'admitted'
+    assert admission.stats()['rejected'] == {'evicted': 1}
+
+
+def test_point_lookups_leave_the_queue_first():
+    admission = controller(queue_size=4)
+    admission.acquire(SCAN)
+    scan = Waiter(admission, SCAN)
+    scan.start()
+    queued(admission, 1)
+    point = Waiter(admission, POINT)
+    point.start()
+    queued(admission, 2)
+
+    admission.release(SCAN)
+    point.join(1)
+    assert point.outcome == 'admitted'
+    assert scan.outcome is None
+    admission.release(POINT)
+    scan.join(1)
+    assert scan.outcome == 'admitted'
+
+
+def test_scans_keep_room_for_point_lookups():
+    admission = controller(limit=4, scan_share=0.5)
+    admission.acquire(SCAN)
+    admission.acquire(SCAN)
+    scan = Waiter(admission, SCAN)
+    scan.start()
+    queued(admission, 1)
+    # Le parcours attend, mais une lecture ponctuelle passe devant lui
+    admission.acquire(POINT)
+    assert admission.stats()['scans_in_flight'] == 2
+    admission.release(SCAN)
+    scan.join(1)
+    assert scan.outcome == 'admitted'
+
+
+def test_async_acquire_and_cancellation():
+    admission = controller()
+
+    async def scenario():
+        await admission.acquire_async(POINT)
+        waiting = asyncio.ensure_future(admission.acquire_async(POINT))
+        await asyncio.sleep(0.01)
+        assert admission.stats()['queue_depth'] == 1
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert admission.stats()['queue_depth'] == 0
+        admission.release(POINT)
+        async with admission.slot_async(SCAN):
+            assert admission.stats()['in_flight'] == 1
+
+    asyncio.run(scenario())
+    assert admission.stats()['in_flight'] == 0
+
+
+def test_disabled_controller_never_waits():
+    admission = AdmissionController('test', 1, 0, 0.01, enabled=False)
+    with admission.slot(SCAN), admission.slot(SCAN):
+        pass
+
+
+def test_refusal_answers_503(client, graph):
+    """Un refus, même intercepté par la route, devient un 503 avec Retry-After"""
+    admission = controller(timeout=0.01)
+    admission.acquire(SCAN)
+    run = graph.run
+
+    def saturated(query, parameters=None, **kwargs):
+        with admission.slot(query_priority(query)):
+            return run(query, parameters, **kwargs)
+
+    graph.run = saturated
+    response = client.get('/posts')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '3'
+    assert response.json['success'] is False
+
+    graph.run = run
+    assert client.get('/posts').status_code == 200
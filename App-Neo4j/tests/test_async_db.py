@@ -0,0 +1,44 @@
+"""Driver asynchrone lié à une boucle d'événements (aio/db.py)"""
+import asyncio
+import logging
+import threading
+from aio.db import AsyncDatabaseService
+
+
+async def current_driver(service):
+    return service.driver
+
+
+def test_driver_of_a_stopped_loop_is_dropped_with_a_warning(caplog):
+    service = AsyncDatabaseService()
+    first = asyncio.run(current_driver(service))
+    with caplog.at_level(logging.WARNING, logger='aio.db'):
+        second = asyncio.run(current_driver(service))
+    assert second is not first
+    assert [record.levelno for record in caplog.records] == [logging.WARNING]
+    asyncio.run(service.close())
+
+
+def test_driver_of_a_running_loop_is_closed_in_that_loop():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        service = AsyncDatabaseService()
+        first = asyncio.run_coroutine_threadsafe(current_driver(service), loop).result(5)
+        closed = threading.Event()
+        close = first.close
+
+        async def tracked_close():
+            await close()
+            closed.set()
+
+        first.close = tracked_close
+        second = asyncio.run(current_driver(service))
+        assert second is not first
+        assert closed.wait(5)
+        asyncio.run(service.close())
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+        loop.close()
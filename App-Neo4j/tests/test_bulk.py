@@ -0,0 +1,24 @@
+"""Écritures en masse (UNWIND par lots)"""
+from models.user import User
+
+
+def test_bulk_befriend_rows_rejects_self_friendship():
+    reports, rows = User.bulk_befriend_rows([
+        {"user_id": "a", "friend_id": "a"},
+        {"user_id": "a", "friend_id": "b"},
+        {"user_id": "b", "friend_id": "a"},
+    ])
+    assert reports[0]['error'] == "Un utilisateur ne peut pas être ami avec lui-même"
+    assert reports[1] is None
+    assert reports[2]['error'] == "Amitié en double dans la requête"
+    assert [row['idx'] for row in rows] == [1]
+
+
+def test_bulk_friendships_route(client, graph, dataset):
+    first, second = dataset['users'][0]['id'], dataset['users'][1]['id']
+    response = client.post('/friendships/bulk', json=[{"user_id": first, "friend_id": first},
+                                                      {"user_id": first, "friend_id": second}])
+    assert response.status_code == 207
+    assert [result['success'] for result in response.json['data']['results']] == [False, True]
+    assert first not in graph.friends.get(first, ())
+    assert second in graph.friends[first]
@@ -0,0 +1,120 @@
+"""Cache LRU des lectures par clé et son invalidation"""
+from services.cache import LRUCache
+
+
+def make_cache(**kwargs):
+    options = dict(max_size=3, ttl=60, negative_ttl=60)
+    options.update(kwargs)
+    return LRUCache('test', **options)
+
+
+class Loader:
+    """Chargeur qui compte ses appels"""
+
+    def __init__(self, value=None):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+def is_cached(cache, key):
+    """Vrai si la clé est servie sans chargement (une absence est mise en cache négatif)"""
+    loader = Loader()
+    cache.get_or_load(key, loader)
+    return loader.calls == 0
+
+
+def test_read_through_and_invalidation():
+    cache = make_cache()
+    loader = Loader({"value": 1})
+    assert cache.get_or_load('a', loader) == {"value": 1}
+    assert cache.get_or_load('a', loader) == {"value": 1}
+    assert loader.calls == 1
+    cache.invalidate('a')
+    cache.get_or_load('a', loader)
+    assert loader.calls == 2
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_negative_entries():
+    cache = make_cache()
+    loader = Loader()
+    assert cache.get_or_load('absent', loader) is None
+    assert cache.get_or_load('absent', loader) is None
+    assert loader.calls == 1
+    cache.invalidate('absent')
+    assert not is_cached(cache, 'absent')
+
+
+def test_lru_eviction():
+    cache = make_cache()
+    for key in 'abc':
+        cache.get_or_load(key, Loader(key))
+    cache.get_or_load('a', Loader('a'))
+    cache.get_or_load('d', Loader('d'))
+    assert cache.stats()['evictions'] == 1
+    assert is_cached(cache, 'a')
+    assert not is_cached(cache, 'b')
+
+
+def test_load_racing_with_its_invalidation_is_not_stored():
+    cache = make_cache()
+
+    def loader():
+        cache.invalidate('a')
+        return 'stale'
+
+    assert cache.get_or_load('a', loader) == 'stale'
+    assert not is_cached(cache, 'a')
+
+
+def test_invalidating_another_key_keeps_the_load():
+    cache = make_cache()
+    other = next(key for key in (f'key-{n}' for n in range(1000)) if cache._shard(key) != cache._shard('a'))
+
+    def loader():
+        cache.invalidate(other)
+        return 'fresh'
+
+    cache.get_or_load('a', loader)
+    assert is_cached(cache, 'a')
+
+
+def test_get_many_or_load():
+    cache = make_cache(max_size=10)
+    cache.get_or_load('a', Loader('cached'))
+    requested = []
+
+    def loader(keys):
+        requested.extend(keys)
+        return {'b': 'loaded'}
+
+    assert cache.get_many_or_load(['a', 'b', 'c'], loader) == {'a': 'cached', 'b': 'loaded'}
+    assert requested == ['b', 'c']
+    assert is_cached(cache, 'c')
+
+
+def test_remote_invalidation_is_filtered_by_cache_name():
+    cache = make_cache()
+    cache.get_or_load('a', Loader('a'))
+    cache._on_remote_invalidation('autre', ['a'])
+    assert is_cached(cache, 'a')
+    cache._on_remote_invalidation('test', ['a'])
+    assert not is_cached(cache, 'a')
+
+
+def test_disabled_cache_always_loads():
+    cache = make_cache(enabled=False)
+    loader = Loader(1)
+    cache.get_or_load('a', loader)
+    cache.get_or_load('a', loader)
+    assert loader.calls == 2
+
+
+def test_post_update_invalidates_post_cache(client, post_id):
+    assert client.get(f'/posts/{post_id}').status_code == 200
+    assert client.put(f'/posts/{post_id}', json={"title": "Nouveau titre"}).status_code == 200
+    assert client.get(f'/posts/{post_id}').json['data']['title'] == "Nouveau titre"
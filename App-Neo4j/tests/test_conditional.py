@@ -0,0 +1,76 @@
+"""Requêtes conditionnelles : ETag, Last-Modified et 304"""
+from email.utils import formatdate
+from services.conditional import Version, version_from, is_not_modified
+
+
+def test_version_depends_on_revision_and_variant():
+    row = {"revision": 1, "updated_at": 1700000000.5}
+    version = version_from('post', 'p1', row)
+    assert version.etag.startswith('W/"')
+    assert version.last_modified == 1700000000.5
+    assert version_from('post', 'p1', dict(row, revision=2)).etag != version.etag
+    assert version_from('post', 'p1', row, 'id,title').etag != version.etag
+    assert version_from('post', 'p1', row).etag == version.etag
+
+
+def test_is_not_modified():
+    version = Version('W/"abc"', 1700000000.5)
+    assert is_not_modified({'If-None-Match': 'W/"abc"'}, version)
+    assert is_not_modified({'If-None-Match': '"abc"'}, version)
+    assert is_not_modified({'If-None-Match': '"x", W/"abc"'}, version)
+    assert is_not_modified({'If-None-Match': '*'}, version)
+    assert not is_not_modified({'If-None-Match': '"x"'}, version)
+    assert not is_not_modified({}, version)
+    assert is_not_modified({'If-Modified-Since': formatdate(1700000000, usegmt=True)}, version)
+    assert not is_not_modified({'If-Modified-Since': formatdate(1699999999, usegmt=True)}, version)
+    assert not is_not_modified({'If-Modified-Since': 'hier'}, version)
+    # If-None-Match l'emporte sur If-Modified-Since
+    assert not is_not_modified({'If-None-Match': '"x"',
+                                'If-Modified-Since': formatdate(1700000000, usegmt=True)}, version)
+
+
+def test_post_etag_and_304(client, post_id, user_id):
+    response = client.get(f'/posts/{post_id}')
+    etag = response.headers['ETag']
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert 'Last-Modified' in response.headers
+
+    not_modified = client.get(f'/posts/{post_id}', headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers['ETag'] == etag
+    assert not_modified.get_data() == b''
+
+    # Un like change le compteur du post, donc sa version
+    client.post(f'/posts/{post_id}/like', json={"user_id": user_id})
+    response = client.get(f'/posts/{post_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_projection_has_its_own_etag(client, post_id):
+    full = client.get(f'/posts/{post_id}').headers['ETag']
+    projected = client.get(f'/posts/{post_id}?fields=id,title')
+    assert projected.status_code == 200
+    assert projected.headers['ETag'] != full
+    assert client.get(f'/posts/{post_id}?fields=id,title',
+                      headers={'If-None-Match': full}).status_code == 200
+
+
+def test_include_is_not_conditional(client, post_id):
+    response = client.get(f'/posts/{post_id}?include=author')
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
+
+
+def test_user_etag_changes_on_update(client, user_id):
+    etag = client.get(f'/users/{user_id}').headers['ETag']
+    assert client.get(f'/users/{user_id}', headers={'If-None-Match': etag}).status_code == 304
+    assert client.put(f'/users/{user_id}', json={"name": "Autre"}).status_code == 200
+    response = client.get(f'/users/{user_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.json['data']['name'] == "Autre"
+
+
+def test_unknown_resource_is_not_found(client):
+    assert client.get('/posts/inconnu', headers={'If-None-Match': '*'}).status_code == 404
+    assert client.get('/comments/inconnu').status_code == 404
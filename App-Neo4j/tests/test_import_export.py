@@ -0,0 +1,58 @@
+"""Aller-retour export (services/exporter.py) puis import (services/importer.py)"""
+import gzip
+import hashlib
+import os
+import pytest
+from benchmarks.memory_graph import MemoryGraph
+from models.comment import Comment
+from services.exporter import export_graph, InvalidExportError
+from services.importer import Importer, KINDS
+
+
+def concatenate(manifest, source, target, dataset, compression=None):
+    """Réunit les tranches exportées d'un type en un fichier NDJSON importable"""
+    with open(os.path.join(target, dataset + '.ndjson'), 'wb') as out:
+        for part in manifest['files'][dataset]['parts']:
+            path = os.path.join(source, part['path'])
+            with (gzip.open(path) if compression == 'gzip' else open(path, 'rb')) as f:
+                out.write(f.read())
+
+
+@pytest.mark.parametrize('compression', [None, 'gzip'])
+def test_round_trip(graph, dataset, tmp_path, compression):
+    parent = dataset['comments'][0]
+    Comment("réponse", parent['author_id'], parent['post_id'], parent_id=parent['id']).save()
+
+    exported = str(tmp_path / 'export')
+    manifest = export_graph(graph, exported, compression=compression, shards=3, workers=2)
+    assert manifest['consistent']
+    assert os.path.exists(os.path.join(exported, 'manifest.json'))
+    assert manifest['files']['users']['rows'] == len(graph.users)
+    assert manifest['files']['comments']['rows'] == len(graph.comments)
+    for part in manifest['files']['posts']['parts']:
+        with open(os.path.join(exported, part['path']), 'rb') as f:
+            assert hashlib.sha256(f.read()).hexdigest() == part['sha256']
+
+    source = tmp_path / 'import'
+    source.mkdir()
+    for kind in KINDS:
+        concatenate(manifest, exported, str(source), kind.name, compression)
+    copy = MemoryGraph()
+    report = Importer(copy, str(source), workers=2, partitions=2).run()
+    assert all(not file_report['errors'] for file_report in report['files'].values())
+
+    assert copy.users.keys() == graph.users.keys()
+    assert copy.posts.keys() == graph.posts.keys()
+    assert copy.comments.keys() == graph.comments.keys()
+    assert {frozenset(edge) for edge in copy.edges} == {frozenset(edge) for edge in graph.edges}
+    assert copy.author_of == graph.author_of
+    for post_id, post in graph.posts.items():
+        assert copy.posts[post_id]['likes_count'] == post['likes_count']
+        assert copy.posts[post_id]['comments_count'] == post['comments_count']
+    for comment_id, comment in graph.comments.items():
+        assert copy.comments[comment_id]['parent_id'] == comment.get('parent_id')
+
+
+def test_unknown_format(graph, tmp_path):
+    with pytest.raises(InvalidExportError):
+        export_graph(graph, str(tmp_path), fmt='xml')
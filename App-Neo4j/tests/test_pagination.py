@@ -0,0 +1,56 @@
+"""Curseurs de pagination keyset"""
+import pytest
+from services.pagination import (encode_cursor, decode_cursor, parse_page_args, build_page,
+                                 InvalidCursorError)
+from config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(1700000000.25, 'post-1')
+    assert '=' not in cursor
+    assert decode_cursor(cursor) == (1700000000.25, 'post-1')
+
+
+@pytest.mark.parametrize('cursor', ['', '!!!', 'bm90IGpzb24', encode_cursor('hier', 'a'),
+                                    encode_cursor(1.0, 2)])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
+
+
+def test_parse_page_args():
+    assert parse_page_args({}) == (PAGE_SIZE_DEFAULT, None)
+    assert parse_page_args({'limit': '0'})[0] == 1
+    assert parse_page_args({'limit': str(PAGE_SIZE_MAX + 1)})[0] == PAGE_SIZE_MAX
+    assert parse_page_args({'limit': '5', 'after': encode_cursor(2.0, 'b')}) == (5, (2.0, 'b'))
+    with pytest.raises(InvalidCursorError):
+        parse_page_args({'limit': 'dix'})
+
+
+def test_build_page():
+    items = [{"id": str(n), "created_at": 10 - n, "score": n} for n in range(3)]
+    assert build_page(items, 3) == (items, None)
+    page, cursor = build_page(items, 2)
+    assert page == items[:2]
+    assert decode_cursor(cursor) == (9, '1')
+    assert decode_cursor(build_page(items, 2, 'score')[1]) == (1, '1')
+
+
+@pytest.mark.parametrize('url', ['/posts?after=!!!', '/posts?limit=dix', '/users?after=!!!',
+                                 '/comments?after=!!!', '/posts/search?q=neo4j&after=!!!'])
+def test_invalid_cursor_is_a_bad_request(client, url):
+    response = client.get(url)
+    assert response.status_code == 400
+    assert response.json['success'] is False
+
+
+def test_pages_cover_all_posts_once(client, graph):
+    seen, cursor = [], None
+    while True:
+        response = client.get('/posts?limit=50' + (f'&after={cursor}' if cursor else ''))
+        assert response.status_code == 200
+        seen.extend(post['id'] for post in response.json['data'])
+        cursor = response.json['next_cursor']
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == len(graph.posts)
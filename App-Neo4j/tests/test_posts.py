@@ -0,0 +1,28 @@
+"""Lectures et suppressions de posts"""
+
+
+def test_delete_post_removes_its_comments(client, graph, post_id, user_id):
+    root = client.post(f'/posts/{post_id}/comments', json={"content": "a", "user_id": user_id}).json['data']
+    reply = client.post(f'/posts/{post_id}/comments',
+                        json={"content": "b", "user_id": user_id, "parent_id": root['id']}).json['data']
+
+    assert client.delete(f'/posts/{post_id}').status_code == 200
+    assert client.get(f'/posts/{post_id}').status_code == 404
+    assert client.get(f"/comments/{root['id']}").status_code == 404
+    assert client.get(f"/comments/{reply['id']}").status_code == 404
+    assert all(comment['post_id'] != post_id for comment in graph.comments.values())
+    assert client.delete(f'/posts/{post_id}').status_code == 404
+
+
+def test_posts_of_deleted_author_stay_readable(client, graph, post_id):
+    author_id = graph.author_of[post_id]
+    assert client.delete(f'/users/{author_id}').status_code == 200
+
+    response = client.get(f'/posts/{post_id}')
+    assert response.status_code == 200
+    assert response.json['data']['author_id'] is None
+    assert client.get(f'/posts/{post_id}', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+    response = client.get(f'/posts?ids={post_id},inconnu')
+    assert list(response.json['data']) == [post_id]
+    assert response.json['missing'] == ['inconnu']
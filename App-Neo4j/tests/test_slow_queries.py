@@ -0,0 +1,15 @@
+"""Journal des requêtes lentes"""
+import logging
+from models import queries
+from services.slow_queries import SlowQueryLog
+
+
+def test_slow_query_is_logged_at_warning(caplog):
+    ring = []  # Seule append() du tampon circulaire est utilisée ici
+    log = SlowQueryLog(threshold_ms=10, profile_sample=0, profile_cooldown=60, ring=ring)
+    with caplog.at_level(logging.WARNING, logger='services.slow_queries'):
+        log.record(queries.POST_FIND_BY_ID, {"id": "p1"}, 0.5, rows=1)
+
+    assert [record.levelno for record in caplog.records] == [logging.WARNING]
+    assert 'POST_FIND_BY_ID' in caplog.records[0].getMessage()
+    assert ring[0]["query"] == 'POST_FIND_BY_ID' and ring[0]["params"] == {"id": "p1"}
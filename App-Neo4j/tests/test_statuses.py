@@ -0,0 +1,139 @@
+"""Statuts des écritures en une requête et leur traduction HTTP"""
+import pytest
+from models import queries
+from models.comment import Comment
+from models.post import Post
+from models.user import User
+
+
+def returned(query, *values):
+    """Ligne de résultat avec les colonnes de la clause RETURN finale de la requête"""
+    clause = query.rsplit('RETURN', 1)[1]
+    columns = [column.rsplit(' AS ', 1)[-1].strip() for column in clause.split(',')]
+    assert len(columns) == len(values)
+    return dict(zip(columns, values))
+
+
+@pytest.mark.parametrize('values, status', [
+    ((False, True, False), 'post_not_found'),
+    ((True, False, False), 'user_not_found'),
+    ((True, True, True), 'already_exists'),
+    ((True, True, False), 'ok'),
+])
+def test_post_like_status(values, status):
+    assert Post.like_status(returned(queries.POST_LIKE, *values)) == status
+
+
+@pytest.mark.parametrize('values, status', [
+    ((False, True, False), 'post_not_found'),
+    ((True, False, False), 'user_not_found'),
+    ((True, True, False), 'relation_not_found'),
+    ((True, True, True), 'ok'),
+])
+def test_post_unlike_status(values, status):
+    assert Post.unlike_status(returned(queries.POST_UNLIKE, *values)) == status
+
+
+@pytest.mark.parametrize('values, status', [
+    ((False, True, False), 'comment_not_found'),
+    ((True, False, False), 'user_not_found'),
+    ((True, True, True), 'already_exists'),
+    ((True, True, False), 'ok'),
+])
+def test_comment_like_status(values, status):
+    assert Comment.like_status(returned(queries.COMMENT_LIKE, *values)) == status
+
+
+@pytest.mark.parametrize('values, status', [
+    ((False, True, False), 'comment_not_found'),
+    ((True, False, False), 'user_not_found'),
+    ((True, True, False), 'relation_not_found'),
+    ((True, True, True), 'ok'),
+])
+def test_comment_unlike_status(values, status):
+    # Seules les colonnes de COMMENT_UNLIKE : pas de parent_found
+    assert Comment.unlike_status(returned(queries.COMMENT_UNLIKE, *values)) == status
+
+
+@pytest.mark.parametrize('result, status', [
+    ({"post_found": False, "user_found": True, "parent_found": True}, 'post_not_found'),
+    ({"post_found": True, "user_found": False, "parent_found": True}, 'user_not_found'),
+    ({"post_found": True, "user_found": True, "parent_found": False}, 'parent_not_found'),
+    ({"post_found": True, "user_found": True, "parent_found": True}, 'ok'),
+])
+def test_comment_save_status(result, status):
+    assert Comment.save_status(result) == status
+
+
+@pytest.mark.parametrize('values, status', [
+    ((False, True, False), 'user_not_found'),
+    ((True, False, False), 'friend_not_found'),
+    ((True, True, True), 'already_exists'),
+    ((True, True, False), 'ok'),
+])
+def test_befriend_status(values, status):
+    assert User.befriend_status(returned(queries.USER_BEFRIEND, *values)) == status
+
+
+@pytest.mark.parametrize('values, status', [
+    ((False, True, False), 'user_not_found'),
+    ((True, False, False), 'friend_not_found'),
+    ((True, True, False), 'relation_not_found'),
+    ((True, True, True), 'ok'),
+])
+def test_unfriend_status(values, status):
+    assert User.unfriend_status(returned(queries.USER_UNFRIEND, *values)) == status
+
+
+def test_post_like_routes(client, post_id, user_id):
+    url = f'/posts/{post_id}/like'
+    assert client.post(url, json={}).status_code == 400
+    assert client.post('/posts/inconnu/like', json={"user_id": user_id}).status_code == 404
+    assert client.post(url, json={"user_id": "inconnu"}).status_code == 404
+    # Un like en double ou un unlike sans like réussissent sans rien changer
+    assert client.delete(url, json={"user_id": user_id}).status_code == 200
+    assert client.post(url, json={"user_id": user_id}).status_code == 201
+    assert client.post(url, json={"user_id": user_id}).status_code == 201
+    assert client.delete(url, json={"user_id": user_id}).status_code == 200
+    assert client.delete(url, json={"user_id": user_id}).status_code == 200
+
+
+def test_post_like_updates_counter(client, post_id, user_id):
+    before = client.get(f'/posts/{post_id}').json['data']['likes_count']
+    client.post(f'/posts/{post_id}/like', json={"user_id": user_id})
+    client.post(f'/posts/{post_id}/like', json={"user_id": user_id})
+    assert client.get(f'/posts/{post_id}').json['data']['likes_count'] == before + 1
+    client.delete(f'/posts/{post_id}/like', json={"user_id": user_id})
+    client.delete(f'/posts/{post_id}/like', json={"user_id": user_id})
+    assert client.get(f'/posts/{post_id}').json['data']['likes_count'] == before
+
+
+def test_comment_like_then_unlike(client, post_id, user_id):
+    created = client.post(f'/posts/{post_id}/comments', json={"content": "Bonjour", "user_id": user_id})
+    assert created.status_code == 201
+    url = f"/comments/{created.json['data']['id']}/like"
+
+    assert client.post(url, json={"user_id": user_id}).status_code == 201
+    assert client.post(url, json={"user_id": user_id}).status_code == 201
+    response = client.delete(url, json={"user_id": user_id})
+    assert response.status_code == 200, response.json
+    assert client.delete(url, json={"user_id": user_id}).status_code == 200
+    assert client.delete('/comments/inconnu/like', json={"user_id": user_id}).status_code == 404
+
+
+def test_reply_to_comment_of_another_post(client, dataset, user_id):
+    first, second = dataset['posts'][0]['id'], dataset['posts'][1]['id']
+    parent = client.post(f'/posts/{first}/comments', json={"content": "a", "user_id": user_id}).json['data']
+    response = client.post(f'/posts/{second}/comments',
+                           json={"content": "b", "user_id": user_id, "parent_id": parent['id']})
+    assert response.status_code == 404
+
+
+def test_friendship_routes(client, dataset, user_id):
+    url = f'/users/{user_id}/friends'
+    friend_id = dataset['users'][1]['id']
+    assert client.post(url, json={"friend_id": "inconnu"}).status_code == 404
+    assert client.post(url, json={"friend_id": friend_id}).status_code == 201
+    assert client.post(url, json={"friend_id": friend_id}).status_code == 409
+    assert client.delete(f'{url}/{friend_id}').status_code == 200
+    assert client.delete(f'{url}/{friend_id}').status_code == 404